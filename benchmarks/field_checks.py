@@ -0,0 +1,103 @@
+"""
+Débit des contrôles de format sur des résultats stockés.
+
+Sérialise N résultats d'extraction synthétiques (JSON des enregistrements du
+store), puis mesure en flux, par enregistrement :
+- la lecture seule du JSON brut (`json.loads`) ;
+- l'audit de `ResultStore.iter_field_warnings` : lecture brute puis `payload_warnings` ;
+- pour comparaison, une relecture Pydantic (`model_validate_json`) suivie des mêmes contrôles.
+
+L'écart entre les deux premières mesures est le coût des contrôles ; la lecture
+SQLite n'est pas comprise.
+
+Usage:
+    PYTHONPATH=src uv run python benchmarks/field_checks.py --documents 200000
+"""
+
+import argparse
+import json
+import time
+from pathlib import Path
+
+from chains.fake_model import sample_payload
+from chains.llm_chain import EXTRACTION_SPECS, RESULT_FIELDS
+from chains.schemas import ClassificationDocument, ResultatExtractionKYC, TypeDocument
+from chains.schemas.field_checks import field_warnings, payload_warnings
+
+
+def synthetic_payloads(count: int) -> list[str]:
+    """JSON de `count` résultats d'extraction réussis, tous types confondus, 1 sur 10 hors format."""
+    templates = []
+    for type_document in TypeDocument:
+        schema, _ = EXTRACTION_SPECS[type_document]
+        for bad in (False, True):
+            data = sample_payload(type_document)
+            if bad:
+                data = {
+                    **data,
+                    **{
+                        "nationalite": "France",
+                        "numero_permis": "12345",
+                        "code_postal": "750",
+                        "bic": "BNP",
+                    },
+                }
+                data = {k: v for k, v in data.items() if k in schema.model_fields}
+            result = ResultatExtractionKYC(
+                classification=ClassificationDocument(type_detecte=type_document, confiance=0.95),
+                extraction_reussie=True,
+                **{RESULT_FIELDS[type_document]: schema(**data)},
+            )
+            templates.append((result.model_dump_json(), bad))
+    good = [payload for payload, bad in templates if not bad]
+    bad = [payload for payload, bad in templates if bad]
+    return [bad[i // 10 % len(bad)] if i % 10 == 0 else good[i % len(good)] for i in range(count)]
+
+
+def _per_document_us(fn, payloads: list[str]) -> float:
+    """Durée moyenne (µs) de `fn` par enregistrement, en flux comme la lecture du store."""
+    start = time.perf_counter()
+    for payload in payloads:
+        fn(payload)
+    return round((time.perf_counter() - start) / len(payloads) * 1e6, 2)
+
+
+def _pydantic_warnings(payload: str) -> list[str]:
+    result = ResultatExtractionKYC.model_validate_json(payload)
+    type_document = result.classification.type_detecte
+    return field_warnings(type_document, vars(getattr(result, RESULT_FIELDS[type_document])))
+
+
+def measure(payloads: list[str]) -> dict:
+    """Coût par enregistrement (µs) de la lecture seule et des deux audits."""
+    read_us = _per_document_us(json.loads, payloads)
+    audit_us = _per_document_us(lambda payload: payload_warnings(json.loads(payload)), payloads)
+    return {
+        "documents": len(payloads),
+        "signales": sum(1 for payload in payloads if payload_warnings(json.loads(payload))),
+        "lecture_json_us": read_us,
+        "audit_json_us": audit_us,
+        "controles_us": round(audit_us - read_us, 2),
+        "audit_pydantic_us": _per_document_us(_pydantic_warnings, payloads),
+        "audit_docs_s": round(1e6 / audit_us),
+    }
+
+
+def main():
+    """Point d'entrée du benchmark."""
+    parser = argparse.ArgumentParser(description="Débit des contrôles de format")
+    parser.add_argument("--documents", type=int, default=100_000, help="Nombre de résultats")
+    parser.add_argument("--json", type=Path, help="Fichier où écrire les mesures (JSON)")
+    args = parser.parse_args()
+
+    report = measure(synthetic_payloads(args.documents))
+    for key, value in report.items():
+        print(f"{key:<20} {value}")
+
+    if args.json:
+        args.json.parent.mkdir(parents=True, exist_ok=True)
+        args.json.write_text(json.dumps(report, indent=2, ensure_ascii=False))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,255 @@
+"""
+Benchmark de précision et de latence sur un jeu de documents étiquetés (golden dataset).
+
+Chaque document du jeu a un type attendu et les valeurs attendues de son
+extraction (`CarteIdentite`, `Passeport`, `PermisConduire`, `JustificatifDomicile`
+ou `RIB`). Le benchmark rapporte, par type de document : précision de la
+classification, précision par champ, tokens, coût et latences p50/p95/p99. Le
+rapport JSON (clés triées) se compare d'une exécution à l'autre avec `diff` :
+par exemple avec et sans `--sans-couche-texte` pour mesurer le chemin rapide des
+PDF natifs (tokens, latence et précision), ou avec et sans `--sortie-compacte`
+pour les tokens de sortie et la latence de génération des extractions par type.
+
+Trois modes :
+- replay (défaut) : réponses rejouées depuis la cassette, hors ligne et sans coût ;
+- record : appels au modèle (`VAR_LLM_MODELE`, ou `--fake`) enregistrés dans la cassette ;
+- live : appels au modèle sans cassette.
+
+Deux versions de prompt (`VAR_KYC_PROMPTS`) se comparent en enregistrant puis en
+rejouant chacune avec sa propre cassette (`--cassette`).
+
+Usage:
+    PYTHONPATH=src uv run python benchmarks/golden.py --output data/golden.json
+    PYTHONPATH=src uv run python benchmarks/golden.py --mode record
+"""
+
+import argparse
+import json
+import os
+import sys
+import time
+from pathlib import Path
+from typing import Any
+
+from load_test import percentile
+
+from chains.cassette import Cassette, CassetteModel
+from chains.configuration import Configuration
+from chains.fake_model import FakeGenerativeModel
+from chains.llm_chain import RESULT_FIELDS, KYCDocumentChain
+from chains.model_registry import get_model_client
+from chains.schemas import ResultatExtractionKYC, TypeDocument
+
+GOLDEN_DIR = Path(__file__).parent / "golden"
+
+
+def _normalize(value: Any) -> Any:
+    if isinstance(value, str):
+        return " ".join(value.split()).casefold()
+    if isinstance(value, list):
+        return sorted(_normalize(item) for item in value)
+    return value
+
+
+def compare_fields(result: ResultatExtractionKYC, expected: dict[str, Any]) -> dict[str, bool]:
+    """
+    Compare les champs extraits aux valeurs attendues.
+
+    Les chaînes sont comparées sans casse ni espaces superflus, les listes sans ordre.
+
+    Returns:
+        Dictionnaire {champ: valeur correcte ?} (tous faux si le type détecté est faux)
+    """
+    extraction = None
+    if result.classification is not None:
+        extraction = getattr(result, RESULT_FIELDS[result.classification.type_detecte])
+    values = extraction.model_dump(mode="json") if extraction is not None else {}
+    return {
+        field: field in values and _normalize(values[field]) == _normalize(expected_value)
+        for field, expected_value in expected.items()
+    }
+
+
+def build_chain(config: Configuration, mode: str, cassette: Cassette, fake: bool):
+    """Chain du benchmark selon le mode (rejeu, enregistrement ou appels directs)."""
+    if mode == "replay":
+        return KYCDocumentChain(config, model=CassetteModel(cassette))
+    if fake:
+        model, generation_config, model_name = FakeGenerativeModel(seed=0), None, "fake"
+    else:
+        # Un seul modèle pour toutes les étapes : celui de `VAR_LLM_MODELE`
+        client = get_model_client(config)
+        model, generation_config, model_name = client.model, client.generation_config, config.model
+    if mode == "record":
+        model = CassetteModel(cassette, model, generation_config, model_name)
+    return KYCDocumentChain(config, model=model)
+
+
+def run(dataset_path: Path, chain: KYCDocumentChain) -> tuple[list[dict], dict[str, dict]]:
+    """
+    Traite chaque document du jeu et le note.
+
+    Returns:
+        Tuple (mesures par document, rapport par type attendu)
+    """
+    dataset = json.loads(dataset_path.read_text(encoding="utf-8"))
+    # Échauffement : le SDK Vertex AI (encodage des documents) est importé avant les mesures
+    import vertexai.generative_models  # noqa: F401
+
+    rows = []
+    for entry in dataset["documents"]:
+        expected_type = TypeDocument(entry["type_document"])
+        start = time.perf_counter()
+        result = chain.process_document(dataset_path.parent / entry["fichier"])
+        duration = time.perf_counter() - start
+        detected = result.classification.type_detecte if result.classification else None
+        fields = compare_fields(result, entry["attendu"])
+        rows.append(
+            {
+                "fichier": entry["fichier"],
+                "type_attendu": expected_type.value,
+                "type_detecte": detected.value if detected else None,
+                "classification_exacte": detected == expected_type,
+                "champs": fields,
+                "champs_faux": sorted(field for field, ok in fields.items() if not ok),
+                "tokens": result.tokens.get("total_tokens", 0),
+                "couche_texte": result.couche_texte,
+                "prompts": result.prompts,
+                "duree_s": round(duration, 3),
+            }
+        )
+
+    # Extractions de chaque type, toutes routes confondues : coût, tokens de sortie, latence
+    extraction: dict[str, dict[str, float]] = {}
+    for stats in chain.router.stats():
+        if stats.type_document is not None:
+            totals = extraction.setdefault(
+                stats.type_document.value,
+                {"cout_usd": 0.0, "output_tokens": 0, "appels": 0, "latence_s": 0.0},
+            )
+            totals["cout_usd"] += stats.cout_usd
+            totals["output_tokens"] += stats.output_tokens
+            totals["appels"] += stats.appels
+            totals["latence_s"] += stats.latence_totale_s
+
+    by_type: dict[str, dict] = {}
+    for type_document in sorted({row["type_attendu"] for row in rows}):
+        type_rows = [row for row in rows if row["type_attendu"] == type_document]
+        field_names = sorted({field for row in type_rows for field in row["champs"]})
+        per_field = {
+            field: _ratio(
+                sum(row["champs"].get(field, False) for row in type_rows),
+                sum(field in row["champs"] for row in type_rows),
+            )
+            for field in field_names
+        }
+        latencies = sorted(row["duree_s"] for row in type_rows)
+        totals = extraction.get(
+            type_document, {"cout_usd": 0.0, "output_tokens": 0, "appels": 0, "latence_s": 0.0}
+        )
+        by_type[type_document] = {
+            "documents": len(type_rows),
+            "precision_classification": _ratio(
+                sum(row["classification_exacte"] for row in type_rows), len(type_rows)
+            ),
+            "precision_champs": _ratio(
+                sum(sum(row["champs"].values()) for row in type_rows),
+                sum(len(row["champs"]) for row in type_rows),
+            ),
+            "champs": per_field,
+            "tokens": sum(row["tokens"] for row in type_rows),
+            "documents_couche_texte": sum(row["couche_texte"] for row in type_rows),
+            # Coût des extractions de ce type (la classification est comptée à part)
+            "cout_extraction_usd": round(totals["cout_usd"], 6),
+            "output_tokens_extraction": totals["output_tokens"],
+            "latence_generation_extraction_s": round(
+                totals["latence_s"] / totals["appels"] if totals["appels"] else 0.0, 4
+            ),
+            "latence_p50_s": percentile(latencies, 0.50),
+            "latence_p95_s": percentile(latencies, 0.95),
+            "latence_p99_s": percentile(latencies, 0.99),
+        }
+    return rows, by_type
+
+
+def _ratio(numerator: int, denominator: int) -> float:
+    return round(numerator / denominator, 4) if denominator else 0.0
+
+
+def main():
+    """Point d'entrée du benchmark."""
+    parser = argparse.ArgumentParser(description="Benchmark sur le golden dataset")
+    parser.add_argument("--dataset", type=Path, default=GOLDEN_DIR / "dataset.json")
+    parser.add_argument("--cassette", type=Path, default=GOLDEN_DIR / "cassette.json")
+    parser.add_argument("--mode", choices=("replay", "record", "live"), default="replay")
+    parser.add_argument("--fake", action="store_true", help="Backend factice (record/live)")
+    parser.add_argument("--output", type=Path, help="Rapport JSON à écrire")
+    parser.add_argument(
+        "--sortie-compacte",
+        action="store_true",
+        help="Demande les extractions en JSON compact (clés courtes)",
+    )
+    parser.add_argument(
+        "--sans-couche-texte",
+        action="store_true",
+        help="Envoie toujours le document, même pour un PDF natif",
+    )
+    parser.add_argument(
+        "--min-field-accuracy", type=float, help="Échec si la précision des champs est inférieure"
+    )
+    args = parser.parse_args()
+
+    if args.sans_couche_texte:
+        os.environ["VAR_KYC_COUCHE_TEXTE"] = "0"
+    if args.sortie_compacte:
+        os.environ["VAR_KYC_SORTIE_COMPACTE"] = "1"
+    config = Configuration()
+    cassette = Cassette(args.cassette)
+    chain = build_chain(config, args.mode, cassette, args.fake)
+    rows, by_type = run(args.dataset, chain)
+    if args.mode == "record":
+        cassette.save()
+
+    total_fields = sum(len(row["champs"]) for row in rows)
+    field_accuracy = _ratio(sum(sum(row["champs"].values()) for row in rows), total_fields)
+    report = {
+        "mode": args.mode,
+        "modele": cassette.model_name if args.mode == "replay" else config.model,
+        # Un changement de prompt (version ou texte) se voit dans le rapport
+        "empreinte_prompts": chain.prompts.fingerprint(),
+        "prompts": {prompt.key: prompt.version for prompt in chain.prompts.selected()},
+        "couche_texte": config.text_layer["enabled"],
+        "sortie_compacte": config.compact_output["enabled"],
+        "global": {
+            "documents": len(rows),
+            "precision_classification": _ratio(
+                sum(row["classification_exacte"] for row in rows), len(rows)
+            ),
+            "precision_champs": field_accuracy,
+            "tokens": sum(row["tokens"] for row in rows),
+            "cout_usd": round(sum(stats.cout_usd for stats in chain.router.stats()), 6),
+        },
+        "par_type": by_type,
+        "documents": rows,
+    }
+
+    print(f"{'type':<24} {'docs':>5} {'classif.':>9} {'champs':>7} {'tokens':>8} {'p95 (s)':>8}")
+    for type_document, stats in by_type.items():
+        print(
+            f"{type_document:<24} {stats['documents']:>5} "
+            f"{stats['precision_classification']:>9.0%} {stats['precision_champs']:>7.0%} "
+            f"{stats['tokens']:>8} {stats['latence_p95_s']:>8.3f}"
+        )
+    for row in rows:
+        if row["champs_faux"] or not row["classification_exacte"]:
+            print(f"✗ {row['fichier']}: type={row['type_detecte']} {', '.join(row['champs_faux'])}")
+
+    if args.output:
+        args.output.parent.mkdir(parents=True, exist_ok=True)
+        args.output.write_text(json.dumps(report, indent=2, sort_keys=True, ensure_ascii=False))
+    if args.min_field_accuracy is not None and field_accuracy < args.min_field_accuracy:
+        sys.exit(f"Précision des champs {field_accuracy:.2%} < {args.min_field_accuracy:.2%}")
+
+
+if __name__ == "__main__":
+    main()
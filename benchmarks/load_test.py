@@ -0,0 +1,250 @@
+"""
+Test de charge du pipeline KYC contre le backend de modèle factice.
+
+Génère des documents synthétiques de chaque `TypeDocument` (ou des dossiers
+complets), puis les traite à plusieurs niveaux de concurrence avec
+`FakeGenerativeModel` : latence tirée selon une distribution, taux d'erreur et
+nombres de tokens configurables. Pour chaque niveau, rapporte le débit, les
+latences p50/p95/p99, le pic de mémoire résidente et le temps CPU par document.
+
+Chaque niveau s'exécute dans un processus neuf : `ru_maxrss` est un pic propre au
+processus, qui resterait sinon celui du niveau le plus gourmand déjà passé.
+
+Usage:
+    PYTHONPATH=src uv run python benchmarks/load_test.py --items 500 --concurrency 50 500
+    PYTHONPATH=src uv run python benchmarks/load_test.py --mode dossier --items 100 \\
+        --latency-ms 800 --distribution lognormal --error-rate 0.02 --json data/load.json
+"""
+
+import argparse
+import json
+import multiprocessing
+import resource
+import sys
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from dataclasses import asdict, dataclass
+from pathlib import Path
+
+from chains.budget import BudgetError
+from chains.configuration import Configuration
+from chains.fake_model import LATENCY_DISTRIBUTIONS, FakeGenerativeModel, fake_document_bytes
+from chains.llm_chain import KYCDocumentChain
+from chains.schemas import TypeDocument
+from pipeline import KYCPipeline, TransientDossierError
+
+# Contenu d'un dossier synthétique complet
+DOSSIER_TYPES = (
+    TypeDocument.CARTE_IDENTITE,
+    TypeDocument.JUSTIFICATIF_DOMICILE,
+    TypeDocument.RIB,
+    TypeDocument.PERMIS_CONDUIRE,
+)
+
+
+@dataclass
+class LoadReport:
+    """Mesures d'un niveau de concurrence."""
+
+    concurrence: int
+    elements: int
+    documents: int
+    echecs: int
+    refus_budget: int
+    duree_s: float
+    debit_documents_s: float
+    p50_s: float
+    p95_s: float
+    p99_s: float
+    rss_max_mib: float
+    cpu_ms_par_document: float
+    cout_usd: float
+
+
+def generate_documents(root: Path, count: int, padding: int) -> list[Path]:
+    """Crée `count` documents synthétiques, en alternant les types de document."""
+    types = list(TypeDocument)
+    paths = []
+    for index in range(count):
+        type_document = types[index % len(types)]
+        path = root / f"{index:06d}_{type_document.value}.png"
+        path.write_bytes(fake_document_bytes(type_document, padding) + str(index).encode())
+        paths.append(path)
+    return paths
+
+
+def generate_dossiers(root: Path, count: int, padding: int) -> list[Path]:
+    """Crée `count` dossiers synthétiques complets (pièce d'identité, domicile, RIB, permis)."""
+    folders = []
+    for index in range(count):
+        folder = root / f"client_{index:06d}"
+        folder.mkdir()
+        for type_document in DOSSIER_TYPES:
+            content = fake_document_bytes(type_document, padding) + str(index).encode()
+            (folder / f"{type_document.value}.png").write_bytes(content)
+        folders.append(folder)
+    return folders
+
+
+def rss_high_water_mib() -> float:
+    """Pic de mémoire résidente du processus depuis son démarrage, en MiB."""
+    maxrss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux : kilo-octets ; macOS : octets
+    return maxrss / (1024 * 1024) if sys.platform == "darwin" else maxrss / 1024
+
+
+def percentile(sorted_values: list[float], fraction: float) -> float:
+    """Percentile par rang le plus proche d'une liste triée (0 si vide)."""
+    if not sorted_values:
+        return 0.0
+    index = min(len(sorted_values) - 1, max(0, round(fraction * len(sorted_values)) - 1))
+    return sorted_values[index]
+
+
+def run_level(pipeline: KYCPipeline, items: list[Path], mode: str, concurrency: int) -> LoadReport:
+    """
+    Traite tous les éléments avec `concurrency` threads et mesure le niveau.
+
+    Args:
+        pipeline: Pipeline branché sur le modèle factice
+        items: Documents ou dossiers à traiter
+        mode: "document" (un appel `process_document` par élément) ou "dossier"
+        concurrency: Nombre d'éléments traités simultanément
+
+    Returns:
+        Mesures du niveau
+    """
+
+    def process(item: Path) -> tuple[float, int, int, int]:
+        start = time.perf_counter()
+        try:
+            if mode == "dossier":
+                dossier = pipeline.process_folder(item, incremental=False)
+                failures = 0 if dossier.dossier_complet else 1
+                documents = len(DOSSIER_TYPES)
+            else:
+                result = pipeline.process_document(item)
+                failures = 0 if result.extraction_reussie else 1
+                documents = 1
+            refused = 0
+        except BudgetError:
+            failures, refused, documents = 1, 1, 0
+        except (ValueError, TransientDossierError):
+            # Dossier incomplet : un appel a échoué (taux d'erreur simulé)
+            failures, refused, documents = 1, 0, 0
+        return time.perf_counter() - start, documents, failures, refused
+
+    spent_start = pipeline.chain.budget.spent_today_usd
+    cpu_start = time.process_time()
+    wall_start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as executor:
+        outcomes = list(executor.map(process, items))
+    duration = time.perf_counter() - wall_start
+    cpu = time.process_time() - cpu_start
+
+    latencies = sorted(outcome[0] for outcome in outcomes)
+    documents = sum(outcome[1] for outcome in outcomes)
+    return LoadReport(
+        concurrence=concurrency,
+        elements=len(items),
+        documents=documents,
+        echecs=sum(outcome[2] for outcome in outcomes),
+        refus_budget=sum(outcome[3] for outcome in outcomes),
+        duree_s=duration,
+        debit_documents_s=documents / duration if duration else 0.0,
+        p50_s=percentile(latencies, 0.50),
+        p95_s=percentile(latencies, 0.95),
+        p99_s=percentile(latencies, 0.99),
+        rss_max_mib=rss_high_water_mib(),
+        cpu_ms_par_document=cpu * 1000 / max(documents, 1),
+        cout_usd=pipeline.chain.budget.spent_today_usd - spent_start,
+    )
+
+
+def build_pipeline(args: argparse.Namespace) -> KYCPipeline:
+    """Pipeline branché sur le modèle factice, échauffé hors mesure."""
+    config = Configuration()
+    model = FakeGenerativeModel(
+        latency_s=args.latency_ms / 1000,
+        error_rate=args.error_rate,
+        input_tokens=args.input_tokens,
+        output_tokens=args.output_tokens,
+        seed=args.seed,
+        latency_distribution=args.distribution,
+        latency_sigma=args.sigma,
+        token_jitter=args.token_jitter,
+    )
+    pipeline = KYCPipeline(config, chain=KYCDocumentChain(config, model=model))
+    # Pas de store : chaque niveau retraite réellement ses documents
+    pipeline.store = None
+
+    # Échauffement : imports différés (SDK Vertex AI pour l'encodage) et caches
+    with tempfile.TemporaryDirectory(prefix="kyc-load-") as tmp:
+        for path in generate_documents(Path(tmp), len(TypeDocument), 0):
+            pipeline.process_document(path)
+    return pipeline
+
+
+def measure_level(args: argparse.Namespace, concurrency: int) -> LoadReport:
+    """
+    Mesure un niveau de concurrence dans le processus courant.
+
+    Appelée dans un processus neuf par niveau (`spawn`) : le pic de mémoire
+    rapporté est celui de ce niveau, échauffement et imports compris.
+    """
+    pipeline = build_pipeline(args)
+    with tempfile.TemporaryDirectory(prefix="kyc-load-") as tmp:
+        generate = generate_dossiers if args.mode == "dossier" else generate_documents
+        items = generate(Path(tmp), args.items, args.padding_kb * 1024)
+        return run_level(pipeline, items, args.mode, concurrency)
+
+
+def main():
+    """Point d'entrée du test de charge."""
+    parser = argparse.ArgumentParser(description="Test de charge du pipeline KYC")
+    parser.add_argument("--mode", choices=("document", "dossier"), default="document")
+    parser.add_argument("--items", type=int, default=200, help="Documents ou dossiers par niveau")
+    parser.add_argument(
+        "--concurrency", type=int, nargs="+", default=[1, 10, 50], help="Niveaux de concurrence"
+    )
+    parser.add_argument("--latency-ms", type=float, default=200.0, help="Latence moyenne par appel")
+    parser.add_argument("--distribution", choices=LATENCY_DISTRIBUTIONS, default="lognormal")
+    parser.add_argument("--sigma", type=float, default=0.5, help="Sigma de la loi lognormale")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="Taux d'erreur par appel")
+    parser.add_argument("--input-tokens", type=int, default=1300)
+    parser.add_argument("--output-tokens", type=int, default=150)
+    parser.add_argument("--token-jitter", type=float, default=0.2, help="Variation des tokens")
+    parser.add_argument("--padding-kb", type=int, default=200, help="Taille des documents (Kio)")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--json", type=Path, help="Fichier où écrire les mesures (JSON)")
+    args = parser.parse_args()
+
+    print(
+        f"{'concurrence':>11} {'docs':>6} {'échecs':>7} {'docs/s':>8} {'p50 (s)':>8} "
+        f"{'p95 (s)':>8} {'p99 (s)':>8} {'RSS max (MiB)':>14} {'CPU/doc (ms)':>13}"
+    )
+    reports = []
+    context = multiprocessing.get_context("spawn")
+    for concurrency in args.concurrency:
+        with ProcessPoolExecutor(max_workers=1, mp_context=context) as executor:
+            report = executor.submit(measure_level, args, concurrency).result()
+        reports.append(report)
+        print(
+            f"{report.concurrence:>11} {report.documents:>6} {report.echecs:>7} "
+            f"{report.debit_documents_s:>8.1f} {report.p50_s:>8.3f} {report.p95_s:>8.3f} "
+            f"{report.p99_s:>8.3f} {report.rss_max_mib:>14.1f} {report.cpu_ms_par_document:>13.2f}"
+        )
+
+    print(f"\nCoût simulé total: ${sum(report.cout_usd for report in reports):.4f}")
+    if args.json:
+        args.json.parent.mkdir(parents=True, exist_ok=True)
+        payload = {
+            "parametres": {**vars(args), "json": str(args.json)},
+            "niveaux": [asdict(report) for report in reports],
+        }
+        args.json.write_text(json.dumps(payload, indent=2, ensure_ascii=False))
+
+
+if __name__ == "__main__":
+    main()
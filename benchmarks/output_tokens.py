@@ -0,0 +1,86 @@
+"""
+Tokens de sortie économisés par la sortie compacte, estimés hors ligne.
+
+Pour chaque `TypeDocument`, encode une extraction type (celle du backend factice)
+sous les noms de champs, avec les champs absents à null comme le demandent les
+prompts, puis sous les clés courtes de `chains.compact_output`. Rapporte les
+tokens de sortie estimés des deux encodages, les tokens d'entrée ajoutés par la
+table des clés dans le prompt, et le coût net pour 1000 extractions au tarif du
+modèle. La latence de génération se mesure sur le golden dataset
+(`golden.py --sortie-compacte`, `latence_generation_extraction_s` par type).
+
+Usage:
+    PYTHONPATH=src uv run python benchmarks/output_tokens.py --modele gemini-2.5-pro
+"""
+
+import argparse
+import json
+from pathlib import Path
+
+from chains.compact_output import COMPACT_KEYS, compact, compact_instructions
+from chains.configuration import Configuration
+from chains.fake_model import sample_payload
+from chains.llm_chain import EXTRACTION_SPECS
+from chains.prompt_registry import PromptRegistry, estimate_tokens
+from chains.schemas import TypeDocument
+
+
+def measure(config: Configuration, model_name: str) -> list[dict]:
+    """
+    Compare les deux encodages de sortie pour chaque type de document.
+
+    Returns:
+        Une ligne par type : tokens de sortie (complets, compacts), tokens d'entrée
+        ajoutés et écart de coût pour 1000 extractions
+    """
+    wrapper = PromptRegistry().get("sortie_compacte").text
+    rows = []
+    for type_document in TypeDocument:
+        schema, _ = EXTRACTION_SPECS[type_document]
+        payload = sample_payload(type_document)
+        full = {field: payload.get(field) for field in schema.model_fields if field in COMPACT_KEYS}
+        full_tokens = estimate_tokens(json.dumps(full, ensure_ascii=False))
+        compact_tokens = estimate_tokens(json.dumps(compact(payload), ensure_ascii=False))
+        extra_input = estimate_tokens(wrapper.format(prompt="", cles=compact_instructions(schema)))
+        saved_usd = config.token_cost(
+            model_name, {"output_tokens": full_tokens - compact_tokens}
+        ) - config.token_cost(model_name, {"input_tokens": extra_input})
+        rows.append(
+            {
+                "type_document": type_document.value,
+                "sortie_complete": full_tokens,
+                "sortie_compacte": compact_tokens,
+                "sortie_economisee": round(1 - compact_tokens / full_tokens, 4),
+                "entree_ajoutee": extra_input,
+                "gain_usd_1000": round(saved_usd * 1000, 4),
+            }
+        )
+    return rows
+
+
+def main():
+    """Point d'entrée du benchmark."""
+    parser = argparse.ArgumentParser(description="Tokens de sortie de la sortie compacte")
+    parser.add_argument("--modele", default="gemini-2.5-flash", help="Tarif du modèle")
+    parser.add_argument("--json", type=Path, help="Fichier où écrire les mesures (JSON)")
+    args = parser.parse_args()
+
+    rows = measure(Configuration(), args.modele)
+    print(
+        f"{'type':<24} {'sortie':>7} {'compacte':>9} {'économie':>9} "
+        f"{'entrée +':>9} {'gain $/1000':>12}"
+    )
+    for row in rows:
+        print(
+            f"{row['type_document']:<24} {row['sortie_complete']:>7} {row['sortie_compacte']:>9} "
+            f"{row['sortie_economisee']:>9.0%} {row['entree_ajoutee']:>9} "
+            f"{row['gain_usd_1000']:>12.4f}"
+        )
+
+    if args.json:
+        args.json.parent.mkdir(parents=True, exist_ok=True)
+        args.json.write_text(json.dumps(rows, indent=2, ensure_ascii=False))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,89 @@
+"""
+Tokens d'entrée de chaque version de prompt, mesurés hors ligne.
+
+Pour chaque étape du registre (`chains.prompt_registry`), rapporte les caractères
+et les tokens estimés de chaque version, et l'écart à la v1 : le coût fixe d'un
+prompt est payé à chaque appel, document en plus. L'estimation locale se passe
+de tout accès réseau ; `--vertex-tokenizer` compte en plus avec le tokenizer
+local du SDK Vertex AI (`google-cloud-aiplatform[tokenization]`, fichier du
+tokenizer téléchargé une fois).
+
+Les versions se comparent ensuite en précision, coût et latence sur le golden
+dataset (`VAR_KYC_PROMPTS=extraction.rib=v2 ... golden.py --mode record`).
+
+Usage:
+    PYTHONPATH=src uv run python benchmarks/prompt_tokens.py
+    PYTHONPATH=src uv run python benchmarks/prompt_tokens.py --vertex-tokenizer gemini-1.5-flash-002
+"""
+
+import argparse
+import json
+from pathlib import Path
+
+from chains.prompt_registry import PROMPT_VERSIONS, PromptRegistry, estimate_tokens
+
+
+def vertex_token_counter(model_name: str):
+    """Compteur de tokens du tokenizer local du SDK Vertex AI pour un modèle."""
+    from vertexai.preview.tokenization import get_tokenizer_for_model
+
+    tokenizer = get_tokenizer_for_model(model_name)
+    return lambda text: tokenizer.count_tokens(text).total_tokens
+
+
+def measure(count_tokens=None) -> list[dict]:
+    """
+    Mesure chaque version de chaque prompt.
+
+    Args:
+        count_tokens: Compteur de tokens exact (None pour l'estimation seule)
+
+    Returns:
+        Une ligne par version : clé, version, empreinte, caractères, tokens et écart à la v1
+    """
+    registry = PromptRegistry()
+    rows = []
+    for key in PROMPT_VERSIONS:
+        baseline = None
+        for prompt in registry.versions(key):
+            tokens = estimate_tokens(prompt.text)
+            baseline = baseline or tokens
+            row = {
+                "prompt": key,
+                "version": prompt.version,
+                "empreinte": prompt.fingerprint,
+                "caracteres": len(prompt.text),
+                "tokens_estimes": tokens,
+                "ecart_v1": round(tokens / baseline - 1, 4),
+            }
+            if count_tokens is not None:
+                row["tokens_tokenizer"] = count_tokens(prompt.text)
+            rows.append(row)
+    return rows
+
+
+def main():
+    """Point d'entrée du benchmark."""
+    parser = argparse.ArgumentParser(description="Tokens d'entrée des versions de prompt")
+    parser.add_argument("--vertex-tokenizer", metavar="MODELE", help="Tokenizer local Vertex AI")
+    parser.add_argument("--json", type=Path, help="Fichier où écrire les mesures (JSON)")
+    args = parser.parse_args()
+
+    count_tokens = vertex_token_counter(args.vertex_tokenizer) if args.vertex_tokenizer else None
+    rows = measure(count_tokens)
+
+    print(f"{'prompt':<34} {'version':>7} {'caractères':>10} {'tokens':>7} {'écart v1':>9}")
+    for row in rows:
+        exact = f" ({row['tokens_tokenizer']})" if "tokens_tokenizer" in row else ""
+        print(
+            f"{row['prompt']:<34} {row['version']:>7} {row['caracteres']:>10} "
+            f"{row['tokens_estimes']:>7} {row['ecart_v1']:>9.0%}{exact}"
+        )
+
+    if args.json:
+        args.json.parent.mkdir(parents=True, exist_ok=True)
+        args.json.write_text(json.dumps(rows, indent=2, ensure_ascii=False))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,141 @@
+"""
+Temps du rapport d'exploitation sur un gros export Parquet.
+
+Écrit un export synthétique au schéma complet de `storage.export` (N extractions
+sur 30 jours, tous types confondus, N/5 dossiers), puis mesure le rapport :
+- la lecture des seules colonnes du rapport (`load_export`) ;
+- pour comparaison, la lecture de toutes les colonnes des extractions ;
+- les agrégats (`build_report`) et le rendu Markdown et HTML.
+
+Usage:
+    uv sync --extra export
+    PYTHONPATH=src uv run python benchmarks/report.py --documents 2000000
+"""
+
+import argparse
+import json
+import tempfile
+import time
+from datetime import date, timedelta
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+from chains.schemas import TypeDocument
+from storage.export import DOSSIER_COLUMNS, EXTRACTION_COLUMNS, arrow_schema
+from storage.report import build_report, load_export, render_html, render_markdown
+
+DAYS = 30
+# Groupes de lignes de la taille écrite par `DatasetWriter` (10 000 par défaut)
+ROW_GROUPS = {"min_rows_per_group": 10_000, "max_rows_per_group": 10_000}
+RAISONS = ("Document d'identité expiré", "IBAN invalide", "Noms discordants")
+
+
+def _table(columns: dict[str, str], values: dict[str, np.ndarray], count: int) -> pa.Table:
+    """Table au schéma complet ; les colonnes non renseignées sont vides (nulles)."""
+    schema = arrow_schema(columns)
+    arrays = [
+        pa.array(values[field.name], type=field.type)
+        if field.name in values
+        else pa.nulls(count, type=field.type)
+        for field in schema
+    ]
+    return pa.Table.from_arrays(arrays, schema=schema)
+
+
+def write_synthetic_export(root: Path, count: int, seed: int = 0) -> None:
+    """Export de `count` extractions et `count // 5` dossiers synthétiques."""
+    rng = np.random.default_rng(seed)
+    days = np.array([date(2026, 10, 1) + timedelta(days=i) for i in range(DAYS)])
+    types = np.array([t.value for t in TypeDocument])
+    input_tokens = rng.integers(1_500, 4_000, count)
+    output_tokens = rng.integers(100, 600, count)
+    extractions = {
+        "date": days[rng.integers(0, DAYS, count)],
+        "type_document": types[rng.integers(0, len(types), count)],
+        "fichier_source": np.char.add(
+            "clients/dossier/", rng.integers(0, 10**9, count).astype(str)
+        ),
+        "empreinte_fichier": np.char.zfill(rng.integers(0, 10**18, count).astype(str), 64),
+        "extraction_reussie": rng.random(count) > 0.03,
+        "input_tokens": input_tokens,
+        "output_tokens": output_tokens,
+        "total_tokens": input_tokens + output_tokens,
+        "cout_usd": (input_tokens * 0.075 + output_tokens * 0.3) / 1e6,
+        "duree_classification_s": rng.lognormal(-0.5, 0.4, count),
+        "duree_extraction_s": rng.lognormal(0.3, 0.5, count),
+        "escalade_classification": rng.random(count) < 0.02,
+        "escalade_extraction": rng.random(count) < 0.08,
+    }
+    pq.write_to_dataset(
+        _table(EXTRACTION_COLUMNS, extractions, count),
+        root / "extractions",
+        partition_cols=["date", "type_document"],
+        **ROW_GROUPS,
+    )
+
+    dossiers_count = count // 5
+    rejected = rng.random(dossiers_count) < 0.15
+    raisons = [
+        [RAISONS[i]] if is_rejected else []
+        for i, is_rejected in zip(rng.integers(0, len(RAISONS), dossiers_count), rejected)
+    ]
+    dossiers = {
+        "date": days[rng.integers(0, DAYS, dossiers_count)],
+        "statut_kyc": np.where(rejected, "REJECTED", "APPROVED"),
+        "raisons_rejet": raisons,
+    }
+    pq.write_to_dataset(
+        _table(DOSSIER_COLUMNS, dossiers, dossiers_count),
+        root / "dossiers",
+        partition_cols=["date"],
+        **ROW_GROUPS,
+    )
+
+
+def _timed(fn):
+    start = time.perf_counter()
+    value = fn()
+    return value, round(time.perf_counter() - start, 3)
+
+
+def measure(root: Path) -> dict:
+    """Durées (s) de lecture, d'agrégation et de rendu du rapport."""
+    data, read_s = _timed(lambda: load_export(root))
+    _, read_all_s = _timed(lambda: pd.read_parquet(root / "extractions"))
+    report, aggregate_s = _timed(lambda: build_report(data))
+    _, render_s = _timed(lambda: (render_markdown(report), render_html(report)))
+    return {
+        "extractions": len(data.extractions),
+        "dossiers": len(data.dossiers),
+        "lecture_colonnes_rapport_s": read_s,
+        "lecture_toutes_colonnes_s": read_all_s,
+        "agregation_s": aggregate_s,
+        "rendu_s": render_s,
+        "rapport_s": round(read_s + aggregate_s + render_s, 3),
+    }
+
+
+def main():
+    """Point d'entrée du benchmark."""
+    parser = argparse.ArgumentParser(description="Temps du rapport d'exploitation")
+    parser.add_argument("--documents", type=int, default=1_000_000, help="Nombre d'extractions")
+    parser.add_argument("--json", type=Path, help="Fichier où écrire les mesures (JSON)")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        write_synthetic_export(Path(tmp), args.documents)
+        report = measure(Path(tmp))
+    for key, value in report.items():
+        print(f"{key:<28} {value}")
+
+    if args.json:
+        args.json.parent.mkdir(parents=True, exist_ok=True)
+        args.json.write_text(json.dumps(report, indent=2, ensure_ascii=False))
+
+
+if __name__ == "__main__":
+    main()
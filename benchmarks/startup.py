@@ -0,0 +1,70 @@
+"""
+Benchmark du temps de démarrage : temps d'import de chaque module dans un interpréteur neuf.
+
+Chaque mesure lance un sous-processus Python pour ne pas bénéficier du cache
+`sys.modules`, et vérifie si le SDK Vertex AI a été chargé au passage.
+
+Usage:
+    PYTHONPATH=src uv run python benchmarks/startup.py --repeat 5
+"""
+
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+from pathlib import Path
+
+SRC_DIR = Path(__file__).parent.parent / "src"
+MODULES = ["chains", "chains.schemas", "chains.llm_chain", "pipeline", "main"]
+
+MEASURE_SNIPPET = """
+import json, sys, time
+start = time.perf_counter()
+import {module}
+elapsed = time.perf_counter() - start
+print(json.dumps({{"seconds": elapsed, "vertexai": "vertexai" in sys.modules}}))
+"""
+
+
+def measure_import(module: str) -> dict:
+    """
+    Mesure l'import d'un module dans un interpréteur neuf.
+
+    Args:
+        module: Nom du module à importer
+
+    Returns:
+        Dictionnaire {"seconds": durée, "vertexai": SDK chargé ?}
+    """
+    env = {**os.environ, "PYTHONPATH": str(SRC_DIR)}
+    output = subprocess.run(
+        [sys.executable, "-c", MEASURE_SNIPPET.format(module=module)],
+        env=env,
+        check=True,
+        capture_output=True,
+        text=True,
+    ).stdout
+    return json.loads(output.strip().splitlines()[-1])
+
+
+def main():
+    """Point d'entrée du benchmark."""
+    parser = argparse.ArgumentParser(description="Benchmark des temps d'import")
+    parser.add_argument("--repeat", type=int, default=5, help="Nombre de mesures par module")
+    args = parser.parse_args()
+
+    print(f"{'Module':<20} {'médiane (ms)':>14} {'min (ms)':>10}  SDK Vertex AI")
+    for module in MODULES:
+        runs = [measure_import(module) for _ in range(args.repeat)]
+        durations = [run["seconds"] * 1000 for run in runs]
+        vertexai_loaded = "oui" if any(run["vertexai"] for run in runs) else "non"
+        print(
+            f"{module:<20} {statistics.median(durations):>14.1f} {min(durations):>10.1f}  "
+            f"{vertexai_loaded}"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,388 @@
+"""
+Budget de tokens et de coût avec contrôle d'admission.
+
+Avant chaque appel au modèle, son coût est estimé (pages du document, moyenne
+historique des tokens par étape et type de document, tarif du modèle routé) et
+réservé sur trois plafonds : par dossier, par client et par jour, et global par
+jour. Un appel qui dépasserait un plafond est refusé (`BudgetExceededError`) ou, pour
+le travail de fond, différé (`BudgetDeferredError`) ; une part du plafond global est
+réservée au trafic interactif. Après l'appel, le coût réel remplace l'estimation.
+
+Le périmètre (client, dossier, interactif ou non) de l'appel en cours est porté
+par un `ContextVar` : voir `budget_scope`. Les dépenses du jour sont tenues dans un
+registre SQLite (`BudgetLedger`) : en mémoire par défaut, ou dans un fichier
+(`VAR_KYC_BUDGET_PATH`) partagé par tous les processus, pour que N workers
+respectent ensemble les plafonds et qu'un redémarrage ne les remette pas à zéro.
+"""
+
+import sqlite3
+import threading
+from collections.abc import Callable, Iterator
+from contextlib import contextmanager
+from contextvars import ContextVar
+from dataclasses import dataclass
+from datetime import date, datetime, time, timedelta
+from pathlib import Path
+
+from chains.configuration import Configuration
+from chains.routing import Stage
+from chains.schemas import TypeDocument
+from utils.files import page_count
+
+
+class BudgetError(RuntimeError):
+    """Appel refusé par le contrôle d'admission."""
+
+
+class BudgetExceededError(BudgetError):
+    """Plafond atteint : l'appel est refusé."""
+
+
+class BudgetDeferredError(BudgetError):
+    """Plafond du travail de fond atteint : l'appel est à rejouer plus tard."""
+
+    def __init__(self, message: str, retry_after_s: float):
+        super().__init__(message)
+        self.retry_after_s = retry_after_s
+
+
+@dataclass(frozen=True)
+class BudgetScope:
+    """Périmètre de facturation de l'appel en cours."""
+
+    client: str | None = None
+    dossier: str | None = None
+    interactive: bool = False
+
+
+_SCOPE: ContextVar[BudgetScope] = ContextVar("budget_scope", default=BudgetScope())
+
+
+def current_scope() -> BudgetScope:
+    """Périmètre de facturation du contexte courant."""
+    return _SCOPE.get()
+
+
+@contextmanager
+def budget_scope(scope: BudgetScope) -> Iterator[BudgetScope]:
+    """
+    Facture les appels du bloc sur un périmètre.
+
+    Les threads n'héritent pas du contexte : le périmètre doit être posé dans la
+    fonction exécutée par le thread (voir `KYCPipeline`).
+    """
+    token = _SCOPE.set(scope)
+    try:
+        yield scope
+    finally:
+        _SCOPE.reset(token)
+
+
+# Compteur de dépense : ("global", ""), ("client", nom) ou ("dossier", nom)
+LedgerKey = tuple[str, str]
+
+LEDGER_SCHEMA_SQL = """
+CREATE TABLE IF NOT EXISTS depenses (
+    jour TEXT NOT NULL,
+    perimetre TEXT NOT NULL,
+    cle TEXT NOT NULL,
+    montant_usd REAL NOT NULL,
+    PRIMARY KEY (jour, perimetre, cle)
+);
+"""
+
+
+class BudgetLedger:
+    """
+    Registre SQLite des dépenses par jour et par périmètre.
+
+    Une réservation lit les compteurs et les incrémente dans une même transaction
+    `BEGIN IMMEDIATE` : deux processus ne peuvent pas dépasser ensemble un plafond.
+    """
+
+    def __init__(self, db_path: str | Path = ":memory:"):
+        """
+        Ouvre (ou crée) le registre.
+
+        Args:
+            db_path: Chemin du fichier SQLite (`:memory:` : registre propre au processus)
+        """
+        if db_path != ":memory:":
+            Path(db_path).parent.mkdir(parents=True, exist_ok=True)
+        self._conn = sqlite3.connect(
+            db_path, isolation_level=None, timeout=30.0, check_same_thread=False
+        )
+        if db_path != ":memory:":
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.executescript(LEDGER_SCHEMA_SQL)
+        self._lock = threading.Lock()
+
+    def close(self) -> None:
+        """Ferme la connexion SQLite."""
+        self._conn.close()
+
+    def reserve(
+        self,
+        day: date,
+        keys: list[LedgerKey],
+        amount_usd: float,
+        check: Callable[[dict[LedgerKey, float]], None],
+    ) -> None:
+        """
+        Ajoute un montant aux compteurs si `check` l'accepte, atomiquement.
+
+        Args:
+            day: Jour de la dépense
+            keys: Compteurs concernés
+            amount_usd: Montant à ajouter
+            check: Appelée avec la dépense actuelle de chaque compteur ; lève pour refuser
+        """
+        with self._lock:
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                check({key: self._spent(day, key) for key in keys})
+                self._add(day, keys, amount_usd)
+            except BaseException:
+                self._conn.execute("ROLLBACK")
+                raise
+            self._conn.execute("COMMIT")
+
+    def add(self, day: date, keys: list[LedgerKey], amount_usd: float) -> None:
+        """Ajoute un montant (éventuellement négatif) aux compteurs."""
+        with self._lock:
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                self._add(day, keys, amount_usd)
+            except BaseException:
+                self._conn.execute("ROLLBACK")
+                raise
+            self._conn.execute("COMMIT")
+
+    def spent(self, day: date, key: LedgerKey) -> float:
+        """Dépense d'un compteur pour un jour."""
+        with self._lock:
+            return self._spent(day, key)
+
+    def prune(self, before: date) -> None:
+        """Oublie les jours antérieurs à `before`."""
+        with self._lock:
+            self._conn.execute("DELETE FROM depenses WHERE jour < ?", (before.isoformat(),))
+
+    def _spent(self, day: date, key: LedgerKey) -> float:
+        row = self._conn.execute(
+            "SELECT montant_usd FROM depenses WHERE jour = ? AND perimetre = ? AND cle = ?",
+            (day.isoformat(), *key),
+        ).fetchone()
+        return row[0] if row else 0.0
+
+    def _add(self, day: date, keys: list[LedgerKey], amount_usd: float) -> None:
+        self._conn.executemany(
+            "INSERT INTO depenses (jour, perimetre, cle, montant_usd) VALUES (?, ?, ?, ?) "
+            "ON CONFLICT (jour, perimetre, cle) DO UPDATE "
+            "SET montant_usd = montant_usd + excluded.montant_usd",
+            [(day.isoformat(), *key, amount_usd) for key in keys],
+        )
+
+
+def _ledger_keys(scope: BudgetScope) -> list[LedgerKey]:
+    """Compteurs débités par un appel du périmètre."""
+    keys = [("global", "")]
+    if scope.client is not None:
+        keys.append(("client", scope.client))
+    if scope.dossier is not None:
+        keys.append(("dossier", scope.dossier))
+    return keys
+
+
+@dataclass
+class Reservation:
+    """Coût estimé réservé pour un appel en cours."""
+
+    scope: BudgetScope
+    day: date
+    estimate_usd: float
+    stage: Stage
+    type_document: TypeDocument | None
+    pages: int
+
+
+@dataclass
+class _History:
+    """Moyenne mobile des tokens d'une étape pour un type de document."""
+
+    input_tokens_per_page: float
+    output_tokens: float
+
+
+class BudgetManager:
+    """Plafonds de dépense et estimation du coût des appels."""
+
+    def __init__(self, config: Configuration):
+        """
+        Initialise le gestionnaire depuis la section `budget` de la configuration.
+
+        Args:
+            config: Configuration (plafonds, estimations par défaut, tarifs et
+                registre des dépenses `budget_ledger_path`)
+        """
+        self.config = config
+        self.settings = config.budget
+        self.rejected = 0
+        self.deferred = 0
+        self._lock = threading.Lock()
+        self._day = date.today()
+        self._ledger = BudgetLedger(config.budget_ledger_path or ":memory:")
+        self._history: dict[tuple[Stage, TypeDocument | None], _History] = {}
+
+    @property
+    def spent_today_usd(self) -> float:
+        """Dépense globale du jour, réservations en cours comprises."""
+        with self._lock:
+            self._roll_day()
+            return self._ledger.spent(self._day, ("global", ""))
+
+    def estimate(
+        self,
+        stage: Stage,
+        type_document: TypeDocument | None,
+        model_name: str,
+        image_path: str | Path,
+    ) -> tuple[float, int]:
+        """
+        Estime le coût d'un appel avant de le faire.
+
+        Les tokens d'entrée sont proportionnels au nombre de pages ; tant qu'aucun
+        appel de la même étape et du même type n'a été observé, les valeurs par
+        défaut de la configuration sont utilisées.
+
+        Args:
+            stage: Étape de l'appel
+            type_document: Type de document (None pour la classification)
+            model_name: Modèle routé
+            image_path: Document envoyé
+
+        Returns:
+            Tuple (coût estimé en USD, nombre de pages)
+        """
+        pages = page_count(image_path)
+        with self._lock:
+            history = self._history.get((stage, type_document))
+        if history is None:
+            input_tokens = self.settings["default_input_tokens_per_page"] * pages
+            output_tokens = self.settings["default_output_tokens"]
+        else:
+            input_tokens = history.input_tokens_per_page * pages
+            output_tokens = history.output_tokens
+        usage = {"input_tokens": round(input_tokens), "output_tokens": round(output_tokens)}
+        return self.config.token_cost(model_name, usage), pages
+
+    def admit(
+        self,
+        stage: Stage,
+        type_document: TypeDocument | None,
+        model_name: str,
+        image_path: str | Path,
+    ) -> Reservation:
+        """
+        Réserve le coût estimé d'un appel sur les plafonds du périmètre courant.
+
+        Returns:
+            Réservation à solder avec `settle` (ou `release` si l'appel échoue)
+
+        Raises:
+            BudgetExceededError: Plafond du dossier atteint, ou plafond atteint en interactif
+            BudgetDeferredError: Plafond client ou global atteint pour du travail de fond
+        """
+        estimate_usd, pages = self.estimate(stage, type_document, model_name, image_path)
+        scope = current_scope()
+        with self._lock:
+            self._roll_day()
+            day = self._day
+            self._ledger.reserve(
+                day,
+                _ledger_keys(scope),
+                estimate_usd,
+                lambda spent: self._check(scope, estimate_usd, spent),
+            )
+        return Reservation(scope, day, estimate_usd, stage, type_document, pages)
+
+    def settle(
+        self, reservation: Reservation, actual_usd: float, token_usage: dict[str, int] | None
+    ) -> None:
+        """
+        Remplace l'estimation par le coût réel et met à jour l'historique.
+
+        Args:
+            reservation: Réservation retournée par `admit`
+            actual_usd: Coût réel de l'appel
+            token_usage: Tokens réellement consommés
+        """
+        with self._lock:
+            self._roll_day()
+            if reservation.day == self._day:
+                self._ledger.add(
+                    self._day,
+                    _ledger_keys(reservation.scope),
+                    actual_usd - reservation.estimate_usd,
+                )
+            if token_usage:
+                self._observe(reservation, token_usage)
+
+    def release(self, reservation: Reservation) -> None:
+        """Annule la réservation d'un appel qui n'a pas abouti."""
+        self.settle(reservation, 0.0, None)
+
+    def _observe(self, reservation: Reservation, token_usage: dict[str, int]) -> None:
+        key = (reservation.stage, reservation.type_document)
+        input_per_page = token_usage.get("input_tokens", 0) / reservation.pages
+        output_tokens = token_usage.get("output_tokens", 0)
+        history = self._history.get(key)
+        if history is None:
+            self._history[key] = _History(input_per_page, output_tokens)
+            return
+        weight = self.settings["history_weight"]
+        history.input_tokens_per_page += weight * (input_per_page - history.input_tokens_per_page)
+        history.output_tokens += weight * (output_tokens - history.output_tokens)
+
+    def _roll_day(self) -> None:
+        today = date.today()
+        if today != self._day:
+            self._day = today
+            self._ledger.prune(today)
+
+    def _check(
+        self, scope: BudgetScope, estimate_usd: float, spent: dict[LedgerKey, float]
+    ) -> None:
+        dossier_cap = self.settings.get("dossier_usd")
+        if dossier_cap is not None and scope.dossier is not None:
+            if spent[("dossier", scope.dossier)] + estimate_usd > dossier_cap:
+                self.rejected += 1
+                raise BudgetExceededError(
+                    f"Budget du dossier {scope.dossier} dépassé (plafond ${dossier_cap:.2f})"
+                )
+
+        client_cap = self.settings.get("daily_client_usd")
+        if client_cap is not None and scope.client is not None:
+            if spent[("client", scope.client)] + estimate_usd > client_cap:
+                self._refuse(
+                    scope,
+                    f"Budget journalier du client {scope.client} atteint "
+                    f"(plafond ${client_cap:.2f})",
+                )
+
+        global_cap = self.settings.get("daily_global_usd")
+        if global_cap is not None:
+            if not scope.interactive:
+                # Le travail de fond ne peut pas consommer la réserve du trafic interactif
+                global_cap *= 1 - self.settings["interactive_reserve"]
+            if spent[("global", "")] + estimate_usd > global_cap:
+                self._refuse(scope, f"Budget journalier global atteint (plafond ${global_cap:.2f})")
+
+    def _refuse(self, scope: BudgetScope, message: str) -> None:
+        if scope.interactive:
+            self.rejected += 1
+            raise BudgetExceededError(message)
+        self.deferred += 1
+        tomorrow = datetime.combine(self._day + timedelta(days=1), time.min)
+        raise BudgetDeferredError(message, (tomorrow - datetime.now()).total_seconds())
@@ -0,0 +1,147 @@
+"""
+Cassettes d'appels au modèle : enregistrement puis rejeu hors ligne.
+
+En enregistrement, `CassetteModel` transmet chaque appel au modèle réel et
+conserve sa réponse (texte et tokens) ; en rejeu, il la restitue sans réseau.
+Une interaction est identifiée par le prompt et le contenu des documents
+envoyés : modifier un prompt impose donc de réenregistrer la cassette.
+"""
+
+import hashlib
+import json
+import threading
+from pathlib import Path
+from typing import Any
+
+from chains.fake_model import FakeResponse, FakeUsageMetadata
+
+
+class CassetteMissError(RuntimeError):
+    """Appel absent de la cassette rejouée."""
+
+
+def interaction_key(contents: list) -> str:
+    """
+    Identifiant d'un appel : empreinte du prompt et des documents envoyés.
+
+    Args:
+        contents: Prompt (str) suivi des parties binaires du document
+
+    Returns:
+        Empreinte SHA-256 hexadécimale
+    """
+    digest = hashlib.sha256()
+    for content in contents:
+        if isinstance(content, str):
+            digest.update(b"prompt\0" + content.encode())
+        else:
+            digest.update(b"document\0" + content.inline_data.data)
+    return digest.hexdigest()
+
+
+class Cassette:
+    """Réponses enregistrées, sauvegardées dans un fichier JSON."""
+
+    def __init__(self, path: str | Path):
+        """
+        Charge la cassette si le fichier existe.
+
+        Args:
+            path: Fichier JSON de la cassette
+        """
+        self.path = Path(path)
+        self.model_name: str | None = None
+        self._interactions: dict[str, dict[str, Any]] = {}
+        self._lock = threading.Lock()
+        if self.path.exists():
+            data = json.loads(self.path.read_text(encoding="utf-8"))
+            self.model_name = data.get("modele")
+            self._interactions = data["interactions"]
+
+    def __len__(self) -> int:
+        return len(self._interactions)
+
+    def get(self, key: str) -> dict[str, Any] | None:
+        """Interaction enregistrée pour une clé (None si absente)."""
+        with self._lock:
+            return self._interactions.get(key)
+
+    def put(self, key: str, text: str, usage: dict[str, int]) -> None:
+        """Enregistre la réponse d'un appel."""
+        with self._lock:
+            self._interactions[key] = {"text": text, "usage": usage}
+
+    def save(self) -> None:
+        """Écrit la cassette (clés triées : le fichier se compare d'un enregistrement à l'autre)."""
+        with self._lock:
+            data = {"modele": self.model_name, "interactions": self._interactions}
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self.path.write_text(
+            json.dumps(data, indent=2, sort_keys=True, ensure_ascii=False), encoding="utf-8"
+        )
+
+
+class CassetteModel:
+    """Modèle compatible `generate_content` qui enregistre ou rejoue une cassette."""
+
+    def __init__(
+        self,
+        cassette: Cassette,
+        model: Any = None,
+        generation_config: Any = None,
+        model_name: str | None = None,
+    ):
+        """
+        Initialise le modèle.
+
+        Args:
+            cassette: Cassette à compléter ou à rejouer
+            model: Modèle réel à enregistrer (si None, rejeu seul)
+            generation_config: Configuration de génération du modèle réel
+            model_name: Nom du modèle enregistré, conservé dans la cassette
+        """
+        self.cassette = cassette
+        self.model = model
+        self.generation_config = generation_config
+        if model is not None and model_name is not None:
+            cassette.model_name = model_name
+
+    def generate_content(self, contents: list, generation_config=None) -> FakeResponse:
+        """
+        Rejoue la réponse enregistrée de l'appel, ou l'enregistre.
+
+        Raises:
+            CassetteMissError: En rejeu seul, si l'appel n'a pas été enregistré
+        """
+        key = interaction_key(contents)
+        if self.model is None:
+            interaction = self.cassette.get(key)
+            if interaction is None:
+                raise CassetteMissError(
+                    f"Appel absent de la cassette {self.cassette.path} (prompt ou document "
+                    "modifié ?) : réenregistrer la cassette"
+                )
+            usage = interaction["usage"]
+            return FakeResponse(
+                text=interaction["text"],
+                usage_metadata=FakeUsageMetadata(
+                    prompt_token_count=usage["input_tokens"],
+                    candidates_token_count=usage["output_tokens"],
+                    total_token_count=usage["total_tokens"],
+                ),
+            )
+
+        response = self.model.generate_content(
+            contents, generation_config=generation_config or self.generation_config
+        )
+        metadata = response.usage_metadata
+        self.cassette.put(
+            key,
+            response.text,
+            {
+                "input_tokens": metadata.prompt_token_count,
+                "output_tokens": metadata.candidates_token_count,
+                "total_tokens": metadata.total_token_count,
+            },
+        )
+        return response
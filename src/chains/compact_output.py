@@ -0,0 +1,97 @@
+"""
+Sortie JSON compacte des extractions : clés courtes à la place des noms de champs.
+
+Les tokens de sortie coûtent quatre fois ceux d'entrée et les noms de champs
+(`adresse_ligne1`, `autorite_emission`...) sont répétés dans chaque réponse.
+Quand la sortie compacte est activée (section `compact_output`), le prompt
+d'extraction demande les clés courtes ci-dessous et la réponse est remise sous
+ses noms de champs avant la validation par le schéma Pydantic habituel.
+
+Les champs calculés par les schémas (`est_recent`, `iban_valide`) n'ont pas de
+clé courte : le modèle n'a pas à les produire.
+"""
+
+from typing import Any
+
+from pydantic import BaseModel
+
+# Clé courte de chaque champ d'extraction (unique au sein de chaque schéma)
+COMPACT_KEYS: dict[str, str] = {
+    "type_document": "t",
+    "numero_document": "no",
+    "numero_passeport": "no",
+    "numero_permis": "no",
+    "nom": "n",
+    "prenom": "p",
+    "sexe": "s",
+    "date_naissance": "dn",
+    "lieu_naissance": "ln",
+    "nationalite": "na",
+    "statut_marital": "sm",
+    "date_emission": "de",
+    "date_expiration": "dx",
+    "autorite_emission": "ae",
+    "lieu_delivrance": "ld",
+    "adresse": "a",
+    "mrz_ligne1": "m1",
+    "mrz_ligne2": "m2",
+    "categories": "c",
+    "date_document": "d",
+    "nom_complet": "nc",
+    "adresse_ligne1": "a1",
+    "adresse_ligne2": "a2",
+    "code_postal": "cp",
+    "ville": "v",
+    "pays": "py",
+    "emetteur": "e",
+    "nom_titulaire": "nt",
+    "iban": "i",
+    "bic": "b",
+    "nom_banque": "nb",
+    "adresse_banque": "ab",
+    "numero_compte": "cc",
+    "code_guichet": "g",
+}
+
+
+def compact_keys(schema: type[BaseModel]) -> dict[str, str]:
+    """Clés courtes des champs d'un schéma, dans l'ordre du schéma."""
+    return {field: COMPACT_KEYS[field] for field in schema.model_fields if field in COMPACT_KEYS}
+
+
+def compact_instructions(schema: type[BaseModel]) -> str:
+    """Table `clé courte: champ` d'un schéma, à insérer dans le prompt."""
+    return "\n".join(f"- {short}: {field}" for field, short in compact_keys(schema).items())
+
+
+def compact(data: dict[str, Any]) -> dict[str, Any]:
+    """
+    Encode une extraction avec les clés courtes, sans les valeurs nulles.
+
+    Args:
+        data: Extraction sous ses noms de champs
+
+    Returns:
+        Extraction compacte (les champs sans clé courte gardent leur nom)
+    """
+    return {
+        COMPACT_KEYS.get(field, field): value for field, value in data.items() if value is not None
+    }
+
+
+def expand(data: dict[str, Any], schema: type[BaseModel]) -> dict[str, Any]:
+    """
+    Remet une réponse compacte sous les noms de champs d'un schéma.
+
+    Une clé qui n'est pas une clé courte du schéma (réponse déjà sous les noms de
+    champs, par exemple) est conservée telle quelle.
+
+    Args:
+        data: Réponse du modèle
+        schema: Schéma d'extraction attendu
+
+    Returns:
+        Dictionnaire prêt pour `schema(**...)`
+    """
+    fields = {short: field for field, short in compact_keys(schema).items()}
+    return {fields.get(key, key): value for key, value in data.items()}
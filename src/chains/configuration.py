@@ -64,7 +64,47 @@ class Configuration:
         """Nombre maximum de tokens en sortie."""
         return int(os.getenv("VAR_LLM_MAX_OUTPUT_TOKEN", "4096"))
 
+    @property
+    def max_concurrent_documents(self) -> int:
+        """Nombre maximum de documents traités en parallèle dans un dossier."""
+        return int(os.getenv("VAR_KYC_MAX_CONCURRENCE", "4"))
+
+    @property
+    def result_store_path(self) -> Path | None:
+        """Chemin du store SQLite des résultats (désactivé si non renseigné)."""
+        value = os.getenv("VAR_KYC_STORE_PATH", "")
+        return Path(value) if value else None
+
+    @property
+    def budget_ledger_path(self) -> Path | None:
+        """Registre SQLite des dépenses partagé entre processus (en mémoire si non renseigné)."""
+        value = os.getenv("VAR_KYC_BUDGET_PATH", "")
+        return Path(value) if value else None
+
+    @property
+    def trace_path(self) -> Path | None:
+        """Fichier de trace Chrome Trace Event (tracing désactivé si non renseigné)."""
+        value = os.getenv("VAR_KYC_TRACE_PATH", "")
+        return Path(value) if value else None
+
+    @property
+    def events_path(self) -> Path | None:
+        """Fichier JSON lines des événements (désactivé si non renseigné)."""
+        value = os.getenv("VAR_KYC_EVENTS_PATH", "")
+        return Path(value) if value else None
+
+    @property
+    def log_level(self) -> str:
+        """Niveau minimum des événements émis (DEBUG, INFO, WARNING, ERROR)."""
+        return os.getenv("VAR_KYC_LOG_LEVEL", "INFO").upper()
+
+    @property
+    def quiet(self) -> bool:
+        """Mode silencieux : la console n'affiche que les avertissements et erreurs."""
+        return os.getenv("VAR_KYC_QUIET", "").lower() in ("1", "true", "oui")
+
     # Token pricing (USD per 1M tokens) - Gemini 2.5 Flash
+    # (tarif par défaut des modèles absents de `model_pricing`)
     INPUT_TOKEN_PRICE_PER_MILLION: float = 0.15
     OUTPUT_TOKEN_PRICE_PER_MILLION: float = 0.60
 
@@ -78,6 +118,112 @@ class Configuration:
         """Règles métier."""
         return self._config["business_rules"]
 
+    @property
+    def service(self) -> dict[str, Any]:
+        """Paramètres du service HTTP (taille de file, workers, deadline, taille max)."""
+        return self._config["service"]
+
+    @property
+    def job_queue(self) -> dict[str, Any]:
+        """Paramètres de la file de travaux (bail, tentatives, backoff)."""
+        return self._config["job_queue"]
+
+    @property
+    def ingestion(self) -> dict[str, Any]:
+        """Limites d'ingestion (octets en vol, taille maximale, réduction des images)."""
+        return self._config["ingestion"]
+
+    @property
+    def text_layer(self) -> dict[str, Any]:
+        """
+        Extraction des PDF natifs par leur couche texte (types concernés, seuils de qualité).
+
+        `VAR_KYC_COUCHE_TEXTE` (0 ou 1) remplace `enabled`, par exemple pour comparer
+        les deux chemins sur le golden dataset.
+        """
+        settings = dict(self._config["text_layer"])
+        value = os.getenv("VAR_KYC_COUCHE_TEXTE", "")
+        if value:
+            settings["enabled"] = value.lower() in ("1", "true", "oui")
+        return settings
+
+    @property
+    def compact_output(self) -> dict[str, Any]:
+        """
+        Sortie JSON compacte des extractions (clés courtes), par type de document.
+
+        `VAR_KYC_SORTIE_COMPACTE` (0 ou 1) remplace `enabled`.
+        """
+        settings = dict(self._config["compact_output"])
+        value = os.getenv("VAR_KYC_SORTIE_COMPACTE", "")
+        if value:
+            settings["enabled"] = value.lower() in ("1", "true", "oui")
+        return settings
+
+    @property
+    def partial_extraction(self) -> dict[str, Any]:
+        """
+        Reprise partielle d'une extraction rejetée par son schéma (`max_rounds` relances
+        pour les seuls champs invalides, 0 pour refaire directement l'extraction entière).
+        """
+        return self._config["partial_extraction"]
+
+    @property
+    def prompt_versions(self) -> dict[str, str]:
+        """
+        Version de prompt choisie par étape (section `prompts`, v1 pour les étapes absentes).
+
+        `VAR_KYC_PROMPTS` (par exemple `extraction.rib=v2,classification=v2`) complète
+        ou remplace la configuration, pour comparer deux versions sans la modifier.
+        """
+        versions = dict(self._config["prompts"])
+        for item in os.getenv("VAR_KYC_PROMPTS", "").split(","):
+            if item.strip():
+                key, _, version = item.partition("=")
+                versions[key.strip()] = version.strip()
+        return versions
+
+    @property
+    def routing(self) -> dict[str, dict[str, str]]:
+        """Table de routage des modèles par étape puis par type de document."""
+        return self._config["routing"]
+
+    @property
+    def escalation(self) -> dict[str, Any]:
+        """Politique d'escalade (seuil de confiance et modèle plus fort par étape)."""
+        return self._config["escalation"]
+
+    @property
+    def budget(self) -> dict[str, Any]:
+        """Plafonds de dépense (USD, null = illimité) et estimations par défaut."""
+        return self._config["budget"]
+
+    @property
+    def model_pricing(self) -> dict[str, dict[str, float]]:
+        """Tarifs par modèle (USD par million de tokens, clés `input` et `output`)."""
+        return self._config["model_pricing"]
+
+    def token_cost(self, model_name: str, token_usage: dict[str, int]) -> float:
+        """
+        Coût en USD d'un appel.
+
+        Les modèles absents de `model_pricing` utilisent le tarif par défaut.
+
+        Args:
+            model_name: Modèle appelé
+            token_usage: Tokens consommés (input_tokens, output_tokens)
+
+        Returns:
+            Coût en USD
+        """
+        pricing = self.model_pricing.get(model_name, {})
+        input_price = pricing.get("input", self.INPUT_TOKEN_PRICE_PER_MILLION)
+        output_price = pricing.get("output", self.OUTPUT_TOKEN_PRICE_PER_MILLION)
+        return (
+            token_usage.get("input_tokens", 0) / 1_000_000 * input_price
+            + token_usage.get("output_tokens", 0) / 1_000_000 * output_price
+        )
+
     def get_rule(self, rule_name: str) -> Any:
         """
         Récupère une règle métier spécifique.
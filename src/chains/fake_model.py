@@ -0,0 +1,260 @@
+"""
+Backend de modèle factice pour les tests de charge et l'exécution hors ligne.
+
+Expose la même interface que `GenerativeModel.generate_content` et retourne du
+JSON conforme aux schémas KYC, avec une latence (et sa distribution), un taux
+d'erreur et des nombres de tokens configurables.
+Le type du document est lu dans son contenu (marqueur `KYC-FAKE:<type>`), ou
+dans le prompt quand seule la couche texte du PDF est envoyée ; pour la
+segmentation, chaque marqueur compte pour une page.
+"""
+
+import hashlib
+import json
+import math
+import random
+import re
+import time
+from dataclasses import dataclass
+from datetime import date, timedelta
+
+from chains.compact_output import compact
+from chains.schemas import TypeDocument
+
+FAKE_DOCUMENT_MARKER = b"KYC-FAKE:"
+FAKE_DOCUMENT_PATTERN = re.compile(re.escape(FAKE_DOCUMENT_MARKER) + rb"([a-z_]+)")
+# Champ demandé par un prompt de reprise partielle
+REPAIR_FIELD_PATTERN = re.compile(r"^- ([a-z0-9_]+):", re.MULTILINE)
+
+# Distributions de latence : `latency_s` en est toujours la moyenne
+LATENCY_DISTRIBUTIONS = ("constant", "uniform", "exponential", "lognormal")
+
+
+class FakeModelError(RuntimeError):
+    """Erreur simulée d'appel au modèle."""
+
+
+@dataclass
+class FakeUsageMetadata:
+    """Équivalent de `usage_metadata` d'une réponse Vertex AI."""
+
+    prompt_token_count: int
+    candidates_token_count: int
+    total_token_count: int
+
+
+@dataclass
+class FakeResponse:
+    """Équivalent d'une réponse `generate_content`."""
+
+    text: str
+    usage_metadata: FakeUsageMetadata
+
+
+def sample_payload(type_document: TypeDocument) -> dict:
+    """
+    Retourne une extraction valide pour un type de document.
+
+    Args:
+        type_document: Type de document
+
+    Returns:
+        Dictionnaire JSON conforme au schéma d'extraction du type
+    """
+    today = date.today()
+    identite = {
+        "nom": "MARTIN",
+        "prenom": "Jean",
+        "sexe": "M",
+        "date_naissance": "1990-05-15",
+        "lieu_naissance": "Paris (75)",
+        "nationalite": "FRA",
+        "date_emission": (today - timedelta(days=365)).isoformat(),
+        "date_expiration": (today + timedelta(days=3650)).isoformat(),
+    }
+    payloads = {
+        TypeDocument.CARTE_IDENTITE: {**identite, "numero_document": "123456789012"},
+        TypeDocument.PASSEPORT: {**identite, "numero_passeport": "24AX12345"},
+        TypeDocument.PERMIS_CONDUIRE: {
+            **identite,
+            "numero_permis": "123456789012",
+            "categories": ["B"],
+        },
+        TypeDocument.JUSTIFICATIF_DOMICILE: {
+            "type_document": "utility_bill",
+            "date_document": (today - timedelta(days=15)).isoformat(),
+            "nom_complet": "Jean MARTIN",
+            "adresse_ligne1": "10 rue de la Paix",
+            "code_postal": "75001",
+            "ville": "Paris",
+            "emetteur": "EDF",
+        },
+        TypeDocument.RIB: {
+            "nom_titulaire": "MARTIN",
+            "iban": "FR7610278060740002014820115",
+            "bic": "BNPAFRPP",
+            "nom_banque": "BNP Paribas",
+        },
+    }
+    return payloads[type_document]
+
+
+def fake_document_bytes(type_document: TypeDocument, padding: int = 0) -> bytes:
+    """
+    Génère le contenu d'un document synthétique reconnu par `FakeGenerativeModel`.
+
+    Args:
+        type_document: Type de document simulé
+        padding: Nombre d'octets de remplissage (pour simuler la taille d'un scan)
+
+    Returns:
+        Contenu binaire du document
+    """
+    return FAKE_DOCUMENT_MARKER + type_document.value.encode() + b"\n" + b"\0" * padding
+
+
+def _document_type(data: bytes) -> TypeDocument:
+    match = FAKE_DOCUMENT_PATTERN.search(data)
+    if match:
+        return TypeDocument(match.group(1).decode())
+    # Document réel : type déterministe dérivé du contenu
+    types = list(TypeDocument)
+    return types[hashlib.sha256(data).digest()[0] % len(types)]
+
+
+def _page_types(data: bytes) -> list[TypeDocument]:
+    """Type de chaque page d'un document synthétique multi-documents (un marqueur par page)."""
+    return [TypeDocument(value.decode()) for value in FAKE_DOCUMENT_PATTERN.findall(data)]
+
+
+def _segments(page_types: list[TypeDocument], confidence: float) -> list[dict]:
+    """Regroupe les pages consécutives de même type en documents."""
+    segments: list[dict] = []
+    for page, type_document in enumerate(page_types, start=1):
+        if segments and segments[-1]["type_detecte"] == type_document.value:
+            segments[-1]["pages"].append(page)
+        else:
+            segments.append(
+                {"type_detecte": type_document.value, "pages": [page], "confiance": confidence}
+            )
+    return segments
+
+
+class FakeGenerativeModel:
+    """Modèle factice compatible avec `GenerativeModel.generate_content`."""
+
+    def __init__(
+        self,
+        latency_s: float = 0.0,
+        error_rate: float = 0.0,
+        input_tokens: int = 1300,
+        output_tokens: int = 150,
+        confidence: float = 0.95,
+        seed: int | None = None,
+        latency_distribution: str = "constant",
+        latency_sigma: float = 0.5,
+        token_jitter: float = 0.0,
+    ):
+        """
+        Initialise le modèle factice.
+
+        Args:
+            latency_s: Latence moyenne simulée par appel en secondes
+            error_rate: Probabilité d'échec d'un appel (0-1)
+            input_tokens: Tokens d'entrée annoncés par appel (en moyenne)
+            output_tokens: Tokens de sortie annoncés par appel (en moyenne)
+            confidence: Confiance annoncée par la classification
+            seed: Graine du générateur aléatoire (reproductibilité)
+            latency_distribution: Distribution de la latence (voir `LATENCY_DISTRIBUTIONS`)
+            latency_sigma: Écart-type du logarithme de la latence (distribution lognormale)
+            token_jitter: Variation relative maximale des tokens annoncés (0-1)
+
+        Raises:
+            ValueError: Si la distribution de latence est inconnue
+        """
+        if latency_distribution not in LATENCY_DISTRIBUTIONS:
+            raise ValueError(
+                f"Distribution de latence inconnue: {latency_distribution} "
+                f"(attendu: {', '.join(LATENCY_DISTRIBUTIONS)})"
+            )
+        self.latency_s = latency_s
+        self.error_rate = error_rate
+        self.input_tokens = input_tokens
+        self.output_tokens = output_tokens
+        self.confidence = confidence
+        self.latency_distribution = latency_distribution
+        self.latency_sigma = latency_sigma
+        self.token_jitter = token_jitter
+        self._random = random.Random(seed)
+
+    def sample_latency(self) -> float:
+        """Tire la latence d'un appel selon la distribution configurée."""
+        if self.latency_s <= 0:
+            return 0.0
+        if self.latency_distribution == "uniform":
+            return self._random.uniform(0.0, 2 * self.latency_s)
+        if self.latency_distribution == "exponential":
+            return self._random.expovariate(1 / self.latency_s)
+        if self.latency_distribution == "lognormal":
+            # mu choisi pour que la moyenne reste `latency_s` ; la queue s'allonge avec sigma
+            mu = math.log(self.latency_s) - self.latency_sigma**2 / 2
+            return self._random.lognormvariate(mu, self.latency_sigma)
+        return self.latency_s
+
+    def _sample_tokens(self, tokens: int) -> int:
+        if self.token_jitter <= 0:
+            return tokens
+        return max(0, round(tokens * (1 + self._random.uniform(-1, 1) * self.token_jitter)))
+
+    def generate_content(self, contents: list, generation_config=None) -> FakeResponse:
+        """
+        Simule un appel au modèle.
+
+        Args:
+            contents: Prompt (str) suivi des parties binaires du document
+            generation_config: Ignoré
+
+        Returns:
+            Réponse factice avec texte JSON et métadonnées d'usage
+
+        Raises:
+            FakeModelError: Selon le taux d'erreur configuré
+        """
+        time.sleep(self.sample_latency())
+        if self._random.random() < self.error_rate:
+            raise FakeModelError("Erreur simulée du modèle")
+
+        prompt = next(content for content in contents if isinstance(content, str))
+        data = b"".join(
+            content.inline_data.data for content in contents if not isinstance(content, str)
+        )
+        input_tokens = self._sample_tokens(self.input_tokens)
+        if not data:
+            # Prompt seul (couche texte d'un PDF) : le document est lu dans le prompt et
+            # les tokens d'entrée sont ceux du texte (environ 4 caractères par token)
+            data = prompt.encode()
+            input_tokens = len(prompt) // 4
+        type_document = _document_type(data)
+
+        if '"documents"' in prompt:
+            payload = {"documents": _segments(_page_types(data), self.confidence)}
+        elif "type_detecte" in prompt:
+            payload = {"type_detecte": type_document.value, "confiance": self.confidence}
+        elif "REPRISE PARTIELLE" in prompt:
+            # Seuls les champs listés dans le prompt (`- champ: description`)
+            fields = set(REPAIR_FIELD_PATTERN.findall(prompt))
+            payload = {k: v for k, v in sample_payload(type_document).items() if k in fields}
+        elif "FORMAT DE SORTIE COMPACT" in prompt:
+            payload = compact(sample_payload(type_document))
+        else:
+            payload = sample_payload(type_document)
+
+        output_tokens = self._sample_tokens(self.output_tokens)
+        return FakeResponse(
+            text=json.dumps(payload),
+            usage_metadata=FakeUsageMetadata(
+                prompt_token_count=input_tokens,
+                candidates_token_count=output_tokens,
+                total_token_count=input_tokens + output_tokens,
+            ),
+        )
@@ -0,0 +1,133 @@
+"""
+Lecture tolérante du JSON retourné par le modèle.
+
+Une réponse peut être coupée par `max_output_tokens`, entourée d'un bloc de code
+markdown ou suivie d'un commentaire : `json.loads` la rejette alors en entier et
+toute l'extraction est refaite. `parse_model_json` récupère l'objet utile et
+liste ce qu'il a réparé ; les champs perdus par une coupure sont ensuite repris
+par la reprise partielle de la chain.
+
+Usage:
+    parsed = parse_model_json(response.text)
+    parsed.data, parsed.repairs
+"""
+
+import json
+import re
+from dataclasses import dataclass, field
+from typing import Any
+
+# Bloc de code markdown (```json ... ```), fermeture absente si la réponse est coupée
+_FENCE_PATTERN = re.compile(r"^```[a-zA-Z]*\s*\n?(.*?)(?:\n?```\s*)?$", re.DOTALL)
+_CLOSERS = {"{": "}", "[": "]"}
+_DECODER = json.JSONDecoder()
+
+
+@dataclass
+class ParsedJSON:
+    """Objet JSON lu dans une réponse, avec les réparations appliquées."""
+
+    data: dict[str, Any]
+    repairs: list[str] = field(default_factory=list)
+
+
+def _cut_points(text: str) -> list[tuple[int, str]]:
+    """
+    Positions où le JSON peut être coupé puis refermé, de la plus tardive à la plus précoce.
+
+    Une position suit une valeur complète (objet ou tableau fermé) ou précède une
+    virgule hors chaîne, au niveau des champs de l'objet (ou des objets d'un tableau
+    racine) : un champ coupé est perdu en entier, jamais gardé tronqué (une liste
+    réduite à ses premiers éléments passerait la validation). La fermeture associée
+    referme les conteneurs ouverts.
+    """
+    points = []
+    stack: list[str] = []
+    # Profondeur des champs de l'objet : 1, ou 2 dans un tableau racine
+    field_depth = 2 if text.startswith("[") else 1
+    in_string = escaped = False
+    for index, char in enumerate(text):
+        if in_string:
+            if escaped:
+                escaped = False
+            elif char == "\\":
+                escaped = True
+            elif char == '"':
+                in_string = False
+        elif char == '"':
+            in_string = True
+        elif char in _CLOSERS:
+            stack.append(_CLOSERS[char])
+        elif char in "}]" and stack:
+            stack.pop()
+            if 0 < len(stack) <= field_depth:
+                points.append((index + 1, "".join(reversed(stack))))
+        elif char == "," and 0 < len(stack) <= field_depth:
+            points.append((index, "".join(reversed(stack))))
+    return points[::-1]
+
+
+def _truncated(text: str) -> Any | None:
+    """Valeur JSON la plus longue qu'on obtient en coupant puis refermant `text`."""
+    for end, closers in _cut_points(text):
+        try:
+            return json.loads(text[:end] + closers)
+        except json.JSONDecodeError:
+            continue
+    return None
+
+
+def parse_model_json(text: str) -> ParsedJSON:
+    """
+    Lit l'objet JSON d'une réponse du modèle, en réparant ce qui peut l'être.
+
+    Réparations, dans l'ordre :
+    - bloc de code markdown retiré ;
+    - texte avant ou après le JSON ignoré ;
+    - JSON coupé refermé après son dernier champ complet ;
+    - tableau ramené à son premier objet (les autres sont signalés).
+
+    Args:
+        text: Texte de la réponse
+
+    Returns:
+        Objet lu et liste des réparations (vide pour un JSON déjà conforme)
+
+    Raises:
+        json.JSONDecodeError: Si aucun objet JSON ne peut être récupéré
+    """
+    repairs = []
+    stripped = text.strip()
+    fence = _FENCE_PATTERN.match(stripped)
+    if fence:
+        stripped = fence.group(1).strip()
+        repairs.append("bloc de code retiré")
+
+    try:
+        data = json.loads(stripped)
+    except json.JSONDecodeError as error:
+        start = min((i for i in (stripped.find("{"), stripped.find("[")) if i >= 0), default=-1)
+        if start < 0:
+            raise error
+        if start > 0:
+            repairs.append("texte avant le JSON ignoré")
+        try:
+            data, end = _DECODER.raw_decode(stripped, start)
+            if stripped[end:].strip():
+                repairs.append("texte après le JSON ignoré")
+        except json.JSONDecodeError:
+            data = _truncated(stripped[start:])
+            if data is None:
+                raise error from None
+            repairs.append("JSON tronqué refermé après le dernier champ complet")
+
+    if isinstance(data, list):
+        objects = [item for item in data if isinstance(item, dict)]
+        if not objects:
+            raise json.JSONDecodeError("Aucun objet JSON dans le tableau", stripped, 0)
+        if len(data) > 1:
+            repairs.append(f"tableau de {len(data)} éléments, premier objet retenu")
+        data = objects[0]
+    if not isinstance(data, dict):
+        raise json.JSONDecodeError("Objet JSON attendu", stripped, 0)
+    return ParsedJSON(data=data, repairs=repairs)
@@ -4,22 +4,24 @@ Chain LLM pour classification et extraction de documents KYC.
 Utilise Vertex AI Gemini avec extraction structurée via Pydantic.
 """
 
+import hashlib
 import json
+import logging
 import time
+from contextvars import ContextVar
+from dataclasses import dataclass, field
 from pathlib import Path
+from typing import TYPE_CHECKING, Any
 
-import vertexai
-from vertexai.generative_models import GenerationConfig, GenerativeModel, Part
+from pydantic import BaseModel, ValidationError
 
+from chains.budget import BudgetError, BudgetManager
+from chains.compact_output import compact_instructions, expand
 from chains.configuration import Configuration
-from chains.prompts import (
-    PROMPT_CLASSIFICATION,
-    PROMPT_EXTRACTION_CNI,
-    PROMPT_EXTRACTION_JUSTIFICATIF,
-    PROMPT_EXTRACTION_PASSEPORT,
-    PROMPT_EXTRACTION_PERMIS,
-    PROMPT_EXTRACTION_RIB,
-)
+from chains.json_repair import parse_model_json
+from chains.model_registry import ModelClient, get_model_client
+from chains.prompt_registry import PromptRegistry, prompt_key
+from chains.routing import ModelRouter, Stage
 from chains.schemas import (
     RIB,
     CarteIdentite,
@@ -28,8 +30,99 @@ from chains.schemas import (
     Passeport,
     PermisConduire,
     ResultatExtractionKYC,
+    SegmentationDocument,
     TypeDocument,
 )
+from chains.schemas.field_checks import check_fields, field_warnings
+from utils.events import emit
+from utils.files import file_sha256
+from utils.ingestion import DocumentIngestor, LoadedDocument
+from utils.pdf import extract_text, usable_text
+from utils.tracing import span
+
+if TYPE_CHECKING:
+    from vertexai.generative_models import Part
+
+# Schéma et libellé de log de l'extraction de chaque type de document (le prompt
+# vient du registre, selon la version configurée)
+EXTRACTION_SPECS: dict[TypeDocument, tuple[type[BaseModel], str]] = {
+    TypeDocument.CARTE_IDENTITE: (CarteIdentite, "Extraction CNI"),
+    TypeDocument.PASSEPORT: (Passeport, "Extraction Passeport"),
+    TypeDocument.PERMIS_CONDUIRE: (PermisConduire, "Extraction Permis"),
+    TypeDocument.JUSTIFICATIF_DOMICILE: (JustificatifDomicile, "Extraction Justificatif"),
+    TypeDocument.RIB: (RIB, "Extraction RIB"),
+}
+
+# Champ de `ResultatExtractionKYC` qui reçoit l'extraction de chaque type
+RESULT_FIELDS: dict[TypeDocument, str] = {
+    TypeDocument.CARTE_IDENTITE: "carte_identite",
+    TypeDocument.PASSEPORT: "passeport",
+    TypeDocument.PERMIS_CONDUIRE: "permis_conduire",
+    TypeDocument.JUSTIFICATIF_DOMICILE: "justificatif_domicile",
+    TypeDocument.RIB: "rib",
+}
+
+
+@dataclass
+class StageResult:
+    """Résultat d'une étape (classification ou extraction), tentatives cumulées."""
+
+    value: BaseModel | None
+    token_usage: dict[str, int] | None
+    model: str
+    cost: float
+    escalated: bool = False
+    error: Exception | None = None
+    duration_s: float = 0.0
+    # Réponse obtenue à partir de la couche texte du PDF (sans le document)
+    text_layer: bool = False
+    # Version du prompt de la tentative retenue (`clé@version`)
+    prompt: str | None = None
+    # Réponse sans ses champs rejetés (schéma ou format) et motif de chaque rejet,
+    # base d'une reprise partielle
+    partial: dict[str, Any] | None = None
+    rejected: dict[str, str] | None = None
+    # Relances de reprise partielle faites sur la tentative retenue
+    repairs: int = 0
+    # Réparations appliquées au JSON des réponses (bloc de code, coupure, ...)
+    json_repairs: list[str] = field(default_factory=list)
+
+
+@dataclass
+class _DocumentSpend:
+    """Coût et tokens des appels faits pour un document, tentatives rejetées comprises."""
+
+    cost: float = 0.0
+    token_usage: dict[str, int] | None = None
+
+
+# Dépense du document en cours de traitement (voir `KYCDocumentChain.process_document`)
+_DOCUMENT_SPEND: ContextVar[_DocumentSpend | None] = ContextVar("document_spend", default=None)
+
+
+def _sum_token_usage(*usages: dict[str, int] | None) -> dict[str, int] | None:
+    """Somme des tokens de plusieurs appels (None si aucun n'en rapporte)."""
+    usages = [usage for usage in usages if usage]
+    if not usages:
+        return None
+    return {key: sum(usage.get(key, 0) for usage in usages) for key in usages[0]}
+
+
+def _rejected_fields(error: ValidationError, schema: type[BaseModel]) -> dict[str, str] | None:
+    """
+    Champs rejetés par la validation d'un schéma.
+
+    Returns:
+        Message d'erreur de chaque champ absent ou invalide, ou None si une erreur
+        porte sur le document entier (validateur de modèle) : elle ne se corrige pas
+        champ par champ
+    """
+    rejected = {}
+    for detail in error.errors():
+        if not detail["loc"] or detail["loc"][0] not in schema.model_fields:
+            return None
+        rejected[detail["loc"][0]] = detail["msg"]
+    return rejected
 
 
 class KYCDocumentChain:
@@ -42,54 +135,73 @@ class KYCDocumentChain:
     3. Validation des règles métier
     """
 
-    def __init__(self, config: Configuration | None = None):
+    def __init__(self, config: Configuration | None = None, model=None):
         """
         Initialise la chain.
 
         Args:
             config: Configuration (si None, charge depuis config.json)
+            model: Modèle compatible `generate_content` (si None, modèle Vertex AI ;
+                ex: `FakeGenerativeModel` pour les tests de charge)
         """
         self.config = config or Configuration()
+        self.router = ModelRouter(self.config)
+        self.budget = BudgetManager(self.config)
+        self.ingestor = DocumentIngestor(self.config.ingestion)
+        self.prompts = PromptRegistry(self.config.prompt_versions)
+        self._model = model
+        self.reuse_key = self._reuse_key()
+
+    def _reuse_key(self) -> str:
+        """
+        Empreinte courte des prompts et des modèles qui produisent un résultat.
 
-        # Initialiser Vertex AI
-        vertexai.init(project=self.config.project_id, location=self.config.location)
+        Un résultat stocké (store ou manifest) n'est réutilisé que sous la même clé :
+        changer un prompt (version ou texte), le routage ou l'escalade fait
+        réextraire les documents déjà vus.
+        """
+        settings = {
+            "prompts": self.prompts.fingerprint(),
+            "modele": self.config.model,
+            "routage": self.config.routing,
+            "escalade": self.config.escalation,
+        }
+        return hashlib.sha256(json.dumps(settings, sort_keys=True).encode()).hexdigest()[:12]
 
-        # Créer le modèle
-        self.model = GenerativeModel(self.config.model)
+    def _client(self, model_name: str | None = None) -> ModelClient:
+        """
+        Client de modèle à utiliser pour un appel.
 
-        # Configuration de génération
-        self.generation_config = GenerationConfig(
-            temperature=self.config.temperature,
-            max_output_tokens=self.config.max_output_tokens,
-            response_mime_type="application/json",
-        )
+        Le client Vertex AI vient du registre partagé par le processus : construire
+        une chain ne crée ni connexion ni modèle, et `vertexai.init` n'est appelé
+        qu'au premier appel du processus. Un modèle injecté sert toutes les routes.
 
-    def _load_image(self, image_path: str | Path) -> Part:
+        Args:
+            model_name: Modèle choisi par le routeur (si None, `config.model`)
         """
-        Charge une image pour l'envoyer au modèle.
+        if self._model is not None:
+            return ModelClient(model=self._model, generation_config=None)
+        return get_model_client(self.config, model_name)
 
-        Args:
-            image_path: Chemin vers l'image
+    @property
+    def model(self):
+        """Modèle utilisé par la chain."""
+        return self._client().model
 
-        Returns:
-            Part contenant l'image encodée
+    def _encode(self, document: LoadedDocument) -> "Part":
         """
-        image_path = Path(image_path)
+        Encode un document lu par l'ingestion pour l'envoyer au modèle.
 
-        with open(image_path, "rb") as f:
-            image_bytes = f.read()
+        Args:
+            document: Contenu et type MIME du document
 
-        # Déterminer le MIME type
-        suffix = image_path.suffix.lower()
-        mime_types = {
-            ".jpg": "image/jpeg",
-            ".jpeg": "image/jpeg",
-            ".png": "image/png",
-            ".pdf": "application/pdf",
-        }
-        mime_type = mime_types.get(suffix, "image/jpeg")
+        Returns:
+            Part contenant le document encodé
+        """
+        from vertexai.generative_models import Part
 
-        return Part.from_data(data=image_bytes, mime_type=mime_type)
+        with span("encodage", octets=len(document.data)):
+            return Part.from_data(data=document.data, mime_type=document.mime_type)
 
     def _extract_token_usage(self, response) -> dict[str, int] | None:
         """
@@ -123,36 +235,412 @@ class KYCDocumentChain:
                     "total_tokens": total_tok,
                     "overhead_tokens": overhead,
                 }
-        except Exception as e:
-            print(f"   ⚠️  Impossible d'extraire les statistiques de tokens: {e}")
+        except (AttributeError, TypeError) as e:
+            # Métadonnées d'usage incomplètes du SDK (attribut absent ou compteur à None)
+            emit("tokens.indisponibles", logging.WARNING, erreur=str(e))
         return None
 
-    def _log_token_usage(self, document_type: str, token_usage: dict):
-        """Log les statistiques de tokens pour un document."""
+    def _log_token_usage(self, document_type: str, token_usage: dict, total_cost: float):
+        """Log les statistiques de tokens et le coût (au tarif du modèle routé) d'un appel."""
         if not token_usage:
             return
 
-        input_tok = token_usage.get("input_tokens", 0)
-        output_tok = token_usage.get("output_tokens", 0)
-        total_tok = token_usage.get("total_tokens", 0)
-        overhead_tok = token_usage.get("overhead_tokens", 0)
-
-        # Calculer le coût
-        input_cost = (input_tok / 1_000_000) * self.config.INPUT_TOKEN_PRICE_PER_MILLION
-        output_cost = (output_tok / 1_000_000) * self.config.OUTPUT_TOKEN_PRICE_PER_MILLION
-        total_cost = input_cost + output_cost
-
-        if overhead_tok > 0:
-            print(
-                f"   💰 Tokens {document_type}: "
-                f"input={input_tok}, output={output_tok}, total={total_tok} "
-                f"(overhead: {overhead_tok}) | Coût: ${total_cost:.6f}"
-            )
+        emit(
+            "appel.tokens",
+            etape=document_type,
+            input_tokens=token_usage.get("input_tokens", 0),
+            output_tokens=token_usage.get("output_tokens", 0),
+            total_tokens=token_usage.get("total_tokens", 0),
+            overhead_tokens=token_usage.get("overhead_tokens", 0),
+            cout_usd=total_cost,
+        )
+
+    def _generate(
+        self,
+        stage: Stage,
+        type_document: TypeDocument | None,
+        model_name: str,
+        prompt: str,
+        image_path: str | Path,
+        label: str,
+        text: str | None = None,
+        prompt_version: str | None = None,
+        downsample: bool = True,
+    ) -> tuple[str, dict | None, float]:
+        """
+        Appelle un modèle pour une étape.
+
+        Args:
+            stage: Étape (classification ou extraction)
+            type_document: Type de document (None pour la classification)
+            model_name: Modèle à appeler
+            prompt: Prompt de l'étape
+            image_path: Chemin vers l'image du document
+            label: Libellé pour les logs de tokens
+            text: Si fourni, le prompt contient déjà le texte du document et le
+                document n'est ni lu ni envoyé
+            prompt_version: Version du prompt (`clé@version`) pour les statistiques de route
+            downsample: Réduire une image volumineuse (voir `DocumentIngestor.load`)
+
+        Returns:
+            Tuple (texte de la réponse, token_usage, coût en USD)
+
+        Raises:
+            BudgetError: Si l'appel dépasserait un plafond de dépense
+            DocumentTooLargeError: Si le document dépasse la taille maximale
+        """
+        # Contrôle d'admission : coût estimé réservé avant l'appel
+        reservation = self.budget.admit(stage, type_document, model_name, image_path)
+        client = self._client(model_name)
+        try:
+            route = (stage, type_document, model_name, prompt_version)
+            if text is not None:
+                response, latency = self._call(client, route, [prompt])
+            else:
+                # Le document reste compté dans les octets en vol jusqu'à la fin de l'appel
+                with self.ingestor.load(image_path, downsample) as document:
+                    contents = [prompt, self._encode(document)]
+                    response, latency = self._call(client, route, contents)
+        except Exception:
+            self.budget.release(reservation)
+            raise
+
+        # Extraire les tokens
+        token_usage = self._extract_token_usage(response)
+        cost = self.router.record(
+            stage, type_document, model_name, latency, token_usage, prompt_version
+        )
+        self.budget.settle(reservation, cost, token_usage)
+        spend = _DOCUMENT_SPEND.get()
+        if spend is not None:
+            spend.cost += cost
+            spend.token_usage = _sum_token_usage(spend.token_usage, token_usage)
+        if token_usage:
+            self._log_token_usage(label, token_usage, cost)
+        return response.text, token_usage, cost
+
+    def _call(self, client: ModelClient, route: tuple, contents: list) -> tuple[Any, float]:
+        """
+        Appel au modèle chronométré ; un échec est compté dans les statistiques de la route.
+
+        Args:
+            client: Client du modèle
+            route: Tuple (étape, type de document, modèle, version du prompt)
+            contents: Prompt, suivi du document s'il est envoyé
+        """
+        stage, _, model_name, _ = route
+        start = time.perf_counter()
+        try:
+            with span("appel_modele", etape=stage.value, modele=model_name):
+                response = client.model.generate_content(
+                    contents, generation_config=client.generation_config
+                )
+        except Exception:
+            self.router.record_error(*route)
+            raise
+        return response, time.perf_counter() - start
+
+    def _text_layer(self, type_document: TypeDocument, image_path: str | Path) -> str | None:
+        """
+        Texte d'un PDF natif, s'il suffit à extraire le document sans son image.
+
+        Seuls les types de `text_layer.document_types` sont concernés (factures, avis
+        d'impôt, RIB édités par la banque) : leur texte coûte une fraction des tokens
+        d'une page envoyée en image.
+
+        Returns:
+            Texte du PDF, ou None pour envoyer le document
+        """
+        settings = self.config.text_layer
+        path = Path(image_path)
+        if (
+            not settings["enabled"]
+            or type_document.value not in settings["document_types"]
+            or path.suffix.lower() != ".pdf"
+            or path.stat().st_size > self.config.ingestion["max_file_bytes"]
+        ):
+            return None
+        with span("couche_texte", fichier=path.name):
+            text = extract_text(path, settings["max_pages"])
+        if text is None or not usable_text(
+            text, settings["min_chars"], settings["min_alnum_ratio"]
+        ):
+            return None
+        emit("extraction.texte", fichier=str(image_path), caracteres=len(text))
+        return text
+
+    def _compact_output(self, type_document: TypeDocument) -> bool:
+        """Indique si l'extraction d'un type est demandée en JSON compact (clés courtes)."""
+        settings = self.config.compact_output
+        return settings["enabled"] and type_document.value in settings["document_types"]
+
+    def _attempt(
+        self,
+        stage: Stage,
+        type_document: TypeDocument | None,
+        model_name: str,
+        image_path: str | Path,
+        text: str | None = None,
+        downsample: bool = True,
+    ) -> StageResult:
+        """
+        Exécute une tentative d'étape et valide la réponse contre son schéma.
+
+        Une réponse invalide (JSON ou schéma) n'est pas levée mais portée par
+        `StageResult.error`, pour que la politique d'escalade puisse réessayer ;
+        une extraction dont seuls certains champs sont rejetés (schéma ou contrôles
+        de format) garde les autres dans `StageResult.partial`.
+        Avec `text`, le document est remplacé par le texte de son PDF ; avec
+        `downsample=False`, une image n'est réduite que si elle dépasse la taille maximale.
+        """
+        if stage == Stage.CLASSIFICATION:
+            schema, label = ClassificationDocument, "Classification"
+        elif stage == Stage.SEGMENTATION:
+            schema, label = SegmentationDocument, "Segmentation"
         else:
-            print(
-                f"   💰 Tokens {document_type}: "
-                f"input={input_tok}, output={output_tok}, total={total_tok} | Coût: ${total_cost:.6f}"
+            schema, label = EXTRACTION_SPECS[type_document]
+        prompt_version = self.prompts.get(prompt_key(stage, type_document))
+        prompt, version = prompt_version.text, prompt_version.label
+        compact_output = stage == Stage.EXTRACTION and self._compact_output(type_document)
+        if compact_output:
+            wrapper = self.prompts.get("sortie_compacte")
+            prompt = wrapper.text.format(prompt=prompt, cles=compact_instructions(schema))
+            version = f"{version}+{wrapper.label}"
+        if text is not None:
+            wrapper = self.prompts.get("couche_texte")
+            prompt = wrapper.text.format(prompt=prompt, texte=text)
+            version = f"{version}+{wrapper.label}"
+            label = f"{label} (texte)"
+
+        response_text, token_usage, cost = self._generate(
+            stage, type_document, model_name, prompt, image_path, label, text, version, downsample
+        )
+        result = StageResult(
+            value=None,
+            token_usage=token_usage,
+            model=model_name,
+            cost=cost,
+            text_layer=text is not None,
+            prompt=version,
+        )
+        try:
+            result_json = self._parse_response(response_text, result, image_path)
+            if compact_output:
+                result_json = expand(result_json, schema)
+            with span("validation", schema=schema.__name__):
+                result.value = schema(**result_json)
+        except ValidationError as e:
+            result.error = e
+            if stage == Stage.EXTRACTION:
+                self._reject(result, e, schema, result_json)
+        except json.JSONDecodeError as e:
+            result.error = e
+        else:
+            if stage == Stage.EXTRACTION:
+                self._check_fields(type_document, result, result_json)
+        return result
+
+    def _repair(
+        self,
+        type_document: TypeDocument,
+        image_path: str | Path,
+        result: StageResult,
+        text: str | None = None,
+        downsample: bool = True,
+    ) -> StageResult:
+        """
+        Reprend une extraction pour ses seuls champs rejetés.
+
+        Un champ est rejeté par le schéma (absent ou mal typé) ou par les contrôles
+        de format (`chains.schemas.field_checks`). Les autres champs de la réponse
+        sont conservés ; la relance, sur le même modèle et avec le même document (ou
+        le même texte), ne demande que les champs rejetés, puis sa réponse est
+        fusionnée et revalidée. Au plus `partial_extraction.max_rounds` relances :
+        une réponse encore invalide est ensuite traitée par la politique d'escalade,
+        un champ encore hors format reste signalé dans les avertissements.
+
+        Args:
+            type_document: Type du document extrait
+            image_path: Chemin vers l'image du document
+            result: Tentative à reprendre (modifiée sur place)
+            text: Couche texte du PDF si la tentative l'a utilisée
+            downsample: Réduire une image volumineuse, comme pour la tentative reprise
+
+        Returns:
+            La tentative, validée si une relance a suffi (tokens et coût cumulés)
+        """
+        schema, label = EXTRACTION_SPECS[type_document]
+        wrapper = self.prompts.get("reprise_partielle")
+        for _ in range(self.config.partial_extraction["max_rounds"]):
+            if result.partial is None:
+                break
+            rejected = result.rejected
+            champs = "\n".join(
+                f"- {name}: {schema.model_fields[name].description} (erreur: {rejected[name]})"
+                for name in schema.model_fields
+                if name in rejected
             )
+            prompt = wrapper.text.format(schema=schema.__name__, champs=champs)
+            version = wrapper.label
+            if text is not None:
+                text_wrapper = self.prompts.get("couche_texte")
+                prompt = text_wrapper.text.format(prompt=prompt, texte=text)
+                version = f"{version}+{text_wrapper.label}"
+            emit(
+                "extraction.reprise",
+                fichier=str(image_path),
+                type_document=type_document.value,
+                champs=sorted(rejected),
+            )
+
+            response_text, token_usage, cost = self._generate(
+                Stage.EXTRACTION,
+                type_document,
+                result.model,
+                prompt,
+                image_path,
+                f"{label} (reprise)",
+                text,
+                version,
+                downsample,
+            )
+            result.token_usage = _sum_token_usage(result.token_usage, token_usage)
+            result.cost += cost
+            if result.repairs == 0:
+                result.prompt = f"{result.prompt}+{wrapper.label}"
+            result.repairs += 1
+            partial, result.partial, result.rejected = result.partial, None, None
+            try:
+                answer = self._parse_response(response_text, result, image_path)
+                merged = {**partial, **{k: answer[k] for k in rejected if k in answer}}
+                with span("validation", schema=schema.__name__):
+                    value = schema(**merged)
+            except ValidationError as e:
+                # Une extraction déjà valide (champs hors format) garde sa valeur
+                if result.value is None:
+                    result.error = e
+                    self._reject(result, e, schema, merged)
+                continue
+            except json.JSONDecodeError as e:
+                if result.value is None:
+                    result.error = e
+                continue
+            result.value, result.error = value, None
+            self._check_fields(type_document, result, merged)
+        return result
+
+    @staticmethod
+    def _reject(
+        result: StageResult, error: ValidationError, schema: type[BaseModel], data: dict
+    ) -> None:
+        """Garde les champs valides d'une réponse rejetée par le schéma, pour la reprendre."""
+        rejected = _rejected_fields(error, schema)
+        if rejected is not None:
+            result.partial = {k: v for k, v in data.items() if k not in rejected}
+            result.rejected = rejected
+
+    @staticmethod
+    def _check_fields(type_document: TypeDocument, result: StageResult, data: dict) -> None:
+        """Marque à reprendre les champs hors format d'une extraction valide."""
+        issues = check_fields(type_document, vars(result.value))
+        if issues:
+            result.partial = {k: v for k, v in data.items() if k not in issues}
+            result.rejected = issues
+
+    def _parse_response(
+        self, response_text: str, result: StageResult, image_path: str | Path
+    ) -> dict[str, Any]:
+        """
+        Lit l'objet JSON d'une réponse, réparé si besoin (voir `chains.json_repair`).
+
+        Les réparations sont ajoutées à `result.json_repairs` et signalées par un événement.
+
+        Raises:
+            json.JSONDecodeError: Si aucun objet JSON ne peut être récupéré
+        """
+        with span("parse_json", caracteres=len(response_text)):
+            parsed = parse_model_json(response_text)
+        if parsed.repairs:
+            emit("reponse.reparee", fichier=str(image_path), reparations=parsed.repairs)
+            result.json_repairs.extend(parsed.repairs)
+        return parsed.data
+
+    def _escalation_reason(self, result: StageResult) -> str | None:
+        """Motif d'escalade d'une tentative (None si elle est acceptée)."""
+        if result.error is not None:
+            return "réponse invalide"
+        if isinstance(result.value, ClassificationDocument):
+            confiance = result.value.confiance
+            if confiance is not None and confiance < self.router.confidence_threshold:
+                return f"confiance {confiance:.2%}"
+        if isinstance(result.value, SegmentationDocument):
+            if not result.value.documents:
+                return "aucun document trouvé"
+            scores = [d.confiance for d in result.value.documents if d.confiance is not None]
+            if scores and min(scores) < self.router.confidence_threshold:
+                return f"confiance {min(scores):.2%}"
+        return None
+
+    def _run_stage(
+        self, stage: Stage, type_document: TypeDocument | None, image_path: str | Path
+    ) -> StageResult:
+        """
+        Exécute une étape sur le modèle routé, puis l'escalade si nécessaire.
+
+        La première tentative utilise le modèle le moins cher de la route. Elle
+        n'est refaite avec le modèle d'escalade de l'étape que si sa confiance est
+        sous le seuil ou si sa réponse est invalide, après la reprise partielle
+        d'une extraction dont seuls certains champs sont rejetés (la tentative
+        d'escalade a droit à la même reprise). Pour l'extraction d'un PDF natif,
+        la première tentative se contente de sa couche texte ; l'escalade envoie le document.
+
+        Args:
+            stage: Étape (classification ou extraction)
+            type_document: Type de document (None pour la classification)
+            image_path: Chemin vers l'image du document
+
+        Returns:
+            Résultat de l'étape (tokens et coût cumulés sur les tentatives)
+
+        Raises:
+            json.JSONDecodeError, ValidationError: Si la dernière tentative est invalide
+        """
+        model_name = self.router.route(stage, type_document)
+        text = None
+        if stage == Stage.EXTRACTION:
+            text = self._text_layer(type_document, image_path)
+        result = self._attempt(stage, type_document, model_name, image_path, text)
+        if result.partial is not None:
+            result = self._repair(type_document, image_path, result, text)
+
+        reason = self._escalation_reason(result)
+        escalation_model = self.router.escalation_model(stage)
+        escalate = reason is not None and escalation_model not in (None, model_name)
+        self.router.record_decision(stage, escalate)
+
+        retry_model = None
+        if escalate:
+            emit("escalade", etape=stage.value, modele=escalation_model, raison=reason)
+            retry_model = escalation_model
+        elif result.text_layer and result.error is not None:
+            # Couche texte inexploitable : le même modèle reçoit le document
+            retry_model = model_name
+        if retry_model is not None:
+            first = result
+            # Le modèle d'escalade reçoit l'image en pleine résolution
+            result = self._attempt(
+                stage, type_document, retry_model, image_path, downsample=not escalate
+            )
+            if result.partial is not None:
+                result = self._repair(type_document, image_path, result, downsample=not escalate)
+            result.token_usage = _sum_token_usage(first.token_usage, result.token_usage)
+            result.cost += first.cost
+            result.json_repairs = first.json_repairs + result.json_repairs
+            result.escalated = escalate
+
+        if result.error is not None:
+            raise result.error
+        return result
 
     def classify_document(
         self, image_path: str | Path
@@ -166,23 +654,24 @@ class KYCDocumentChain:
         Returns:
             Tuple (Résultat de classification, token_usage)
         """
-        image_part = self._load_image(image_path)
+        result = self._run_stage(Stage.CLASSIFICATION, None, image_path)
+        return result.value, result.token_usage
 
-        response = self.model.generate_content(
-            [PROMPT_CLASSIFICATION, image_part],
-            generation_config=self.generation_config,
-        )
+    def extract(
+        self, image_path: str | Path, type_document: TypeDocument
+    ) -> tuple[BaseModel, dict | None]:
+        """
+        Extrait les données d'un document dont le type est connu.
 
-        # Extraire les tokens
-        token_usage = self._extract_token_usage(response)
-        if token_usage:
-            self._log_token_usage("Classification", token_usage)
+        Args:
+            image_path: Chemin vers l'image
+            type_document: Type du document
 
-        # Parser la réponse JSON (le LLM peut retourner une liste ou un objet)
-        result_json = json.loads(response.text)
-        if isinstance(result_json, list):
-            result_json = result_json[0]
-        return ClassificationDocument(**result_json), token_usage
+        Returns:
+            Tuple (Données structurées selon le schéma du type, token_usage)
+        """
+        result = self._run_stage(Stage.EXTRACTION, type_document, image_path)
+        return result.value, result.token_usage
 
     def extract_cni(self, image_path: str | Path) -> tuple[CarteIdentite, dict | None]:
         """
@@ -194,22 +683,7 @@ class KYCDocumentChain:
         Returns:
             Tuple (Données structurées de la CNI, token_usage)
         """
-        image_part = self._load_image(image_path)
-
-        response = self.model.generate_content(
-            [PROMPT_EXTRACTION_CNI, image_part],
-            generation_config=self.generation_config,
-        )
-
-        # Extraire les tokens
-        token_usage = self._extract_token_usage(response)
-        if token_usage:
-            self._log_token_usage("Extraction CNI", token_usage)
-
-        result_json = json.loads(response.text)
-        if isinstance(result_json, list):
-            result_json = result_json[0]
-        return CarteIdentite(**result_json), token_usage
+        return self.extract(image_path, TypeDocument.CARTE_IDENTITE)
 
     def extract_passeport(self, image_path: str | Path) -> tuple[Passeport, dict | None]:
         """
@@ -221,22 +695,7 @@ class KYCDocumentChain:
         Returns:
             Tuple (Données structurées du passeport, token_usage)
         """
-        image_part = self._load_image(image_path)
-
-        response = self.model.generate_content(
-            [PROMPT_EXTRACTION_PASSEPORT, image_part],
-            generation_config=self.generation_config,
-        )
-
-        # Extraire les tokens
-        token_usage = self._extract_token_usage(response)
-        if token_usage:
-            self._log_token_usage("Extraction Passeport", token_usage)
-
-        result_json = json.loads(response.text)
-        if isinstance(result_json, list):
-            result_json = result_json[0]
-        return Passeport(**result_json), token_usage
+        return self.extract(image_path, TypeDocument.PASSEPORT)
 
     def extract_permis(self, image_path: str | Path) -> tuple[PermisConduire, dict | None]:
         """
@@ -250,22 +709,7 @@ class KYCDocumentChain:
         Returns:
             Tuple (Données structurées du permis, token_usage)
         """
-        image_part = self._load_image(image_path)
-
-        response = self.model.generate_content(
-            [PROMPT_EXTRACTION_PERMIS, image_part],
-            generation_config=self.generation_config,
-        )
-
-        # Extraire les tokens
-        token_usage = self._extract_token_usage(response)
-        if token_usage:
-            self._log_token_usage("Extraction Permis", token_usage)
-
-        result_json = json.loads(response.text)
-        if isinstance(result_json, list):
-            result_json = result_json[0]
-        return PermisConduire(**result_json), token_usage
+        return self.extract(image_path, TypeDocument.PERMIS_CONDUIRE)
 
     def extract_justificatif(
         self, image_path: str | Path
@@ -279,22 +723,7 @@ class KYCDocumentChain:
         Returns:
             Tuple (Données structurées du justificatif, token_usage)
         """
-        image_part = self._load_image(image_path)
-
-        response = self.model.generate_content(
-            [PROMPT_EXTRACTION_JUSTIFICATIF, image_part],
-            generation_config=self.generation_config,
-        )
-
-        # Extraire les tokens
-        token_usage = self._extract_token_usage(response)
-        if token_usage:
-            self._log_token_usage("Extraction Justificatif", token_usage)
-
-        result_json = json.loads(response.text)
-        if isinstance(result_json, list):
-            result_json = result_json[0]
-        return JustificatifDomicile(**result_json), token_usage
+        return self.extract(image_path, TypeDocument.JUSTIFICATIF_DOMICILE)
 
     def extract_rib(self, image_path: str | Path) -> tuple[RIB, dict | None]:
         """
@@ -308,24 +737,70 @@ class KYCDocumentChain:
         Returns:
             Tuple (Données structurées du RIB, token_usage)
         """
-        image_part = self._load_image(image_path)
+        return self.extract(image_path, TypeDocument.RIB)
+
+    def classify(self, image_path: str | Path) -> StageResult:
+        """
+        Classification seule (RAD), avec tokens, coût, modèle et durée.
+
+        Permet de classer tous les documents d'un dossier avant de décider
+        lesquels extraire (voir `process_document(..., classification_step=...)`).
 
-        response = self.model.generate_content(
-            [PROMPT_EXTRACTION_RIB, image_part],
-            generation_config=self.generation_config,
+        Args:
+            image_path: Chemin vers l'image du document
+
+        Returns:
+            Résultat de l'étape de classification
+        """
+        emit("classification.debut", fichier=str(image_path))
+        start_rad = time.time()
+        with span("classification", fichier=Path(image_path).name):
+            classification_step = self._run_stage(Stage.CLASSIFICATION, None, image_path)
+        classification_step.duration_s = time.time() - start_rad
+        classification = classification_step.value
+        emit(
+            "classification.fin",
+            fichier=str(image_path),
+            type_document=classification.type_detecte.value,
+            confiance=classification.confiance,
+            modele=classification_step.model,
+            duree_s=classification_step.duration_s,
         )
+        return classification_step
 
-        # Extraire les tokens
-        token_usage = self._extract_token_usage(response)
-        if token_usage:
-            self._log_token_usage("Extraction RIB", token_usage)
+    def segment(self, pdf_path: str | Path) -> StageResult:
+        """
+        Classifie chaque page d'un PDF multi-documents et regroupe les pages par document.
 
-        result_json = json.loads(response.text)
-        if isinstance(result_json, list):
-            result_json = result_json[0]
-        return RIB(**result_json), token_usage
+        Un seul appel pour tout le PDF : les documents trouvés sont ensuite extraits
+        séparément, chacun avec ses seules pages (voir `KYCPipeline.process_pdf_dossier`).
+
+        Args:
+            pdf_path: Chemin du PDF
+
+        Returns:
+            Résultat de l'étape de segmentation (`SegmentationDocument`)
+        """
+        emit("segmentation.debut", fichier=str(pdf_path))
+        start = time.time()
+        with span("segmentation", fichier=Path(pdf_path).name):
+            segmentation_step = self._run_stage(Stage.SEGMENTATION, None, pdf_path)
+        segmentation_step.duration_s = time.time() - start
+        emit(
+            "segmentation.fin",
+            fichier=str(pdf_path),
+            documents=[
+                {"type_document": d.type_detecte.value, "pages": d.pages}
+                for d in segmentation_step.value.documents
+            ],
+            modele=segmentation_step.model,
+            duree_s=segmentation_step.duration_s,
+        )
+        return segmentation_step
 
-    def process_document(self, image_path: str | Path) -> ResultatExtractionKYC:
+    def process_document(
+        self, image_path: str | Path, classification_step: StageResult | None = None
+    ) -> ResultatExtractionKYC:
         """
         Pipeline complet: classification + extraction + validation.
 
@@ -333,10 +808,31 @@ class KYCDocumentChain:
 
         Args:
             image_path: Chemin vers l'image du document
+            classification_step: Classification déjà faite par `classify` (si None, faite ici)
 
         Returns:
             Résultat complet avec classification, extraction et validation
+
+        Raises:
+            BudgetError: Si un appel dépasserait un plafond de dépense
         """
+        # Chaque appel du document est compté, même s'il est rejeté ou suivi d'un échec
+        spend = _DocumentSpend()
+        token = _DOCUMENT_SPEND.set(spend)
+        try:
+            with span("document", fichier=Path(image_path).name):
+                return self._process_document(image_path, classification_step, spend)
+        finally:
+            _DOCUMENT_SPEND.reset(token)
+
+    def _process_document(
+        self,
+        image_path: str | Path,
+        classification_step: StageResult | None,
+        spend: _DocumentSpend,
+    ) -> ResultatExtractionKYC:
+        # Une classification faite par `classify` avant l'appel n'est pas dans `spend`
+        prior_steps = [classification_step] if classification_step is not None else []
         erreurs = []
         avertissements = []
         classification = None
@@ -349,95 +845,98 @@ class KYCDocumentChain:
 
         try:
             # 1. Classification (RAD - Reconnaissance Automatique de Documents)
-            print(f"🔍 Classification du document: {image_path}")
-            start_rad = time.time()
-            classification, token_usage_classification = self.classify_document(image_path)
-            time_rad = time.time() - start_rad
-            confiance_str = (
-                f" (confiance: {classification.confiance:.2%})"
-                if classification.confiance is not None
-                else ""
-            )
-            print(f"   ✓ Type détecté: {classification.type_detecte.value}{confiance_str}")
-            # print(f"   ⏱️  Temps RAD (Classification): {time_rad:.2f}s")
+            if classification_step is None:
+                classification_step = self.classify(image_path)
+            classification = classification_step.value
+            time_rad = classification_step.duration_s
 
             # Accumuler les tokens de classification
-            if token_usage_classification:
+            if classification_step.token_usage:
                 for key in total_tokens_usage:
-                    total_tokens_usage[key] += token_usage_classification.get(key, 0)
+                    total_tokens_usage[key] += classification_step.token_usage.get(key, 0)
 
             # 2. Extraction selon le type (LAD - Lecture Automatique de Documents)
-            print("📄 Extraction des données...")
+            type_document = classification.type_detecte
+            emit("extraction.debut", fichier=str(image_path), type_document=type_document.value)
             start_lad = time.time()
-            extraction_result = None
-            token_usage_extraction = None
-
-            if classification.type_detecte == TypeDocument.CARTE_IDENTITE:
-                extraction_result, token_usage_extraction = self.extract_cni(image_path)
-            elif classification.type_detecte == TypeDocument.PASSEPORT:
-                extraction_result, token_usage_extraction = self.extract_passeport(image_path)
-            elif classification.type_detecte == TypeDocument.PERMIS_CONDUIRE:
-                extraction_result, token_usage_extraction = self.extract_permis(image_path)
-            elif classification.type_detecte == TypeDocument.JUSTIFICATIF_DOMICILE:
-                extraction_result, token_usage_extraction = self.extract_justificatif(image_path)
-            elif classification.type_detecte == TypeDocument.RIB:
-                extraction_result, token_usage_extraction = self.extract_rib(image_path)
-
+            with span("extraction", type_document=type_document.value):
+                extraction_step = self._run_stage(Stage.EXTRACTION, type_document, image_path)
             time_lad = time.time() - start_lad
+            # Champs restés hors format après la reprise partielle
+            avertissements.extend(field_warnings(type_document, vars(extraction_step.value)))
 
             # Accumuler les tokens d'extraction
-            if token_usage_extraction:
+            if extraction_step.token_usage:
                 for key in total_tokens_usage:
-                    total_tokens_usage[key] += token_usage_extraction.get(key, 0)
-
-            print("   ✓ Extraction réussie")
-            # print(f"   ⏱️  Temps LAD (Extraction): {time_lad:.2f}s")
+                    total_tokens_usage[key] += extraction_step.token_usage.get(key, 0)
+
+            emit(
+                "extraction.fin",
+                fichier=str(image_path),
+                type_document=type_document.value,
+                modele=extraction_step.model,
+                duree_s=time_lad,
+            )
 
             # Afficher le total des tokens et coût pour ce document
             if total_tokens_usage["total_tokens"] > 0:
-                total_cost = (
-                    total_tokens_usage["input_tokens"] / 1_000_000
-                ) * self.config.INPUT_TOKEN_PRICE_PER_MILLION + (
-                    total_tokens_usage["output_tokens"] / 1_000_000
-                ) * self.config.OUTPUT_TOKEN_PRICE_PER_MILLION
-                total_time = time_rad + time_lad
-                print(
-                    f"   📊 Total tokens: {total_tokens_usage['total_tokens']} | "
-                    f"Coût total: ${total_cost:.6f}"
+                total_cost = classification_step.cost + extraction_step.cost
+                emit(
+                    "document.cout",
+                    fichier=str(image_path),
+                    total_tokens=total_tokens_usage["total_tokens"],
+                    cout_usd=total_cost,
+                    duree_s=time_rad + time_lad,
                 )
-                # print(f"   ⏱️  Temps total (RAD + LAD): {total_time:.2f}s")
 
             # 3. Construction du résultat
+            steps = {Stage.CLASSIFICATION: classification_step, Stage.EXTRACTION: extraction_step}
             result = ResultatExtractionKYC(
                 classification=classification,
                 extraction_reussie=True,
                 regles_metier_validees=True,
                 erreurs=erreurs,
                 avertissements=avertissements,
+                fichier_source=str(image_path),
+                empreinte_fichier=file_sha256(image_path),
+                tokens=total_tokens_usage,
+                cout_usd=classification_step.cost + extraction_step.cost,
+                durees={"classification": time_rad, "extraction": time_lad},
+                modeles={stage.value: step.model for stage, step in steps.items()},
+                escalades=[stage.value for stage, step in steps.items() if step.escalated],
+                couche_texte=extraction_step.text_layer,
+                prompts={stage.value: step.prompt for stage, step in steps.items() if step.prompt},
+                reprises=extraction_step.repairs,
+                reparations_json=[
+                    repair for step in steps.values() for repair in step.json_repairs
+                ],
             )
 
             # Assigner l'extraction au bon champ
-            if classification.type_detecte == TypeDocument.CARTE_IDENTITE:
-                result.carte_identite = extraction_result
-            elif classification.type_detecte == TypeDocument.PASSEPORT:
-                result.passeport = extraction_result
-            elif classification.type_detecte == TypeDocument.PERMIS_CONDUIRE:
-                result.permis_conduire = extraction_result
-            elif classification.type_detecte == TypeDocument.JUSTIFICATIF_DOMICILE:
-                result.justificatif_domicile = extraction_result
-            elif classification.type_detecte == TypeDocument.RIB:
-                result.rib = extraction_result
-
-            print("✅ Traitement terminé avec succès\n")
+            setattr(result, RESULT_FIELDS[type_document], extraction_step.value)
+
+            emit("document.fin", fichier=str(image_path), type_document=type_document.value)
             return result
 
+        except BudgetError:
+            # Refus ou report décidé avant l'appel : à traiter par l'appelant
+            raise
         except Exception as e:
-            print(f"❌ Erreur lors du traitement: {e}\n")
+            emit("document.erreur", logging.ERROR, fichier=str(image_path), erreur=str(e))
             erreurs.append(str(e))
+            # Coût de toutes les tentatives (rejetées, escaladées, reprises), pas des seules réussies
+            usages = [step.token_usage for step in prior_steps] + [spend.token_usage]
+            total_tokens_usage = {
+                key: sum(usage.get(key, 0) for usage in usages if usage)
+                for key in total_tokens_usage
+            }
             return ResultatExtractionKYC(
                 classification=classification,
                 extraction_reussie=False,
                 regles_metier_validees=False,
                 erreurs=erreurs,
                 avertissements=avertissements,
+                fichier_source=str(image_path),
+                tokens=total_tokens_usage,
+                cout_usd=sum(step.cost for step in prior_steps) + spend.cost,
             )
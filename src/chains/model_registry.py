@@ -0,0 +1,108 @@
+"""
+Registre process-wide des clients de modèle Vertex AI.
+
+Un client (modèle + configuration de génération) est créé une seule fois par clé
+(projet, région, modèle, configuration de génération) et partagé par toutes les
+chains du processus : `vertexai.init` n'est appelé qu'une fois, et la connexion
+gRPC du modèle est réutilisée d'un document à l'autre.
+"""
+
+import threading
+from dataclasses import dataclass
+from typing import Any
+
+from chains.configuration import Configuration
+
+
+@dataclass(frozen=True)
+class ClientKey:
+    """Clé d'un client de modèle."""
+
+    project: str
+    location: str
+    model: str
+    temperature: float
+    max_output_tokens: int
+
+
+@dataclass(frozen=True)
+class ModelClient:
+    """Modèle prêt à l'emploi et sa configuration de génération."""
+
+    model: Any
+    generation_config: Any
+
+
+class ModelClientRegistry:
+    """Registre thread-safe des clients de modèle."""
+
+    def __init__(self):
+        self._clients: dict[ClientKey, ModelClient] = {}
+        self._initialized = False
+        self._lock = threading.Lock()
+
+    def get(self, key: ClientKey) -> ModelClient:
+        """
+        Retourne le client associé à la clé, en le créant au premier appel.
+
+        Args:
+            key: Projet, région, modèle et configuration de génération
+
+        Returns:
+            Client partagé
+        """
+        client = self._clients.get(key)
+        if client is not None:
+            return client
+
+        with self._lock:
+            if key not in self._clients:
+                self._clients[key] = self._create(key)
+            return self._clients[key]
+
+    def _create(self, key: ClientKey) -> ModelClient:
+        import vertexai
+        from vertexai.generative_models import GenerationConfig, GenerativeModel
+
+        if not self._initialized:
+            vertexai.init(project=key.project, location=key.location)
+            self._initialized = True
+
+        # Nom de ressource complet : projet et région propres à la clé,
+        # indépendamment de la configuration globale de `vertexai.init`
+        resource_name = (
+            f"projects/{key.project}/locations/{key.location}/publishers/google/models/{key.model}"
+        )
+        return ModelClient(
+            model=GenerativeModel(resource_name),
+            generation_config=GenerationConfig(
+                temperature=key.temperature,
+                max_output_tokens=key.max_output_tokens,
+                response_mime_type="application/json",
+            ),
+        )
+
+
+_REGISTRY = ModelClientRegistry()
+
+
+def get_model_client(config: Configuration, model_name: str | None = None) -> ModelClient:
+    """
+    Retourne le client partagé pour une configuration.
+
+    Args:
+        config: Configuration (projet, région, température, tokens max)
+        model_name: Modèle à utiliser (si None, `config.model`)
+
+    Returns:
+        Client partagé par tout le processus
+    """
+    return _REGISTRY.get(
+        ClientKey(
+            project=config.project_id,
+            location=config.location,
+            model=model_name or config.model,
+            temperature=config.temperature,
+            max_output_tokens=config.max_output_tokens,
+        )
+    )
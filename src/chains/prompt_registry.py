@@ -0,0 +1,151 @@
+"""
+Registre des prompts versionnés de chaque étape.
+
+Chaque étape (`classification`, `segmentation`, `extraction.<type_document>`),
+chaque enveloppe (`couche_texte`, `sortie_compacte`) et la relance
+`reprise_partielle` ont une ou plusieurs versions de prompt ; la version appelée
+est choisie par la section `prompts` de config/config.json (v1 par défaut) ou par
+`VAR_KYC_PROMPTS`. La version utilisée est enregistrée avec chaque résultat et
+dans les statistiques de route : deux versions se comparent en coût et en latence.
+
+Usage:
+    registry = PromptRegistry({"extraction.rib": "v2"})
+    prompt = registry.get("extraction.rib")
+    prompt.label, estimate_tokens(prompt.text)
+"""
+
+import hashlib
+import math
+import re
+from dataclasses import dataclass
+
+from chains import prompts
+from chains.routing import Stage
+from chains.schemas import TypeDocument
+
+DEFAULT_VERSION = "v1"
+
+# Versions de chaque prompt, par clé d'étape
+PROMPT_VERSIONS: dict[str, dict[str, str]] = {
+    "classification": {
+        "v1": prompts.PROMPT_CLASSIFICATION,
+        "v2": prompts.PROMPT_CLASSIFICATION_V2,
+    },
+    "segmentation": {"v1": prompts.PROMPT_SEGMENTATION},
+    "extraction.carte_identite": {"v1": prompts.PROMPT_EXTRACTION_CNI},
+    "extraction.passeport": {"v1": prompts.PROMPT_EXTRACTION_PASSEPORT},
+    "extraction.permis_conduire": {
+        "v1": prompts.PROMPT_EXTRACTION_PERMIS,
+        "v2": prompts.PROMPT_EXTRACTION_PERMIS_V2,
+    },
+    "extraction.justificatif_domicile": {
+        "v1": prompts.PROMPT_EXTRACTION_JUSTIFICATIF,
+        "v2": prompts.PROMPT_EXTRACTION_JUSTIFICATIF_V2,
+    },
+    "extraction.rib": {
+        "v1": prompts.PROMPT_EXTRACTION_RIB,
+        "v2": prompts.PROMPT_EXTRACTION_RIB_V2,
+    },
+    # Enveloppe d'un prompt d'extraction quand seul le texte du PDF est envoyé
+    "couche_texte": {"v1": prompts.PROMPT_COUCHE_TEXTE},
+    # Enveloppe d'un prompt d'extraction quand la sortie compacte est demandée
+    "sortie_compacte": {"v1": prompts.PROMPT_SORTIE_COMPACTE},
+    # Relance d'une extraction pour ses seuls champs rejetés par le schéma
+    "reprise_partielle": {"v1": prompts.PROMPT_REPRISE_PARTIELLE},
+}
+
+# Mots (par tranches de lettres), chiffres isolés et ponctuation
+_TOKEN_PATTERN = re.compile(r"[^\W\d_]+|\d|[^\w\s]")
+# Lettres par token d'un mot, en moyenne, pour les tokenizers sous-mots sur du français
+_LETTERS_PER_TOKEN = 4
+
+
+def prompt_key(stage: Stage, type_document: TypeDocument | None = None) -> str:
+    """Clé du prompt d'une étape (`extraction.<type>` pour l'extraction)."""
+    if stage == Stage.EXTRACTION:
+        return f"{stage.value}.{type_document.value}"
+    return stage.value
+
+
+def estimate_tokens(text: str) -> int:
+    """
+    Estime hors ligne le nombre de tokens d'entrée d'un texte.
+
+    Approximation d'un tokenizer sous-mots (SentencePiece) : un token par chiffre
+    et par signe de ponctuation, et un token par tranche de quatre lettres d'un mot.
+
+    Args:
+        text: Texte du prompt
+
+    Returns:
+        Nombre de tokens estimé
+    """
+    return sum(
+        math.ceil(len(token) / _LETTERS_PER_TOKEN) if token[0].isalpha() else 1
+        for token in _TOKEN_PATTERN.findall(text)
+    )
+
+
+@dataclass(frozen=True)
+class PromptVersion:
+    """Une version du prompt d'une étape."""
+
+    key: str
+    version: str
+    text: str
+
+    @property
+    def label(self) -> str:
+        """Identifiant enregistré avec les résultats (`clé@version`)."""
+        return f"{self.key}@{self.version}"
+
+    @property
+    def fingerprint(self) -> str:
+        """Empreinte courte du texte : une modification sans nouvelle version se voit."""
+        return hashlib.sha256(self.text.encode()).hexdigest()[:12]
+
+
+class PromptRegistry:
+    """Versions de prompt sélectionnées pour chaque étape."""
+
+    def __init__(self, selection: dict[str, str] | None = None):
+        """
+        Initialise le registre.
+
+        Args:
+            selection: Version choisie par clé d'étape (v1 pour les clés absentes)
+
+        Raises:
+            ValueError: Si une clé ou une version est inconnue
+        """
+        selection = selection or {}
+        unknown = set(selection) - set(PROMPT_VERSIONS)
+        if unknown:
+            raise ValueError(f"Prompts inconnus dans la configuration: {sorted(unknown)}")
+        for key, version in selection.items():
+            if version not in PROMPT_VERSIONS[key]:
+                raise ValueError(
+                    f"Version inconnue pour le prompt {key}: {version} "
+                    f"(disponibles: {', '.join(PROMPT_VERSIONS[key])})"
+                )
+        self._selection = {key: selection.get(key, DEFAULT_VERSION) for key in PROMPT_VERSIONS}
+
+    def get(self, key: str) -> PromptVersion:
+        """Version sélectionnée du prompt d'une étape."""
+        version = self._selection[key]
+        return PromptVersion(key, version, PROMPT_VERSIONS[key][version])
+
+    def versions(self, key: str) -> list[PromptVersion]:
+        """Toutes les versions du prompt d'une étape."""
+        return [PromptVersion(key, version, text) for version, text in PROMPT_VERSIONS[key].items()]
+
+    def selected(self) -> list[PromptVersion]:
+        """Version sélectionnée de chaque étape, dans l'ordre du registre."""
+        return [self.get(key) for key in PROMPT_VERSIONS]
+
+    def fingerprint(self) -> str:
+        """Empreinte courte de l'ensemble des prompts sélectionnés."""
+        digest = hashlib.sha256()
+        for prompt in self.selected():
+            digest.update(prompt.label.encode() + b"\0" + prompt.text.encode())
+        return digest.hexdigest()[:12]
@@ -3,6 +3,10 @@ Prompts pour la classification et l'extraction de documents KYC.
 
 La magie de l'approche LLM: tout tient dans les prompts!
 Avant fallait des milliers de lignes de code + modèles deep learning.
+
+Chaque prompt est une version d'une étape dans `chains.prompt_registry` : les
+constantes sans suffixe sont les versions v1, celles en `_V2` des versions
+allégées (sans le texte de démo, facturé à chaque appel).
 """
 
 # =============================================================================
@@ -32,6 +36,29 @@ Réponds en JSON avec:
 
 Sois précis et explicite dans ton raisonnement."""
 
+# =============================================================================
+# Prompt de segmentation d'un PDF multi-documents
+# =============================================================================
+
+PROMPT_SEGMENTATION = """Tu es un système expert de classification de documents KYC (Know Your Customer) bancaires.
+
+Le PDF fourni est un scan qui peut contenir PLUSIEURS documents à la suite (par exemple une
+pièce d'identité, puis un justificatif de domicile, puis un RIB). Classe chaque page, puis
+regroupe les pages consécutives qui forment un même document.
+
+Types possibles pour chaque document:
+- carte_identite: Carte Nationale d'Identité française (recto et verso = un seul document)
+- passeport: Passeport français
+- permis_conduire: Permis de conduire français (format carte européenne)
+- justificatif_domicile: Facture, quittance de loyer, avis d'impôt, attestation d'assurance habitation
+- rib: Relevé d'Identité Bancaire avec IBAN et BIC
+
+Réponds en JSON avec:
+{"documents": [{"type_detecte": "carte_identite", "pages": [1, 2], "confiance": 0.95}, ...]}
+- pages: numéros des pages du document, à partir de 1, dans l'ordre du PDF
+- une page appartient à un seul document ; ignore les pages blanches ou sans rapport
+- confiance: score de 0 à 1 pour le type de ce document"""
+
 # =============================================================================
 # Prompts d'extraction par type de document
 # =============================================================================
@@ -220,6 +247,88 @@ ATTENTION:
 
 Réponds en JSON selon le schéma RIB."""
 
+# =============================================================================
+# Versions allégées (v2) : mêmes consignes, sans le récit de la démo
+# =============================================================================
+
+PROMPT_CLASSIFICATION_V2 = """Classe ce document KYC français dans un des types:
+- carte_identite: CNI (carte plastique, "CARTE NATIONALE D'IDENTITÉ", numéro à 12 chiffres)
+- passeport: livret bordeaux "PASSEPORT", zone MRZ en bas
+- permis_conduire: carte rose européenne, catégories A, B... avec cases
+- justificatif_domicile: facture (énergie, télécom, eau), quittance de loyer, avis d'impôt, attestation d'assurance habitation
+- rib: IBAN FR, BIC, codes banque/guichet/compte
+
+Réponds en JSON: {"type_detecte": "...", "confiance": 0.0-1.0, "raison": "indices en une phrase"}"""
+
+PROMPT_EXTRACTION_PERMIS_V2 = """Extrais ce permis de conduire français (format carte européenne) en JSON selon le schéma PermisConduire.
+
+Champs obligatoires: numero_permis (12 chiffres), nom, prenom, date_naissance, lieu_naissance,
+date_emission, date_expiration (dates YYYY-MM-DD), categories.
+Optionnel: date_obtention_B.
+
+categories: UNIQUEMENT les catégories dont la case est cochée, parmi
+AM, A1, A2, A, B, BE, C1, C1E, C, CE, D1, D1E, D, DE (ex: ["B", "A2"])."""
+
+PROMPT_EXTRACTION_JUSTIFICATIF_V2 = """Extrais ce justificatif de domicile français en JSON selon le schéma JustificatifDomicile.
+
+Champs obligatoires:
+- type_document: utility_bill (énergie, eau, télécom), bank_statement, tax_notice (avis d'impôt,
+  taxes d'habitation ou foncière), rental_agreement (quittance de loyer), residence_certificate
+- nom_complet: titulaire destinataire (si seul "M. DUPONT" figure, mets le nom disponible)
+- adresse_ligne1, code_postal (5 chiffres), ville
+- date_document: YYYY-MM-DD (en haut ou en bas du document)
+Optionnels: adresse_ligne2, emetteur (EDF, Orange, DGFiP...), pays (défaut "France")."""
+
+PROMPT_EXTRACTION_RIB_V2 = """Extrais ce RIB français en JSON selon le schéma RIB.
+
+Champs obligatoires: nom_titulaire (parfois le nom seul), iban (FR + 25 caractères, copié
+exactement, espaces ignorés), nom_banque.
+Optionnels: bic (8 ou 11 caractères, parfois "Code SWIFT"), code_guichet (5 chiffres),
+numero_compte (11 caractères), adresse_banque."""
+
+# =============================================================================
+# Extraction depuis la couche texte d'un PDF natif
+# =============================================================================
+
+# Enveloppe un prompt d'extraction : `{prompt}` puis le texte du PDF à la place du document
+PROMPT_COUCHE_TEXTE = """{prompt}
+
+DOCUMENT FOURNI EN TEXTE:
+Le document n'est pas joint en image : voici le texte extrait de son PDF (couche texte
+native, mise en page approximative, pages séparées par un saut de page). Les logos et
+les cases à cocher n'y figurent pas. N'invente aucune valeur absente du texte.
+
+<<<DEBUT DU DOCUMENT>>>
+{texte}
+<<<FIN DU DOCUMENT>>>"""
+
+# =============================================================================
+# Sortie compacte des extractions
+# =============================================================================
+
+# Enveloppe un prompt d'extraction : `{cles}` est la table des clés courtes du schéma
+PROMPT_SORTIE_COMPACTE = """{prompt}
+
+FORMAT DE SORTIE COMPACT:
+Dans le JSON, remplace chaque nom de champ par sa clé courte ci-dessous et omets les
+champs absents (pas de null). Les valeurs restent au format demandé.
+{cles}"""
+
+# =============================================================================
+# Reprise partielle d'une extraction rejetée par son schéma
+# =============================================================================
+
+# `{schema}` est le nom du schéma, `{champs}` les champs à reprendre avec l'erreur de chacun
+PROMPT_REPRISE_PARTIELLE = """Tu as déjà extrait ce document selon le schéma {schema}, mais la
+validation a rejeté les champs ci-dessous (absents ou mal formés). Les autres champs sont
+corrects et ne doivent pas être renvoyés.
+
+REPRISE PARTIELLE - CHAMPS À REPRENDRE:
+{champs}
+
+Relis le document fourni et réponds en JSON avec UNIQUEMENT ces champs, sous leur nom,
+au format demandé (dates au format YYYY-MM-DD) ; null si la valeur est absente du document."""
+
 # =============================================================================
 # Prompt pour validation de dossier complet
 # =============================================================================
@@ -0,0 +1,234 @@
+"""
+Routage des appels au modèle par étape et par type de document.
+
+La table de routage (`routing` dans config/config.json) associe à chaque étape
+(classification, extraction, segmentation) un modèle par défaut et, optionnellement, un modèle
+par `TypeDocument` : par exemple un modèle rapide pour la classification et un
+modèle plus fort pour l'extraction des justificatifs de domicile.
+
+Chaque route accumule ses appels, erreurs, latences, tokens et coût, séparément
+pour chaque version de prompt (voir `chains.prompt_registry`).
+
+La politique d'escalade (`escalation`) donne, par étape, un modèle plus fort à
+n'utiliser que lorsque la première tentative est peu confiante ou invalide ; le
+routeur suit le taux d'escalade de chaque étape.
+"""
+
+import threading
+from dataclasses import dataclass
+from enum import Enum
+
+from pydantic import BaseModel, Field
+
+from chains.configuration import Configuration
+from chains.schemas import TypeDocument
+
+DEFAULT_ROUTE = "default"
+
+
+class Stage(str, Enum):
+    """Étapes du traitement d'un document."""
+
+    CLASSIFICATION = "classification"
+    EXTRACTION = "extraction"
+    # Classification page par page d'un PDF multi-documents
+    SEGMENTATION = "segmentation"
+
+
+@dataclass(frozen=True)
+class RouteKey:
+    """Clé des statistiques d'une route."""
+
+    stage: Stage
+    type_document: TypeDocument | None
+    model: str
+    prompt_version: str | None
+
+
+class RouteStats(BaseModel):
+    """Statistiques cumulées d'une route (étape, type de document, modèle, version du prompt)."""
+
+    stage: Stage = Field(description="Étape")
+    type_document: TypeDocument | None = Field(
+        None, description="Type de document (None pour la classification)"
+    )
+    modele: str = Field(description="Modèle appelé")
+    prompt: str | None = Field(None, description="Version du prompt (clé@version)")
+    appels: int = Field(0, description="Nombre d'appels réussis")
+    erreurs: int = Field(0, description="Nombre d'appels en erreur")
+    latence_totale_s: float = Field(0.0, description="Somme des latences des appels réussis")
+    latence_max_s: float = Field(0.0, description="Latence maximale observée")
+    input_tokens: int = Field(0, description="Tokens en entrée")
+    output_tokens: int = Field(0, description="Tokens en sortie")
+    cout_usd: float = Field(0.0, description="Coût cumulé en USD")
+
+    @property
+    def latence_moyenne_s(self) -> float:
+        """Latence moyenne d'un appel réussi."""
+        return self.latence_totale_s / self.appels if self.appels else 0.0
+
+
+class EscaladeStats(BaseModel):
+    """Taux d'escalade d'une étape."""
+
+    stage: Stage = Field(description="Étape")
+    decisions: int = Field(0, description="Nombre de premières tentatives évaluées")
+    escalades: int = Field(0, description="Nombre de tentatives refaites avec le modèle fort")
+
+    @property
+    def taux(self) -> float:
+        """Part des tentatives escaladées."""
+        return self.escalades / self.decisions if self.decisions else 0.0
+
+
+class ModelRouter:
+    """Choix du modèle par étape et type de document, et suivi par route."""
+
+    def __init__(self, config: Configuration):
+        """
+        Initialise le routeur depuis la configuration.
+
+        Args:
+            config: Configuration (table `routing`, tarifs et modèle par défaut)
+
+        Raises:
+            ValueError: Si la table de routage référence une étape ou un type inconnu
+        """
+        self.config = config
+        self._routes = self._parse_routes(config.routing)
+        self._stats: dict[RouteKey, RouteStats] = {}
+        self._escalation = config.escalation
+        self._escalation_stats = {stage: EscaladeStats(stage=stage) for stage in Stage}
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _parse_routes(routing: dict[str, dict[str, str]]) -> dict[Stage, dict[str, str]]:
+        routes = {}
+        for stage_name, table in routing.items():
+            try:
+                stage = Stage(stage_name)
+            except ValueError:
+                raise ValueError(f"Étape de routage inconnue: {stage_name}") from None
+            known = {DEFAULT_ROUTE} | {type_document.value for type_document in TypeDocument}
+            unknown = set(table) - known
+            if unknown:
+                raise ValueError(
+                    f"Types de document inconnus dans le routage {stage_name}: {sorted(unknown)}"
+                )
+            routes[stage] = table
+        return routes
+
+    def route(self, stage: Stage, type_document: TypeDocument | None = None) -> str:
+        """
+        Modèle à utiliser pour une étape.
+
+        Ordre de résolution : route du type de document, route par défaut de
+        l'étape, puis `config.model`.
+
+        Args:
+            stage: Étape du traitement
+            type_document: Type de document (None pour la classification)
+
+        Returns:
+            Nom du modèle
+        """
+        table = self._routes.get(stage, {})
+        if type_document is not None and type_document.value in table:
+            return table[type_document.value]
+        return table.get(DEFAULT_ROUTE) or self.config.model
+
+    @property
+    def confidence_threshold(self) -> float:
+        """Confiance de classification en dessous de laquelle l'étape est escaladée."""
+        return self._escalation["confidence_threshold"]
+
+    def escalation_model(self, stage: Stage) -> str | None:
+        """Modèle d'escalade d'une étape (None si l'étape n'est jamais escaladée)."""
+        return self._escalation["models"].get(stage.value)
+
+    def record_decision(self, stage: Stage, escalated: bool) -> None:
+        """Enregistre l'issue de la première tentative d'une étape."""
+        with self._lock:
+            self._escalation_stats[stage].decisions += 1
+            self._escalation_stats[stage].escalades += int(escalated)
+
+    def escalation_stats(self) -> list[EscaladeStats]:
+        """Copie des taux d'escalade par étape (étapes déjà exécutées seulement)."""
+        with self._lock:
+            return [
+                stats.model_copy() for stats in self._escalation_stats.values() if stats.decisions
+            ]
+
+    def _entry(
+        self,
+        stage: Stage,
+        type_document: TypeDocument | None,
+        model_name: str,
+        prompt_version: str | None,
+    ) -> RouteStats:
+        key = RouteKey(stage, type_document, model_name, prompt_version)
+        if key not in self._stats:
+            self._stats[key] = RouteStats(
+                stage=stage, type_document=type_document, modele=model_name, prompt=prompt_version
+            )
+        return self._stats[key]
+
+    def record(
+        self,
+        stage: Stage,
+        type_document: TypeDocument | None,
+        model_name: str,
+        latency_s: float,
+        token_usage: dict[str, int] | None,
+        prompt_version: str | None = None,
+    ) -> float:
+        """
+        Enregistre un appel réussi.
+
+        Args:
+            stage: Étape
+            type_document: Type de document (None pour la classification)
+            model_name: Modèle appelé
+            latency_s: Latence de l'appel
+            token_usage: Tokens consommés
+            prompt_version: Version du prompt envoyé (`clé@version`)
+
+        Returns:
+            Coût de l'appel en USD
+        """
+        token_usage = token_usage or {}
+        cost = self.config.token_cost(model_name, token_usage)
+        with self._lock:
+            entry = self._entry(stage, type_document, model_name, prompt_version)
+            entry.appels += 1
+            entry.latence_totale_s += latency_s
+            entry.latence_max_s = max(entry.latence_max_s, latency_s)
+            entry.input_tokens += token_usage.get("input_tokens", 0)
+            entry.output_tokens += token_usage.get("output_tokens", 0)
+            entry.cout_usd += cost
+        return cost
+
+    def record_error(
+        self,
+        stage: Stage,
+        type_document: TypeDocument | None,
+        model_name: str,
+        prompt_version: str | None = None,
+    ) -> None:
+        """Enregistre un appel en erreur."""
+        with self._lock:
+            self._entry(stage, type_document, model_name, prompt_version).erreurs += 1
+
+    def stats(self) -> list[RouteStats]:
+        """Copie des statistiques de chaque route, triées par étape puis type."""
+        with self._lock:
+            entries = [entry.model_copy() for entry in self._stats.values()]
+        return sorted(
+            entries,
+            key=lambda e: (
+                e.stage.value,
+                e.type_document.value if e.type_document else "",
+                e.modele,
+                e.prompt or "",
+            ),
+        )
@@ -9,6 +9,8 @@ from chains.schemas.kyc_schemas import (
     Passeport,
     PermisConduire,
     ResultatExtractionKYC,
+    SegmentationDocument,
+    SegmentDocument,
     Sexe,
     TypeDocument,
     TypeJustificatifDomicile,
@@ -23,6 +25,8 @@ __all__ = [
     "PermisConduire",
     "ResultatExtractionKYC",
     "RIB",
+    "SegmentationDocument",
+    "SegmentDocument",
     "Sexe",
     "TypeDocument",
     "TypeJustificatifDomicile",
@@ -0,0 +1,156 @@
+"""
+Contrôles déterministes du format des champs extraits.
+
+Le schéma Pydantic vérifie les types ; ces contrôles vérifient les formats métier
+(numéro de CNI, de passeport ou de permis, code postal, IBAN, BIC, MRZ) et l'ordre
+des dates. Les expressions régulières sont compilées une fois à l'import et les
+contrôles s'appliquent aussi bien à un document validé (`vars(document)`) qu'au
+JSON brut d'un résultat stocké : ils coûtent quelques microsecondes par document,
+moins que la lecture de son enregistrement (`benchmarks/field_checks.py`).
+
+Un champ en défaut est redemandé par la reprise partielle de la chain ; s'il
+l'est encore, il est signalé dans `ResultatExtractionKYC.avertissements`.
+"""
+
+import re
+from collections.abc import Mapping
+from dataclasses import dataclass
+from datetime import date
+from typing import Any
+
+from chains.schemas.kyc_schemas import TypeDocument
+
+
+def _as_date(value: Any) -> date:
+    """Date d'un champ validé (date) ou d'un payload JSON (chaîne ISO)."""
+    return value if isinstance(value, date) else date.fromisoformat(value)
+
+
+@dataclass(frozen=True)
+class PatternCheck:
+    """Format d'un champ texte, vérifié par une expression régulière précompilée."""
+
+    field: str
+    pattern: re.Pattern
+    expected: str
+
+    def __call__(self, data: Mapping[str, Any]) -> str | None:
+        value = data.get(self.field)
+        if value is None or (isinstance(value, str) and self.pattern.fullmatch(value)):
+            return None
+        return f"{self.expected} attendu (reçu '{value}')"
+
+
+@dataclass(frozen=True)
+class DateOrderCheck:
+    """Date postérieure à une autre date du document, ou (`before` None) pas dans le futur."""
+
+    field: str
+    before: str | None
+
+    def __call__(self, data: Mapping[str, Any]) -> str | None:
+        value = data.get(self.field)
+        earlier = date.today() if self.before is None else data.get(self.before)
+        if value is None or earlier is None:
+            return None
+        try:
+            if self.before is None and _as_date(value) <= earlier:
+                return None
+            if self.before is not None and _as_date(earlier) < _as_date(value):
+                return None
+        except (TypeError, ValueError):
+            return "date illisible"
+        if self.before is None:
+            return f"date dans le futur ({value})"
+        return f"doit être postérieure à {self.before} ({earlier} ≥ {value})"
+
+
+def _pattern(field: str, regex: str, expected: str) -> PatternCheck:
+    return PatternCheck(field, re.compile(regex), expected)
+
+
+_NATIONALITE = _pattern("nationalite", r"[A-Z]{3}", "code pays à 3 lettres")
+_DATES_IDENTITE = (
+    DateOrderCheck("date_emission", before="date_naissance"),
+    DateOrderCheck("date_expiration", before="date_emission"),
+)
+_MRZ = tuple(
+    _pattern(field, r"[A-Z0-9<]{44}", "ligne MRZ de 44 caractères")
+    for field in ("mrz_ligne1", "mrz_ligne2")
+)
+
+# Contrôles de chaque type de document ; un champ absent (None) n'est pas contrôlé
+FIELD_CHECKS: dict[TypeDocument, tuple[PatternCheck | DateOrderCheck, ...]] = {
+    TypeDocument.CARTE_IDENTITE: (
+        # 12 caractères (CNI cartonnée) ou 9 (CNI au format carte bancaire, depuis 2021)
+        _pattern(
+            "numero_document",
+            r"[0-9A-Z]{12}|[0-9A-Z]{9}",
+            "numéro de 12 (ou 9) caractères alphanumériques",
+        ),
+        _NATIONALITE,
+        *_DATES_IDENTITE,
+    ),
+    TypeDocument.PASSEPORT: (
+        _pattern(
+            "numero_passeport", r"\d{2}[A-Z]{2}\d{5}", "numéro de 2 chiffres, 2 lettres, 5 chiffres"
+        ),
+        _NATIONALITE,
+        *_DATES_IDENTITE,
+        *_MRZ,
+    ),
+    TypeDocument.PERMIS_CONDUIRE: (
+        _pattern("numero_permis", r"\d{12}", "numéro de 12 chiffres"),
+        *_DATES_IDENTITE,
+    ),
+    TypeDocument.JUSTIFICATIF_DOMICILE: (
+        _pattern("code_postal", r"\d{5}", "code postal de 5 chiffres"),
+        DateOrderCheck("date_document", before=None),
+    ),
+    TypeDocument.RIB: (
+        _pattern("iban", r"[A-Z]{2}\d{2}[A-Z0-9]{11,30}", "IBAN (pays, clé, 11 à 30 caractères)"),
+        _pattern("bic", r"[A-Z]{6}[A-Z0-9]{2}(?:[A-Z0-9]{3})?", "BIC de 8 ou 11 caractères"),
+    ),
+}
+
+
+def check_fields(type_document: TypeDocument, data: Mapping[str, Any]) -> dict[str, str]:
+    """
+    Contrôle le format des champs d'une extraction.
+
+    Args:
+        type_document: Type du document
+        data: Champs de l'extraction (`vars(document)` ou payload JSON)
+
+    Returns:
+        Message de chaque champ en défaut (vide si tout est conforme)
+    """
+    issues = {}
+    for check in FIELD_CHECKS[type_document]:
+        message = check(data)
+        if message is not None:
+            issues[check.field] = message
+    return issues
+
+
+def field_warnings(type_document: TypeDocument, data: Mapping[str, Any]) -> list[str]:
+    """Avertissements (`champ: message`) des champs en défaut d'une extraction."""
+    return [f"{field}: {message}" for field, message in check_fields(type_document, data).items()]
+
+
+def payload_warnings(payload: Mapping[str, Any]) -> list[str]:
+    """
+    Avertissements d'un résultat stocké, lu en JSON brut (sans validation Pydantic).
+
+    Args:
+        payload: `ResultatExtractionKYC` sérialisé puis relu par `json.loads`
+
+    Returns:
+        Avertissements des champs en défaut (vide si l'extraction a échoué)
+    """
+    classification = payload.get("classification") or {}
+    type_document = TypeDocument(classification["type_detecte"]) if classification else None
+    data = payload.get(type_document.value) if type_document else None
+    if not data:
+        return []
+    return field_warnings(type_document, data)
@@ -382,6 +382,21 @@ class ClassificationDocument(BaseModel):
     confiance: Optional[float] = Field(None, description="Score de confiance (0-1)")
 
 
+# Segmentation d'un PDF multi-documents
+class SegmentDocument(BaseModel):
+    """Document logique d'un PDF multi-documents : son type et ses pages."""
+
+    type_detecte: TypeDocument = Field(description="Type de document détecté")
+    pages: list[int] = Field(min_length=1, description="Numéros des pages (à partir de 1)")
+    confiance: Optional[float] = Field(None, description="Score de confiance (0-1)")
+
+
+class SegmentationDocument(BaseModel):
+    """Découpage d'un PDF multi-documents en documents logiques."""
+
+    documents: list[SegmentDocument] = Field(description="Documents trouvés, dans l'ordre")
+
+
 # Résultat d'extraction
 class ResultatExtractionKYC(BaseModel):
     """Résultat de l'extraction d'un document KYC."""
@@ -404,3 +419,38 @@ class ResultatExtractionKYC(BaseModel):
     rib: Optional[RIB] = Field(None, description="Données de RIB/IBAN")
     erreurs: list[str] = Field(default_factory=list, description="Messages d'erreur")
     avertissements: list[str] = Field(default_factory=list, description="Messages d'avertissement")
+    fichier_source: Optional[str] = Field(None, description="Chemin du fichier traité")
+    empreinte_fichier: Optional[str] = Field(
+        None, description="Empreinte SHA-256 du contenu du fichier traité"
+    )
+    tokens: dict[str, int] = Field(
+        default_factory=dict,
+        description="Tokens consommés (input_tokens, output_tokens, total_tokens, overhead_tokens)",
+    )
+    cout_usd: float = Field(0.0, description="Coût des appels au modèle pour ce document (USD)")
+    durees: dict[str, float] = Field(
+        default_factory=dict,
+        description="Durées par étape en secondes (classification, extraction)",
+    )
+    modeles: dict[str, str] = Field(
+        default_factory=dict,
+        description="Modèle appelé par étape (classification, extraction)",
+    )
+    escalades: list[str] = Field(
+        default_factory=list,
+        description="Étapes refaites avec le modèle d'escalade (confiance basse ou réponse invalide)",
+    )
+    couche_texte: bool = Field(
+        False, description="Extraction faite sur la couche texte du PDF, sans son image"
+    )
+    prompts: dict[str, str] = Field(
+        default_factory=dict,
+        description="Version du prompt utilisée par étape (clé@version)",
+    )
+    reprises: int = Field(
+        0, description="Relances de l'extraction pour ses seuls champs rejetés par le schéma"
+    )
+    reparations_json: list[str] = Field(
+        default_factory=list,
+        description="Réparations du JSON des réponses (bloc de code, texte ignoré, coupure)",
+    )
@@ -0,0 +1,65 @@
+"""
+Export du store de résultats vers un dataset Parquet ou JSONL partitionné.
+
+Chaque exécution ajoute ses fichiers aux partitions existantes (`date`, puis
+`type_document` pour les extractions). Chaque exécution affiche son curseur
+(dernier id exporté des extractions et des dossiers) : `--depuis-id` le reprend
+pour n'exporter que les lignes enregistrées depuis.
+
+Usage:
+    python src/export.py --store data/kyc_results.db --sortie exports/
+    python src/export.py --sortie exports/ --format jsonl --depuis-id 1200:340
+"""
+
+import argparse
+from pathlib import Path
+
+from dotenv import load_dotenv
+
+from chains.configuration import Configuration
+from storage import ResultStore
+from storage.export import FORMATS, export_store
+
+
+def _cursor(value: str) -> dict[str, int]:
+    """Curseur `EXTRACTIONS:DOSSIERS` (derniers id exportés) de `--depuis-id`."""
+    try:
+        extractions, dossiers = (int(part) for part in value.split(":"))
+    except ValueError:
+        raise argparse.ArgumentTypeError(
+            f"Curseur invalide: {value} (attendu: EXTRACTIONS:DOSSIERS, ex. 1200:340)"
+        ) from None
+    return {"extractions": extractions, "dossiers": dossiers}
+
+
+def main():
+    """Point d'entrée de l'export."""
+    load_dotenv()
+    parser = argparse.ArgumentParser(description="Export des résultats KYC (Parquet ou JSONL)")
+    parser.add_argument("--store", type=Path, help="Store SQLite (VAR_KYC_STORE_PATH par défaut)")
+    parser.add_argument("--sortie", type=Path, required=True, help="Répertoire de l'export")
+    parser.add_argument("--format", choices=FORMATS, default="parquet", help="Format des fichiers")
+    parser.add_argument(
+        "--depuis-id",
+        type=_cursor,
+        metavar="EXTRACTIONS:DOSSIERS",
+        help="Curseur affiché par l'export précédent (n'exporter que les lignes suivantes)",
+    )
+    parser.add_argument(
+        "--row-group-size", type=int, default=10_000, help="Lignes par groupe écrit"
+    )
+    args = parser.parse_args()
+
+    store_path = args.store or Configuration().result_store_path
+    if store_path is None:
+        parser.error("--store ou VAR_KYC_STORE_PATH requis")
+
+    with ResultStore(store_path) as store:
+        summary = export_store(store, args.sortie, args.format, args.depuis_id, args.row_group_size)
+    print(" | ".join(f"{table}: {count}" for table, count in summary.lignes.items()))
+    curseur = summary.curseur
+    print(f"Export suivant : --depuis-id {curseur['extractions']}:{curseur['dossiers']}")
+
+
+if __name__ == "__main__":
+    main()
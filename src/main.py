@@ -5,12 +5,10 @@ Exemple d'utilisation pour la conférence!
 """
 
 import sys
+from pathlib import Path
 
 from dotenv import load_dotenv
 
-from chains.llm_chain import KYCDocumentChain
-from pipeline import KYCPipeline
-
 # Charger les variables d'environnement depuis .env
 load_dotenv()
 
@@ -26,8 +24,23 @@ def demo_document_unique(image_path: str):
     print("🎯 DÉMO: Classification et extraction d'un document unique")
     print("=" * 70)
 
+    # Imports différés : afficher l'usage ne charge pas la chain et ses dépendances
+    from chains.budget import BudgetScope, budget_scope
+    from chains.llm_chain import KYCDocumentChain
+    from storage import ResultStore
+    from utils.events import flush_events
+
     chain = KYCDocumentChain()
-    result = chain.process_document(image_path)
+    with budget_scope(BudgetScope(interactive=True)):
+        result = chain.process_document(image_path)
+    # Le récapitulatif s'affiche après les événements de progression
+    flush_events()
+
+    if chain.config.result_store_path is not None:
+        with ResultStore(chain.config.result_store_path) as store:
+            # Mêmes clés que le pipeline : dossier client (répertoire du document) et
+            # prompts/modèles, pour que cette extraction soit réutilisable
+            store.append_extraction(result, Path(image_path).parent.name, chain.reuse_key)
 
     if result.extraction_reussie:
         print("\n✅ EXTRACTION RÉUSSIE\n")
@@ -126,15 +139,26 @@ def demo_document_unique(image_path: str):
                 print(f"   - {erreur}")
 
 
-def demo_dossier_complet(folder_path: str):
+def demo_dossier_complet(folder_path: str, pdf: bool = False):
     """
     Démo: traiter un dossier KYC complet.
 
     Args:
-        folder_path: Chemin vers le dossier contenant les documents
+        folder_path: Chemin vers le dossier contenant les documents, ou vers un PDF
+            contenant tous les documents à la suite si `pdf`
+        pdf: Le dossier est un seul PDF multi-documents
     """
+    from chains.budget import BudgetScope, budget_scope
+    from pipeline import KYCPipeline
+    from utils.events import flush_events
+
     pipeline = KYCPipeline()
-    dossier = pipeline.process_folder(folder_path)
+    with budget_scope(BudgetScope(interactive=True)):
+        if pdf:
+            dossier = pipeline.process_pdf_dossier(folder_path)
+        else:
+            dossier = pipeline.process_folder(folder_path)
+    flush_events()
 
     print("\n" + "=" * 70)
     print("📊 RÉSUMÉ DU DOSSIER KYC")
@@ -149,6 +173,17 @@ def demo_dossier_complet(folder_path: str):
         for erreur in dossier.erreurs_validation:
             print(f"   - {erreur}")
 
+    print("\n🧭 Coût et latence par route:")
+    for stats in pipeline.chain.router.stats():
+        type_document = stats.type_document.value if stats.type_document else "-"
+        print(
+            f"   {stats.stage.value:<15} {type_document:<22} {stats.modele:<24} "
+            f"prompt={stats.prompt or '-'} appels={stats.appels} "
+            f"latence moy.={stats.latence_moyenne_s:.2f}s coût=${stats.cout_usd:.6f}"
+        )
+    for stats in pipeline.chain.router.escalation_stats():
+        print(f"   ⤴️  Escalade {stats.stage.value}: {stats.escalades}/{stats.decisions}")
+
     print("\n" + "=" * 70)
     print("💡 Ce qui a changé depuis l'époque du deep learning:")
     print("=" * 70)
@@ -185,13 +220,28 @@ def main():
         print("Usage:")
         print("  python main.py <chemin_document>        # Traiter un document")
         print("  python main.py --folder <chemin_dossier> # Traiter un dossier complet")
+        print("  python main.py --pdf <fichier.pdf>       # Traiter un dossier scanné en un PDF")
         return
 
+    from chains.configuration import Configuration
+    from utils.events import configure_events
+    from utils.tracing import enable_trace_file
+
+    config = Configuration()
+    configure_events(json_path=config.events_path, level=config.log_level, quiet=config.quiet)
+    if config.trace_path is not None:
+        enable_trace_file(config.trace_path)
+
     if sys.argv[1] == "--folder":
         if len(sys.argv) < 3:
             print("Erreur: spécifiez le chemin du dossier")
             return
         demo_dossier_complet(sys.argv[2])
+    elif sys.argv[1] == "--pdf":
+        if len(sys.argv) < 3:
+            print("Erreur: spécifiez le chemin du PDF")
+            return
+        demo_dossier_complet(sys.argv[2], pdf=True)
     else:
         demo_document_unique(sys.argv[1])
 
@@ -4,14 +4,84 @@ Pipeline principal pour traiter des dossiers KYC complets.
 Traite plusieurs documents d'un même client et valide la cohérence.
 """
 
+import asyncio
+import logging
+import os
+import tempfile
+from collections import defaultdict
+from collections.abc import AsyncIterator, Callable, Iterable, Iterator
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, as_completed, wait
+from dataclasses import dataclass, replace
+from functools import cached_property
 from pathlib import Path
+from typing import TypeVar
 
+from chains.budget import BudgetError, budget_scope, current_scope
 from chains.configuration import Configuration
-from chains.llm_chain import KYCDocumentChain
+from chains.llm_chain import KYCDocumentChain, StageResult
 from chains.schemas import (
+    ClassificationDocument,
     DossierKYC,
+    ResultatExtractionKYC,
+    SegmentationDocument,
+    SegmentDocument,
     TypeDocument,
 )
+from storage import FolderManifest, ResultStore
+from utils.events import emit
+from utils.files import file_sha256
+from utils.pdf import extract_pages
+from utils.tracing import span
+
+DOCUMENT_EXTENSIONS = {".jpg", ".jpeg", ".png", ".pdf"}
+
+# Documents requis d'un dossier, par libellé ; la pièce d'identité peut être une
+# CNI ou un passeport (la CNI est préférée, comme dans `_build_dossier`)
+REQUIRED_DOCUMENTS: dict[str, tuple[TypeDocument, ...]] = {
+    "pièce d'identité": (TypeDocument.CARTE_IDENTITE, TypeDocument.PASSEPORT),
+    "justificatif de domicile": (TypeDocument.JUSTIFICATIF_DOMICILE,),
+    "RIB": (TypeDocument.RIB,),
+}
+OPTIONAL_DOCUMENTS: tuple[TypeDocument, ...] = (TypeDocument.PERMIS_CONDUIRE,)
+
+T = TypeVar("T")
+R = TypeVar("R")
+
+
+class TransientDossierError(RuntimeError):
+    """
+    Dossier incomplet parce que des documents présents n'ont pas pu être traités
+    (appel au modèle, réponse illisible) : le rejouer peut aboutir.
+
+    Un dossier sans aucun document d'un type requis lève `ValueError` : le
+    rejouer ne changera rien.
+    """
+
+
+def _missing_required(results: dict[TypeDocument, ResultatExtractionKYC]) -> list[str]:
+    """Libellés des documents requis sans extraction réussie."""
+    return [
+        label for label, types in REQUIRED_DOCUMENTS.items() if not any(t in results for t in types)
+    ]
+
+
+@dataclass
+class _Candidate:
+    """Document d'un dossier après la phase de classification."""
+
+    path: Path
+    classification: ClassificationDocument | None = None
+    classification_step: StageResult | None = None
+    result: ResultatExtractionKYC | None = None
+    # Résultat ou classification déjà dans le manifest
+    reused: bool = False
+
+    @cached_property
+    def selection_key(self) -> tuple[float, int, int]:
+        """Clé de choix entre documents d'un même type : confiance, récence, taille."""
+        stat = self.path.stat()
+        confiance = self.classification.confiance if self.classification else None
+        return (confiance or 0.0, stat.st_mtime_ns, stat.st_size)
 
 
 class KYCPipeline:
@@ -25,50 +95,380 @@ class KYCPipeline:
     - (optionnel) 1 permis de conduire
     """
 
-    def __init__(self, config: Configuration | None = None):
+    def __init__(
+        self,
+        config: Configuration | None = None,
+        store: ResultStore | None = None,
+        chain: KYCDocumentChain | None = None,
+    ):
         """
         Initialise le pipeline.
 
         Args:
             config: Configuration
+            store: Store des résultats (si None, ouvert depuis `VAR_KYC_STORE_PATH` si défini)
+            chain: Chain de traitement (si None, créée depuis la configuration)
         """
         self.config = config or Configuration()
-        self.chain = KYCDocumentChain(self.config)
+        self.chain = chain or KYCDocumentChain(self.config)
+        if store is None and self.config.result_store_path is not None:
+            store = ResultStore(self.config.result_store_path)
+        self.store = store
+
+    def process_document(
+        self, doc_path: Path, dossier_client: str | None = None
+    ) -> ResultatExtractionKYC:
+        """
+        Traite un document en réutilisant l'extraction déjà stockée pour le même contenu.
+
+        Args:
+            doc_path: Chemin du document
+            dossier_client: Identifiant du dossier client pour le store
 
-    def process_folder(self, folder_path: str | Path) -> DossierKYC:
+        Returns:
+            Résultat d'extraction (stocké ou calculé)
+        """
+        cached = self._find_stored(doc_path)
+        if cached is not None:
+            return cached
+        return self._process_and_store(doc_path, dossier_client)
+
+    def _find_stored(self, doc_path: Path) -> ResultatExtractionKYC | None:
+        """Extraction déjà stockée pour le même contenu, mêmes prompts et modèles (None sans store)."""
+        if self.store is None:
+            return None
+        cached = self.store.find_extraction(file_sha256(doc_path), self.chain.reuse_key)
+        if cached is None:
+            return None
+        emit("document.reutilise", fichier=str(doc_path), source="store")
+        return cached.model_copy(update={"fichier_source": str(doc_path)})
+
+    def _process_and_store(
+        self,
+        doc_path: Path,
+        dossier_client: str | None,
+        classification_step: StageResult | None = None,
+    ) -> ResultatExtractionKYC:
+        """Traite un document avec la chain et stocke son résultat."""
+        result = self.chain.process_document(doc_path, classification_step)
+        if self.store is not None:
+            self.store.append_extraction(result, dossier_client, self.chain.reuse_key)
+        return result
+
+    def _iter_documents(self, folder_path: Path) -> Iterator[Path]:
+        """Parcourt paresseusement les documents images/PDF d'un dossier."""
+        with os.scandir(folder_path) as entries:
+            for entry in entries:
+                if entry.is_file() and Path(entry.name).suffix.lower() in DOCUMENT_EXTENSIONS:
+                    yield Path(entry.path)
+
+    def _classify_or_reuse(self, doc_path: Path, manifest: FolderManifest | None) -> _Candidate:
+        """
+        Phase 1 d'un document : réutilise son résultat s'il est connu, sinon le classe.
+
+        Un document inchangé depuis le manifest (extrait ou écarté), ou dont le
+        contenu est déjà dans le store, n'est pas reclassé.
+        """
+        with span("recherche_resultat", fichier=doc_path.name):
+            if manifest is not None:
+                result = manifest.lookup(doc_path)
+                if result is not None:
+                    emit("document.reutilise", fichier=str(doc_path), source="manifest")
+                    return _Candidate(doc_path, result.classification, result=result, reused=True)
+                known = manifest.lookup_classification(doc_path)
+                if known is not None:
+                    classification, model = known
+                    emit("classification.reutilisee", fichier=str(doc_path), source="manifest")
+                    step = StageResult(
+                        value=classification, token_usage=None, model=model, cost=0.0
+                    )
+                    return _Candidate(doc_path, classification, step, reused=True)
+
+            result = self._find_stored(doc_path)
+            if result is not None:
+                return _Candidate(doc_path, result.classification, result=result)
+
+        try:
+            step = self.chain.classify(doc_path)
+        except BudgetError:
+            raise
+        except Exception as e:
+            # Comme dans `KYCDocumentChain.process_document`, un échec reste local au document
+            emit("classification.erreur", logging.ERROR, fichier=str(doc_path), erreur=str(e))
+            failed = ResultatExtractionKYC(
+                extraction_reussie=False, erreurs=[str(e)], fichier_source=str(doc_path)
+            )
+            return _Candidate(doc_path, result=failed)
+        return _Candidate(doc_path, step.value, classification_step=step)
+
+    def _extract_candidate(
+        self, candidate: _Candidate, dossier_client: str
+    ) -> tuple[Path, ResultatExtractionKYC, bool]:
+        """Phase 2 d'un document retenu : extraction à partir de sa classification."""
+        result = self._process_and_store(
+            candidate.path, dossier_client, candidate.classification_step
+        )
+        return candidate.path, result, False
+
+    def _run_bounded(self, fn: Callable[[T], R], items: Iterable[T]) -> Iterator[R]:
+        """
+        Applique `fn` en parallèle avec une fenêtre bornée d'éléments en vol.
+
+        Yields:
+            Les résultats dans l'ordre de complétion
+        """
+        max_workers = self.config.max_concurrent_documents
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            pending = set()
+            for item in items:
+                if len(pending) >= max_workers:
+                    done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                    yield from (future.result() for future in done)
+                pending.add(executor.submit(fn, item))
+            for future in as_completed(pending):
+                yield future.result()
+
+    async def _arun_bounded(self, fn: Callable[[T], R], items: Iterable[T]) -> AsyncIterator[R]:
+        """Version asynchrone de `_run_bounded` (threads via `asyncio.to_thread`)."""
+        max_workers = self.config.max_concurrent_documents
+        pending = set()
+        for item in items:
+            if len(pending) >= max_workers:
+                done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    yield task.result()
+            pending.add(asyncio.create_task(asyncio.to_thread(fn, item)))
+        for next_done in asyncio.as_completed(pending):
+            yield await next_done
+
+    def iter_folder(
+        self, folder_path: str | Path, incremental: bool = True
+    ) -> Iterator[ResultatExtractionKYC | DossierKYC]:
+        """
+        Traite un dossier en deux phases, en produisant chaque résultat dès qu'il est disponible.
+
+        1. Tous les documents sont classés en parallèle.
+        2. Un seul document est retenu par type requis (plus le permis, optionnel),
+           et seuls ceux-là sont extraits. Si un type requis manque, le dossier est
+           refusé avant toute dépense d'extraction. Si l'extraction du document retenu
+           échoue, le suivant du même type est extrait à sa place.
+
+        Les deux phases s'exécutent en parallèle (`VAR_KYC_MAX_CONCURRENCE`) avec une
+        fenêtre bornée de documents en vol.
+
+        Args:
+            folder_path: Chemin vers le dossier contenant les documents
+            incremental: Réutiliser les résultats du manifest pour les fichiers inchangés
+
+        Yields:
+            Chaque `ResultatExtractionKYC` retenu (ou en échec) dans l'ordre de
+            complétion, puis le `DossierKYC`
+
+        Raises:
+            ValueError: Si un type de document requis est absent du dossier
+            TransientDossierError: Si un document requis n'a pas pu être traité
+        """
+        run = _FolderRun(self, Path(folder_path), incremental)
+
+        documents = self._iter_documents(run.folder_path)
+        with span("classification_dossier", dossier=run.folder_path.name):
+            for candidate in self._run_bounded(run.classify, documents):
+                failed = run.add(candidate)
+                if failed is not None:
+                    yield failed
+
+        to_extract, ready = run.plan()
+        while to_extract or ready:
+            yield from (run.collect(c.path, c.result, c.reused) for c in ready)
+            for extracted in self._run_bounded(run.extract, to_extract):
+                yield run.collect(*extracted)
+            to_extract, ready = run.fallbacks()
+
+        yield run.finish()
+
+    async def aiter_folder(
+        self, folder_path: str | Path, incremental: bool = True
+    ) -> AsyncIterator[ResultatExtractionKYC | DossierKYC]:
+        """
+        Version asynchrone de `iter_folder`.
+
+        Args:
+            folder_path: Chemin vers le dossier contenant les documents
+            incremental: Réutiliser les résultats du manifest pour les fichiers inchangés
+
+        Yields:
+            Chaque `ResultatExtractionKYC` retenu (ou en échec) dans l'ordre de
+            complétion, puis le `DossierKYC`
+
+        Raises:
+            ValueError: Si un type de document requis est absent du dossier
+            TransientDossierError: Si un document requis n'a pas pu être traité
+        """
+        run = _FolderRun(self, Path(folder_path), incremental)
+
+        documents = self._iter_documents(run.folder_path)
+        with span("classification_dossier", dossier=run.folder_path.name):
+            async for candidate in self._arun_bounded(run.classify, documents):
+                failed = run.add(candidate)
+                if failed is not None:
+                    yield failed
+
+        to_extract, ready = run.plan()
+        while to_extract or ready:
+            for candidate in ready:
+                yield run.collect(candidate.path, candidate.result, candidate.reused)
+            async for extracted in self._arun_bounded(run.extract, to_extract):
+                yield run.collect(*extracted)
+            to_extract, ready = run.fallbacks()
+
+        yield run.finish()
+
+    def process_folder(self, folder_path: str | Path, incremental: bool = True) -> DossierKYC:
         """
         Traite tous les documents d'un dossier.
 
+        En mode incrémental, le manifest du dossier (`.kyc_manifest.json`) permet de
+        ne renvoyer à la chain que les documents nouveaux ou modifiés. Seul le
+        meilleur document de chaque type est extrait (voir `iter_folder`).
+
         Args:
             folder_path: Chemin vers le dossier contenant les documents
+            incremental: Réutiliser les résultats du manifest pour les fichiers inchangés
 
         Returns:
             Dossier KYC avec tous les documents extraits et validés
+
+        Raises:
+            ValueError: Si un type de document requis est absent du dossier
+            TransientDossierError: Si un document requis n'a pas pu être traité
         """
-        folder_path = Path(folder_path)
+        for item in self.iter_folder(folder_path, incremental):
+            if isinstance(item, DossierKYC):
+                return item
 
-        print(f"\n{'=' * 70}")
-        print(f"🏦 Traitement du dossier KYC: {folder_path.name}")
-        print(f"{'=' * 70}\n")
+    def process_pdf_dossier(self, pdf_path: str | Path) -> DossierKYC:
+        """
+        Traite un dossier reçu comme un seul PDF scanné (plusieurs documents à la suite).
 
-        # Trouver tous les documents images
-        extensions = [".jpg", ".jpeg", ".png", ".pdf"]
-        documents = [f for f in folder_path.iterdir() if f.suffix.lower() in extensions]
+        1. Un appel de segmentation classe chaque page et regroupe les pages par document.
+        2. Le document le plus sûr de chaque type est retenu ; si un type requis
+           manque, le dossier est refusé avant toute extraction.
+        3. Chaque document retenu est découpé dans son propre PDF (ses seules pages)
+           et extrait avec la classification de la segmentation, en parallèle.
 
-        print(f"📁 {len(documents)} document(s) trouvé(s)\n")
+        Args:
+            pdf_path: Chemin du PDF (le nom du fichier sert d'identifiant de dossier)
 
-        # Traiter chaque document
-        results = {}
-        for doc_path in documents:
-            result = self.chain.process_document(doc_path)
-            if result.extraction_reussie:
-                type_doc = result.classification.type_detecte
-                results[type_doc] = result
-
-        # Construire le dossier KYC
-        print(f"\n{'=' * 70}")
-        print("📋 Construction du dossier KYC")
-        print(f"{'=' * 70}\n")
+        Returns:
+            Dossier KYC avec tous les documents extraits et validés
+
+        Raises:
+            ValueError: Si un type de document requis est absent du PDF
+            TransientDossierError: Si un document requis n'a pas pu être extrait
+            ImportError: Si pypdf n'est pas installé (dépendance optionnelle `pdf`)
+        """
+        pdf_path = Path(pdf_path)
+        dossier_client = pdf_path.stem
+        scope = current_scope()
+        scope = replace(scope, client=scope.client or dossier_client, dossier=dossier_client)
+        emit("dossier.debut", dossier=dossier_client)
+
+        with budget_scope(scope):
+            segmentation_step = self.chain.segment(pdf_path)
+        selected = self._select_segments(segmentation_step.value)
+
+        results: dict[TypeDocument, ResultatExtractionKYC] = {}
+        with tempfile.TemporaryDirectory(prefix="kyc-pdf-") as tmp:
+
+            def extract(segment: SegmentDocument) -> ResultatExtractionKYC:
+                source = f"{pdf_path}#pages={','.join(str(page) for page in segment.pages)}"
+                part = Path(tmp) / f"{segment.type_detecte.value}.pdf"
+                step = StageResult(
+                    value=ClassificationDocument(
+                        type_detecte=segment.type_detecte, confiance=segment.confiance
+                    ),
+                    token_usage=None,
+                    model=segmentation_step.model,
+                    cost=0.0,
+                    prompt=segmentation_step.prompt,
+                )
+                with budget_scope(scope):
+                    try:
+                        extract_pages(pdf_path, segment.pages, part)
+                    except ValueError as e:
+                        emit("document.erreur", logging.ERROR, fichier=source, erreur=str(e))
+                        return ResultatExtractionKYC(
+                            extraction_reussie=False, erreurs=[str(e)], fichier_source=source
+                        )
+                    result = self.chain.process_document(part, step)
+                result = result.model_copy(update={"fichier_source": source})
+                if self.store is not None:
+                    self.store.append_extraction(result, dossier_client, self.chain.reuse_key)
+                return result
+
+            for result in self._run_bounded(extract, selected):
+                if result.extraction_reussie:
+                    results[result.classification.type_detecte] = result
+
+        emit("dossier.fin", dossier=dossier_client, documents=len(selected))
+        missing = _missing_required(results)
+        if missing:
+            # Chaque type requis avait un segment (`_select_segments`) : son extraction a échoué
+            emit("dossier.incomplet", logging.ERROR, manquants=", ".join(missing))
+            raise TransientDossierError(
+                f"Dossier KYC incomplet. Échec d'extraction: {', '.join(missing)}"
+            )
+        with span("assemblage_dossier", dossier=dossier_client):
+            return self._build_dossier(results, dossier_client)
+
+    def _select_segments(self, segmentation: SegmentationDocument) -> list[SegmentDocument]:
+        """
+        Choisit le document le plus sûr par type requis (et le permis s'il est présent).
+
+        Une page absente du PDF fait échouer l'extraction de son document (`extract_pages`).
+
+        Raises:
+            ValueError: Si un type requis n'a aucun document, avant toute extraction
+        """
+        best: dict[TypeDocument, SegmentDocument] = {}
+        for segment in segmentation.documents:
+            current = best.get(segment.type_detecte)
+            if current is None or (segment.confiance or 0.0) > (current.confiance or 0.0):
+                best[segment.type_detecte] = segment
+
+        selected: list[SegmentDocument] = []
+        missing = []
+        for label, types in REQUIRED_DOCUMENTS.items():
+            segment = next((best[t] for t in types if t in best), None)
+            if segment is None:
+                emit("dossier.piece", libelle=label, present=False)
+                missing.append(label)
+            else:
+                selected.append(segment)
+        selected += [best[t] for t in OPTIONAL_DOCUMENTS if t in best]
+
+        if missing:
+            emit("dossier.incomplet", logging.ERROR, manquants=", ".join(missing))
+            raise ValueError(f"Dossier KYC incomplet. Documents manquants: {', '.join(missing)}")
+        return selected
+
+    def _build_dossier(
+        self, results: dict[TypeDocument, ResultatExtractionKYC], dossier_client: str
+    ) -> DossierKYC:
+        """
+        Construit et valide le dossier KYC à partir des résultats par type.
+
+        Args:
+            results: Meilleur résultat réussi pour chaque type de document
+            dossier_client: Identifiant du dossier client pour le store
+
+        Returns:
+            Dossier KYC validé
+
+        Raises:
+            ValueError: Si un document requis manque
+        """
+        emit("dossier.construction", dossier=dossier_client)
 
         # Extraire les documents par type
         piece_identite = None
@@ -79,35 +479,40 @@ class KYCPipeline:
         # Pièce d'identité (CNI ou Passeport)
         if TypeDocument.CARTE_IDENTITE in results:
             piece_identite = results[TypeDocument.CARTE_IDENTITE].carte_identite
-            print("✓ Carte d'identité trouvée")
+            emit("dossier.piece", libelle="Carte d'identité", present=True)
         elif TypeDocument.PASSEPORT in results:
             piece_identite = results[TypeDocument.PASSEPORT].passeport
-            print("✓ Passeport trouvé")
+            emit("dossier.piece", libelle="Passeport", present=True)
         else:
-            print("✗ Aucune pièce d'identité trouvée")
+            emit("dossier.piece", libelle="Pièce d'identité", present=False)
 
         # Justificatif de domicile
         if TypeDocument.JUSTIFICATIF_DOMICILE in results:
             justificatif = results[TypeDocument.JUSTIFICATIF_DOMICILE].justificatif_domicile
-            print("✓ Justificatif de domicile trouvé")
-        else:
-            print("✗ Justificatif de domicile manquant")
+        emit("dossier.piece", libelle="Justificatif de domicile", present=justificatif is not None)
 
         # RIB
         if TypeDocument.RIB in results:
             rib = results[TypeDocument.RIB].rib
-            print("✓ RIB trouvé")
-        else:
-            print("✗ RIB manquant")
+        emit("dossier.piece", libelle="RIB", present=rib is not None)
 
         # Permis (optionnel)
         if TypeDocument.PERMIS_CONDUIRE in results:
             permis = results[TypeDocument.PERMIS_CONDUIRE].permis_conduire
-            print("✓ Permis de conduire trouvé (optionnel)")
+            emit("dossier.piece", libelle="Permis de conduire (optionnel)", present=True)
 
         # Vérifier que tous les documents requis sont présents
         if not (piece_identite and justificatif and rib):
-            print("\n❌ Dossier incomplet - documents manquants\n")
+            missing = [
+                label
+                for label, document in (
+                    ("pièce d'identité", piece_identite),
+                    ("justificatif de domicile", justificatif),
+                    ("RIB", rib),
+                )
+                if not document
+            ]
+            emit("dossier.incomplet", logging.ERROR, manquants=", ".join(missing))
             raise ValueError(
                 "Dossier KYC incomplet. Documents requis: "
                 "pièce d'identité + justificatif de domicile + RIB"
@@ -122,20 +527,21 @@ class KYCPipeline:
         )
 
         # Valider la cohérence
-        print(f"\n{'=' * 70}")
-        print("🔍 Validation de la cohérence du dossier")
-        print(f"{'=' * 70}\n")
+        emit("dossier.validation", dossier=dossier_client)
 
         is_valid = dossier.valider_coherence()
+        if self.store is not None:
+            self.store.append_dossier(dossier, dossier_client)
 
         if is_valid:
-            print("✅ Dossier KYC VALIDÉ\n")
+            emit("dossier.valide", dossier=dossier_client)
         else:
-            print("❌ Dossier KYC REJETÉ\n")
-            print("Erreurs détectées:")
-            for erreur in dossier.erreurs_validation:
-                print(f"  - {erreur}")
-            print()
+            emit(
+                "dossier.rejete",
+                logging.WARNING,
+                dossier=dossier_client,
+                erreurs=dossier.erreurs_validation,
+            )
 
         return dossier
 
@@ -153,13 +559,11 @@ class KYCPipeline:
         Returns:
             Dossier KYC validé
         """
-        print(f"\n{'=' * 70}")
-        print("🏦 Traitement de documents KYC individuels")
-        print(f"{'=' * 70}\n")
+        emit("documents.debut")
 
         # Traiter chaque document
-        print("1️⃣ Pièce d'identité...")
-        result_id = self.chain.process_document(id_path)
+        emit("document.etape", numero=1, libelle="Pièce d'identité")
+        result_id = self.process_document(Path(id_path))
         if not result_id.extraction_reussie:
             raise ValueError(f"Échec extraction pièce d'identité: {result_id.erreurs}")
 
@@ -171,14 +575,14 @@ class KYCPipeline:
         else:
             raise ValueError("Type de pièce d'identité non reconnu")
 
-        print("2️⃣ Justificatif de domicile...")
-        result_address = self.chain.process_document(address_path)
+        emit("document.etape", numero=2, libelle="Justificatif de domicile")
+        result_address = self.process_document(Path(address_path))
         if not result_address.extraction_reussie or not result_address.justificatif_domicile:
             raise ValueError(f"Échec extraction justificatif: {result_address.erreurs}")
         justificatif = result_address.justificatif_domicile
 
-        print("3️⃣ RIB...")
-        result_rib = self.chain.process_document(rib_path)
+        emit("document.etape", numero=3, libelle="RIB")
+        result_rib = self.process_document(Path(rib_path))
         if not result_rib.extraction_reussie or not result_rib.rib:
             raise ValueError(f"Échec extraction RIB: {result_rib.erreurs}")
         rib = result_rib.rib
@@ -188,18 +592,212 @@ class KYCPipeline:
             document_identite=piece_identite, justificatif_domicile=justificatif, rib=rib
         )
 
-        print(f"\n{'=' * 70}")
-        print("🔍 Validation de la cohérence")
-        print(f"{'=' * 70}\n")
+        emit("dossier.validation")
 
         is_valid = dossier.valider_coherence()
+        if self.store is not None:
+            self.store.append_dossier(dossier)
 
         if is_valid:
-            print("✅ Dossier KYC VALIDÉ\n")
+            emit("dossier.valide")
         else:
-            print("❌ Dossier KYC REJETÉ\n")
-            for erreur in dossier.erreurs_validation:
-                print(f"  - {erreur}")
-            print()
+            emit("dossier.rejete", logging.WARNING, erreurs=dossier.erreurs_validation)
 
         return dossier
+
+
+class _FolderRun:
+    """
+    État d'un traitement de dossier : manifest, classement par type et meilleur résultat par type.
+
+    Seuls des candidats légers (chemin, classification) sont gardés pour tout le
+    dossier ; un résultat réutilisé n'est gardé que pour le meilleur document de
+    son type, et un échec de classification est rendu au consommateur aussitôt.
+    """
+
+    def __init__(self, pipeline: KYCPipeline, folder_path: Path, incremental: bool):
+        self.pipeline = pipeline
+        self.folder_path = folder_path
+        self.manifest = (
+            FolderManifest(folder_path, pipeline.chain.reuse_key) if incremental else None
+        )
+        self.results: dict[TypeDocument, ResultatExtractionKYC] = {}
+        self.paths: list[Path] = []
+        self.ranking: dict[TypeDocument, list[_Candidate]] = defaultdict(list)
+        self.best_reused: dict[TypeDocument, _Candidate] = {}
+        self.failures = 0
+        # Documents de repli par libellé, le meilleur en dernier
+        self.fallback_queues: dict[str, list[_Candidate]] = {}
+        self.extracting: dict[Path, str] = {}
+        self.failed_labels: list[str] = []
+        # Dépenses facturées au dossier (et au client, par défaut le nom du dossier)
+        scope = current_scope()
+        self.scope = replace(
+            scope, client=scope.client or folder_path.name, dossier=folder_path.name
+        )
+
+        emit("dossier.debut", dossier=folder_path.name)
+
+    def classify(self, doc_path: Path) -> _Candidate:
+        """Phase 1 d'un document, exécutée dans un thread du pool."""
+        with budget_scope(self.scope):
+            return self.pipeline._classify_or_reuse(doc_path, self.manifest)
+
+    def extract(self, candidate: _Candidate) -> tuple[Path, ResultatExtractionKYC, bool]:
+        """Phase 2 d'un document retenu, exécutée dans un thread du pool."""
+        with budget_scope(self.scope):
+            return self.pipeline._extract_candidate(candidate, self.folder_path.name)
+
+    def add(self, candidate: _Candidate) -> ResultatExtractionKYC | None:
+        """
+        Enregistre un document classé (phase 1).
+
+        Returns:
+            Le résultat en échec d'un document qui n'a pas pu être classé, sinon None
+        """
+        self.paths.append(candidate.path)
+        if candidate.classification is None:
+            self.failures += 1
+            return candidate.result
+        type_document = candidate.classification.type_detecte
+        if candidate.result is None:
+            self.ranking[type_document].append(candidate)
+            return None
+        # Un résultat réutilisé ne peut plus échouer : seul le meilleur de son type
+        # peut servir, les autres sont écartés tout de suite
+        kept = self.best_reused.get(type_document)
+        if kept is None or candidate.selection_key > kept.selection_key:
+            self.best_reused[type_document], dropped = candidate, kept
+        else:
+            dropped = candidate
+        if dropped is not None:
+            emit("document.ecarte", fichier=str(dropped.path))
+        return None
+
+    def _queue(self, types: tuple[TypeDocument, ...]) -> list[_Candidate]:
+        """Documents des types, par ordre de préférence des types puis de `selection_key`."""
+        queue = []
+        for type_document in reversed(types):
+            candidates = self.ranking.pop(type_document, [])
+            if type_document in self.best_reused:
+                candidates.append(self.best_reused.pop(type_document))
+            queue += sorted(candidates, key=lambda c: c.selection_key)
+        return queue
+
+    def _split(
+        self, selected: list[tuple[str, _Candidate]]
+    ) -> tuple[list[_Candidate], list[_Candidate]]:
+        """Sépare les documents retenus à extraire de ceux dont le résultat est réutilisé."""
+        to_extract = []
+        for label, candidate in selected:
+            if candidate.result is None:
+                self.extracting[candidate.path] = label
+                to_extract.append(candidate)
+        return to_extract, [c for _, c in selected if c.result is not None]
+
+    def plan(self) -> tuple[list[_Candidate], list[_Candidate]]:
+        """
+        Choisit un document par type requis (et le permis s'il est présent).
+
+        Returns:
+            Tuple (documents à extraire, documents réutilisés)
+
+        Raises:
+            ValueError: Si un type requis n'a aucun document, avant toute extraction
+            TransientDossierError: Si un type requis manque alors que des documents
+                n'ont pas pu être classés
+        """
+        groups = dict(REQUIRED_DOCUMENTS)
+        groups.update(
+            {type_document.value: (type_document,) for type_document in OPTIONAL_DOCUMENTS}
+        )
+        self.fallback_queues = {label: self._queue(types) for label, types in groups.items()}
+        missing = [label for label in REQUIRED_DOCUMENTS if not self.fallback_queues[label]]
+        for label in missing:
+            emit("dossier.piece", libelle=label, present=False)
+        if missing:
+            emit("dossier.incomplet", logging.ERROR, manquants=", ".join(missing))
+            # Les classifications déjà payées sont gardées pour le prochain passage
+            self._save_manifest()
+            message = f"Dossier KYC incomplet. Documents manquants: {', '.join(missing)}"
+            if self.failures:
+                # Le document manquant est peut-être l'un de ceux qui n'ont pas pu être classés
+                raise TransientDossierError(f"{message} ({self.failures} document(s) en échec)")
+            raise ValueError(message)
+
+        selected = [(label, queue.pop()) for label, queue in self.fallback_queues.items() if queue]
+        skipped = [c for queue in self.fallback_queues.values() for c in queue]
+        for candidate in skipped:
+            emit("document.ecarte", fichier=str(candidate.path))
+
+        to_extract, ready = self._split(selected)
+        emit(
+            "dossier.plan",
+            dossier=self.folder_path.name,
+            classes=len(self.paths),
+            a_extraire=len(to_extract),
+            ecartes=len(skipped),
+        )
+        return to_extract, ready
+
+    def fallbacks(self) -> tuple[list[_Candidate], list[_Candidate]]:
+        """
+        Choisit le document suivant de chaque type dont l'extraction a échoué.
+
+        Returns:
+            Tuple (documents à extraire, documents réutilisés), vides s'il n'y a
+            plus de repli
+        """
+        selected = []
+        for label in self.failed_labels:
+            queue = self.fallback_queues.get(label)
+            if queue:
+                candidate = queue.pop()
+                emit("document.repli", fichier=str(candidate.path), libelle=label)
+                selected.append((label, candidate))
+        self.failed_labels = []
+        return self._split(selected)
+
+    def collect(
+        self, doc_path: Path, result: ResultatExtractionKYC, reused: bool
+    ) -> ResultatExtractionKYC:
+        """Enregistre un résultat terminé et le retourne pour le consommateur."""
+        label = self.extracting.pop(doc_path, None)
+        if self.manifest and not reused and result.extraction_reussie:
+            self.manifest.record(doc_path, result)
+        if result.extraction_reussie:
+            self.results[result.classification.type_detecte] = result
+        elif label is not None:
+            self.failed_labels.append(label)
+        return result
+
+    def _save_manifest(self) -> None:
+        """Sauvegarde le manifest, avec la classification des documents écartés."""
+        if not self.manifest:
+            return
+        with span("sauvegarde_manifest"):
+            # Documents classés mais jamais extraits : doublons et types hors dossier
+            unused = [*self.fallback_queues.values(), *self.ranking.values()]
+            for candidate in (c for candidates in unused for c in candidates):
+                if candidate.result is None and not candidate.reused:
+                    self.manifest.record_classification(
+                        candidate.path,
+                        candidate.classification,
+                        candidate.classification_step.model,
+                    )
+            self.manifest.prune(self.paths)
+            self.manifest.save()
+
+    def finish(self) -> DossierKYC:
+        """Sauvegarde le manifest et construit le dossier."""
+        emit("dossier.fin", dossier=self.folder_path.name, documents=len(self.paths))
+        self._save_manifest()
+        missing = _missing_required(self.results)
+        if missing:
+            # Chaque type requis avait un document (`plan`) : toutes ses extractions ont échoué
+            emit("dossier.incomplet", logging.ERROR, manquants=", ".join(missing))
+            raise TransientDossierError(
+                f"Dossier KYC incomplet. Échec d'extraction: {', '.join(missing)}"
+            )
+        with span("assemblage_dossier", dossier=self.folder_path.name):
+            return self.pipeline._build_dossier(self.results, self.folder_path.name)
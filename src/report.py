@@ -0,0 +1,54 @@
+"""
+Rapport d'exploitation KYC en Markdown ou HTML statique.
+
+La source est un export Parquet (répertoire produit par `src/export.py`) ou le
+store SQLite des résultats ; seules les colonnes utiles au rapport sont lues.
+
+Usage:
+    python src/report.py --source exports/ --depuis 2026-10-01 --sortie rapport.html
+    python src/report.py --source data/kyc_results.db --format markdown
+"""
+
+import argparse
+from datetime import date
+from pathlib import Path
+
+from dotenv import load_dotenv
+
+from chains.configuration import Configuration
+from storage.report import build_report, load_portfolio, render_html, render_markdown
+
+
+def main():
+    """Point d'entrée du rapport."""
+    load_dotenv()
+    parser = argparse.ArgumentParser(description="Rapport d'exploitation KYC")
+    parser.add_argument(
+        "--source", type=Path, help="Export Parquet ou store SQLite (VAR_KYC_STORE_PATH par défaut)"
+    )
+    parser.add_argument("--depuis", type=date.fromisoformat, help="Premier jour (AAAA-MM-JJ)")
+    parser.add_argument(
+        "--format", choices=("markdown", "html"), help="Format (d'après l'extension de --sortie)"
+    )
+    parser.add_argument("--sortie", type=Path, help="Fichier du rapport (sortie standard sinon)")
+    args = parser.parse_args()
+
+    source = args.source or Configuration().result_store_path
+    if source is None:
+        parser.error("--source ou VAR_KYC_STORE_PATH requis")
+    format = args.format or (
+        "html" if args.sortie and args.sortie.suffix in (".html", ".htm") else "markdown"
+    )
+
+    report = build_report(load_portfolio(source, args.depuis))
+    title = f"Rapport KYC depuis le {args.depuis}" if args.depuis else "Rapport KYC"
+    text = (render_html if format == "html" else render_markdown)(report, title)
+    if args.sortie:
+        args.sortie.parent.mkdir(parents=True, exist_ok=True)
+        args.sortie.write_text(text, encoding="utf-8")
+    else:
+        print(text, end="")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,417 @@
+"""
+Service HTTP local et persistant autour de `KYCDocumentChain` et `KYCPipeline`.
+
+Évite de relancer l'interpréteur, les imports et `vertexai.init` à chaque document.
+File d'attente bornée en mémoire, deadline par requête, réponse 429 en cas de
+saturation, et endpoints /health, /ready et /metrics.
+
+Usage:
+    python src/service.py --port 8080             # Vertex AI
+    python src/service.py --port 8080 --fake      # Backend factice (tests de charge)
+"""
+
+import argparse
+import asyncio
+import base64
+import binascii
+import json
+import sqlite3
+import tempfile
+import time
+from collections import Counter
+from collections.abc import Callable
+from dataclasses import dataclass, field
+from http import HTTPStatus
+from pathlib import Path
+from urllib.parse import parse_qs, urlsplit
+
+from dotenv import load_dotenv
+from pydantic import BaseModel
+
+from chains.budget import BudgetError, BudgetScope, budget_scope
+from chains.configuration import Configuration
+from chains.fake_model import FakeGenerativeModel
+from chains.llm_chain import KYCDocumentChain
+from pipeline import KYCPipeline, TransientDossierError
+from utils.events import configure_events, emit
+from utils.tracing import enable_trace_file
+
+
+class HTTPError(Exception):
+    """Erreur convertie en réponse HTTP."""
+
+    def __init__(self, status: HTTPStatus, message: str):
+        super().__init__(message)
+        self.status = status
+
+
+def _number_header(headers: dict, name: str, parse: Callable[[str], float], default: float):
+    """Valeur numérique d'un en-tête (défaut si absent) ; 400 si invalide ou négative."""
+    if name not in headers:
+        return default
+    try:
+        value = parse(headers[name])
+    except ValueError:
+        value = None
+    # `not value >= 0` écarte aussi NaN
+    if value is None or not value >= 0:
+        raise HTTPError(HTTPStatus.BAD_REQUEST, f"En-tête {name} invalide: {headers[name]!r}")
+    return value
+
+
+def _document_name(filename: str) -> str:
+    """Nom d'un document envoyé, sans répertoire ; 400 s'il ne désigne pas un fichier."""
+    name = Path(filename).name
+    if name in ("", ".", ".."):
+        raise HTTPError(HTTPStatus.BAD_REQUEST, f"Nom de fichier invalide: {filename!r}")
+    return name
+
+
+@dataclass
+class _Job:
+    """Travail en attente dans la file du service."""
+
+    run: Callable[[], BaseModel]
+    deadline: float
+    future: asyncio.Future
+
+
+@dataclass
+class ServiceMetrics:
+    """Compteurs exposés sur /metrics."""
+
+    requests: Counter = field(default_factory=Counter)
+    rejected: int = 0
+    deadline_exceeded: int = 0
+    inflight: int = 0
+    job_seconds_sum: float = 0.0
+    job_count: int = 0
+
+
+class KYCService:
+    """Service HTTP asyncio avec file bornée et contre-pression."""
+
+    def __init__(
+        self,
+        chain: KYCDocumentChain,
+        pipeline: KYCPipeline,
+        queue_size: int,
+        workers: int,
+        deadline_s: float,
+        max_body_bytes: int,
+    ):
+        """
+        Initialise le service.
+
+        Args:
+            chain: Chain partagée (routage, budget et ingestion exposés sur /metrics)
+            pipeline: Pipeline partagé pour les documents et les dossiers (store, réutilisation)
+            queue_size: Nombre maximum de travaux en attente (au-delà: 429)
+            workers: Nombre de travaux exécutés en parallèle
+            deadline_s: Deadline par défaut d'une requête en secondes
+            max_body_bytes: Taille maximale d'un corps de requête
+        """
+        self.chain = chain
+        self.pipeline = pipeline
+        self.workers = workers
+        self.deadline_s = deadline_s
+        self.max_body_bytes = max_body_bytes
+        self.metrics = ServiceMetrics()
+        self._queue: asyncio.Queue[_Job] = asyncio.Queue(maxsize=queue_size)
+        self._worker_tasks: list[asyncio.Task] = []
+
+    @property
+    def ready(self) -> bool:
+        """Le service accepte-t-il de nouveaux travaux ?"""
+        return bool(self._worker_tasks) and not self._queue.full()
+
+    async def start(self, host: str, port: int) -> asyncio.Server:
+        """Démarre les workers et le serveur HTTP."""
+        self._worker_tasks = [asyncio.create_task(self._worker()) for _ in range(self.workers)]
+        return await asyncio.start_server(self._handle_connection, host, port)
+
+    async def _worker(self) -> None:
+        while True:
+            job = await self._queue.get()
+            try:
+                if job.future.done() or time.monotonic() > job.deadline:
+                    # Le client a déjà reçu un 504 : inutile de payer l'appel au modèle
+                    continue
+                self.metrics.inflight += 1
+                start = time.perf_counter()
+                try:
+                    result = await asyncio.to_thread(job.run)
+                except BudgetError as e:
+                    if not job.future.done():
+                        job.future.set_exception(HTTPError(HTTPStatus.TOO_MANY_REQUESTS, str(e)))
+                except ValueError as e:
+                    if not job.future.done():
+                        job.future.set_exception(HTTPError(HTTPStatus.UNPROCESSABLE_ENTITY, str(e)))
+                except TransientDossierError as e:
+                    # Un document requis n'a pas pu être traité : le client peut réessayer
+                    if not job.future.done():
+                        job.future.set_exception(HTTPError(HTTPStatus.SERVICE_UNAVAILABLE, str(e)))
+                except (RuntimeError, OSError, sqlite3.Error) as e:
+                    # Échec du modèle, du disque ou du store : le worker continue, le client
+                    # reçoit un 500
+                    if not job.future.done():
+                        job.future.set_exception(
+                            HTTPError(HTTPStatus.INTERNAL_SERVER_ERROR, f"Erreur interne: {e}")
+                        )
+                else:
+                    if not job.future.done():
+                        job.future.set_result(result)
+                finally:
+                    self.metrics.inflight -= 1
+                    self.metrics.job_seconds_sum += time.perf_counter() - start
+                    self.metrics.job_count += 1
+            finally:
+                self._queue.task_done()
+
+    async def _submit(self, run: Callable[[], BaseModel], deadline_s: float) -> BaseModel:
+        job = _Job(
+            run=run,
+            deadline=time.monotonic() + deadline_s,
+            future=asyncio.get_running_loop().create_future(),
+        )
+        try:
+            self._queue.put_nowait(job)
+        except asyncio.QueueFull:
+            self.metrics.rejected += 1
+            raise HTTPError(HTTPStatus.TOO_MANY_REQUESTS, "File d'attente saturée") from None
+        try:
+            return await asyncio.wait_for(asyncio.shield(job.future), timeout=deadline_s)
+        except asyncio.TimeoutError:
+            self.metrics.deadline_exceeded += 1
+            job.future.cancel()
+            raise HTTPError(HTTPStatus.GATEWAY_TIMEOUT, "Deadline dépassée") from None
+
+    def _process_upload(self, filename: str, body: bytes, client: str | None) -> BaseModel:
+        with (
+            budget_scope(BudgetScope(client=client, interactive=True)),
+            tempfile.TemporaryDirectory(prefix="kyc_") as tmp_dir,
+        ):
+            doc_path = Path(tmp_dir) / filename
+            doc_path.write_bytes(body)
+            return self.pipeline.process_document(doc_path, client)
+
+    def _process_dossier(self, documents: list[tuple[str, bytes]], client: str | None) -> BaseModel:
+        with (
+            budget_scope(BudgetScope(client=client, interactive=True)),
+            tempfile.TemporaryDirectory(prefix="kyc_") as tmp_dir,
+        ):
+            for filename, content in documents:
+                (Path(tmp_dir) / filename).write_bytes(content)
+            return self.pipeline.process_folder(tmp_dir, incremental=False)
+
+    def _parse_dossier(self, body: bytes) -> list[tuple[str, bytes]]:
+        try:
+            payload = json.loads(body)
+            documents = [
+                (_document_name(document["filename"]), base64.b64decode(document["content_base64"]))
+                for document in payload["documents"]
+            ]
+        except (json.JSONDecodeError, KeyError, TypeError, binascii.Error) as e:
+            raise HTTPError(
+                HTTPStatus.BAD_REQUEST,
+                'Corps attendu: {"documents": [{"filename": ..., "content_base64": ...}]}',
+            ) from e
+        # Écrits dans un même répertoire : deux documents de même nom s'écraseraient
+        names = Counter(filename for filename, _ in documents)
+        duplicates = sorted(name for name, count in names.items() if count > 1)
+        if duplicates:
+            raise HTTPError(
+                HTTPStatus.BAD_REQUEST, f"Noms de fichiers en double: {', '.join(duplicates)}"
+            )
+        return documents
+
+    def _render_metrics(self) -> str:
+        lines = [
+            f"kyc_queue_depth {self._queue.qsize()}",
+            f"kyc_queue_capacity {self._queue.maxsize}",
+            f"kyc_inflight {self.metrics.inflight}",
+            f"kyc_rejected_total {self.metrics.rejected}",
+            f"kyc_deadline_exceeded_total {self.metrics.deadline_exceeded}",
+            f"kyc_job_duration_seconds_sum {self.metrics.job_seconds_sum:.6f}",
+            f"kyc_job_duration_seconds_count {self.metrics.job_count}",
+        ]
+        lines += [
+            f'kyc_requests_total{{route="{route}",status="{status}"}} {count}'
+            for (route, status), count in sorted(self.metrics.requests.items())
+        ]
+        for stats in self.chain.router.stats():
+            labels = (
+                f'stage="{stats.stage.value}",'
+                f'type_document="{stats.type_document.value if stats.type_document else ""}",'
+                f'model="{stats.modele}",'
+                f'prompt="{stats.prompt or ""}"'
+            )
+            lines += [
+                f"kyc_model_calls_total{{{labels}}} {stats.appels}",
+                f"kyc_model_errors_total{{{labels}}} {stats.erreurs}",
+                f"kyc_model_latency_seconds_sum{{{labels}}} {stats.latence_totale_s:.6f}",
+                f"kyc_model_cost_usd_total{{{labels}}} {stats.cout_usd:.6f}",
+            ]
+        budget = self.chain.budget
+        lines += [
+            f"kyc_budget_spent_today_usd {budget.spent_today_usd:.6f}",
+            f"kyc_budget_rejected_total {budget.rejected}",
+            f"kyc_budget_deferred_total {budget.deferred}",
+        ]
+        in_flight = self.chain.ingestor.in_flight
+        lines += [
+            f"kyc_ingestion_in_flight_bytes {in_flight.in_flight}",
+            f"kyc_ingestion_in_flight_bytes_peak {in_flight.peak}",
+            f"kyc_ingestion_waits_total {in_flight.waits}",
+        ]
+        for stats in self.chain.router.escalation_stats():
+            lines += [
+                f'kyc_escalation_decisions_total{{stage="{stats.stage.value}"}} {stats.decisions}',
+                f'kyc_escalations_total{{stage="{stats.stage.value}"}} {stats.escalades}',
+            ]
+        return "\n".join(lines) + "\n"
+
+    async def _route(
+        self, method: str, path: str, query: dict, headers: dict, body: bytes
+    ) -> tuple[HTTPStatus, bytes, str]:
+        if method == "GET" and path == "/health":
+            return HTTPStatus.OK, b'{"status": "ok"}', "application/json"
+        if method == "GET" and path == "/ready":
+            status = HTTPStatus.OK if self.ready else HTTPStatus.SERVICE_UNAVAILABLE
+            return status, json.dumps({"ready": self.ready}).encode(), "application/json"
+        if method == "GET" and path == "/metrics":
+            return HTTPStatus.OK, self._render_metrics().encode(), "text/plain; version=0.0.4"
+
+        deadline_s = _number_header(headers, "x-request-timeout", float, self.deadline_s)
+        client = headers.get("x-client-id")
+        if method == "POST" and path == "/documents":
+            if "filename" not in query:
+                raise HTTPError(HTTPStatus.BAD_REQUEST, "Paramètre 'filename' manquant")
+            filename = _document_name(query["filename"][0])
+            result = await self._submit(
+                lambda: self._process_upload(filename, body, client), deadline_s
+            )
+        elif method == "POST" and path == "/dossiers":
+            documents = self._parse_dossier(body)
+            result = await self._submit(
+                lambda: self._process_dossier(documents, client), deadline_s
+            )
+        else:
+            raise HTTPError(HTTPStatus.NOT_FOUND, f"Route inconnue: {method} {path}")
+        return HTTPStatus.OK, result.model_dump_json().encode(), "application/json"
+
+    async def _read_request(self, reader: asyncio.StreamReader) -> tuple[str, str, dict, bytes]:
+        request_line = (await reader.readline()).decode("latin-1").strip()
+        try:
+            method, target, _ = request_line.split(" ", 2)
+        except ValueError:
+            raise HTTPError(HTTPStatus.BAD_REQUEST, "Requête HTTP invalide") from None
+
+        headers = {}
+        while (line := await reader.readline()) not in (b"\r\n", b"\n", b""):
+            name, _, value = line.decode("latin-1").partition(":")
+            headers[name.strip().lower()] = value.strip()
+
+        length = _number_header(headers, "content-length", int, 0)
+        if length > self.max_body_bytes:
+            raise HTTPError(HTTPStatus.REQUEST_ENTITY_TOO_LARGE, "Corps de requête trop volumineux")
+        body = await reader.readexactly(length) if length else b""
+        return method, target, headers, body
+
+    async def _handle_connection(
+        self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter
+    ) -> None:
+        route = "?"
+        try:
+            try:
+                method, target, headers, body = await self._read_request(reader)
+                url = urlsplit(target)
+                route = url.path
+                status, payload, content_type = await self._route(
+                    method, url.path, parse_qs(url.query, keep_blank_values=True), headers, body
+                )
+            except HTTPError as e:
+                status, content_type = e.status, "application/json"
+                payload = json.dumps({"erreur": str(e)}).encode()
+            except asyncio.IncompleteReadError:
+                return
+
+            self.metrics.requests[(route, status.value)] += 1
+            extra_headers = "Retry-After: 1\r\n" if status == HTTPStatus.TOO_MANY_REQUESTS else ""
+            writer.write(
+                (
+                    f"HTTP/1.1 {status.value} {status.phrase}\r\n"
+                    f"Content-Type: {content_type}\r\n"
+                    f"Content-Length: {len(payload)}\r\n"
+                    f"{extra_headers}"
+                    "Connection: close\r\n\r\n"
+                ).encode()
+                + payload
+            )
+            await writer.drain()
+        finally:
+            writer.close()
+
+
+def build_service(
+    config: Configuration,
+    fake: bool,
+    fake_latency_s: float,
+    fake_error_rate: float,
+) -> KYCService:
+    """
+    Construit le service avec une chain unique partagée par les workers.
+
+    Args:
+        config: Configuration
+        fake: Utiliser le backend factice au lieu de Vertex AI
+        fake_latency_s: Latence simulée par appel du backend factice
+        fake_error_rate: Taux d'erreur du backend factice
+
+    Returns:
+        Service prêt à démarrer
+    """
+    model = (
+        FakeGenerativeModel(latency_s=fake_latency_s, error_rate=fake_error_rate) if fake else None
+    )
+    chain = KYCDocumentChain(config, model=model)
+    settings = config.service
+    return KYCService(
+        chain=chain,
+        pipeline=KYCPipeline(config, chain=chain),
+        queue_size=settings["queue_size"],
+        workers=settings["workers"],
+        deadline_s=settings["deadline_s"],
+        max_body_bytes=settings["max_body_bytes"],
+    )
+
+
+async def serve(service: KYCService, host: str, port: int) -> None:
+    """Démarre le service et le fait tourner jusqu'à interruption."""
+    server = await service.start(host, port)
+    emit("service.demarre", hote=host, port=port)
+    async with server:
+        await server.serve_forever()
+
+
+def main():
+    """Point d'entrée du service."""
+    load_dotenv()
+    parser = argparse.ArgumentParser(description="Service HTTP KYC")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8080)
+    parser.add_argument("--fake", action="store_true", help="Backend de modèle factice")
+    parser.add_argument("--fake-latency", type=float, default=0.5, help="Latence factice (s)")
+    parser.add_argument("--fake-error-rate", type=float, default=0.0, help="Taux d'erreur factice")
+    args = parser.parse_args()
+
+    config = Configuration()
+    configure_events(json_path=config.events_path, level=config.log_level, quiet=config.quiet)
+    if config.trace_path is not None:
+        enable_trace_file(config.trace_path)
+    service = build_service(config, args.fake, args.fake_latency, args.fake_error_rate)
+    asyncio.run(serve(service, args.host, args.port))
+
+
+if __name__ == "__main__":
+    main()
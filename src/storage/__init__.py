@@ -0,0 +1,7 @@
+"""__init__.py pour le module storage."""
+
+from storage.job_queue import Job, JobKind, JobQueue, JobStatus
+from storage.manifest import FolderManifest
+from storage.result_store import ResultStore
+
+__all__ = ["FolderManifest", "Job", "JobKind", "JobQueue", "JobStatus", "ResultStore"]
@@ -0,0 +1,518 @@
+"""
+Export en flux des résultats KYC vers un dataset Parquet ou JSONL partitionné.
+
+Chaque `ResultatExtractionKYC` ou `DossierKYC` devient une ligne à plat, de schéma
+typé et fixe (colonnes `doc_*` : champs des schémas d'extraction, vides pour les
+autres types). Les lignes sont regroupées par partition puis écrites par groupes
+de `row_group_size` : la mémoire reste bornée quel que soit le nombre de résultats.
+
+Le dataset est partitionné à la Hive (`extractions/date=2026-10-19/type_document=rib/`,
+`dossiers/date=2026-10-19/`). Chaque export écrit ses propres fichiers
+`part-<run>-<n>` dans les partitions, existantes ou non : ajouter à un dataset ne
+réécrit rien, et `pandas.read_parquet("export/extractions")` relit l'ensemble.
+
+Parquet nécessite pyarrow (dépendance optionnelle `export`) ; JSONL n'a besoin de rien.
+
+Usage:
+    with ResultExporter("exports/", format="parquet") as exporter:
+        exporter.write_extraction(result, dossier_client="dupont")
+
+    with ResultStore("data/kyc_results.db") as store:
+        summary = export_store(store, "exports/", depuis_id=previous.curseur)
+"""
+
+import json
+import types
+import uuid
+from collections import OrderedDict
+from collections.abc import Iterable
+from dataclasses import dataclass
+from datetime import date, datetime, timezone
+from enum import Enum
+from pathlib import Path
+from typing import Any, Union, get_args, get_origin
+
+from pydantic import BaseModel
+
+from chains.schemas import (
+    RIB,
+    CarteIdentite,
+    DossierKYC,
+    JustificatifDomicile,
+    Passeport,
+    PermisConduire,
+    ResultatExtractionKYC,
+)
+from storage.result_store import ResultStore
+
+FORMATS = ("parquet", "jsonl")
+
+# Schémas d'extraction dont les champs deviennent les colonnes `doc_*`
+DOCUMENT_SCHEMAS: tuple[type[BaseModel], ...] = (
+    CarteIdentite,
+    Passeport,
+    PermisConduire,
+    JustificatifDomicile,
+    RIB,
+)
+
+
+def _column_type(annotation: Any) -> str:
+    """Type de colonne d'un champ Pydantic (les énumérations sont exportées en texte)."""
+    if get_origin(annotation) in (Union, types.UnionType):
+        annotation = next(arg for arg in get_args(annotation) if arg is not type(None))
+    if annotation is bool:
+        return "bool"
+    if annotation is date:
+        return "date"
+    if annotation is int:
+        return "int64"
+    if annotation is float:
+        return "float64"
+    if get_origin(annotation) is list:
+        return "list<string>"
+    return "string"
+
+
+def _document_columns() -> dict[str, str]:
+    columns = {}
+    for schema in DOCUMENT_SCHEMAS:
+        for name, field in schema.model_fields.items():
+            columns.setdefault(f"doc_{name}", _column_type(field.annotation))
+    return columns
+
+
+# Colonnes typées de chaque table ; `date` (jour d'enregistrement, UTC) et
+# `type_document` sont aussi les colonnes de partition
+EXTRACTION_COLUMNS: dict[str, str] = {
+    "date": "date",
+    "enregistre_le": "timestamp",
+    "dossier_client": "string",
+    "fichier_source": "string",
+    "empreinte_fichier": "string",
+    "type_document": "string",
+    "confiance": "float64",
+    "extraction_reussie": "bool",
+    "regles_metier_validees": "bool",
+    "input_tokens": "int64",
+    "output_tokens": "int64",
+    "total_tokens": "int64",
+    "overhead_tokens": "int64",
+    "cout_usd": "float64",
+    "duree_classification_s": "float64",
+    "duree_extraction_s": "float64",
+    "modele_classification": "string",
+    "modele_extraction": "string",
+    "escalade_classification": "bool",
+    "escalade_extraction": "bool",
+    "couche_texte": "bool",
+    "reprises": "int64",
+    "erreurs": "list<string>",
+    "avertissements": "list<string>",
+    "reparations_json": "list<string>",
+    **_document_columns(),
+}
+
+DOSSIER_COLUMNS: dict[str, str] = {
+    "date": "date",
+    "enregistre_le": "timestamp",
+    "dossier_client": "string",
+    "statut_kyc": "string",
+    "type_identite": "string",
+    "nom": "string",
+    "prenom": "string",
+    "date_expiration_identite": "date",
+    "date_justificatif": "date",
+    "justificatif_recent": "bool",
+    "iban_valide": "bool",
+    "noms_concordent": "bool",
+    "adresses_concordent": "bool",
+    "tous_documents_valides": "bool",
+    "dossier_complet": "bool",
+    "permis_present": "bool",
+    "raisons_rejet": "list<string>",
+}
+
+
+def _plain(value: Any) -> Any:
+    """Valeur exportable : énumérations remplacées par leur valeur."""
+    if isinstance(value, Enum):
+        return value.value
+    if isinstance(value, list):
+        return [_plain(item) for item in value]
+    return value
+
+
+def _timestamp(enregistre_le: datetime | str | None) -> datetime:
+    if enregistre_le is None:
+        return datetime.now(timezone.utc)
+    if isinstance(enregistre_le, str):
+        enregistre_le = datetime.fromisoformat(enregistre_le)
+    return enregistre_le.astimezone(timezone.utc)
+
+
+def extraction_row(
+    result: ResultatExtractionKYC,
+    dossier_client: str | None = None,
+    enregistre_le: datetime | str | None = None,
+) -> dict[str, Any]:
+    """
+    Met à plat un résultat d'extraction selon `EXTRACTION_COLUMNS`.
+
+    Args:
+        result: Résultat d'extraction
+        dossier_client: Identifiant du dossier client
+        enregistre_le: Date d'enregistrement (maintenant si None)
+
+    Returns:
+        Ligne de l'export (colonnes absentes à None)
+    """
+    timestamp = _timestamp(enregistre_le)
+    classification = result.classification
+    type_document = classification.type_detecte if classification else None
+    row = dict.fromkeys(EXTRACTION_COLUMNS)
+    row.update(
+        {
+            "date": timestamp.date(),
+            "enregistre_le": timestamp,
+            "dossier_client": dossier_client,
+            "fichier_source": result.fichier_source,
+            "empreinte_fichier": result.empreinte_fichier,
+            "type_document": type_document.value if type_document else None,
+            "confiance": classification.confiance if classification else None,
+            "extraction_reussie": result.extraction_reussie,
+            "regles_metier_validees": result.regles_metier_validees,
+            "input_tokens": result.tokens.get("input_tokens", 0),
+            "output_tokens": result.tokens.get("output_tokens", 0),
+            "total_tokens": result.tokens.get("total_tokens", 0),
+            "overhead_tokens": result.tokens.get("overhead_tokens", 0),
+            "cout_usd": result.cout_usd,
+            "duree_classification_s": result.durees.get("classification"),
+            "duree_extraction_s": result.durees.get("extraction"),
+            "modele_classification": result.modeles.get("classification"),
+            "modele_extraction": result.modeles.get("extraction"),
+            "escalade_classification": "classification" in result.escalades,
+            "escalade_extraction": "extraction" in result.escalades,
+            "couche_texte": result.couche_texte,
+            "reprises": result.reprises,
+            "erreurs": result.erreurs,
+            "avertissements": result.avertissements,
+            "reparations_json": result.reparations_json,
+        }
+    )
+    # Le champ de `ResultatExtractionKYC` de chaque type porte le nom du type
+    document = getattr(result, type_document.value) if type_document else None
+    if document is not None:
+        row.update({f"doc_{name}": _plain(value) for name, value in vars(document).items()})
+    return row
+
+
+def dossier_row(
+    dossier: DossierKYC,
+    dossier_client: str | None = None,
+    enregistre_le: datetime | str | None = None,
+) -> dict[str, Any]:
+    """
+    Met à plat un dossier KYC selon `DOSSIER_COLUMNS`.
+
+    Args:
+        dossier: Dossier KYC validé
+        dossier_client: Identifiant du dossier client
+        enregistre_le: Date d'enregistrement (maintenant si None)
+
+    Returns:
+        Ligne de l'export
+    """
+    timestamp = _timestamp(enregistre_le)
+    identite = dossier.document_identite
+    return {
+        "date": timestamp.date(),
+        "enregistre_le": timestamp,
+        "dossier_client": dossier_client,
+        "statut_kyc": dossier.statut_kyc,
+        "type_identite": "passeport" if isinstance(identite, Passeport) else "carte_identite",
+        "nom": identite.nom,
+        "prenom": identite.prenom,
+        "date_expiration_identite": identite.date_expiration,
+        "date_justificatif": dossier.justificatif_domicile.date_document,
+        "justificatif_recent": dossier.justificatif_domicile.est_recent,
+        "iban_valide": dossier.rib.iban_valide,
+        "noms_concordent": dossier.noms_concordent,
+        "adresses_concordent": dossier.adresses_concordent,
+        "tous_documents_valides": dossier.tous_documents_valides,
+        "dossier_complet": dossier.dossier_complet,
+        "permis_present": dossier.permis_conduire is not None,
+        "raisons_rejet": dossier.raisons_rejet,
+    }
+
+
+def _json_default(value: Any) -> str:
+    if isinstance(value, (date, datetime)):
+        return value.isoformat()
+    raise TypeError(f"Valeur non exportable en JSON: {value!r}")
+
+
+def _partition_value(value: Any) -> str:
+    """Nom de répertoire d'une valeur de partition (`inconnu` si absente)."""
+    if value is None:
+        return "inconnu"
+    return value.isoformat() if isinstance(value, date) else str(value)
+
+
+def arrow_schema(columns: dict[str, str]):
+    """Schéma pyarrow de colonnes typées (`EXTRACTION_COLUMNS`, `DOSSIER_COLUMNS`)."""
+    import pyarrow as pa
+
+    types_ = {
+        "string": pa.string(),
+        "bool": pa.bool_(),
+        "int64": pa.int64(),
+        "float64": pa.float64(),
+        "date": pa.date32(),
+        "timestamp": pa.timestamp("us", tz="UTC"),
+        "list<string>": pa.list_(pa.string()),
+    }
+    return pa.schema([(name, types_[kind]) for name, kind in columns.items()])
+
+
+class DatasetWriter:
+    """
+    Écrit des lignes dans un dataset partitionné, par groupes de lignes bornés.
+
+    Les lignes de chaque partition sont mises en tampon et écrites par groupes de
+    `row_group_size` (un groupe de lignes Parquet, ou un bloc de lignes JSONL). Au
+    plus `max_buffered_rows` lignes sont en tampon, toutes partitions confondues :
+    au-delà, la partition la plus remplie est écrite.
+
+    Au plus `max_open_files` fichiers restent ouverts : au-delà, le fichier utilisé
+    le moins récemment est fermé, et la partition reçoit un nouveau fichier à sa
+    prochaine écriture. Un export de milliers de partitions ne dépasse ni la limite
+    de descripteurs du processus ni la mémoire des écrivains Parquet ouverts.
+    """
+
+    def __init__(
+        self,
+        root: str | Path,
+        columns: dict[str, str],
+        partition_by: tuple[str, ...],
+        format: str = "parquet",
+        row_group_size: int = 10_000,
+        max_buffered_rows: int | None = None,
+        max_open_files: int = 32,
+    ):
+        """
+        Prépare l'écriture (aucun fichier n'est créé avant la première ligne).
+
+        Args:
+            root: Répertoire du dataset
+            columns: Colonnes typées des lignes
+            partition_by: Colonnes de partition, dans l'ordre des répertoires
+            format: `parquet` ou `jsonl`
+            row_group_size: Nombre de lignes par groupe écrit
+            max_buffered_rows: Lignes en tampon au plus (4 groupes par défaut)
+            max_open_files: Fichiers ouverts au plus, toutes partitions confondues
+
+        Raises:
+            ValueError: Si le format est inconnu
+            ImportError: Si le format est `parquet` et que pyarrow n'est pas installé
+        """
+        if format not in FORMATS:
+            raise ValueError(f"Format d'export inconnu: {format} (attendu: {', '.join(FORMATS)})")
+        self.root = Path(root)
+        self.partition_by = partition_by
+        self.format = format
+        self.row_group_size = row_group_size
+        self.max_buffered_rows = max_buffered_rows or 4 * row_group_size
+        self.max_open_files = max_open_files
+        self.rows_written = 0
+        # Identifiant de l'export : nom des fichiers qu'il ajoute aux partitions
+        self.run_id = f"{datetime.now(timezone.utc):%Y%m%dT%H%M%S}-{uuid.uuid4().hex[:8]}"
+        self._buffers: dict[tuple, list[dict[str, Any]]] = {}
+        self._buffered = 0
+        # Fichiers ouverts, du moins au plus récemment utilisé
+        self._writers: OrderedDict[tuple, Any] = OrderedDict()
+        self._files_opened = 0
+        self._schema = None
+        if format == "parquet":
+            try:
+                # Colonnes de partition : dans le chemin, pas dans les fichiers
+                self._schema = arrow_schema(
+                    {name: kind for name, kind in columns.items() if name not in partition_by}
+                )
+            except ImportError as e:
+                raise ImportError(
+                    "L'export Parquet nécessite pyarrow : uv sync --extra export"
+                ) from e
+
+    def __enter__(self) -> "DatasetWriter":
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+    def write(self, row: dict[str, Any]) -> None:
+        """Ajoute une ligne au dataset."""
+        key = tuple(row[name] for name in self.partition_by)
+        buffer = self._buffers.setdefault(key, [])
+        buffer.append(row)
+        self._buffered += 1
+        if len(buffer) >= self.row_group_size:
+            self._flush(key)
+        elif self._buffered >= self.max_buffered_rows:
+            self._flush(max(self._buffers, key=lambda k: len(self._buffers[k])))
+
+    def write_many(self, rows: Iterable[dict[str, Any]]) -> None:
+        """Ajoute des lignes au dataset, en flux."""
+        for row in rows:
+            self.write(row)
+
+    def close(self) -> None:
+        """Écrit les lignes en tampon et ferme les fichiers."""
+        for key in list(self._buffers):
+            self._flush(key)
+        for writer in self._writers.values():
+            writer.close()
+        self._writers.clear()
+
+    def _flush(self, key: tuple) -> None:
+        rows = self._buffers.pop(key)
+        self._buffered -= len(rows)
+        if key in self._writers:
+            self._writers.move_to_end(key)
+            writer = self._writers[key]
+        else:
+            writer = self._open(key)
+        if self.format == "parquet":
+            import pyarrow as pa
+
+            writer.write_table(pa.Table.from_pylist(rows, schema=self._schema))
+        else:
+            writer.writelines(
+                json.dumps(row, ensure_ascii=False, default=_json_default) + "\n" for row in rows
+            )
+        self.rows_written += len(rows)
+
+    def _open(self, key: tuple):
+        directory = self.root.joinpath(
+            *(f"{name}={_partition_value(value)}" for name, value in zip(self.partition_by, key))
+        )
+        directory.mkdir(parents=True, exist_ok=True)
+        if len(self._writers) >= self.max_open_files:
+            _, oldest = self._writers.popitem(last=False)
+            oldest.close()
+        path = directory / f"part-{self.run_id}-{self._files_opened:05d}.{self.format}"
+        self._files_opened += 1
+        if self.format == "parquet":
+            import pyarrow.parquet as pq
+
+            writer = pq.ParquetWriter(path, self._schema)
+        else:
+            writer = path.open("w", encoding="utf-8")
+        self._writers[key] = writer
+        return writer
+
+
+class ResultExporter:
+    """Export des extractions et des dossiers dans deux datasets d'un même répertoire."""
+
+    def __init__(self, root: str | Path, format: str = "parquet", row_group_size: int = 10_000):
+        """
+        Args:
+            root: Répertoire de l'export (`extractions/` et `dossiers/` y sont créés)
+            format: `parquet` ou `jsonl`
+            row_group_size: Nombre de lignes par groupe écrit
+        """
+        root = Path(root)
+        self.extractions = DatasetWriter(
+            root / "extractions",
+            EXTRACTION_COLUMNS,
+            ("date", "type_document"),
+            format,
+            row_group_size,
+        )
+        self.dossiers = DatasetWriter(
+            root / "dossiers", DOSSIER_COLUMNS, ("date",), format, row_group_size
+        )
+
+    def __enter__(self) -> "ResultExporter":
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+    def write_extraction(
+        self,
+        result: ResultatExtractionKYC,
+        dossier_client: str | None = None,
+        enregistre_le: datetime | str | None = None,
+    ) -> None:
+        """Ajoute un résultat d'extraction à l'export."""
+        self.extractions.write(extraction_row(result, dossier_client, enregistre_le))
+
+    def write_dossier(
+        self,
+        dossier: DossierKYC,
+        dossier_client: str | None = None,
+        enregistre_le: datetime | str | None = None,
+    ) -> None:
+        """Ajoute un dossier KYC à l'export."""
+        self.dossiers.write(dossier_row(dossier, dossier_client, enregistre_le))
+
+    def close(self) -> None:
+        """Écrit les lignes en tampon et ferme les fichiers."""
+        self.extractions.close()
+        self.dossiers.close()
+
+
+@dataclass
+class ExportSummary:
+    """Bilan d'un export du store, par table."""
+
+    lignes: dict[str, int]
+    # Dernier `id` exporté : `depuis_id` de l'export incrémental suivant
+    curseur: dict[str, int]
+
+
+def export_store(
+    store: ResultStore,
+    root: str | Path,
+    format: str = "parquet",
+    depuis_id: dict[str, int] | None = None,
+    row_group_size: int = 10_000,
+) -> ExportSummary:
+    """
+    Exporte en flux le contenu d'un store : les lignes sont lues, mises à plat et
+    écrites au fil de l'eau, sans charger les tables en mémoire.
+
+    L'export incrémental repart du curseur de l'export précédent (`id` des lignes,
+    strictement croissant) : contrairement à un horodatage, deux lignes enregistrées
+    au même instant ne peuvent pas être séparées par la borne.
+
+    Args:
+        store: Store des résultats
+        root: Répertoire de l'export (ajout aux datasets existants)
+        format: `parquet` ou `jsonl`
+        depuis_id: N'exporter que les lignes d'`id` supérieur, par table
+            (`ExportSummary.curseur` de l'export précédent)
+        row_group_size: Nombre de lignes par groupe écrit
+
+    Returns:
+        Lignes exportées et curseur, par table
+    """
+    curseur = {"extractions": 0, "dossiers": 0, **(depuis_id or {})}
+    with ResultExporter(root, format, row_group_size) as exporter:
+        for row_id, enregistre_le, dossier_client, result in store.iter_records(
+            "extractions", curseur["extractions"]
+        ):
+            exporter.write_extraction(result, dossier_client, enregistre_le)
+            curseur["extractions"] = row_id
+        for row_id, enregistre_le, dossier_client, dossier in store.iter_records(
+            "dossiers", curseur["dossiers"]
+        ):
+            exporter.write_dossier(dossier, dossier_client, enregistre_le)
+            curseur["dossiers"] = row_id
+    lignes = {
+        "extractions": exporter.extractions.rows_written,
+        "dossiers": exporter.dossiers.rows_written,
+    }
+    return ExportSummary(lignes, curseur)
@@ -0,0 +1,306 @@
+"""
+File de travaux durable basée sur SQLite.
+
+Traitement "at-least-once" des documents et dossiers : un travail est loué
+(lease) par un worker pour une durée de visibilité. Si le worker meurt, le bail
+expire et le travail redevient disponible ; seuls les travaux en vol peuvent
+donc être rejoués après un crash.
+"""
+
+import sqlite3
+import time
+from enum import Enum
+from pathlib import Path
+
+from pydantic import BaseModel, Field
+
+SCHEMA_SQL = """
+CREATE TABLE IF NOT EXISTS jobs (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    kind TEXT NOT NULL,
+    chemin TEXT NOT NULL,
+    status TEXT NOT NULL,
+    attempts INTEGER NOT NULL DEFAULT 0,
+    max_attempts INTEGER NOT NULL,
+    available_at REAL NOT NULL,
+    lease_owner TEXT,
+    lease_expires_at REAL,
+    result TEXT,
+    error TEXT,
+    created_at REAL NOT NULL,
+    updated_at REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_jobs_status_available ON jobs (status, available_at);
+CREATE INDEX IF NOT EXISTS idx_jobs_lease ON jobs (status, lease_expires_at);
+"""
+
+
+class JobKind(str, Enum):
+    """Types de travaux."""
+
+    DOCUMENT = "document"
+    DOSSIER = "dossier"
+
+
+class JobStatus(str, Enum):
+    """États d'un travail."""
+
+    PENDING = "pending"
+    LEASED = "leased"
+    DONE = "done"
+    FAILED = "failed"
+
+
+class Job(BaseModel):
+    """Travail loué par un worker."""
+
+    id: int = Field(description="Identifiant du travail")
+    kind: JobKind = Field(description="Type de travail (document ou dossier)")
+    chemin: str = Field(description="Chemin du document ou du dossier à traiter")
+    attempts: int = Field(description="Nombre de tentatives, celle en cours incluse")
+    max_attempts: int = Field(description="Nombre maximum de tentatives")
+
+
+class JobQueue:
+    """
+    File de travaux SQLite partagée entre processus.
+
+    Chaque processus ouvre sa propre instance sur le même fichier. La location
+    d'un travail se fait dans une transaction `BEGIN IMMEDIATE` : deux workers ne
+    peuvent pas louer le même travail.
+    """
+
+    def __init__(
+        self,
+        db_path: str | Path,
+        visibility_timeout_s: float = 300.0,
+        max_attempts: int = 3,
+        retry_backoff_s: float = 5.0,
+    ):
+        """
+        Ouvre (ou crée) la file.
+
+        Args:
+            db_path: Chemin du fichier SQLite
+            visibility_timeout_s: Durée d'un bail avant que le travail redevienne disponible
+            max_attempts: Nombre maximum de tentatives par défaut
+            retry_backoff_s: Délai de base avant nouvelle tentative (doublé à chaque échec)
+        """
+        self.db_path = Path(db_path)
+        self.db_path.parent.mkdir(parents=True, exist_ok=True)
+        self.visibility_timeout_s = visibility_timeout_s
+        self.max_attempts = max_attempts
+        self.retry_backoff_s = retry_backoff_s
+        self._conn = sqlite3.connect(self.db_path, isolation_level=None, timeout=30.0)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.executescript(SCHEMA_SQL)
+
+    def __enter__(self) -> "JobQueue":
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+    def close(self) -> None:
+        """Ferme la connexion SQLite."""
+        self._conn.close()
+
+    def enqueue(self, kind: JobKind, chemins: list[str | Path]) -> list[int]:
+        """
+        Ajoute des travaux dans une seule transaction.
+
+        Args:
+            kind: Type de travail
+            chemins: Chemins des documents ou dossiers
+
+        Returns:
+            Identifiants des travaux créés
+        """
+        now = time.time()
+        ids = []
+        self._conn.execute("BEGIN IMMEDIATE")
+        try:
+            for chemin in chemins:
+                cursor = self._conn.execute(
+                    "INSERT INTO jobs (kind, chemin, status, max_attempts, available_at, "
+                    "created_at, updated_at) VALUES (?, ?, ?, ?, ?, ?, ?)",
+                    (
+                        kind.value,
+                        str(chemin),
+                        JobStatus.PENDING.value,
+                        self.max_attempts,
+                        now,
+                        now,
+                        now,
+                    ),
+                )
+                ids.append(cursor.lastrowid)
+            self._conn.execute("COMMIT")
+        except sqlite3.Error:
+            self._conn.execute("ROLLBACK")
+            raise
+        return ids
+
+    def lease(self, worker_id: str) -> Job | None:
+        """
+        Loue le plus ancien travail disponible (en attente ou au bail expiré).
+
+        Args:
+            worker_id: Identifiant du worker
+
+        Returns:
+            Le travail loué, ou None si la file est vide
+        """
+        now = time.time()
+        self._conn.execute("BEGIN IMMEDIATE")
+        try:
+            # Baux expirés sans tentative restante : le travail est abandonné
+            self._conn.execute(
+                "UPDATE jobs SET status = ?, error = 'Bail expiré', updated_at = ? "
+                "WHERE status = ? AND lease_expires_at <= ? AND attempts >= max_attempts",
+                (JobStatus.FAILED.value, now, JobStatus.LEASED.value, now),
+            )
+            row = self._conn.execute(
+                "UPDATE jobs SET status = ?, lease_owner = ?, lease_expires_at = ?, "
+                "attempts = attempts + 1, updated_at = ? "
+                "WHERE id = (SELECT id FROM jobs "
+                "  WHERE (status = ? AND available_at <= ?) OR (status = ? AND lease_expires_at <= ?) "
+                "  ORDER BY id LIMIT 1) "
+                "RETURNING id, kind, chemin, attempts, max_attempts",
+                (
+                    JobStatus.LEASED.value,
+                    worker_id,
+                    now + self.visibility_timeout_s,
+                    now,
+                    JobStatus.PENDING.value,
+                    now,
+                    JobStatus.LEASED.value,
+                    now,
+                ),
+            ).fetchone()
+            self._conn.execute("COMMIT")
+        except sqlite3.Error:
+            self._conn.execute("ROLLBACK")
+            raise
+        if row is None:
+            return None
+        job_id, kind, chemin, attempts, max_attempts = row
+        return Job(
+            id=job_id, kind=kind, chemin=chemin, attempts=attempts, max_attempts=max_attempts
+        )
+
+    def heartbeat(self, job_id: int, worker_id: str) -> bool:
+        """
+        Prolonge le bail d'un travail en cours.
+
+        Returns:
+            False si le bail a été perdu (expiré et repris par un autre worker)
+        """
+        now = time.time()
+        cursor = self._conn.execute(
+            "UPDATE jobs SET lease_expires_at = ?, updated_at = ? "
+            "WHERE id = ? AND status = ? AND lease_owner = ?",
+            (now + self.visibility_timeout_s, now, job_id, JobStatus.LEASED.value, worker_id),
+        )
+        return cursor.rowcount == 1
+
+    def complete(self, job_id: int, worker_id: str, result: str) -> bool:
+        """
+        Marque un travail comme terminé.
+
+        Args:
+            job_id: Identifiant du travail
+            worker_id: Identifiant du worker titulaire du bail
+            result: Résultat sérialisé en JSON
+
+        Returns:
+            False si le worker n'était plus titulaire du bail
+        """
+        cursor = self._conn.execute(
+            "UPDATE jobs SET status = ?, result = ?, error = NULL, lease_owner = NULL, "
+            "lease_expires_at = NULL, updated_at = ? "
+            "WHERE id = ? AND status = ? AND lease_owner = ?",
+            (JobStatus.DONE.value, result, time.time(), job_id, JobStatus.LEASED.value, worker_id),
+        )
+        return cursor.rowcount == 1
+
+    def fail(self, job_id: int, worker_id: str, error: str, retry: bool = True) -> bool:
+        """
+        Signale l'échec d'une tentative.
+
+        Le travail est replanifié avec un backoff exponentiel tant qu'il reste des
+        tentatives, sinon il passe à l'état FAILED.
+
+        Args:
+            job_id: Identifiant du travail
+            worker_id: Identifiant du worker titulaire du bail
+            error: Message d'erreur
+            retry: False pour un échec définitif (erreur non transitoire)
+
+        Returns:
+            False si le worker n'était plus titulaire du bail
+        """
+        now = time.time()
+        cursor = self._conn.execute(
+            "UPDATE jobs SET "
+            "status = CASE WHEN ? AND attempts < max_attempts THEN ? ELSE ? END, "
+            "available_at = ? + ? * (1 << (attempts - 1)), "
+            "error = ?, lease_owner = NULL, lease_expires_at = NULL, updated_at = ? "
+            "WHERE id = ? AND status = ? AND lease_owner = ?",
+            (
+                retry,
+                JobStatus.PENDING.value,
+                JobStatus.FAILED.value,
+                now,
+                self.retry_backoff_s,
+                error,
+                now,
+                job_id,
+                JobStatus.LEASED.value,
+                worker_id,
+            ),
+        )
+        return cursor.rowcount == 1
+
+    def defer(self, job_id: int, worker_id: str, delay_s: float, reason: str) -> bool:
+        """
+        Remet un travail en attente sans consommer de tentative (ex: budget épuisé).
+
+        Args:
+            job_id: Identifiant du travail
+            worker_id: Identifiant du worker titulaire du bail
+            delay_s: Délai avant que le travail redevienne disponible
+            reason: Motif du report
+
+        Returns:
+            False si le worker n'était plus titulaire du bail
+        """
+        now = time.time()
+        cursor = self._conn.execute(
+            "UPDATE jobs SET status = ?, attempts = attempts - 1, available_at = ?, error = ?, "
+            "lease_owner = NULL, lease_expires_at = NULL, updated_at = ? "
+            "WHERE id = ? AND status = ? AND lease_owner = ?",
+            (
+                JobStatus.PENDING.value,
+                now + delay_s,
+                reason,
+                now,
+                job_id,
+                JobStatus.LEASED.value,
+                worker_id,
+            ),
+        )
+        return cursor.rowcount == 1
+
+    def result(self, job_id: int) -> str | None:
+        """Résultat JSON d'un travail terminé."""
+        row = self._conn.execute("SELECT result FROM jobs WHERE id = ?", (job_id,)).fetchone()
+        return row[0] if row else None
+
+    def counts(self) -> dict[JobStatus, int]:
+        """Nombre de travaux par état."""
+        rows = self._conn.execute("SELECT status, COUNT(*) FROM jobs GROUP BY status").fetchall()
+        counts = {status: 0 for status in JobStatus}
+        counts.update({JobStatus(status): count for status, count in rows})
+        return counts
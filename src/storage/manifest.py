@@ -0,0 +1,189 @@
+"""
+Manifest de dossier pour le traitement incrémental.
+
+Chaque dossier client garde la trace des fichiers déjà extraits (chemin, taille,
+mtime, empreinte, résultat) : seuls les documents nouveaux ou modifiés sont
+renvoyés à la chain, et seulement si les prompts et les modèles n'ont pas changé
+depuis (clé de réutilisation). Les documents classés mais écartés (doublons d'un type) n'y
+gardent que leur classification, pour ne pas être reclassés au passage suivant.
+"""
+
+import os
+from pathlib import Path
+
+from pydantic import BaseModel, Field
+
+from chains.schemas import ClassificationDocument, ResultatExtractionKYC
+from utils.files import file_sha256
+
+MANIFEST_FILENAME = ".kyc_manifest.json"
+
+
+class EntreeManifest(BaseModel):
+    """Fichier déjà traité d'un dossier."""
+
+    chemin: str = Field(description="Nom du fichier relatif au dossier")
+    taille: int = Field(description="Taille du fichier en octets")
+    mtime_ns: int = Field(description="Date de modification (nanosecondes)")
+    empreinte: str = Field(description="Empreinte SHA-256 du contenu")
+    resultat: ResultatExtractionKYC | None = Field(
+        None, description="Résultat d'extraction précédent (None si le document a été écarté)"
+    )
+    classification: ClassificationDocument | None = Field(
+        None, description="Classification d'un document écarté sans extraction"
+    )
+    modele_classification: str | None = Field(
+        None, description="Modèle qui a classé le document écarté"
+    )
+    cle_reutilisation: str | None = Field(
+        None, description="Empreinte des prompts et des modèles qui ont traité le document"
+    )
+    reextrait: bool = Field(
+        False, description="Résultat d'une réextraction faite pour des champs hors format"
+    )
+
+
+class ContenuManifest(BaseModel):
+    """Contenu sérialisé du manifest d'un dossier."""
+
+    entrees: dict[str, EntreeManifest] = Field(
+        default_factory=dict, description="Entrées indexées par nom de fichier"
+    )
+
+
+class FolderManifest:
+    """
+    Manifest d'un dossier client, stocké dans `<dossier>/.kyc_manifest.json`.
+
+    Un fichier est considéré inchangé si sa taille et son mtime sont identiques
+    (sans relecture), ou à défaut si son empreinte SHA-256 est identique.
+    """
+
+    def __init__(self, folder_path: str | Path, cle_reutilisation: str | None = None):
+        """
+        Charge le manifest du dossier (vide s'il n'existe pas encore).
+
+        Args:
+            folder_path: Chemin du dossier client
+            cle_reutilisation: Prompts et modèles courants (`KYCDocumentChain.reuse_key`) :
+                une entrée enregistrée sous une autre clé est ignorée
+        """
+        self.folder_path = Path(folder_path)
+        self.cle_reutilisation = cle_reutilisation
+        self.path = self.folder_path / MANIFEST_FILENAME
+        if self.path.exists():
+            self._contenu = ContenuManifest.model_validate_json(self.path.read_bytes())
+        else:
+            self._contenu = ContenuManifest()
+
+    def _unchanged(self, doc_path: Path) -> EntreeManifest | None:
+        """Entrée du document s'il n'a pas changé depuis son enregistrement."""
+        entree = self._contenu.entrees.get(doc_path.name)
+        if entree is None or entree.cle_reutilisation != self.cle_reutilisation:
+            return None
+
+        stat = doc_path.stat()
+        if stat.st_size == entree.taille and stat.st_mtime_ns == entree.mtime_ns:
+            return entree
+        if stat.st_size != entree.taille or file_sha256(doc_path) != entree.empreinte:
+            return None
+
+        # Fichier touché mais contenu identique : on rafraîchit le mtime
+        entree.mtime_ns = stat.st_mtime_ns
+        return entree
+
+    def lookup(self, doc_path: Path) -> ResultatExtractionKYC | None:
+        """
+        Retourne le résultat précédent si le document n'a pas changé.
+
+        Args:
+            doc_path: Chemin du document
+
+        Returns:
+            Résultat précédent, ou None si le document est nouveau, modifié, seulement
+            classé, ou extrait une seule fois avec des champs hors format (réextrait
+            une fois, puis réutilisé tel quel)
+        """
+        entree = self._unchanged(doc_path)
+        if entree is None or entree.resultat is None:
+            return None
+        if entree.resultat.avertissements and not entree.reextrait:
+            return None
+        return entree.resultat
+
+    def lookup_classification(self, doc_path: Path) -> tuple[ClassificationDocument, str] | None:
+        """
+        Retourne la classification d'un document écarté s'il n'a pas changé.
+
+        Args:
+            doc_path: Chemin du document
+
+        Returns:
+            Tuple (classification, modèle), ou None si le document n'a pas été écarté
+            tel quel
+        """
+        entree = self._unchanged(doc_path)
+        if entree is None or entree.classification is None:
+            return None
+        return entree.classification, entree.modele_classification
+
+    def record(self, doc_path: Path, result: ResultatExtractionKYC) -> None:
+        """
+        Enregistre le résultat d'un document extrait.
+
+        Args:
+            doc_path: Chemin du document
+            result: Résultat d'extraction (doit porter l'empreinte du fichier)
+        """
+        # Même document, même clé, résultat précédent hors format : c'est sa réextraction
+        previous = self._unchanged(doc_path)
+        reextrait = (
+            previous is not None
+            and previous.resultat is not None
+            and bool(previous.resultat.avertissements)
+        )
+        stat = doc_path.stat()
+        self._contenu.entrees[doc_path.name] = EntreeManifest(
+            chemin=doc_path.name,
+            taille=stat.st_size,
+            mtime_ns=stat.st_mtime_ns,
+            empreinte=result.empreinte_fichier,
+            resultat=result,
+            cle_reutilisation=self.cle_reutilisation,
+            reextrait=reextrait,
+        )
+
+    def record_classification(
+        self, doc_path: Path, classification: ClassificationDocument, model: str
+    ) -> None:
+        """
+        Enregistre la classification d'un document écarté sans extraction.
+
+        Args:
+            doc_path: Chemin du document
+            classification: Classification du document
+            model: Modèle qui l'a classé
+        """
+        stat = doc_path.stat()
+        self._contenu.entrees[doc_path.name] = EntreeManifest(
+            chemin=doc_path.name,
+            taille=stat.st_size,
+            mtime_ns=stat.st_mtime_ns,
+            empreinte=file_sha256(doc_path),
+            classification=classification,
+            modele_classification=model,
+            cle_reutilisation=self.cle_reutilisation,
+        )
+
+    def prune(self, doc_paths: list[Path]) -> None:
+        """Retire les entrées des fichiers qui ne sont plus dans le dossier."""
+        noms = {doc_path.name for doc_path in doc_paths}
+        self._contenu.entrees = {
+            nom: entree for nom, entree in self._contenu.entrees.items() if nom in noms
+        }
+
+    def save(self) -> None:
+        """Écrit le manifest de façon atomique (fichier temporaire + renommage)."""
+        tmp_path = self.path.with_suffix(".tmp")
+        tmp_path.write_text(self._contenu.model_dump_json(indent=2), encoding="utf-8")
+        os.replace(tmp_path, self.path)
@@ -0,0 +1,274 @@
+"""
+Rapport d'exploitation sur les résultats KYC stockés ou exportés.
+
+Les résultats sont lus colonne par colonne, sans relire les payloads en Python :
+- depuis un export Parquet (`storage.export`), seules les colonnes utiles sont lues
+  et `depuis` élague les partitions `date` ;
+- depuis le store SQLite, la requête ne lit que des colonnes indexées ou scalaires
+  (coût et escalades en colonnes, `depuis` sur l'index de `enregistre_le`) ; seules
+  les raisons de rejet sont extraites du JSON des dossiers, par SQLite.
+
+Les agrégats (taux d'échec et d'escalade, coût et tokens moyens par `TypeDocument`,
+percentiles de latence, statuts KYC, raisons de rejet) sont des group-by pandas
+vectorisés, rendus en Markdown ou en HTML statique.
+
+Usage:
+    data = load_portfolio("exports/", depuis=date(2026, 10, 1))
+    Path("rapport.html").write_text(render_html(build_report(data)))
+"""
+
+import html
+import sqlite3
+from contextlib import closing
+from dataclasses import dataclass
+from datetime import date
+from pathlib import Path
+
+import pandas as pd
+
+# Colonnes lues par le rapport (noms des colonnes de l'export)
+EXTRACTION_FIELDS = (
+    "date",
+    "type_document",
+    "extraction_reussie",
+    "cout_usd",
+    "input_tokens",
+    "output_tokens",
+    "total_tokens",
+    "duree_classification_s",
+    "duree_extraction_s",
+    "escalade_classification",
+    "escalade_extraction",
+)
+DOSSIER_FIELDS = ("date", "statut_kyc", "raisons_rejet")
+
+PERCENTILES = (0.5, 0.9, 0.99)
+
+# Mêmes colonnes depuis le store ; la date est le jour (UTC) de l'horodatage ISO
+EXTRACTIONS_SQL = """
+SELECT
+    substr(enregistre_le, 1, 10) AS date,
+    type_document,
+    extraction_reussie,
+    cout_usd,
+    input_tokens,
+    output_tokens,
+    total_tokens,
+    duree_classification AS duree_classification_s,
+    duree_extraction AS duree_extraction_s,
+    escalade_classification,
+    escalade_extraction
+FROM extractions
+WHERE enregistre_le >= ?
+"""
+
+DOSSIERS_SQL = """
+SELECT substr(enregistre_le, 1, 10) AS date, statut_kyc
+FROM dossiers
+WHERE enregistre_le >= ?
+"""
+
+RAISONS_REJET_SQL = """
+SELECT substr(d.enregistre_le, 1, 10) AS date, r.value AS raison
+FROM dossiers AS d, json_each(d.payload, '$.raisons_rejet') AS r
+WHERE d.enregistre_le >= ?
+"""
+
+
+@dataclass
+class PortfolioData:
+    """Colonnes utiles au rapport, une ligne par extraction, dossier ou raison de rejet."""
+
+    extractions: pd.DataFrame
+    dossiers: pd.DataFrame
+    raisons_rejet: pd.DataFrame
+
+
+def _normalize(data: PortfolioData) -> PortfolioData:
+    """Types communs aux deux sources (et à une source vide) ; type absent : `inconnu`."""
+    extractions = data.extractions
+    # Clés de regroupement en catégories : les partitions Parquet le sont déjà
+    for column in ("date", "type_document"):
+        extractions[column] = extractions[column].astype("category")
+    if extractions["type_document"].isna().any():
+        extractions["type_document"] = (
+            extractions["type_document"].cat.add_categories("inconnu").fillna("inconnu")
+        )
+    for column in ("extraction_reussie", "escalade_classification", "escalade_extraction"):
+        extractions[column] = extractions[column].astype(bool)
+    for column in ("input_tokens", "output_tokens", "total_tokens"):
+        extractions[column] = extractions[column].astype("int64")
+    for column in ("cout_usd", "duree_classification_s", "duree_extraction_s"):
+        extractions[column] = extractions[column].astype("float64")
+    for frame in (data.dossiers, data.raisons_rejet):
+        frame["date"] = frame["date"].astype(str)
+    return data
+
+
+def _read_dataset(path: Path, columns: tuple[str, ...], depuis: date | None) -> pd.DataFrame:
+    if not path.exists():
+        return pd.DataFrame(columns=list(columns))
+    # Partitions `date=AAAA-MM-JJ` : comparées en texte, dans l'ordre chronologique
+    filters = [("date", ">=", depuis.isoformat())] if depuis is not None else None
+    return pd.read_parquet(path, columns=list(columns), filters=filters)
+
+
+def load_export(root: str | Path, depuis: date | None = None) -> PortfolioData:
+    """
+    Lit les colonnes du rapport dans un export Parquet.
+
+    Args:
+        root: Répertoire de l'export (`extractions/` et `dossiers/`)
+        depuis: Premier jour retenu (les partitions antérieures ne sont pas lues)
+
+    Returns:
+        Données du rapport
+    """
+    root = Path(root)
+    extractions = _read_dataset(root / "extractions", EXTRACTION_FIELDS, depuis)
+    dossiers = _read_dataset(root / "dossiers", DOSSIER_FIELDS, depuis)
+    raisons_rejet = (
+        dossiers[["date", "raisons_rejet"]]
+        .explode("raisons_rejet")
+        .dropna()
+        .rename(columns={"raisons_rejet": "raison"})
+    )
+    return _normalize(
+        PortfolioData(extractions, dossiers[["date", "statut_kyc"]].copy(), raisons_rejet)
+    )
+
+
+def load_store(db_path: str | Path, depuis: date | None = None) -> PortfolioData:
+    """
+    Lit les colonnes du rapport dans le store SQLite.
+
+    Args:
+        db_path: Chemin du store
+        depuis: Premier jour retenu
+
+    Returns:
+        Données du rapport
+    """
+    params = (depuis.isoformat() if depuis is not None else "",)
+    with closing(sqlite3.connect(db_path)) as conn:
+        return _normalize(
+            PortfolioData(
+                pd.read_sql_query(EXTRACTIONS_SQL, conn, params=params),
+                pd.read_sql_query(DOSSIERS_SQL, conn, params=params),
+                pd.read_sql_query(RAISONS_REJET_SQL, conn, params=params),
+            )
+        )
+
+
+def load_portfolio(source: str | Path, depuis: date | None = None) -> PortfolioData:
+    """Lit un export Parquet (répertoire) ou un store SQLite (fichier)."""
+    source = Path(source)
+    return load_export(source, depuis) if source.is_dir() else load_store(source, depuis)
+
+
+def _rates(extractions: pd.DataFrame, by: str | pd.Series) -> pd.DataFrame:
+    """Volumes, taux (%) d'échec et d'escalade, coût et tokens moyens par groupe."""
+    frame = extractions.assign(echec=~extractions["extraction_reussie"])
+    rates = frame.groupby(by, observed=True).agg(
+        documents=("echec", "size"),
+        taux_echec_pct=("echec", "mean"),
+        taux_escalade_classification_pct=("escalade_classification", "mean"),
+        taux_escalade_extraction_pct=("escalade_extraction", "mean"),
+        cout_moyen_usd=("cout_usd", "mean"),
+        cout_total_usd=("cout_usd", "sum"),
+        input_tokens_moyen=("input_tokens", "mean"),
+        output_tokens_moyen=("output_tokens", "mean"),
+        total_tokens_moyen=("total_tokens", "mean"),
+    )
+    rates[[column for column in rates if column.endswith("_pct")]] *= 100
+    return rates
+
+
+def _latencies(extractions: pd.DataFrame) -> pd.DataFrame:
+    """Percentiles de durée (s) de chaque étape par type de document."""
+    durations = extractions[["type_document", "duree_classification_s", "duree_extraction_s"]]
+    quantiles = (
+        durations.groupby("type_document", observed=True).quantile(list(PERCENTILES)).unstack()
+    )
+    quantiles.columns = [
+        f"{column.removeprefix('duree_').removesuffix('_s')}_p{round(q * 100)}"
+        for column, q in quantiles.columns
+    ]
+    return quantiles
+
+
+def _counts(values: pd.Series, total: int, name: str) -> pd.DataFrame:
+    counts = values.value_counts()
+    return pd.DataFrame({name: counts, "part_pct": counts / max(total, 1) * 100})
+
+
+def build_report(data: PortfolioData) -> dict[str, pd.DataFrame]:
+    """
+    Agrège les données du rapport.
+
+    Args:
+        data: Colonnes lues par `load_export` ou `load_store`
+
+    Returns:
+        Tableaux du rapport, par titre de section
+    """
+    extractions, dossiers = data.extractions, data.dossiers
+    rejetes = int((dossiers["statut_kyc"] == "REJECTED").sum())
+    overall = _rates(extractions, pd.Series("total", index=extractions.index, name="periode"))
+    overall.insert(1, "dossiers", len(dossiers))
+    overall.insert(2, "dossiers_rejetes", rejetes)
+    return {
+        "Synthèse": overall,
+        "Par type de document": _rates(extractions, "type_document"),
+        "Latences par type de document (s)": _latencies(extractions),
+        "Par jour": _rates(extractions, "date"),
+        "Statuts KYC": _counts(dossiers["statut_kyc"], len(dossiers), "dossiers"),
+        # Part des dossiers rejetés qui portent chaque raison
+        "Raisons de rejet": _counts(data.raisons_rejet["raison"], rejetes, "dossiers"),
+    }
+
+
+def _cell(value) -> str:
+    if isinstance(value, float):
+        return "" if pd.isna(value) else f"{value:,.4g}"
+    return str(value)
+
+
+def render_markdown(report: dict[str, pd.DataFrame], title: str = "Rapport KYC") -> str:
+    """Rapport en Markdown (tableaux GFM)."""
+    lines = [f"# {title}"]
+    for section, frame in report.items():
+        lines += ["", f"## {section}", ""]
+        if frame.empty:
+            lines.append("_Aucune donnée._")
+            continue
+        frame = frame.reset_index()
+        lines.append("| " + " | ".join(map(str, frame.columns)) + " |")
+        lines.append("|" + "---|" * len(frame.columns))
+        lines.extend(
+            "| " + " | ".join(_cell(value) for value in row) + " |"
+            for row in frame.itertuples(index=False)
+        )
+    return "\n".join(lines) + "\n"
+
+
+def render_html(report: dict[str, pd.DataFrame], title: str = "Rapport KYC") -> str:
+    """Rapport en page HTML statique (sans script ni ressource externe)."""
+    body = []
+    for section, frame in report.items():
+        body.append(f"<h2>{html.escape(section)}</h2>")
+        body.append(
+            "<p>Aucune donnée.</p>"
+            if frame.empty
+            else frame.to_html(float_format=lambda value: f"{value:,.4g}", na_rep="")
+        )
+    return (
+        '<!DOCTYPE html>\n<html lang="fr">\n<head>\n<meta charset="utf-8">\n'
+        f"<title>{html.escape(title)}</title>\n"
+        "<style>body{font-family:sans-serif;margin:2em}"
+        "table{border-collapse:collapse;margin-bottom:1.5em}"
+        "th,td{border:1px solid #ccc;padding:4px 8px;text-align:right}</style>\n"
+        f"</head>\n<body>\n<h1>{html.escape(title)}</h1>\n"
+        + "\n".join(body)
+        + "\n</body>\n</html>\n"
+    )
@@ -0,0 +1,413 @@
+"""
+Stockage persistant et indexé des résultats d'extraction et des dossiers KYC.
+
+Basé sur SQLite (bibliothèque standard) en mode WAL : les relectures, rapports
+et audits interrogent le store au lieu de rappeler le modèle.
+"""
+
+import json
+import sqlite3
+import threading
+from collections.abc import Iterable, Iterator
+from contextlib import closing
+from datetime import date, datetime, timezone
+from pathlib import Path
+
+from chains.schemas import DossierKYC, ResultatExtractionKYC, TypeDocument
+from chains.schemas.field_checks import payload_warnings
+
+SCHEMA_SQL = """
+CREATE TABLE IF NOT EXISTS extractions (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    enregistre_le TEXT NOT NULL,
+    dossier_client TEXT,
+    fichier_source TEXT,
+    empreinte_fichier TEXT,
+    type_document TEXT,
+    confiance REAL,
+    extraction_reussie INTEGER NOT NULL,
+    date_expiration TEXT,
+    input_tokens INTEGER NOT NULL DEFAULT 0,
+    output_tokens INTEGER NOT NULL DEFAULT 0,
+    total_tokens INTEGER NOT NULL DEFAULT 0,
+    duree_classification REAL,
+    duree_extraction REAL,
+    cout_usd REAL NOT NULL DEFAULT 0,
+    escalade_classification INTEGER NOT NULL DEFAULT 0,
+    escalade_extraction INTEGER NOT NULL DEFAULT 0,
+    cle_reutilisation TEXT,
+    payload TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_extractions_dossier ON extractions (dossier_client);
+CREATE INDEX IF NOT EXISTS idx_extractions_type ON extractions (type_document);
+CREATE INDEX IF NOT EXISTS idx_extractions_expiration ON extractions (date_expiration);
+CREATE INDEX IF NOT EXISTS idx_extractions_empreinte ON extractions (empreinte_fichier);
+CREATE INDEX IF NOT EXISTS idx_extractions_enregistre ON extractions (enregistre_le);
+
+CREATE TABLE IF NOT EXISTS dossiers (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    enregistre_le TEXT NOT NULL,
+    dossier_client TEXT,
+    statut_kyc TEXT NOT NULL,
+    date_expiration_identite TEXT,
+    date_justificatif TEXT,
+    payload TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_dossiers_dossier ON dossiers (dossier_client);
+CREATE INDEX IF NOT EXISTS idx_dossiers_statut ON dossiers (statut_kyc);
+CREATE INDEX IF NOT EXISTS idx_dossiers_expiration ON dossiers (date_expiration_identite);
+CREATE INDEX IF NOT EXISTS idx_dossiers_enregistre ON dossiers (enregistre_le);
+"""
+
+
+def _escalade(stage: str) -> str:
+    return f"EXISTS (SELECT 1 FROM json_each(payload, '$.escalades') WHERE value = '{stage}')"
+
+
+# Colonnes ajoutées depuis la création du schéma, par table : un store existant
+# les reçoit à l'ouverture, remplies depuis le payload des lignes déjà enregistrées
+# (expression SQL, ou None pour laisser NULL)
+ADDED_COLUMNS: dict[str, dict[str, tuple[str, str | None]]] = {
+    "extractions": {
+        "cout_usd": ("REAL NOT NULL DEFAULT 0", "ifnull(json_extract(payload, '$.cout_usd'), 0)"),
+        "escalade_classification": ("INTEGER NOT NULL DEFAULT 0", _escalade("classification")),
+        "escalade_extraction": ("INTEGER NOT NULL DEFAULT 0", _escalade("extraction")),
+        "cle_reutilisation": ("TEXT", None),
+    },
+}
+
+INSERT_EXTRACTION_SQL = """
+INSERT INTO extractions (
+    enregistre_le, dossier_client, fichier_source, empreinte_fichier, type_document,
+    confiance, extraction_reussie, date_expiration, input_tokens, output_tokens,
+    total_tokens, duree_classification, duree_extraction, cout_usd, escalade_classification,
+    escalade_extraction, cle_reutilisation, payload
+) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+"""
+
+INSERT_DOSSIER_SQL = """
+INSERT INTO dossiers (
+    enregistre_le, dossier_client, statut_kyc, date_expiration_identite,
+    date_justificatif, payload
+) VALUES (?, ?, ?, ?, ?, ?)
+"""
+
+
+def _now_iso() -> str:
+    return datetime.now(timezone.utc).isoformat()
+
+
+def _date_expiration(result: ResultatExtractionKYC) -> str | None:
+    document = result.carte_identite or result.passeport or result.permis_conduire
+    return document.date_expiration.isoformat() if document else None
+
+
+def _extraction_row(
+    result: ResultatExtractionKYC, dossier_client: str | None, cle_reutilisation: str | None
+) -> tuple:
+    classification = result.classification
+    return (
+        _now_iso(),
+        dossier_client,
+        result.fichier_source,
+        result.empreinte_fichier,
+        classification.type_detecte.value if classification else None,
+        classification.confiance if classification else None,
+        int(result.extraction_reussie),
+        _date_expiration(result),
+        result.tokens.get("input_tokens", 0),
+        result.tokens.get("output_tokens", 0),
+        result.tokens.get("total_tokens", 0),
+        result.durees.get("classification"),
+        result.durees.get("extraction"),
+        result.cout_usd,
+        int("classification" in result.escalades),
+        int("extraction" in result.escalades),
+        cle_reutilisation,
+        result.model_dump_json(),
+    )
+
+
+def _dossier_row(dossier: DossierKYC, dossier_client: str | None) -> tuple:
+    return (
+        _now_iso(),
+        dossier_client,
+        dossier.statut_kyc,
+        dossier.document_identite.date_expiration.isoformat(),
+        dossier.justificatif_domicile.date_document.isoformat(),
+        dossier.model_dump_json(),
+    )
+
+
+class ResultStore:
+    """
+    Store SQLite des résultats KYC.
+
+    Tables:
+    - extractions: un `ResultatExtractionKYC` par ligne, avec empreinte, tokens et durées
+    - dossiers: un `DossierKYC` par ligne
+
+    Index sur le dossier client, le `TypeDocument`, le `statut_kyc` et les dates
+    d'expiration. Les écritures en masse passent par une seule transaction.
+    """
+
+    def __init__(self, db_path: str | Path):
+        """
+        Ouvre (ou crée) le store.
+
+        Args:
+            db_path: Chemin du fichier SQLite
+        """
+        self.db_path = Path(db_path)
+        self.db_path.parent.mkdir(parents=True, exist_ok=True)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(self.db_path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        with self._conn:
+            self._migrate()
+        self._conn.executescript(SCHEMA_SQL)
+
+    def _migrate(self) -> None:
+        """Ajoute à un store existant les colonnes de `ADDED_COLUMNS` qui lui manquent."""
+        for table, columns in ADDED_COLUMNS.items():
+            existing = {row[1] for row in self._conn.execute(f"PRAGMA table_info({table})")}
+            if not existing:
+                # Table absente : créée complète par SCHEMA_SQL
+                continue
+            for name, (definition, backfill) in columns.items():
+                if name in existing:
+                    continue
+                self._conn.execute(f"ALTER TABLE {table} ADD COLUMN {name} {definition}")
+                if backfill is not None:
+                    self._conn.execute(f"UPDATE {table} SET {name} = {backfill}")
+
+    def __enter__(self) -> "ResultStore":
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+    def close(self) -> None:
+        """Ferme la connexion SQLite."""
+        with self._lock:
+            self._conn.close()
+
+    def append_extraction(
+        self,
+        result: ResultatExtractionKYC,
+        dossier_client: str | None = None,
+        cle_reutilisation: str | None = None,
+    ) -> None:
+        """Enregistre un résultat d'extraction."""
+        self.append_extractions([result], dossier_client, cle_reutilisation)
+
+    def append_extractions(
+        self,
+        results: Iterable[ResultatExtractionKYC],
+        dossier_client: str | None = None,
+        cle_reutilisation: str | None = None,
+    ) -> int:
+        """
+        Enregistre un lot de résultats d'extraction dans une seule transaction.
+
+        Args:
+            results: Résultats à enregistrer
+            dossier_client: Identifiant du dossier client (nom du dossier)
+            cle_reutilisation: Prompts et modèles qui ont produit les résultats
+                (`KYCDocumentChain.reuse_key`)
+
+        Returns:
+            Nombre de lignes insérées
+        """
+        rows = [_extraction_row(result, dossier_client, cle_reutilisation) for result in results]
+        with self._lock, self._conn:
+            self._conn.executemany(INSERT_EXTRACTION_SQL, rows)
+        return len(rows)
+
+    def append_dossier(self, dossier: DossierKYC, dossier_client: str | None = None) -> None:
+        """Enregistre un dossier KYC."""
+        self.append_dossiers([dossier], dossier_client)
+
+    def append_dossiers(
+        self, dossiers: Iterable[DossierKYC], dossier_client: str | None = None
+    ) -> int:
+        """
+        Enregistre un lot de dossiers KYC dans une seule transaction.
+
+        Args:
+            dossiers: Dossiers à enregistrer
+            dossier_client: Identifiant du dossier client
+
+        Returns:
+            Nombre de lignes insérées
+        """
+        rows = [_dossier_row(dossier, dossier_client) for dossier in dossiers]
+        with self._lock, self._conn:
+            self._conn.executemany(INSERT_DOSSIER_SQL, rows)
+        return len(rows)
+
+    def find_extraction(
+        self, empreinte_fichier: str, cle_reutilisation: str | None = None
+    ) -> ResultatExtractionKYC | None:
+        """
+        Retrouve la dernière extraction réussie d'un fichier par son empreinte.
+
+        Si des champs de la dernière extraction sont restés hors format
+        (avertissements), elle n'est pas réutilisée tant que le fichier n'a été extrait
+        qu'une fois sous cette clé : il est réextrait une fois, puis la dernière
+        extraction est réutilisée même avec ses avertissements.
+
+        Args:
+            empreinte_fichier: Empreinte SHA-256 du fichier
+            cle_reutilisation: Prompts et modèles attendus : une extraction enregistrée
+                sous une autre clé n'est pas retenue
+
+        Returns:
+            Le résultat enregistré, ou None si le fichier n'a jamais été extrait
+            sous cette clé ou s'il est à réextraire
+        """
+        with self._lock:
+            # Le compte (fenêtre) porte sur toutes les extractions réussies, avant LIMIT
+            row = self._conn.execute(
+                "SELECT payload, ifnull(json_array_length(payload, '$.avertissements'), 0), "
+                "count(*) OVER () "
+                "FROM extractions "
+                "WHERE empreinte_fichier = ? AND cle_reutilisation IS ? "
+                "AND extraction_reussie = 1 "
+                "ORDER BY id DESC LIMIT 1",
+                (empreinte_fichier, cle_reutilisation),
+            ).fetchone()
+        if row is None:
+            return None
+        payload, avertissements, extractions = row
+        if avertissements and extractions < 2:
+            return None
+        return ResultatExtractionKYC.model_validate_json(payload)
+
+    def iter_extractions(
+        self,
+        dossier_client: str | None = None,
+        type_document: TypeDocument | None = None,
+        expire_avant: date | None = None,
+    ) -> Iterator[ResultatExtractionKYC]:
+        """
+        Parcourt les extractions enregistrées, filtrées sur les colonnes indexées.
+
+        Args:
+            dossier_client: Filtre sur le dossier client
+            type_document: Filtre sur le type de document
+            expire_avant: Ne garder que les documents expirant avant cette date
+
+        Yields:
+            Résultats d'extraction dans l'ordre d'enregistrement
+        """
+        clauses, params = [], []
+        if dossier_client is not None:
+            clauses.append("dossier_client = ?")
+            params.append(dossier_client)
+        if type_document is not None:
+            clauses.append("type_document = ?")
+            params.append(type_document.value)
+        if expire_avant is not None:
+            clauses.append("date_expiration < ?")
+            params.append(expire_avant.isoformat())
+        yield from (
+            ResultatExtractionKYC.model_validate_json(payload)
+            for payload in self._iter_payloads("extractions", clauses, params)
+        )
+
+    def iter_field_warnings(
+        self, dossier_client: str | None = None, type_document: TypeDocument | None = None
+    ) -> Iterator[tuple[str | None, str | None, list[str]]]:
+        """
+        Parcourt les extractions réussies dont des champs sont hors format, à réextraire.
+
+        Les contrôles de `chains.schemas.field_checks` sont appliqués au JSON brut de
+        chaque enregistrement, sans validation Pydantic : un résultat stocké par une
+        version antérieure des schémas est audité lui aussi, pour quelques
+        expressions régulières de plus que sa lecture.
+
+        Args:
+            dossier_client: Filtre sur le dossier client
+            type_document: Filtre sur le type de document
+
+        Yields:
+            Tuples (empreinte du fichier, fichier source, avertissements)
+        """
+        clauses, params = ["extraction_reussie = 1"], []
+        if dossier_client is not None:
+            clauses.append("dossier_client = ?")
+            params.append(dossier_client)
+        if type_document is not None:
+            clauses.append("type_document = ?")
+            params.append(type_document.value)
+        for payload in self._iter_payloads("extractions", clauses, params):
+            data = json.loads(payload)
+            warnings = payload_warnings(data)
+            if warnings:
+                yield data.get("empreinte_fichier"), data.get("fichier_source"), warnings
+
+    def iter_dossiers(
+        self,
+        dossier_client: str | None = None,
+        statut_kyc: str | None = None,
+        expire_avant: date | None = None,
+    ) -> Iterator[DossierKYC]:
+        """
+        Parcourt les dossiers enregistrés, filtrés sur les colonnes indexées.
+
+        Args:
+            dossier_client: Filtre sur le dossier client
+            statut_kyc: Filtre sur le statut (APPROVED, REJECTED, PENDING)
+            expire_avant: Ne garder que les dossiers dont la pièce d'identité expire avant cette date
+
+        Yields:
+            Dossiers KYC dans l'ordre d'enregistrement
+        """
+        clauses, params = [], []
+        if dossier_client is not None:
+            clauses.append("dossier_client = ?")
+            params.append(dossier_client)
+        if statut_kyc is not None:
+            clauses.append("statut_kyc = ?")
+            params.append(statut_kyc)
+        if expire_avant is not None:
+            clauses.append("date_expiration_identite < ?")
+            params.append(expire_avant.isoformat())
+        yield from (
+            DossierKYC.model_validate_json(payload)
+            for payload in self._iter_payloads("dossiers", clauses, params)
+        )
+
+    def iter_records(
+        self, table: str, depuis_id: int = 0
+    ) -> Iterator[tuple[int, str, str | None, ResultatExtractionKYC | DossierKYC]]:
+        """
+        Parcourt une table avec l'id, la date d'enregistrement et le dossier client de chaque ligne.
+
+        Args:
+            table: `extractions` ou `dossiers`
+            depuis_id: Ne garder que les lignes d'id supérieur (export incrémental)
+
+        Yields:
+            Tuples (id, enregistre_le, dossier_client, résultat ou dossier)
+        """
+        model = {"extractions": ResultatExtractionKYC, "dossiers": DossierKYC}[table]
+        for row_id, enregistre_le, dossier_client, payload in self._iter_rows(
+            table, "id, enregistre_le, dossier_client, payload", ["id > ?"], [depuis_id]
+        ):
+            yield row_id, enregistre_le, dossier_client, model.model_validate_json(payload)
+
+    def _iter_payloads(self, table: str, clauses: list[str], params: list) -> Iterator[str]:
+        for (payload,) in self._iter_rows(table, "payload", clauses, params):
+            yield payload
+
+    def _iter_rows(
+        self, table: str, columns: str, clauses: list[str], params: list
+    ) -> Iterator[tuple]:
+        where = f" WHERE {' AND '.join(clauses)}" if clauses else ""
+        # Connexion de lecture dédiée : WAL autorise la lecture pendant les écritures
+        # et le curseur ne charge pas toute la table en mémoire.
+        with closing(sqlite3.connect(self.db_path)) as conn:
+            yield from conn.execute(f"SELECT {columns} FROM {table}{where} ORDER BY id", params)
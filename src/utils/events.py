@@ -0,0 +1,235 @@
+"""
+Flux d'événements structurés du traitement (progression, coûts, erreurs).
+
+Usage:
+    emit("classification.fin", fichier="rib.png", type_document="rib", confiance=0.95)
+
+Chaque événement est un enregistrement du logger `kyc.events` : un nom, un niveau
+et des champs. Sans `configure_events`, rien n'est émis (comportement d'une
+bibliothèque). Une fois configuré, le thread qui émet ne fait que déposer
+l'enregistrement dans une file (`QueueHandler`) ; l'écriture est faite par le
+thread d'un `QueueListener`, sur la console (rendu lisible avec emojis, voir
+`ConsoleRenderer`) et/ou dans un fichier JSON lines (voir `JsonLinesFormatter`).
+"""
+
+import atexit
+import json
+import logging
+import logging.handlers
+import queue
+import sys
+from collections.abc import Callable
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any
+
+EVENTS_LOGGER = "kyc.events"
+
+_LOGGER = logging.getLogger(EVENTS_LOGGER)
+_LOGGER.addHandler(logging.NullHandler())
+
+_LISTENER: logging.handlers.QueueListener | None = None
+_QUEUE: queue.Queue[logging.LogRecord] | None = None
+
+
+def emit(event: str, level: int = logging.INFO, **fields: Any) -> None:
+    """
+    Émet un événement.
+
+    Args:
+        event: Nom de l'événement (ex: "classification.fin")
+        level: Niveau `logging` de l'événement
+        **fields: Champs de l'événement (sérialisables en JSON, sinon convertis en texte)
+    """
+    if _LOGGER.isEnabledFor(level):
+        _LOGGER.log(level, event, extra={"event": event, "fields": fields})
+
+
+def _banner(title: str) -> str:
+    return f"\n{'=' * 70}\n{title}\n{'=' * 70}\n"
+
+
+def _render_tokens(fields: dict[str, Any]) -> str:
+    overhead = fields.get("overhead_tokens", 0)
+    overhead_str = f" (overhead: {overhead})" if overhead > 0 else ""
+    return (
+        f"   💰 Tokens {fields['etape']}: input={fields['input_tokens']}, "
+        f"output={fields['output_tokens']}, total={fields['total_tokens']}{overhead_str} "
+        f"| Coût: ${fields['cout_usd']:.6f}"
+    )
+
+
+def _render_classification(fields: dict[str, Any]) -> str:
+    confiance = fields.get("confiance")
+    confiance_str = f" (confiance: {confiance:.2%})" if confiance is not None else ""
+    return f"   ✓ Type détecté: {fields['type_document']}{confiance_str}"
+
+
+def _render_segmentation(fields: dict[str, Any]) -> str:
+    documents = "".join(
+        f"\n   ✓ {d['type_document']}: pages {', '.join(map(str, d['pages']))}"
+        for d in fields["documents"]
+    )
+    return f"   {len(fields['documents'])} document(s) trouvé(s){documents}"
+
+
+def _render_piece(fields: dict[str, Any]) -> str:
+    if fields["present"]:
+        return f"✓ {fields['libelle']} trouvé(e)"
+    return f"✗ {fields['libelle']} manquant(e)"
+
+
+def _render_rejet(fields: dict[str, Any]) -> str:
+    erreurs = "".join(f"\n  - {erreur}" for erreur in fields["erreurs"])
+    return f"❌ Dossier KYC REJETÉ\n\nErreurs détectées:{erreurs}\n"
+
+
+# Rendu console de chaque événement : gabarit `str.format` ou fonction des champs
+CONSOLE_TEMPLATES: dict[str, str | Callable[[dict[str, Any]], str]] = {
+    "tokens.indisponibles": "   ⚠️  Impossible d'extraire les statistiques de tokens: {erreur}",
+    "appel.tokens": _render_tokens,
+    "escalade": "   ⤴️  Escalade {etape} vers {modele} ({raison})",
+    "reponse.reparee": lambda fields: (
+        f"   🩹 Réponse JSON réparée: {', '.join(fields['reparations'])}"
+    ),
+    "classification.debut": "🔍 Classification du document: {fichier}",
+    "classification.fin": _render_classification,
+    "classification.erreur": "❌ Erreur lors de la classification: {erreur}\n",
+    "segmentation.debut": "✂️  Segmentation du PDF: {fichier}",
+    "segmentation.fin": _render_segmentation,
+    "extraction.debut": "📄 Extraction des données...",
+    "extraction.texte": "   📝 Couche texte du PDF utilisée ({caracteres} caractères)",
+    "extraction.reprise": lambda fields: (
+        f"   🔁 Reprise partielle des champs: {', '.join(fields['champs'])}"
+    ),
+    "extraction.fin": "   ✓ Extraction réussie",
+    "document.cout": "   📊 Total tokens: {total_tokens} | Coût total: ${cout_usd:.6f}",
+    "document.fin": "✅ Traitement terminé avec succès\n",
+    "document.erreur": "❌ Erreur lors du traitement: {erreur}\n",
+    "document.etape": "{numero}️⃣ {libelle}...",
+    "document.reutilise": "♻️  Résultat réutilisé pour: {fichier}",
+    "document.ecarte": "⏭️  Document non retenu (doublon de type): {fichier}",
+    "documents.debut": lambda fields: _banner("🏦 Traitement de documents KYC individuels"),
+    "dossier.debut": lambda fields: _banner(f"🏦 Traitement du dossier KYC: {fields['dossier']}"),
+    "dossier.plan": (
+        "\n🗂️  {classes} document(s) classé(s), {a_extraire} à extraire, {ecartes} non retenu(s)\n"
+    ),
+    "dossier.fin": "\n📁 {documents} document(s) traité(s)",
+    "dossier.construction": lambda fields: _banner("📋 Construction du dossier KYC"),
+    "dossier.piece": _render_piece,
+    "dossier.incomplet": "\n❌ Dossier incomplet - documents manquants: {manquants}\n",
+    "dossier.validation": lambda fields: _banner("🔍 Validation de la cohérence du dossier"),
+    "dossier.valide": "✅ Dossier KYC VALIDÉ\n",
+    "dossier.rejete": _render_rejet,
+    "travail.debut": "⚙️  [{worker}] Travail {travail} ({nature}): {chemin}",
+    "travail.reporte": "⏸️  [{worker}] Travail {travail} reporté: {erreur}",
+    "travail.echec_definitif": "❌ [{worker}] Travail {travail} en échec définitif: {erreur}",
+    "travail.echec": "⚠️  [{worker}] Travail {travail} en échec (tentative {tentative}): {erreur}",
+    "service.demarre": "🚀 Service KYC à l'écoute sur http://{hote}:{port}",
+}
+
+
+class ConsoleRenderer(logging.Formatter):
+    """Rendu lisible (emojis) des événements, comme l'affichage historique du démonstrateur."""
+
+    def format(self, record: logging.LogRecord) -> str:
+        event = getattr(record, "event", record.getMessage())
+        fields = getattr(record, "fields", {})
+        template = CONSOLE_TEMPLATES.get(event)
+        if template is None:
+            details = " ".join(f"{key}={value}" for key, value in fields.items())
+            return f"{event} {details}".rstrip()
+        if callable(template):
+            return template(fields)
+        return template.format(**fields)
+
+
+class JsonLinesFormatter(logging.Formatter):
+    """Un objet JSON par événement : horodatage, niveau, nom, processus, thread et champs."""
+
+    def format(self, record: logging.LogRecord) -> str:
+        payload = {
+            "ts": datetime.fromtimestamp(record.created, timezone.utc).isoformat(),
+            "level": record.levelname,
+            "event": getattr(record, "event", record.getMessage()),
+            "process": record.process,
+            "thread": record.threadName,
+            **getattr(record, "fields", {}),
+        }
+        return json.dumps(payload, ensure_ascii=False, default=str)
+
+
+def configure_events(
+    console: bool = True,
+    json_path: str | Path | None = None,
+    level: int | str = logging.INFO,
+    quiet: bool = False,
+) -> None:
+    """
+    Active l'émission des événements, sans bloquer les threads qui les émettent.
+
+    Peut être rappelée : la configuration précédente est alors remplacée.
+
+    Args:
+        console: Afficher le rendu lisible sur la sortie standard
+        json_path: Fichier JSON lines où ajouter les événements (None: pas de fichier)
+        level: Niveau minimum des événements émis
+        quiet: N'afficher sur la console que les avertissements et les erreurs
+            (le fichier JSON lines reçoit tout de même tous les événements)
+    """
+    global _LISTENER, _QUEUE
+
+    shutdown_events()
+    handlers: list[logging.Handler] = []
+    if console:
+        console_handler = logging.StreamHandler(sys.stdout)
+        console_handler.setFormatter(ConsoleRenderer())
+        console_handler.setLevel(logging.WARNING if quiet else logging.NOTSET)
+        handlers.append(console_handler)
+    if json_path is not None:
+        json_path = Path(json_path)
+        json_path.parent.mkdir(parents=True, exist_ok=True)
+        file_handler = logging.FileHandler(json_path, encoding="utf-8")
+        file_handler.setFormatter(JsonLinesFormatter())
+        handlers.append(file_handler)
+
+    _QUEUE = queue.Queue()
+    _LISTENER = logging.handlers.QueueListener(_QUEUE, *handlers, respect_handler_level=True)
+    _LISTENER.start()
+    _LOGGER.addHandler(_QueueHandler(_QUEUE))
+    _LOGGER.setLevel(level)
+    _LOGGER.propagate = False
+
+
+def flush_events() -> None:
+    """Attend que les événements déjà émis soient écrits (avant un affichage direct)."""
+    if _QUEUE is not None and _LISTENER is not None:
+        _QUEUE.join()
+
+
+def shutdown_events() -> None:
+    """Écrit les événements en attente et désactive l'émission."""
+    global _LISTENER, _QUEUE
+
+    for handler in list(_LOGGER.handlers):
+        if isinstance(handler, _QueueHandler):
+            _LOGGER.removeHandler(handler)
+    if _LISTENER is not None:
+        _LISTENER.stop()
+        for handler in _LISTENER.handlers:
+            handler.close()
+        _LISTENER = None
+        _QUEUE = None
+    _LOGGER.setLevel(logging.NOTSET)
+    _LOGGER.propagate = True
+
+
+class _QueueHandler(logging.handlers.QueueHandler):
+    """`QueueHandler` qui conserve les champs de l'événement tels quels."""
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        # Le rendu est fait par le listener : pas de formatage dans le thread émetteur
+        return record
+
+
+atexit.register(shutdown_events)
@@ -0,0 +1,68 @@
+"""Utilitaires de manipulation de fichiers."""
+
+import hashlib
+import math
+import mmap
+import re
+from collections.abc import Iterator
+from contextlib import contextmanager
+from pathlib import Path
+
+# Objets page d'un PDF (`/Type /Page`, mais pas `/Type /Pages`)
+PDF_PAGE_PATTERN = re.compile(rb"/Type\s*/Page(?![a-zA-Z])")
+# Taille moyenne d'une page scannée, quand les pages ne sont pas lisibles (flux compressés)
+PDF_BYTES_PER_PAGE_ESTIMATE = 150 * 1024
+
+
+@contextmanager
+def mapped_file(path: str | Path) -> Iterator[bytes | mmap.mmap]:
+    """
+    Contenu d'un fichier projeté en mémoire (lecture seule), sans copie dans le tas.
+
+    Un fichier vide, qui ne peut pas être projeté, donne `b""`.
+
+    Args:
+        path: Chemin du fichier
+    """
+    with open(path, "rb") as f:
+        if not Path(path).stat().st_size:
+            yield b""
+            return
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+            yield mapped
+
+
+def file_sha256(path: str | Path) -> str:
+    """
+    Calcule l'empreinte SHA-256 d'un fichier projeté en mémoire.
+
+    Args:
+        path: Chemin du fichier
+
+    Returns:
+        Empreinte hexadécimale du contenu
+    """
+    with mapped_file(path) as data:
+        return hashlib.sha256(data).hexdigest()
+
+
+def page_count(path: str | Path) -> int:
+    """
+    Nombre de pages d'un document (1 pour une image).
+
+    Pour un PDF dont les objets page sont compressés, le nombre de pages est
+    estimé à partir de la taille du fichier.
+
+    Args:
+        path: Chemin du document
+
+    Returns:
+        Nombre de pages (au moins 1)
+    """
+    path = Path(path)
+    if path.suffix.lower() != ".pdf":
+        return 1
+    with mapped_file(path) as data:
+        pages = sum(1 for _ in PDF_PAGE_PATTERN.finditer(data))
+        size = len(data)
+    return pages or max(1, math.ceil(size / PDF_BYTES_PER_PAGE_ESTIMATE))
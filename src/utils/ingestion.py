@@ -0,0 +1,199 @@
+"""
+Ingestion des documents à mémoire bornée.
+
+Un document n'est lu qu'après avoir réservé sa taille sur un plafond d'octets
+en vol, partagé par tous les documents traités en parallèle : au-dessus du
+plafond, la lecture attend qu'un appel en cours libère sa réservation. Le pic
+de mémoire des contenus ne dépend donc plus du mélange des documents reçus.
+
+Un fichier au-delà de la taille maximale est refusé, sauf une image qui, une
+fois réduite (Pillow, dépendance optionnelle `images`), repasse sous la limite.
+Une image réduite est décodée depuis son fichier : l'original n'est jamais gardé
+en mémoire avec sa copie réduite. Le décodage occupe la taille du bitmap, pas
+celle du fichier compressé : la réduction réserve la taille décodée estimée
+d'après l'en-tête de l'image, puis l'appel ne réserve que la copie réduite.
+"""
+
+import io
+import threading
+from collections.abc import Iterator
+from contextlib import contextmanager
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any
+
+from utils.tracing import span
+
+MIME_TYPES = {
+    ".jpg": "image/jpeg",
+    ".jpeg": "image/jpeg",
+    ".png": "image/png",
+    ".pdf": "application/pdf",
+}
+
+
+class DocumentTooLargeError(ValueError):
+    """Document au-delà de la taille maximale acceptée."""
+
+
+@dataclass
+class LoadedDocument:
+    """Contenu d'un document prêt à être envoyé au modèle."""
+
+    data: bytes
+    mime_type: str
+    downsampled: bool = False
+
+
+class InFlightBytes:
+    """Plafond d'octets en vol partagé par les documents traités en parallèle."""
+
+    def __init__(self, limit_bytes: int):
+        """
+        Args:
+            limit_bytes: Nombre maximum d'octets réservés simultanément
+        """
+        self.limit_bytes = limit_bytes
+        self.in_flight = 0
+        self.peak = 0
+        self.waits = 0
+        self._condition = threading.Condition()
+
+    @contextmanager
+    def reserve(self, nbytes: int) -> Iterator[None]:
+        """
+        Réserve `nbytes` pour la durée du bloc, en attendant que le plafond le permette.
+
+        Une réservation plus grande que le plafond est admise seule.
+        """
+        nbytes = min(nbytes, self.limit_bytes)
+        with self._condition:
+            if self.in_flight + nbytes > self.limit_bytes:
+                self.waits += 1
+                with span("attente_memoire", octets=nbytes):
+                    self._condition.wait_for(lambda: self.in_flight + nbytes <= self.limit_bytes)
+            self.in_flight += nbytes
+            self.peak = max(self.peak, self.in_flight)
+        try:
+            yield
+        finally:
+            with self._condition:
+                self.in_flight -= nbytes
+                self._condition.notify_all()
+
+
+def decoded_size(path: str | Path) -> int | None:
+    """
+    Taille estimée de l'image décodée (largeur × hauteur × canaux), lue dans l'en-tête.
+
+    `Image.open` ne lit que l'en-tête : le bitmap n'est pas décodé ici.
+
+    Returns:
+        Nombre d'octets, ou None si Pillow n'est pas installé ou si l'image est illisible
+    """
+    try:
+        from PIL import Image, UnidentifiedImageError
+    except ImportError:
+        return None
+    try:
+        with Image.open(path) as image:
+            width, height = image.size
+            return width * height * len(image.getbands())
+    except (UnidentifiedImageError, OSError):
+        return None
+
+
+def downsample_image(path: str | Path, max_side_px: int, quality: int) -> bytes | None:
+    """
+    Réduit une image à `max_side_px` de côté et la réencode en JPEG.
+
+    L'image est décodée depuis son fichier, sans en lire d'abord tout le contenu.
+
+    Returns:
+        Image réduite, ou None si Pillow n'est pas installé ou si l'image est illisible
+    """
+    try:
+        from PIL import Image, UnidentifiedImageError
+    except ImportError:
+        return None
+    try:
+        with Image.open(path) as image:
+            image.thumbnail((max_side_px, max_side_px))
+            output = io.BytesIO()
+            image.convert("RGB").save(output, "JPEG", quality=quality, optimize=True)
+    except (UnidentifiedImageError, OSError):
+        return None
+    return output.getvalue()
+
+
+class DocumentIngestor:
+    """Lecture des documents sous un plafond d'octets en vol."""
+
+    def __init__(self, settings: dict[str, Any]):
+        """
+        Args:
+            settings: Section `ingestion` de la configuration (plafond en vol,
+                taille maximale, seuil de réduction des images, côté et qualité JPEG)
+        """
+        self.settings = settings
+        self.in_flight = InFlightBytes(settings["max_in_flight_bytes"])
+
+    @contextmanager
+    def load(self, path: str | Path, downsample: bool = True) -> Iterator[LoadedDocument]:
+        """
+        Lit un document et garde sa taille réservée pendant le bloc (l'appel au modèle).
+
+        Une image à réduire réserve d'abord sa taille décodée estimée (`decoded_size`)
+        le temps de la réduction, puis seulement la taille de sa copie réduite.
+
+        Args:
+            path: Chemin du document
+            downsample: Réduire une image au-delà de `downsample_above_bytes` ; si False
+                (escalade vers un modèle plus fort), une image n'est réduite que si elle
+                dépasse la taille maximale
+
+        Yields:
+            Contenu et type MIME du document, réduit si c'est une image volumineuse
+
+        Raises:
+            DocumentTooLargeError: Si le document dépasse la taille maximale
+        """
+        path = Path(path)
+        size = path.stat().st_size
+        mime_type = MIME_TYPES.get(path.suffix.lower(), "image/jpeg")
+        max_bytes = self.settings["max_file_bytes"]
+        if size > max_bytes and not mime_type.startswith("image/"):
+            raise DocumentTooLargeError(
+                f"Document trop volumineux: {path.name} ({size} octets, maximum {max_bytes})"
+            )
+
+        threshold = self.settings["downsample_above_bytes"] if downsample else max_bytes
+        document = None
+        if mime_type.startswith("image/") and size > threshold:
+            # Pillow décode tout le bitmap : réserver sa taille, pas celle du fichier
+            with self.in_flight.reserve(max(size, decoded_size(path) or 0)):
+                document = self._downsample(path, size)
+        # Pendant l'appel, seule la copie réduite (ou le fichier lu) reste en mémoire
+        with self.in_flight.reserve(len(document.data) if document else size):
+            if document is None and size <= max_bytes:
+                # Lecture complète plutôt que mmap : `Part.from_data` copie le contenu
+                # dans le message protobuf, une vue mappée serait copiée de toute façon
+                with span("lecture_fichier", fichier=path.name), open(path, "rb") as f:
+                    document = LoadedDocument(f.read(), mime_type)
+            if document is None or len(document.data) > max_bytes:
+                raise DocumentTooLargeError(
+                    f"Image trop volumineuse: {path.name} "
+                    f"({len(document.data) if document else size} octets "
+                    f"après réduction éventuelle, maximum {max_bytes})"
+                )
+            yield document
+
+    def _downsample(self, path: Path, size: int) -> LoadedDocument | None:
+        """Image réduite, ou None si la réduction est impossible ou ne gagne rien."""
+        with span("reduction_image", fichier=path.name, octets=size):
+            reduced = downsample_image(
+                path, self.settings["max_image_side_px"], self.settings["jpeg_quality"]
+            )
+        if reduced is None or len(reduced) >= size:
+            return None
+        return LoadedDocument(reduced, "image/jpeg", downsampled=True)
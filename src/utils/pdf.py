@@ -0,0 +1,91 @@
+"""
+Découpage et couche texte des PDF (dépendance optionnelle `pdf` : pypdf).
+
+Usage:
+    extract_pages("scan.pdf", [2, 3], "justificatif.pdf")
+    text = extract_text("facture.pdf", max_pages=3)
+"""
+
+from pathlib import Path
+
+
+def extract_pages(source: str | Path, pages: list[int], output: str | Path) -> Path:
+    """
+    Écrit un PDF qui ne contient que certaines pages d'un autre.
+
+    Args:
+        source: PDF d'origine
+        pages: Numéros des pages à garder (à partir de 1), dans l'ordre voulu
+        output: PDF à écrire
+
+    Returns:
+        Chemin du PDF écrit
+
+    Raises:
+        ImportError: Si pypdf n'est pas installé
+        ValueError: Si une page n'existe pas dans le PDF
+    """
+    try:
+        from pypdf import PdfReader, PdfWriter
+    except ImportError as e:
+        raise ImportError("Le découpage des PDF nécessite pypdf : uv sync --extra pdf") from e
+
+    reader = PdfReader(source)
+    writer = PdfWriter()
+    for page in pages:
+        if not 1 <= page <= len(reader.pages):
+            raise ValueError(
+                f"Page {page} absente de {Path(source).name} ({len(reader.pages)} pages)"
+            )
+        writer.add_page(reader.pages[page - 1])
+    output = Path(output)
+    with open(output, "wb") as f:
+        writer.write(f)
+    return output
+
+
+def extract_text(source: str | Path, max_pages: int) -> str | None:
+    """
+    Lit la couche texte d'un PDF natif (facture, avis d'impôt...).
+
+    Args:
+        source: PDF à lire
+        max_pages: Nombre de pages au-delà duquel le PDF n'est pas lu
+
+    Returns:
+        Texte des pages séparées par un saut de page, ou None si pypdf n'est pas
+        installé, si le PDF est illisible, chiffré ou a trop de pages
+    """
+    try:
+        from pypdf import PdfReader
+        from pypdf.errors import PdfReadError
+    except ImportError:
+        return None
+    try:
+        reader = PdfReader(source)
+        if reader.is_encrypted or len(reader.pages) > max_pages:
+            return None
+        return "\f".join(page.extract_text() or "" for page in reader.pages)
+    except (PdfReadError, OSError, ValueError):
+        return None
+
+
+def usable_text(text: str, min_chars: int, min_alnum_ratio: float) -> bool:
+    """
+    Indique si une couche texte suffit à extraire le document sans son image.
+
+    Un scan n'a pas de texte (ou quelques caractères d'OCR intégrée) ; une couche
+    texte mal encodée donne surtout des symboles.
+
+    Args:
+        text: Texte extrait
+        min_chars: Nombre minimum de caractères non blancs
+        min_alnum_ratio: Part minimum de lettres et chiffres parmi ces caractères
+
+    Returns:
+        True si le texte peut remplacer l'image
+    """
+    chars = [char for char in text if not char.isspace()]
+    if len(chars) < min_chars:
+        return False
+    return sum(char.isalnum() for char in chars) / len(chars) >= min_alnum_ratio
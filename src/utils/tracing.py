@@ -0,0 +1,195 @@
+"""
+Traces d'exécution légères (spans) autour des étapes de la chain et du pipeline.
+
+Usage:
+    with span("appel_modele", modele="gemini-2.5-flash"):
+        ...
+
+Désactivé par défaut : `span` retourne alors un context manager partagé qui ne
+fait rien, pour un surcoût quasi nul. Une fois activé, chaque span terminé est
+transmis aux callbacks enregistrés (`add_listener`) et, si l'enregistrement est
+demandé, conservé pour être exporté au format Chrome Trace Event (JSON), lisible
+dans chrome://tracing ou https://ui.perfetto.dev.
+"""
+
+import atexit
+import json
+import os
+import threading
+import time
+from collections import deque
+from collections.abc import Callable
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any
+
+# Nombre maximum de spans conservés en mémoire pour l'export (les plus anciens sont oubliés)
+MAX_RECORDED_SPANS = 100_000
+
+
+@dataclass
+class Span:
+    """Étape chronométrée."""
+
+    name: str
+    start_ns: int
+    end_ns: int = 0
+    attributes: dict[str, Any] = field(default_factory=dict)
+    thread_id: int = 0
+    process_id: int = 0
+
+    @property
+    def duration_s(self) -> float:
+        """Durée du span en secondes."""
+        return (self.end_ns - self.start_ns) / 1e9
+
+
+class _NoopSpan:
+    """Span inactif : ne mesure rien."""
+
+    def __enter__(self) -> None:
+        return None
+
+    def __exit__(self, *exc_info) -> None:
+        return None
+
+
+_NOOP_SPAN = _NoopSpan()
+
+
+class _ActiveSpan:
+    """Context manager qui chronomètre un span et le remet au tracer."""
+
+    def __init__(self, tracer: "Tracer", name: str, attributes: dict[str, Any]):
+        self._tracer = tracer
+        self._span = Span(name=name, start_ns=0, attributes=attributes)
+
+    def __enter__(self) -> Span:
+        self._span.thread_id = threading.get_ident()
+        self._span.process_id = os.getpid()
+        self._span.start_ns = time.perf_counter_ns()
+        return self._span
+
+    def __exit__(self, exc_type, exc, traceback) -> None:
+        self._span.end_ns = time.perf_counter_ns()
+        if exc_type is not None:
+            self._span.attributes["erreur"] = exc_type.__name__
+        self._tracer._finish(self._span)
+
+
+class Tracer:
+    """Collecte des spans et diffusion aux callbacks."""
+
+    def __init__(self):
+        self._recording = False
+        self._spans: deque[Span] = deque(maxlen=MAX_RECORDED_SPANS)
+        self._listeners: list[Callable[[Span], None]] = []
+        self._lock = threading.Lock()
+        self._enabled = False
+
+    @property
+    def enabled(self) -> bool:
+        """Les spans sont-ils mesurés ?"""
+        return self._enabled
+
+    def span(self, name: str, **attributes: Any) -> _ActiveSpan | _NoopSpan:
+        """
+        Context manager qui mesure une étape.
+
+        Args:
+            name: Nom de l'étape
+            **attributes: Attributs affichés avec le span (type de document, modèle, ...)
+
+        Returns:
+            Span actif, ou span inactif partagé si le tracing est désactivé
+        """
+        if not self._enabled:
+            return _NOOP_SPAN
+        return _ActiveSpan(self, name, attributes)
+
+    def start_recording(self) -> None:
+        """Conserve les spans terminés pour l'export."""
+        with self._lock:
+            self._recording = True
+            self._enabled = True
+
+    def add_listener(self, listener: Callable[[Span], None]) -> None:
+        """Appelle `listener` avec chaque span terminé."""
+        with self._lock:
+            self._listeners.append(listener)
+            self._enabled = True
+
+    def reset(self) -> None:
+        """Désactive le tracing et oublie spans et callbacks."""
+        with self._lock:
+            self._recording = False
+            self._enabled = False
+            self._spans.clear()
+            self._listeners.clear()
+
+    def spans(self) -> list[Span]:
+        """Copie des spans enregistrés."""
+        with self._lock:
+            return list(self._spans)
+
+    def _finish(self, span: Span) -> None:
+        with self._lock:
+            if self._recording:
+                self._spans.append(span)
+            listeners = list(self._listeners)
+        for listener in listeners:
+            listener(span)
+
+    def export_chrome_trace(self, path: str | Path) -> int:
+        """
+        Écrit les spans enregistrés au format Chrome Trace Event.
+
+        Args:
+            path: Fichier JSON de sortie
+
+        Returns:
+            Nombre de spans exportés
+        """
+        spans = self.spans()
+        events = [
+            {
+                "name": span.name,
+                "ph": "X",
+                "ts": span.start_ns / 1000,
+                "dur": (span.end_ns - span.start_ns) / 1000,
+                "pid": span.process_id,
+                "tid": span.thread_id,
+                "args": {key: str(value) for key, value in span.attributes.items()},
+            }
+            for span in spans
+        ]
+        path = Path(path)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_text(json.dumps({"traceEvents": events, "displayTimeUnit": "ms"}))
+        return len(events)
+
+
+_TRACER = Tracer()
+
+
+def get_tracer() -> Tracer:
+    """Tracer partagé par le processus."""
+    return _TRACER
+
+
+def span(name: str, **attributes: Any) -> _ActiveSpan | _NoopSpan:
+    """Mesure une étape avec le tracer du processus (voir `Tracer.span`)."""
+    if not _TRACER._enabled:
+        return _NOOP_SPAN
+    return _ActiveSpan(_TRACER, name, attributes)
+
+
+def enable_trace_file(path: str | Path) -> None:
+    """
+    Enregistre les spans et les exporte dans `path` à la fin du processus.
+
+    Args:
+        path: Fichier de trace (format Chrome Trace Event)
+    """
+    _TRACER.start_recording()
+    atexit.register(_TRACER.export_chrome_trace, path)
@@ -0,0 +1,223 @@
+"""
+Workers multi-processus pour la file de travaux durable.
+
+Chaque processus garde une seule `KYCDocumentChain` chauffée et consomme la file
+SQLite. Un bail est prolongé tant que le travail tourne : si le processus meurt,
+seul le travail en vol est rejoué. Les extractions déjà présentes dans le store
+de résultats ne sont pas refacturées lors d'un rejeu.
+
+Usage:
+    python src/worker.py --queue data/jobs.db --enqueue-dossier clients/dupont/
+    python src/worker.py --queue data/jobs.db --workers 4 --drain
+"""
+
+import argparse
+import logging
+import multiprocessing
+import os
+import threading
+import time
+from pathlib import Path
+
+from dotenv import load_dotenv
+from pydantic import BaseModel
+
+from chains.budget import BudgetDeferredError, BudgetExceededError, BudgetScope, budget_scope
+from chains.configuration import Configuration
+from chains.fake_model import FakeGenerativeModel
+from chains.llm_chain import KYCDocumentChain
+from pipeline import KYCPipeline
+from storage import Job, JobKind, JobQueue
+from utils.events import configure_events, emit
+from utils.tracing import enable_trace_file
+
+
+class _LeaseKeeper:
+    """Prolonge périodiquement le bail d'un travail depuis un thread dédié."""
+
+    def __init__(self, config: Configuration, queue_path: Path, job: Job, worker_id: str):
+        self._settings = config.job_queue
+        self._queue_path = queue_path
+        self._job = job
+        self._worker_id = worker_id
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+
+    def __enter__(self) -> "_LeaseKeeper":
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self._stop.set()
+        self._thread.join()
+
+    def _run(self) -> None:
+        interval = self._settings["visibility_timeout_s"] / 3
+        with _open_queue(self._settings, self._queue_path) as queue:
+            while not self._stop.wait(interval):
+                if not queue.heartbeat(self._job.id, self._worker_id):
+                    return
+
+
+def _open_queue(settings: dict, queue_path: Path) -> JobQueue:
+    return JobQueue(
+        queue_path,
+        visibility_timeout_s=settings["visibility_timeout_s"],
+        max_attempts=settings["max_attempts"],
+        retry_backoff_s=settings["retry_backoff_s"],
+    )
+
+
+def _run_job(pipeline: KYCPipeline, job: Job) -> BaseModel:
+    chemin = Path(job.chemin)
+    if job.kind == JobKind.DOSSIER:
+        return pipeline.process_folder(chemin)
+    with budget_scope(BudgetScope(client=chemin.parent.name, dossier=chemin.parent.name)):
+        result = pipeline.process_document(chemin, chemin.parent.name)
+    if not result.extraction_reussie:
+        # Les échecs d'extraction (appel modèle, parsing) sont considérés transitoires
+        raise RuntimeError("; ".join(result.erreurs))
+    return result
+
+
+def run_worker(
+    queue_path: str | Path,
+    worker_id: str,
+    fake: bool = False,
+    drain: bool = False,
+    poll_interval_s: float = 1.0,
+) -> int:
+    """
+    Boucle d'un worker : loue, traite et acquitte les travaux.
+
+    Args:
+        queue_path: Chemin de la file SQLite
+        worker_id: Identifiant unique du worker
+        fake: Utiliser le backend de modèle factice
+        drain: S'arrêter dès que la file est vide
+        poll_interval_s: Attente entre deux interrogations d'une file vide
+
+    Returns:
+        Nombre de travaux terminés avec succès
+    """
+    queue_path = Path(queue_path)
+    config = Configuration()
+    if config.trace_path is not None:
+        # Un fichier de trace par worker
+        trace_path = config.trace_path
+        enable_trace_file(trace_path.with_name(f"{trace_path.stem}-{worker_id}{trace_path.suffix}"))
+    events_path = config.events_path
+    if events_path is not None:
+        # Un fichier d'événements par worker, comme pour la trace
+        events_path = events_path.with_name(f"{events_path.stem}-{worker_id}{events_path.suffix}")
+    configure_events(json_path=events_path, level=config.log_level, quiet=config.quiet)
+    chain = KYCDocumentChain(config, model=FakeGenerativeModel() if fake else None)
+    pipeline = KYCPipeline(config, chain=chain)
+    done = 0
+
+    with _open_queue(config.job_queue, queue_path) as queue:
+        while True:
+            job = queue.lease(worker_id)
+            if job is None:
+                if drain:
+                    return done
+                time.sleep(poll_interval_s)
+                continue
+
+            emit(
+                "travail.debut",
+                worker=worker_id,
+                travail=job.id,
+                nature=job.kind.value,
+                chemin=job.chemin,
+            )
+            try:
+                with _LeaseKeeper(config, queue_path, job, worker_id):
+                    result = _run_job(pipeline, job)
+            except BudgetDeferredError as e:
+                # Plafond du travail de fond atteint : reprise plus tard, sans perdre de tentative
+                queue.defer(job.id, worker_id, e.retry_after_s, str(e))
+                emit(
+                    "travail.reporte",
+                    logging.WARNING,
+                    worker=worker_id,
+                    travail=job.id,
+                    erreur=str(e),
+                    delai_s=e.retry_after_s,
+                )
+            except (ValueError, BudgetExceededError) as e:
+                # Dossier incomplet ou hors budget : rejouer ne changera rien
+                queue.fail(job.id, worker_id, str(e), retry=False)
+                emit(
+                    "travail.echec_definitif",
+                    logging.ERROR,
+                    worker=worker_id,
+                    travail=job.id,
+                    erreur=str(e),
+                )
+            except (RuntimeError, OSError) as e:
+                # Y compris `TransientDossierError` : un document requis n'a pas pu être traité
+                queue.fail(job.id, worker_id, str(e))
+                emit(
+                    "travail.echec",
+                    logging.WARNING,
+                    worker=worker_id,
+                    travail=job.id,
+                    tentative=job.attempts,
+                    erreur=str(e),
+                )
+            except Exception as e:
+                # Dernier recours (store, registre des dépenses, validation imprévue) : le
+                # travail suit la voie normale des tentatives au lieu de rester loué jusqu'à
+                # l'expiration de son bail, et le worker continue
+                queue.fail(job.id, worker_id, f"{type(e).__name__}: {e}")
+                emit(
+                    "travail.erreur_inattendue",
+                    logging.ERROR,
+                    worker=worker_id,
+                    travail=job.id,
+                    tentative=job.attempts,
+                    erreur=f"{type(e).__name__}: {e}",
+                )
+            else:
+                if queue.complete(job.id, worker_id, result.model_dump_json()):
+                    done += 1
+
+
+def main():
+    """Point d'entrée des workers."""
+    load_dotenv()
+    parser = argparse.ArgumentParser(description="Workers de la file de travaux KYC")
+    parser.add_argument("--queue", required=True, help="Chemin de la file SQLite")
+    parser.add_argument("--workers", type=int, default=os.cpu_count(), help="Nombre de processus")
+    parser.add_argument("--enqueue-document", nargs="*", default=[], help="Documents à ajouter")
+    parser.add_argument("--enqueue-dossier", nargs="*", default=[], help="Dossiers à ajouter")
+    parser.add_argument("--drain", action="store_true", help="S'arrêter quand la file est vide")
+    parser.add_argument("--fake", action="store_true", help="Backend de modèle factice")
+    args = parser.parse_args()
+    # Un seul registre des dépenses pour tous les workers : les plafonds sont communs
+    os.environ.setdefault("VAR_KYC_BUDGET_PATH", str(Path(args.queue).with_name("budget.db")))
+
+    with _open_queue(Configuration().job_queue, Path(args.queue)) as queue:
+        queue.enqueue(JobKind.DOCUMENT, args.enqueue_document)
+        queue.enqueue(JobKind.DOSSIER, args.enqueue_dossier)
+
+    processes = [
+        multiprocessing.Process(
+            target=run_worker,
+            args=(args.queue, f"worker-{os.getpid()}-{index}", args.fake, args.drain),
+        )
+        for index in range(args.workers)
+    ]
+    for process in processes:
+        process.start()
+    for process in processes:
+        process.join()
+
+    with _open_queue(Configuration().job_queue, Path(args.queue)) as queue:
+        counts = queue.counts()
+    print(" | ".join(f"{status.value}: {count}" for status, count in counts.items()))
+
+
+if __name__ == "__main__":
+    main()
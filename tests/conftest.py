@@ -0,0 +1,104 @@
+"""Fixtures partagées pour les tests."""
+
+import json
+from collections.abc import Callable
+from datetime import date, timedelta
+from pathlib import Path
+
+import pytest
+
+from chains.configuration import Configuration
+from chains.schemas import (
+    RIB,
+    CarteIdentite,
+    ClassificationDocument,
+    DossierKYC,
+    JustificatifDomicile,
+    ResultatExtractionKYC,
+    Sexe,
+    TypeDocument,
+    TypeJustificatifDomicile,
+)
+
+CONFIG_PATH = Path(__file__).parent.parent / "config" / "config.json"
+
+
+@pytest.fixture
+def make_config(tmp_path: Path) -> Callable[..., Configuration]:
+    """
+    Fabrique de `Configuration` à partir de config/config.json.
+
+    Chaque argument nommé est une section dont les clés remplacent celles du fichier,
+    ex: `make_config(budget={"dossier_usd": None})`.
+    """
+
+    def make(**sections: dict) -> Configuration:
+        config = json.loads(CONFIG_PATH.read_text())
+        for name, overrides in sections.items():
+            config[name] = {**config.get(name, {}), **overrides}
+        config_path = tmp_path / "config.json"
+        config_path.write_text(json.dumps(config))
+        return Configuration(str(config_path))
+
+    return make
+
+
+@pytest.fixture
+def cni() -> CarteIdentite:
+    return CarteIdentite(
+        numero_document="123456789012",
+        nom="MARTIN",
+        prenom="Jean",
+        sexe=Sexe.M,
+        date_naissance=date(1990, 5, 15),
+        lieu_naissance="Paris (75)",
+        date_emission=date(2020, 1, 1),
+        date_expiration=date(2030, 1, 1),
+        nationalite="FRA",
+    )
+
+
+@pytest.fixture
+def justificatif() -> JustificatifDomicile:
+    return JustificatifDomicile(
+        type_document=TypeJustificatifDomicile.UTILITY_BILL,
+        nom_complet="Jean MARTIN",
+        adresse_ligne1="10 rue de la Paix",
+        code_postal="75001",
+        ville="Paris",
+        date_document=date.today() - timedelta(days=30),
+        emetteur="EDF",
+    )
+
+
+@pytest.fixture
+def rib() -> RIB:
+    return RIB(
+        nom_titulaire="MARTIN",
+        iban="FR7610278060740002014820115",
+        bic="BNPAFRPP",
+        nom_banque="BNP Paribas",
+    )
+
+
+@pytest.fixture
+def dossier(cni: CarteIdentite, justificatif: JustificatifDomicile, rib: RIB) -> DossierKYC:
+    dossier = DossierKYC(document_identite=cni, justificatif_domicile=justificatif, rib=rib)
+    dossier.valider_coherence()
+    return dossier
+
+
+@pytest.fixture
+def resultat_cni(cni: CarteIdentite) -> ResultatExtractionKYC:
+    return ResultatExtractionKYC(
+        classification=ClassificationDocument(
+            type_detecte=TypeDocument.CARTE_IDENTITE, confiance=0.97
+        ),
+        extraction_reussie=True,
+        regles_metier_validees=True,
+        carte_identite=cni,
+        fichier_source="client_1/cni.png",
+        empreinte_fichier="a" * 64,
+        tokens={"input_tokens": 1200, "output_tokens": 150, "total_tokens": 1350},
+        durees={"classification": 0.8, "extraction": 1.4},
+    )
@@ -0,0 +1,153 @@
+"""Tests pour le budget de coût et le contrôle d'admission."""
+
+from pathlib import Path
+
+import pytest
+
+from chains.budget import (
+    BudgetDeferredError,
+    BudgetExceededError,
+    BudgetManager,
+    BudgetScope,
+    budget_scope,
+)
+from chains.fake_model import FakeGenerativeModel, fake_document_bytes
+from chains.llm_chain import KYCDocumentChain
+from chains.routing import Stage
+from chains.schemas import TypeDocument
+
+# 1 million de tokens d'entrée par page au tarif de 1 USD : 1 USD par page estimée
+BUDGET = {
+    "daily_global_usd": 10.0,
+    "daily_client_usd": 3.0,
+    "dossier_usd": 2.0,
+    "interactive_reserve": 0.2,
+    "default_input_tokens_per_page": 1_000_000,
+    "default_output_tokens": 0,
+    "history_weight": 0.5,
+}
+
+
+# Tout est routé vers `modele`, sans escalade
+SECTIONS = {
+    "routing": {"classification": {"default": "modele"}, "extraction": {"default": "modele"}},
+    "escalation": {"models": {}},
+    "model_pricing": {"modele": {"input": 1.0, "output": 0.0}},
+}
+
+
+@pytest.fixture
+def image(tmp_path: Path) -> Path:
+    path = tmp_path / "rib.png"
+    path.write_bytes(b"image")
+    return path
+
+
+def _admit(manager: BudgetManager, image: Path, scope: BudgetScope):
+    with budget_scope(scope):
+        return manager.admit(Stage.EXTRACTION, TypeDocument.RIB, "modele", image)
+
+
+class TestBudgetManager:
+    """Tests pour BudgetManager."""
+
+    def test_estimation_par_page_puis_historique(self, make_config, tmp_path, image):
+        """Test que l'estimation suit le nombre de pages, puis la moyenne observée."""
+        # Given
+        manager = BudgetManager(make_config(budget=BUDGET, **SECTIONS))
+        pdf = tmp_path / "releve.pdf"
+        pdf.write_bytes(b"%PDF-1.4 /Type /Pages " + b"/Type /Page " * 3)
+
+        # When
+        initial, pages = manager.estimate(Stage.EXTRACTION, TypeDocument.RIB, "modele", pdf)
+        reservation = manager.admit(Stage.EXTRACTION, TypeDocument.RIB, "modele", image)
+        manager.settle(reservation, 0.5, {"input_tokens": 500_000, "output_tokens": 0})
+        learned, _ = manager.estimate(Stage.EXTRACTION, TypeDocument.RIB, "modele", pdf)
+
+        # Then
+        assert pages == 3
+        assert initial == pytest.approx(3.0)
+        assert learned == pytest.approx(1.5)
+        assert manager.spent_today_usd == pytest.approx(0.5)
+
+    def test_plafond_dossier_refuse(self, make_config, image):
+        """Test qu'un dossier qui dépasse son plafond est refusé, même en travail de fond."""
+        # Given
+        manager = BudgetManager(make_config(budget=BUDGET, **SECTIONS))
+        scope = BudgetScope(client="dupont", dossier="dupont")
+        _admit(manager, image, scope)
+        _admit(manager, image, scope)
+
+        # When / Then
+        with pytest.raises(BudgetExceededError, match="dossier"):
+            _admit(manager, image, scope)
+        assert manager.rejected == 1
+
+    def test_plafond_client_differe_le_travail_de_fond(self, make_config, image):
+        """Test qu'un client au plafond est différé en batch et refusé en interactif."""
+        # Given
+        manager = BudgetManager(make_config(budget={**BUDGET, "dossier_usd": None}, **SECTIONS))
+        for _ in range(3):
+            _admit(manager, image, BudgetScope(client="dupont"))
+
+        # When / Then
+        with pytest.raises(BudgetDeferredError) as deferred:
+            _admit(manager, image, BudgetScope(client="dupont"))
+        assert 0 < deferred.value.retry_after_s <= 86_400
+        with pytest.raises(BudgetExceededError):
+            _admit(manager, image, BudgetScope(client="dupont", interactive=True))
+        _admit(manager, image, BudgetScope(client="martin"))
+
+    def test_reserve_interactive(self, make_config, image):
+        """Test que le travail de fond ne consomme pas la réserve du trafic interactif."""
+        # Given
+        manager = BudgetManager(
+            make_config(
+                budget={**BUDGET, "daily_client_usd": None, "dossier_usd": None}, **SECTIONS
+            )
+        )
+        for _ in range(8):
+            _admit(manager, image, BudgetScope())
+
+        # When / Then
+        with pytest.raises(BudgetDeferredError):
+            _admit(manager, image, BudgetScope())
+        _admit(manager, image, BudgetScope(interactive=True))
+        _admit(manager, image, BudgetScope(interactive=True))
+        with pytest.raises(BudgetExceededError):
+            _admit(manager, image, BudgetScope(interactive=True))
+
+    def test_registre_partage_entre_processus(self, make_config, tmp_path, image, monkeypatch):
+        """Test que deux workers partagent les plafonds, et qu'un redémarrage les garde."""
+        # Given
+        monkeypatch.setenv("VAR_KYC_BUDGET_PATH", str(tmp_path / "budget.db"))
+        config = make_config(budget={**BUDGET, "dossier_usd": None}, **SECTIONS)
+        workers = [BudgetManager(config), BudgetManager(config)]
+        scope = BudgetScope(client="dupont")
+
+        # When
+        _admit(workers[0], image, scope)
+        _admit(workers[1], image, scope)
+        _admit(workers[0], image, scope)
+        restarted = BudgetManager(config)
+
+        # Then
+        with pytest.raises(BudgetDeferredError, match="dupont"):
+            _admit(workers[1], image, scope)
+        assert restarted.spent_today_usd == pytest.approx(3.0)
+
+    def test_chain_refuse_avant_l_appel(self, make_config, tmp_path, monkeypatch):
+        """Test que la chain lève l'erreur de budget sans appeler le modèle."""
+        # Given
+        monkeypatch.setenv("VAR_LLM_MODELE", "modele")
+        doc_path = tmp_path / "rib.png"
+        doc_path.write_bytes(fake_document_bytes(TypeDocument.RIB))
+        model = FakeGenerativeModel()
+        model.generate_content = pytest.fail
+        chain = KYCDocumentChain(
+            make_config(budget={**BUDGET, "dossier_usd": 0.5}, **SECTIONS), model=model
+        )
+
+        # When / Then
+        with budget_scope(BudgetScope(dossier="dupont")), pytest.raises(BudgetExceededError):
+            chain.process_document(doc_path)
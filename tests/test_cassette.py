@@ -0,0 +1,45 @@
+"""Tests pour l'enregistrement et le rejeu des appels au modèle."""
+
+import pytest
+
+from chains.cassette import Cassette, CassetteMissError, CassetteModel
+from chains.fake_model import FakeGenerativeModel, fake_document_bytes
+from chains.llm_chain import KYCDocumentChain
+from chains.schemas import TypeDocument
+
+
+class TestCassette:
+    """Tests pour CassetteModel."""
+
+    def test_enregistrement_puis_rejeu(self, tmp_path):
+        """Test qu'un document enregistré est retraité à l'identique sans le modèle."""
+        # Given
+        doc_path = tmp_path / "rib.png"
+        doc_path.write_bytes(fake_document_bytes(TypeDocument.RIB))
+        cassette_path = tmp_path / "cassette.json"
+        recorder = CassetteModel(
+            Cassette(cassette_path), FakeGenerativeModel(input_tokens=200), model_name="fake"
+        )
+        recorded = KYCDocumentChain(model=recorder).process_document(doc_path)
+        recorder.cassette.save()
+
+        # When
+        cassette = Cassette(cassette_path)
+        replayed = KYCDocumentChain(model=CassetteModel(cassette)).process_document(doc_path)
+
+        # Then
+        assert len(cassette) == 2
+        assert cassette.model_name == "fake"
+        assert replayed.rib == recorded.rib
+        assert replayed.tokens == recorded.tokens
+
+    def test_appel_absent_de_la_cassette(self, tmp_path):
+        """Test qu'un appel non enregistré (prompt ou document modifié) est signalé."""
+        # Given
+        doc_path = tmp_path / "rib.png"
+        doc_path.write_bytes(fake_document_bytes(TypeDocument.RIB))
+        chain = KYCDocumentChain(model=CassetteModel(Cassette(tmp_path / "vide.json")))
+
+        # When / Then
+        with pytest.raises(CassetteMissError, match="réenregistrer"):
+            chain.classify(doc_path)
@@ -0,0 +1,52 @@
+"""Tests pour la sortie JSON compacte des extractions."""
+
+import pytest
+
+from chains.compact_output import compact, compact_keys, expand
+from chains.fake_model import FakeGenerativeModel, fake_document_bytes, sample_payload
+from chains.llm_chain import EXTRACTION_SPECS, KYCDocumentChain
+from chains.schemas import TypeDocument
+
+
+class TestSortieCompacte:
+    """Tests pour l'encodage à clés courtes."""
+
+    @pytest.mark.parametrize("type_document", list(TypeDocument))
+    def test_cles_courtes_uniques(self, type_document):
+        """Test que deux champs d'un même schéma n'ont jamais la même clé courte."""
+        # Given
+        schema, _ = EXTRACTION_SPECS[type_document]
+
+        # When
+        keys = list(compact_keys(schema).values())
+
+        # Then
+        assert len(keys) == len(set(keys))
+
+    @pytest.mark.parametrize("type_document", list(TypeDocument))
+    def test_aller_retour(self, type_document):
+        """Test qu'une extraction compacte redonne le même modèle Pydantic."""
+        # Given
+        schema, _ = EXTRACTION_SPECS[type_document]
+        payload = sample_payload(type_document)
+
+        # When
+        restored = schema(**expand(compact(payload), schema))
+
+        # Then
+        assert restored == schema(**payload)
+
+    def test_chain_en_sortie_compacte(self, tmp_path, monkeypatch):
+        """Test que la chain demande la sortie compacte et la remet sous les noms de champs."""
+        # Given
+        monkeypatch.setenv("VAR_KYC_SORTIE_COMPACTE", "1")
+        doc_path = tmp_path / "rib.png"
+        doc_path.write_bytes(fake_document_bytes(TypeDocument.RIB))
+        chain = KYCDocumentChain(model=FakeGenerativeModel())
+
+        # When
+        result = chain.process_document(doc_path)
+
+        # Then
+        assert result.rib.iban == "FR7610278060740002014820115"
+        assert result.prompts["extraction"] == "extraction.rib@v1+sortie_compacte@v1"
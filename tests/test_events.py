@@ -0,0 +1,77 @@
+"""Tests pour le flux d'événements structurés."""
+
+import json
+import logging
+
+import pytest
+
+from chains.fake_model import FakeGenerativeModel, fake_document_bytes
+from chains.llm_chain import KYCDocumentChain
+from chains.schemas import TypeDocument
+from utils.events import configure_events, emit, flush_events, shutdown_events
+
+
+@pytest.fixture(autouse=True)
+def _shutdown():
+    yield
+    shutdown_events()
+
+
+def _read_events(path) -> list[dict]:
+    return [json.loads(line) for line in path.read_text(encoding="utf-8").splitlines()]
+
+
+class TestEvents:
+    """Tests pour l'émission et le rendu des événements."""
+
+    def test_silencieux_sans_configuration(self, capsys):
+        """Test qu'aucun événement n'est affiché tant que le flux n'est pas configuré."""
+        # When
+        emit("document.fin", fichier="rib.png", type_document="rib")
+
+        # Then
+        assert capsys.readouterr().out == ""
+
+    def test_json_lines_de_la_chain(self, tmp_path):
+        """Test que `process_document` émet ses étapes en JSON lines, dans l'ordre."""
+        # Given
+        events_path = tmp_path / "events.jsonl"
+        configure_events(console=False, json_path=events_path)
+        doc_path = tmp_path / "rib.png"
+        doc_path.write_bytes(fake_document_bytes(TypeDocument.RIB))
+        chain = KYCDocumentChain(model=FakeGenerativeModel())
+
+        # When
+        chain.process_document(doc_path)
+        flush_events()
+
+        # Then
+        events = _read_events(events_path)
+        names = [event["event"] for event in events]
+        assert names[0] == "classification.debut"
+        assert names[-1] == "document.fin"
+        assert names.count("appel.tokens") == 2
+        classification = events[names.index("classification.fin")]
+        assert classification["type_document"] == "rib"
+        assert classification["level"] == "INFO"
+
+    def test_rendu_console_et_mode_silencieux(self, tmp_path, capsys):
+        """Test que le mode silencieux ne garde que les avertissements sur la console."""
+        # Given
+        events_path = tmp_path / "events.jsonl"
+        configure_events(json_path=events_path, quiet=True)
+
+        # When
+        emit("dossier.valide", dossier="dupont")
+        emit("dossier.rejete", logging.WARNING, dossier="dupont", erreurs=["Noms différents"])
+        flush_events()
+
+        # Then
+        out = capsys.readouterr().out
+        assert "VALIDÉ" not in out
+        assert "❌ Dossier KYC REJETÉ" in out
+        assert "  - Noms différents" in out
+        assert [event["event"] for event in _read_events(events_path)] == [
+            "dossier.valide",
+            "dossier.rejete",
+        ]
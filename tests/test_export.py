@@ -0,0 +1,158 @@
+"""Tests pour l'export des résultats en Parquet et JSONL."""
+
+import json
+from datetime import date, datetime, timezone
+
+import pytest
+
+from chains.schemas import DossierKYC, ResultatExtractionKYC
+from storage import ResultStore, result_store
+from storage.export import EXTRACTION_COLUMNS, DatasetWriter, ResultExporter, export_store
+
+ds = pytest.importorskip("pyarrow.dataset")
+
+ENREGISTRE_LE = datetime(2026, 10, 19, 8, 30, tzinfo=timezone.utc)
+
+
+def _read(path):
+    return ds.dataset(path, format="parquet", partitioning="hive").to_table().to_pylist()
+
+
+class TestResultExporter:
+    """Tests pour ResultExporter et export_store."""
+
+    def test_parquet_partitionne(self, tmp_path, resultat_cni: ResultatExtractionKYC, dossier):
+        """Test qu'extractions et dossiers sont relus à plat, typés et partitionnés."""
+        # Given
+        with ResultExporter(tmp_path, row_group_size=2) as exporter:
+            # When
+            for _ in range(5):
+                exporter.write_extraction(resultat_cni, "client_1", ENREGISTRE_LE)
+            exporter.write_dossier(dossier, "client_1", ENREGISTRE_LE)
+
+        # Then
+        partition = tmp_path / "extractions" / "date=2026-10-19" / "type_document=carte_identite"
+        assert len(list(partition.glob("part-*.parquet"))) == 1
+        rows = _read(tmp_path / "extractions")
+        assert len(rows) == 5
+        assert rows[0]["dossier_client"] == "client_1"
+        assert rows[0]["doc_numero_document"] == resultat_cni.carte_identite.numero_document
+        assert rows[0]["doc_date_expiration"] == resultat_cni.carte_identite.date_expiration
+        assert rows[0]["doc_iban"] is None
+        assert rows[0]["escalade_extraction"] is False
+        dossiers = _read(tmp_path / "dossiers")
+        assert dossiers[0]["statut_kyc"] == dossier.statut_kyc
+        assert dossiers[0]["raisons_rejet"] == dossier.raisons_rejet
+
+    def test_ajout_a_un_dataset_existant(self, tmp_path, resultat_cni: ResultatExtractionKYC):
+        """Test qu'un second export ajoute ses fichiers sans réécrire ceux du premier."""
+        # Given
+        with ResultExporter(tmp_path) as exporter:
+            exporter.write_extraction(resultat_cni, enregistre_le=ENREGISTRE_LE)
+        first = sorted((tmp_path / "extractions").rglob("*.parquet"))
+
+        # When
+        with ResultExporter(tmp_path) as exporter:
+            exporter.write_extraction(resultat_cni, enregistre_le=ENREGISTRE_LE)
+
+        # Then
+        files = sorted((tmp_path / "extractions").rglob("*.parquet"))
+        assert len(files) == 2
+        assert set(first) < set(files)
+        assert len(_read(tmp_path / "extractions")) == 2
+
+    def test_jsonl(self, tmp_path, resultat_cni: ResultatExtractionKYC):
+        """Test que l'export JSONL garde toutes les colonnes, dates en ISO."""
+        # Given
+        with ResultExporter(tmp_path, format="jsonl") as exporter:
+            # When
+            exporter.write_extraction(resultat_cni, "client_1", ENREGISTRE_LE)
+
+        # Then
+        (path,) = (tmp_path / "extractions").rglob("*.jsonl")
+        row = json.loads(path.read_text().splitlines()[0])
+        assert list(row) == list(EXTRACTION_COLUMNS)
+        assert row["date"] == "2026-10-19"
+        assert row["type_document"] == "carte_identite"
+        assert row["doc_date_expiration"] == resultat_cni.carte_identite.date_expiration.isoformat()
+
+    def test_tampon_borne(self, tmp_path):
+        """Test que les lignes en tampon ne dépassent jamais la limite, toutes partitions confondues."""
+        # Given
+        writer = DatasetWriter(
+            tmp_path,
+            {"jour": "date", "valeur": "int64"},
+            ("jour",),
+            row_group_size=100,
+            max_buffered_rows=10,
+        )
+
+        # When
+        with writer:
+            for i in range(1_000):
+                writer.write({"jour": date(2026, 10, 1 + i % 20), "valeur": i})
+                assert writer._buffered < 10
+
+        # Then
+        assert writer.rows_written == 1_000
+        assert sum(row["valeur"] for row in _read(tmp_path)) == sum(range(1_000))
+
+    def test_fichiers_ouverts_bornes(self, tmp_path):
+        """Test que des milliers de partitions n'ouvrent qu'un nombre borné de fichiers."""
+        # Given
+        writer = DatasetWriter(
+            tmp_path,
+            {"jour": "date", "client": "string", "valeur": "int64"},
+            ("jour", "client"),
+            row_group_size=2,
+            max_buffered_rows=4,
+            max_open_files=8,
+        )
+
+        # When
+        with writer:
+            for i in range(3_000):
+                writer.write({"jour": date(2026, 10, 1), "client": f"c{i % 1_200}", "valeur": i})
+                assert len(writer._writers) <= 8
+
+        # Then
+        assert len(list(tmp_path.glob("jour=2026-10-01/client=*"))) == 1_200
+        assert sum(row["valeur"] for row in _read(tmp_path)) == sum(range(3_000))
+
+    def test_export_store_incremental(
+        self, tmp_path, resultat_cni: ResultatExtractionKYC, dossier: DossierKYC
+    ):
+        """Test de l'export d'un store, puis des seules lignes enregistrées depuis."""
+        # Given
+        with ResultStore(tmp_path / "results.db") as store:
+            store.append_extractions([resultat_cni] * 3, dossier_client="client_1")
+            store.append_dossier(dossier, dossier_client="client_1")
+            first = export_store(store, tmp_path / "export")
+            store.append_extraction(resultat_cni, dossier_client="client_2")
+
+            # When
+            incremental = export_store(store, tmp_path / "export", depuis_id=first.curseur)
+
+        # Then
+        assert first.lignes == {"extractions": 3, "dossiers": 1}
+        assert incremental.lignes == {"extractions": 1, "dossiers": 0}
+        assert incremental.curseur == {"extractions": 4, "dossiers": 1}
+        assert len(_read(tmp_path / "export" / "extractions")) == 4
+
+    def test_export_incremental_meme_horodatage(
+        self, tmp_path, resultat_cni: ResultatExtractionKYC, monkeypatch
+    ):
+        """Test qu'une ligne enregistrée au même instant que la borne n'est pas perdue."""
+        # Given
+        monkeypatch.setattr(result_store, "_now_iso", lambda: ENREGISTRE_LE.isoformat())
+        with ResultStore(tmp_path / "results.db") as store:
+            store.append_extraction(resultat_cni)
+            first = export_store(store, tmp_path / "export")
+            store.append_extraction(resultat_cni)
+
+            # When
+            incremental = export_store(store, tmp_path / "export", depuis_id=first.curseur)
+
+        # Then
+        assert incremental.lignes["extractions"] == 1
+        assert len(_read(tmp_path / "export" / "extractions")) == 2
@@ -0,0 +1,84 @@
+"""Tests pour le modèle factice des tests de charge."""
+
+import statistics
+from types import SimpleNamespace
+
+import pytest
+
+from chains.fake_model import LATENCY_DISTRIBUTIONS, FakeGenerativeModel, fake_document_bytes
+from chains.schemas import TypeDocument
+
+
+def _samples(model: FakeGenerativeModel, count: int = 20_000) -> list[float]:
+    return [model.sample_latency() for _ in range(count)]
+
+
+class TestFakeGenerativeModel:
+    """Tests pour FakeGenerativeModel."""
+
+    @pytest.mark.parametrize("distribution", LATENCY_DISTRIBUTIONS)
+    def test_latence_moyenne_conservee(self, distribution):
+        """Test que chaque distribution garde la latence moyenne demandée."""
+        # Given
+        model = FakeGenerativeModel(latency_s=0.2, seed=1, latency_distribution=distribution)
+
+        # When
+        samples = _samples(model)
+
+        # Then
+        assert statistics.fmean(samples) == pytest.approx(0.2, rel=0.05)
+        assert min(samples) >= 0
+
+    def test_formes_des_distributions(self):
+        """Test des bornes de l'uniforme et de la queue de la lognormale selon sigma."""
+        # Given
+        constant = FakeGenerativeModel(latency_s=0.2, seed=1, latency_distribution="constant")
+        uniform = FakeGenerativeModel(latency_s=0.2, seed=1, latency_distribution="uniform")
+        narrow = FakeGenerativeModel(
+            latency_s=0.2, seed=1, latency_distribution="lognormal", latency_sigma=0.25
+        )
+        wide = FakeGenerativeModel(
+            latency_s=0.2, seed=1, latency_distribution="lognormal", latency_sigma=1.0
+        )
+
+        # When
+        uniform_samples = _samples(uniform)
+        narrow_p99 = statistics.quantiles(_samples(narrow), n=100)[-1]
+        wide_p99 = statistics.quantiles(_samples(wide), n=100)[-1]
+
+        # Then
+        assert _samples(constant, 3) == [0.2] * 3
+        assert max(uniform_samples) <= 0.4
+        assert narrow_p99 < 0.4 < wide_p99
+
+    def test_variation_des_tokens(self):
+        """Test que les tokens annoncés varient dans la limite de `token_jitter`, reproductibles."""
+        # Given
+        # Même forme qu'une `Part` Vertex AI
+        content = SimpleNamespace(
+            inline_data=SimpleNamespace(data=fake_document_bytes(TypeDocument.RIB))
+        )
+
+        def usages(seed: int) -> list[tuple[int, int]]:
+            model = FakeGenerativeModel(
+                input_tokens=1000, output_tokens=100, token_jitter=0.2, seed=seed
+            )
+            responses = [model.generate_content(["prompt", content]) for _ in range(200)]
+            return [
+                (r.usage_metadata.prompt_token_count, r.usage_metadata.candidates_token_count)
+                for r in responses
+            ]
+
+        # When
+        first, replay = usages(seed=7), usages(seed=7)
+
+        # Then
+        assert first == replay
+        assert all(800 <= i <= 1200 and 80 <= o <= 120 for i, o in first)
+        assert len({i for i, _ in first}) > 50
+
+    def test_distribution_inconnue_rejetee(self):
+        """Test qu'une faute de frappe dans la distribution est détectée."""
+        # When / Then
+        with pytest.raises(ValueError, match="normale"):
+            FakeGenerativeModel(latency_distribution="normale")
@@ -0,0 +1,134 @@
+"""Tests pour les contrôles de format des champs extraits."""
+
+import json
+
+import pytest
+
+from chains.fake_model import FakeGenerativeModel, FakeResponse, fake_document_bytes
+from chains.llm_chain import KYCDocumentChain
+from chains.schemas import TypeDocument
+from chains.schemas.field_checks import check_fields, field_warnings, payload_warnings
+
+
+class BadPostcodeModel(FakeGenerativeModel):
+    """Modèle factice qui lit mal le code postal (toujours, ou seulement à la première lecture)."""
+
+    def __init__(self, always: bool):
+        super().__init__()
+        self.always = always
+
+    def generate_content(self, contents: list, generation_config=None) -> FakeResponse:
+        response = super().generate_content(contents, generation_config)
+        payload = json.loads(response.text)
+        if "code_postal" in payload and (self.always or "REPRISE PARTIELLE" not in contents[0]):
+            payload["code_postal"] = "750"
+        response.text = json.dumps(payload)
+        return response
+
+
+class TestControlesDeFormat:
+    """Tests pour check_fields et payload_warnings."""
+
+    def test_documents_conformes(self, cni, justificatif, rib):
+        """Test qu'aucun avertissement n'est levé sur des documents conformes."""
+        # When / Then
+        assert check_fields(TypeDocument.CARTE_IDENTITE, vars(cni)) == {}
+        assert check_fields(TypeDocument.JUSTIFICATIF_DOMICILE, vars(justificatif)) == {}
+        assert check_fields(TypeDocument.RIB, vars(rib)) == {}
+
+    @pytest.mark.parametrize(
+        "type_document, changes, field",
+        [
+            (TypeDocument.CARTE_IDENTITE, {"numero_document": "1234 5678"}, "numero_document"),
+            (TypeDocument.CARTE_IDENTITE, {"date_expiration": "2019-01-01"}, "date_expiration"),
+            (TypeDocument.PASSEPORT, {"numero_passeport": "24AXB1234"}, "numero_passeport"),
+            (TypeDocument.PERMIS_CONDUIRE, {"numero_permis": "12345678901"}, "numero_permis"),
+            (TypeDocument.JUSTIFICATIF_DOMICILE, {"code_postal": "7501"}, "code_postal"),
+            (TypeDocument.JUSTIFICATIF_DOMICILE, {"date_document": "2999-01-01"}, "date_document"),
+            (TypeDocument.RIB, {"bic": "BNPA"}, "bic"),
+        ],
+    )
+    def test_champ_hors_format(self, type_document, changes, field):
+        """Test que chaque contrôle signale son champ, sur le JSON brut d'une extraction."""
+        # Given
+        data = {
+            "numero_document": "123456789012",
+            "numero_passeport": "24AX12345",
+            "numero_permis": "123456789012",
+            "nationalite": "FRA",
+            "date_naissance": "1990-05-15",
+            "date_emission": "2020-01-01",
+            "date_expiration": "2030-01-01",
+            "code_postal": "75001",
+            "date_document": "2020-01-01",
+            "iban": "FR7610278060740002014820115",
+            "bic": "BNPAFRPP",
+            **changes,
+        }
+
+        # When
+        issues = check_fields(type_document, data)
+
+        # Then
+        assert list(issues) == [field]
+
+    def test_payload_stocke(self, resultat_cni):
+        """Test que le JSON d'un résultat stocké donne les mêmes avertissements que le modèle."""
+        # Given
+        resultat = resultat_cni.model_copy(
+            update={
+                "carte_identite": resultat_cni.carte_identite.model_copy(
+                    update={"numero_document": "12AB"}
+                )
+            }
+        )
+        payload = json.loads(resultat.model_dump_json())
+
+        # When
+        warnings = payload_warnings(payload)
+
+        # Then
+        assert warnings == field_warnings(
+            TypeDocument.CARTE_IDENTITE, vars(resultat.carte_identite)
+        )
+        assert warnings[0].startswith("numero_document:")
+
+
+class TestChainControles:
+    """Tests pour les contrôles de format dans la chain."""
+
+    @pytest.fixture
+    def justificatif_path(self, tmp_path):
+        path = tmp_path / "facture.png"
+        path.write_bytes(fake_document_bytes(TypeDocument.JUSTIFICATIF_DOMICILE))
+        return path
+
+    def test_champ_hors_format_repris(self, justificatif_path):
+        """Test qu'un code postal mal lu est redemandé seul puis corrigé."""
+        # Given
+        chain = KYCDocumentChain(model=BadPostcodeModel(always=False))
+
+        # When
+        result = chain.process_document(justificatif_path)
+
+        # Then
+        assert result.extraction_reussie is True
+        assert result.reprises == 1
+        assert result.justificatif_domicile.code_postal == "75001"
+        assert result.avertissements == []
+
+    def test_champ_toujours_hors_format_signale(self, justificatif_path):
+        """Test qu'un champ encore hors format après reprise est un avertissement, pas un échec."""
+        # Given
+        chain = KYCDocumentChain(model=BadPostcodeModel(always=True))
+
+        # When
+        result = chain.process_document(justificatif_path)
+
+        # Then
+        assert result.extraction_reussie is True
+        assert result.escalades == []
+        assert result.justificatif_domicile.code_postal == "750"
+        assert result.avertissements == [
+            "code_postal: code postal de 5 chiffres attendu (reçu '750')"
+        ]
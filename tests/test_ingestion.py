@@ -0,0 +1,128 @@
+"""Tests pour l'ingestion des documents à mémoire bornée."""
+
+import threading
+import time
+
+import pytest
+
+from utils import ingestion
+from utils.ingestion import DocumentIngestor, DocumentTooLargeError, InFlightBytes
+
+SETTINGS = {
+    "max_in_flight_bytes": 100,
+    "max_file_bytes": 80,
+    "downsample_above_bytes": 50,
+    "max_image_side_px": 2048,
+    "jpeg_quality": 85,
+}
+
+
+class TestIngestion:
+    """Tests pour DocumentIngestor et InFlightBytes."""
+
+    def test_plafond_des_octets_en_vol(self):
+        """Test qu'une réservation au-delà du plafond attend la libération d'une autre."""
+        # Given
+        in_flight = InFlightBytes(100)
+        admitted = threading.Event()
+
+        def second():
+            with in_flight.reserve(60):
+                admitted.set()
+
+        # When
+        with in_flight.reserve(60):
+            thread = threading.Thread(target=second)
+            thread.start()
+            time.sleep(0.05)
+            blocked = not admitted.is_set()
+        thread.join(timeout=1)
+
+        # Then
+        assert blocked
+        assert admitted.is_set()
+        assert in_flight.peak == 60
+        assert in_flight.waits == 1
+        assert in_flight.in_flight == 0
+
+    def test_lecture_et_type_mime(self, tmp_path):
+        """Test que le document est lu avec son type MIME et compté pendant le bloc."""
+        # Given
+        ingestor = DocumentIngestor(SETTINGS)
+        path = tmp_path / "avis.pdf"
+        path.write_bytes(b"%PDF-1.4")
+
+        # When
+        with ingestor.load(path) as document:
+            in_flight = ingestor.in_flight.in_flight
+
+        # Then
+        assert document.data == b"%PDF-1.4"
+        assert document.mime_type == "application/pdf"
+        assert in_flight == 8
+        assert ingestor.in_flight.in_flight == 0
+
+    def test_pdf_trop_volumineux_refuse(self, tmp_path):
+        """Test qu'un PDF au-delà de la taille maximale est refusé sans être lu."""
+        # Given
+        ingestor = DocumentIngestor(SETTINGS)
+        path = tmp_path / "releve.pdf"
+        path.write_bytes(b"x" * 81)
+
+        # When / Then
+        with pytest.raises(DocumentTooLargeError, match="releve.pdf"), ingestor.load(path):
+            pass
+        assert ingestor.in_flight.peak == 0
+
+    def test_image_volumineuse_reduite_depuis_le_fichier(self, tmp_path, monkeypatch):
+        """Test que la réduction lit le fichier elle-même, sauf sans `downsample` (escalade)."""
+        # Given
+        ingestor = DocumentIngestor(SETTINGS)
+        path = tmp_path / "cni.png"
+        path.write_bytes(b"x" * 60)
+        sources = []
+
+        def fake_downsample(source, max_side_px, quality):
+            sources.append(source)
+            return b"jpeg"
+
+        monkeypatch.setattr(ingestion, "downsample_image", fake_downsample)
+
+        # When
+        with ingestor.load(path) as reduced:
+            pass
+        with ingestor.load(path, downsample=False) as original:
+            pass
+
+        # Then
+        assert sources == [path]
+        assert (reduced.data, reduced.mime_type, reduced.downsampled) == (
+            b"jpeg",
+            "image/jpeg",
+            True,
+        )
+        assert (original.data, original.downsampled) == (b"x" * 60, False)
+
+    def test_reduction_reserve_la_taille_decodee(self, tmp_path, monkeypatch):
+        """Test que la réduction réserve le bitmap décodé, l'appel la seule copie réduite."""
+        # Given
+        ingestor = DocumentIngestor(SETTINGS)
+        path = tmp_path / "cni.png"
+        path.write_bytes(b"x" * 60)
+        during_downsample = []
+
+        def fake_downsample(source, max_side_px, quality):
+            during_downsample.append(ingestor.in_flight.in_flight)
+            return b"jpeg"
+
+        monkeypatch.setattr(ingestion, "decoded_size", lambda source: 90)
+        monkeypatch.setattr(ingestion, "downsample_image", fake_downsample)
+
+        # When
+        with ingestor.load(path):
+            during_call = ingestor.in_flight.in_flight
+
+        # Then
+        assert during_downsample == [90]
+        assert during_call == 4
+        assert ingestor.in_flight.in_flight == 0
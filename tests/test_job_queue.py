@@ -0,0 +1,150 @@
+"""Tests pour la file de travaux durable et les workers."""
+
+import sqlite3
+import time
+from contextlib import closing
+
+import worker
+from chains.fake_model import fake_document_bytes
+from chains.schemas import ResultatExtractionKYC, TypeDocument
+from storage import JobKind, JobQueue, JobStatus
+from worker import run_worker
+
+
+class TestJobQueue:
+    """Tests pour JobQueue."""
+
+    def test_lease_puis_complete(self, tmp_path):
+        """Test du cycle nominal location / acquittement."""
+        # Given
+        with JobQueue(tmp_path / "jobs.db") as queue:
+            [job_id] = queue.enqueue(JobKind.DOCUMENT, ["client/rib.png"])
+
+            # When
+            job = queue.lease("worker-1")
+            completed = queue.complete(job.id, "worker-1", '{"ok": true}')
+
+            # Then
+            assert job.id == job_id
+            assert job.attempts == 1
+            assert completed is True
+            assert queue.lease("worker-2") is None
+            assert queue.counts()[JobStatus.DONE] == 1
+
+    def test_bail_expire_relouable(self, tmp_path):
+        """Test qu'un travail dont le worker a disparu redevient disponible."""
+        # Given
+        with JobQueue(tmp_path / "jobs.db", visibility_timeout_s=0.05) as queue:
+            queue.enqueue(JobKind.DOCUMENT, ["client/rib.png"])
+            crashed = queue.lease("worker-1")
+
+            # When
+            time.sleep(0.1)
+            job = queue.lease("worker-2")
+
+            # Then
+            assert job.id == crashed.id
+            assert job.attempts == 2
+            assert queue.complete(crashed.id, "worker-1", "{}") is False
+            assert queue.complete(job.id, "worker-2", "{}") is True
+
+    def test_fail_replanifie_puis_abandonne(self, tmp_path):
+        """Test des tentatives avec backoff puis de l'abandon."""
+        # Given
+        with JobQueue(tmp_path / "jobs.db", max_attempts=2, retry_backoff_s=0.0) as queue:
+            queue.enqueue(JobKind.DOCUMENT, ["client/rib.png"])
+
+            # When
+            queue.fail(queue.lease("w").id, "w", "timeout")
+            retried = queue.lease("w")
+            queue.fail(retried.id, "w", "timeout")
+
+            # Then
+            assert retried.attempts == 2
+            assert queue.lease("w") is None
+            assert queue.counts()[JobStatus.FAILED] == 1
+
+    def test_defer_ne_consomme_pas_de_tentative(self, tmp_path):
+        """Test qu'un travail reporté (budget) garde toutes ses tentatives."""
+        # Given
+        with JobQueue(tmp_path / "jobs.db", max_attempts=1) as queue:
+            queue.enqueue(JobKind.DOCUMENT, ["client/rib.png"])
+            job = queue.lease("w")
+
+            # When
+            deferred = queue.defer(job.id, "w", 0.0, "Budget journalier atteint")
+            retried = queue.lease("w")
+
+            # Then
+            assert deferred is True
+            assert retried.attempts == 1
+
+    def test_lease_exclusif(self, tmp_path):
+        """Test que deux workers ne louent jamais le même travail."""
+        # Given
+        db_path = tmp_path / "jobs.db"
+        with JobQueue(db_path) as queue_1, JobQueue(db_path) as queue_2:
+            queue_1.enqueue(JobKind.DOCUMENT, [f"doc_{i}.png" for i in range(10)])
+
+            # When
+            leased = [queue.lease("w").id for queue in (queue_1, queue_2) * 5]
+
+            # Then
+            assert sorted(leased) == list(range(1, 11))
+
+
+class TestWorker:
+    """Tests pour run_worker."""
+
+    def test_run_worker_draine_la_file(self, tmp_path):
+        """Test qu'un worker traite tous les documents puis s'arrête."""
+        # Given
+        doc_path = tmp_path / "client" / "rib.png"
+        doc_path.parent.mkdir()
+        doc_path.write_bytes(fake_document_bytes(TypeDocument.RIB))
+        with JobQueue(tmp_path / "jobs.db") as queue:
+            [job_id] = queue.enqueue(JobKind.DOCUMENT, [doc_path])
+
+        # When
+        done = run_worker(tmp_path / "jobs.db", "worker-test", fake=True, drain=True)
+
+        # Then
+        assert done == 1
+        with JobQueue(tmp_path / "jobs.db") as queue:
+            result = ResultatExtractionKYC.model_validate_json(queue.result(job_id))
+        assert result.rib.iban_valide is True
+
+    def test_run_worker_survit_a_une_erreur_imprevue(self, tmp_path, monkeypatch):
+        """Test qu'une exception hors des cas prévus échoue le travail sans arrêter le worker."""
+        # Given
+        paths = []
+        for name in ("a", "b"):
+            doc_path = tmp_path / name / "rib.png"
+            doc_path.parent.mkdir()
+            doc_path.write_bytes(fake_document_bytes(TypeDocument.RIB))
+            paths.append(doc_path)
+        with JobQueue(tmp_path / "jobs.db") as queue:
+            broken_id, next_id = queue.enqueue(JobKind.DOCUMENT, paths)
+        run_job = worker._run_job
+
+        def flaky_run_job(pipeline, job):
+            if job.id == broken_id:
+                raise sqlite3.OperationalError("database is locked")
+            return run_job(pipeline, job)
+
+        monkeypatch.setattr(worker, "_run_job", flaky_run_job)
+
+        # When
+        done = run_worker(tmp_path / "jobs.db", "worker-test", fake=True, drain=True)
+
+        # Then
+        assert done == 1
+        with closing(sqlite3.connect(tmp_path / "jobs.db")) as conn:
+            status, error, lease_owner = conn.execute(
+                "SELECT status, error, lease_owner FROM jobs WHERE id = ?", (broken_id,)
+            ).fetchone()
+        assert status == JobStatus.PENDING.value
+        assert error == "OperationalError: database is locked"
+        assert lease_owner is None
+        with JobQueue(tmp_path / "jobs.db") as queue:
+            assert queue.result(next_id) is not None
@@ -0,0 +1,108 @@
+"""Tests pour la lecture tolérante du JSON des réponses du modèle."""
+
+import json
+
+import pytest
+
+from chains.fake_model import FakeGenerativeModel, FakeResponse, fake_document_bytes
+from chains.json_repair import parse_model_json
+from chains.llm_chain import KYCDocumentChain
+from chains.schemas import TypeDocument
+
+RIB_JSON = '{"nom_titulaire": "MARTIN", "iban": "FR7610278060740002014820115", "bic": "BNPAFRPP"}'
+
+
+class TruncatedModel(FakeGenerativeModel):
+    """Modèle factice dont l'extraction complète est coupée au milieu du dernier champ."""
+
+    def generate_content(self, contents: list, generation_config=None) -> FakeResponse:
+        response = super().generate_content(contents, generation_config)
+        if "nom_titulaire" in response.text and "REPRISE PARTIELLE" not in contents[0]:
+            payload = json.loads(response.text)
+            nom_titulaire = payload.pop("nom_titulaire")
+            text = json.dumps({**payload, "nom_titulaire": nom_titulaire})
+            response.text = "```json\n" + text[: text.index('"nom_titulaire"') + 20]
+        return response
+
+
+class TestParseModelJson:
+    """Tests pour parse_model_json."""
+
+    @pytest.mark.parametrize(
+        "text, repairs",
+        [
+            (RIB_JSON, []),
+            (f"```json\n{RIB_JSON}\n```", ["bloc de code retiré"]),
+            (f"Voici l'extraction :\n{RIB_JSON}", ["texte avant le JSON ignoré"]),
+            (f"{RIB_JSON}\nL'IBAN semble valide.", ["texte après le JSON ignoré"]),
+            (f"[{RIB_JSON}]", []),
+            (f"[{RIB_JSON}, {RIB_JSON}]", ["tableau de 2 éléments, premier objet retenu"]),
+        ],
+    )
+    def test_reparations(self, text, repairs):
+        """Test que chaque défaut de forme est réparé et signalé."""
+        # When
+        parsed = parse_model_json(text)
+
+        # Then
+        assert parsed.data == json.loads(RIB_JSON)
+        assert parsed.repairs == repairs
+
+    def test_json_tronque(self):
+        """Test qu'un JSON coupé garde ses champs complets et perd le champ coupé."""
+        # Given
+        text = '```json\n{"nom": "MARTIN", "adresse": {"ville": "Paris"}, "prenom": "Je'
+
+        # When
+        parsed = parse_model_json(text)
+
+        # Then
+        assert parsed.data == {"nom": "MARTIN", "adresse": {"ville": "Paris"}}
+        assert parsed.repairs == [
+            "bloc de code retiré",
+            "JSON tronqué refermé après le dernier champ complet",
+        ]
+
+    @pytest.mark.parametrize(
+        "text, data",
+        [
+            ('{"nom": "MARTIN", "categories": ["B", "C', {"nom": "MARTIN"}),
+            (
+                '{"nom": "MARTIN", "adresse": {"rue": "1 rue de la Paix", "ville": "Pa',
+                {"nom": "MARTIN"},
+            ),
+            ('[{"nom": "MARTIN"}, {"nom": "DUR', {"nom": "MARTIN"}),
+        ],
+    )
+    def test_champ_imbrique_coupe_perdu_en_entier(self, text, data):
+        """Test qu'une liste ou un objet coupé n'est pas gardé réduit à ses premiers éléments."""
+        # When
+        parsed = parse_model_json(text)
+
+        # Then
+        assert parsed.data == data
+
+    @pytest.mark.parametrize("text", ["", "Je ne peux pas lire ce document.", '"RIB"', "[1, 2]"])
+    def test_sans_objet(self, text):
+        """Test qu'une réponse sans objet JSON reste une erreur de décodage."""
+        # When / Then
+        with pytest.raises(json.JSONDecodeError):
+            parse_model_json(text)
+
+    def test_chain_reprend_le_champ_coupe(self, tmp_path):
+        """Test qu'une extraction coupée est complétée par reprise partielle, sans escalade."""
+        # Given
+        doc_path = tmp_path / "rib.png"
+        doc_path.write_bytes(fake_document_bytes(TypeDocument.RIB))
+        chain = KYCDocumentChain(model=TruncatedModel())
+
+        # When
+        result = chain.process_document(doc_path)
+
+        # Then
+        assert result.extraction_reussie is True
+        assert result.escalades == []
+        assert result.reprises == 1
+        assert "JSON tronqué refermé après le dernier champ complet" in result.reparations_json
+        assert result.rib.iban_valide is True
+        assert result.rib.nom_titulaire == "MARTIN"
@@ -0,0 +1,114 @@
+"""Tests pour le manifest de traitement incrémental."""
+
+import os
+
+from chains.schemas import ResultatExtractionKYC
+from storage import FolderManifest
+from utils.files import file_sha256
+
+
+def _resultat_pour(doc_path, resultat: ResultatExtractionKYC) -> ResultatExtractionKYC:
+    return resultat.model_copy(update={"empreinte_fichier": file_sha256(doc_path)})
+
+
+class TestFolderManifest:
+    """Tests pour FolderManifest."""
+
+    def test_lookup_document_inchange(self, tmp_path, resultat_cni: ResultatExtractionKYC):
+        """Test qu'un document inchangé est retrouvé après rechargement du manifest."""
+        # Given
+        doc_path = tmp_path / "cni.png"
+        doc_path.write_bytes(b"contenu cni")
+        manifest = FolderManifest(tmp_path)
+        manifest.record(doc_path, _resultat_pour(doc_path, resultat_cni))
+        manifest.save()
+
+        # When
+        found = FolderManifest(tmp_path).lookup(doc_path)
+
+        # Then
+        assert found is not None
+        assert found.carte_identite == resultat_cni.carte_identite
+
+    def test_lookup_document_modifie(self, tmp_path, resultat_cni: ResultatExtractionKYC):
+        """Test qu'un document dont le contenu a changé doit être retraité."""
+        # Given
+        doc_path = tmp_path / "rib.png"
+        doc_path.write_bytes(b"ancien rib")
+        manifest = FolderManifest(tmp_path)
+        manifest.record(doc_path, _resultat_pour(doc_path, resultat_cni))
+
+        # When
+        doc_path.write_bytes(b"nouveau rib")
+
+        # Then
+        assert manifest.lookup(doc_path) is None
+
+    def test_lookup_document_touche(self, tmp_path, resultat_cni: ResultatExtractionKYC):
+        """Test qu'un document touché mais au contenu identique est réutilisé."""
+        # Given
+        doc_path = tmp_path / "cni.png"
+        doc_path.write_bytes(b"contenu cni")
+        manifest = FolderManifest(tmp_path)
+        manifest.record(doc_path, _resultat_pour(doc_path, resultat_cni))
+
+        # When
+        stat = doc_path.stat()
+        os.utime(doc_path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000_000))
+
+        # Then
+        assert manifest.lookup(doc_path) is not None
+
+    def test_lookup_avertissements_a_reextraire(
+        self, tmp_path, resultat_cni: ResultatExtractionKYC
+    ):
+        """Test qu'un résultat aux champs hors format est réextrait une fois, puis réutilisé."""
+        # Given
+        doc_path = tmp_path / "cni.png"
+        doc_path.write_bytes(b"contenu cni")
+        manifest = FolderManifest(tmp_path)
+        resultat = _resultat_pour(doc_path, resultat_cni)
+        hors_format = resultat.model_copy(update={"avertissements": ["date_expiration: format"]})
+        manifest.record(doc_path, hors_format)
+
+        # When
+        first = manifest.lookup(doc_path)
+        manifest.record(doc_path, hors_format)
+        second = manifest.lookup(doc_path)
+
+        # Then
+        assert first is None
+        assert second == hors_format
+
+    def test_prune_fichiers_supprimes(self, tmp_path, resultat_cni: ResultatExtractionKYC):
+        """Test que les fichiers retirés du dossier sortent du manifest."""
+        # Given
+        doc_path = tmp_path / "cni.png"
+        doc_path.write_bytes(b"contenu cni")
+        manifest = FolderManifest(tmp_path)
+        manifest.record(doc_path, _resultat_pour(doc_path, resultat_cni))
+
+        # When
+        manifest.prune([])
+
+        # Then
+        assert manifest.lookup(doc_path) is None
+
+    def test_classification_document_ecarte(self, tmp_path, resultat_cni: ResultatExtractionKYC):
+        """Test qu'un document écarté ne garde que sa classification, sans résultat."""
+        # Given
+        doc_path = tmp_path / "cni_floue.png"
+        doc_path.write_bytes(b"contenu cni floue")
+        manifest = FolderManifest(tmp_path)
+        manifest.record_classification(doc_path, resultat_cni.classification, "gemini-2.5-flash")
+        manifest.save()
+
+        # When
+        reloaded = FolderManifest(tmp_path)
+
+        # Then
+        assert reloaded.lookup(doc_path) is None
+        assert reloaded.lookup_classification(doc_path) == (
+            resultat_cni.classification,
+            "gemini-2.5-flash",
+        )
@@ -0,0 +1,81 @@
+"""Tests pour le registre des clients de modèle."""
+
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+import vertexai
+from vertexai import generative_models
+
+from chains.model_registry import ClientKey, ModelClientRegistry
+
+
+class StubGenerativeModel:
+    """Modèle sans appel réseau ni recherche de credentials."""
+
+    def __init__(self, model_name: str):
+        self.model_name = model_name
+
+
+@pytest.fixture
+def init_calls(monkeypatch) -> list[dict]:
+    calls = []
+    monkeypatch.setattr(vertexai, "init", lambda **kwargs: calls.append(kwargs))
+    monkeypatch.setattr(generative_models, "GenerativeModel", StubGenerativeModel)
+    return calls
+
+
+def _key(**overrides) -> ClientKey:
+    values = {
+        "project": "projet-test",
+        "location": "europe-west1",
+        "model": "gemini-2.5-flash",
+        "temperature": 0.0,
+        "max_output_tokens": 4096,
+    }
+    return ClientKey(**{**values, **overrides})
+
+
+class TestModelClientRegistry:
+    """Tests pour ModelClientRegistry."""
+
+    def test_get_reutilise_le_client(self, init_calls):
+        """Test qu'une même clé retourne le même client et n'initialise Vertex AI qu'une fois."""
+        # Given
+        registry = ModelClientRegistry()
+
+        # When
+        first = registry.get(_key())
+        second = registry.get(_key())
+        other = registry.get(_key(model="gemini-2.5-pro", temperature=0.2))
+
+        # Then
+        assert first is second
+        assert other is not first
+        assert len(init_calls) == 1
+
+    def test_get_thread_safe(self, init_calls):
+        """Test que des accès concurrents partagent un seul client."""
+        # Given
+        registry = ModelClientRegistry()
+
+        # When
+        with ThreadPoolExecutor(max_workers=16) as executor:
+            clients = list(executor.map(lambda _: registry.get(_key()), range(64)))
+
+        # Then
+        assert all(client is clients[0] for client in clients)
+        assert len(init_calls) == 1
+
+    def test_get_nom_de_ressource_complet(self, init_calls):
+        """Test que le modèle vise le projet et la région de sa clé."""
+        # Given
+        registry = ModelClientRegistry()
+
+        # When
+        client = registry.get(_key(location="us-central1"))
+
+        # Then
+        assert client.model.model_name == (
+            "projects/projet-test/locations/us-central1/publishers/google/models/gemini-2.5-flash"
+        )
+        assert client.generation_config.to_dict()["response_mime_type"] == "application/json"
@@ -0,0 +1,103 @@
+"""Tests pour la couche texte des PDF natifs."""
+
+from pathlib import Path
+
+import pytest
+
+from chains import llm_chain
+from chains.fake_model import FakeGenerativeModel, FakeResponse, fake_document_bytes
+from chains.llm_chain import KYCDocumentChain
+from chains.routing import Stage
+from chains.schemas import TypeDocument
+from utils.pdf import usable_text
+
+TEXTE_RIB = (
+    "KYC-FAKE:rib\nRelevé d'identité bancaire\nTitulaire du compte : M. Jean MARTIN\n"
+    "IBAN : FR76 1027 8060 7400 0201 4820 115\nBIC : BNPAFRPP\n" * 4
+)
+
+
+class UnreadableTextModel(FakeGenerativeModel):
+    """Modèle factice dont la réponse sur la couche texte n'est pas du JSON."""
+
+    def __init__(self):
+        super().__init__()
+        self.calls: list[list] = []
+
+    def generate_content(self, contents: list, generation_config=None) -> FakeResponse:
+        response = super().generate_content(contents, generation_config)
+        self.calls.append(contents)
+        if len(contents) == 1:
+            response.text = "Je ne peux pas lire ce texte."
+        return response
+
+
+@pytest.fixture
+def rib_pdf(tmp_path: Path) -> Path:
+    path = tmp_path / "rib.pdf"
+    path.write_bytes(b"%PDF-1.4\n" + fake_document_bytes(TypeDocument.RIB))
+    return path
+
+
+class TestCoucheTexte:
+    """Tests pour le chemin rapide des PDF natifs."""
+
+    def test_qualite_du_texte(self):
+        """Test qu'un scan sans texte ou un texte mal encodé ne remplace pas l'image."""
+        # When / Then
+        assert usable_text(TEXTE_RIB, min_chars=200, min_alnum_ratio=0.6)
+        assert not usable_text("  RIB \n", min_chars=200, min_alnum_ratio=0.6)
+        assert not usable_text("�" * 300, min_chars=200, min_alnum_ratio=0.6)
+
+    def test_extraction_par_la_couche_texte(self, rib_pdf, monkeypatch):
+        """Test qu'un RIB natif est extrait depuis son texte, avec moins de tokens d'entrée."""
+        # Given
+        chain = KYCDocumentChain(model=FakeGenerativeModel())
+        monkeypatch.setattr(llm_chain, "extract_text", lambda path, max_pages: None)
+        image = chain.process_document(rib_pdf)
+        monkeypatch.setattr(llm_chain, "extract_text", lambda path, max_pages: TEXTE_RIB)
+
+        # When
+        text = chain.process_document(rib_pdf)
+
+        # Then
+        assert not image.couche_texte
+        assert text.couche_texte
+        assert text.rib.iban == image.rib.iban
+        assert text.tokens["input_tokens"] < image.tokens["input_tokens"]
+
+    def test_type_hors_couche_texte(self, tmp_path, monkeypatch):
+        """Test qu'une pièce d'identité en PDF est toujours envoyée en image."""
+        # Given
+        doc_path = tmp_path / "cni.pdf"
+        doc_path.write_bytes(b"%PDF-1.4\n" + fake_document_bytes(TypeDocument.CARTE_IDENTITE))
+        monkeypatch.setattr(llm_chain, "extract_text", lambda path, max_pages: TEXTE_RIB)
+        chain = KYCDocumentChain(model=FakeGenerativeModel())
+
+        # When
+        result = chain.process_document(doc_path)
+
+        # Then
+        assert result.carte_identite is not None
+        assert not result.couche_texte
+
+    def test_couche_texte_invalide_renvoie_le_document(self, rib_pdf, monkeypatch, make_config):
+        """Test qu'une réponse invalide sur le texte est refaite avec le document, même modèle."""
+        # Given
+        monkeypatch.setattr(llm_chain, "extract_text", lambda path, max_pages: TEXTE_RIB)
+        model = UnreadableTextModel()
+        chain = KYCDocumentChain(make_config(escalation={"models": {}}), model=model)
+
+        # When
+        result = chain.process_document(rib_pdf)
+
+        # Then
+        classification, text, document = model.calls
+        assert [len(contents) for contents in (classification, text, document)] == [2, 1, 2]
+        assert result.extraction_reussie is True
+        assert not result.couche_texte
+        assert result.escalades == []
+        assert result.rib.iban == "FR7610278060740002014820115"
+        assert result.modeles["extraction"] == chain.router.route(
+            Stage.EXTRACTION, TypeDocument.RIB
+        )
@@ -0,0 +1,316 @@
+"""Tests pour le pipeline de dossier KYC."""
+
+import asyncio
+import os
+import subprocess
+import sys
+from pathlib import Path
+
+import pytest
+
+import pipeline as pipeline_module
+from chains.fake_model import FAKE_DOCUMENT_MARKER, FakeGenerativeModel, fake_document_bytes
+from chains.llm_chain import KYCDocumentChain, StageResult
+from chains.schemas import (
+    RIB,
+    ClassificationDocument,
+    DossierKYC,
+    JustificatifDomicile,
+    ResultatExtractionKYC,
+    TypeDocument,
+)
+from pipeline import KYCPipeline, TransientDossierError
+from utils.files import file_sha256
+
+
+class StubChain:
+    """Chain de test qui retourne un résultat prédéfini par nom de fichier."""
+
+    def __init__(self, results: dict[str, ResultatExtractionKYC]):
+        self.results = results
+        self.classified: list[str] = []
+        self.calls: list[str] = []
+        self.reuse_key = "prompts-v1"
+
+    def classify(self, image_path: str | Path) -> StageResult:
+        image_path = Path(image_path)
+        self.classified.append(image_path.name)
+        classification = self.results[image_path.name].classification
+        return StageResult(value=classification, token_usage=None, model="stub", cost=0.0)
+
+    def process_document(
+        self, image_path: str | Path, classification_step: StageResult | None = None
+    ) -> ResultatExtractionKYC:
+        image_path = Path(image_path)
+        self.calls.append(image_path.name)
+        return self.results[image_path.name].model_copy(
+            update={"fichier_source": str(image_path), "empreinte_fichier": file_sha256(image_path)}
+        )
+
+
+def _resultat(
+    type_document: TypeDocument, confiance: float = 0.9, **extraction
+) -> ResultatExtractionKYC:
+    return ResultatExtractionKYC(
+        classification=ClassificationDocument(type_detecte=type_document, confiance=confiance),
+        extraction_reussie=True,
+        regles_metier_validees=True,
+        **extraction,
+    )
+
+
+@pytest.fixture
+def dossier_client(tmp_path: Path) -> Path:
+    for name in ("cni.png", "edf.pdf", "rib.png"):
+        (tmp_path / name).write_bytes(f"contenu {name}".encode())
+    (tmp_path / "notes.txt").write_text("ignoré")
+    return tmp_path
+
+
+@pytest.fixture
+def stub_chain(
+    resultat_cni: ResultatExtractionKYC, justificatif: JustificatifDomicile, rib: RIB
+) -> StubChain:
+    return StubChain(
+        {
+            "cni.png": resultat_cni,
+            "edf.pdf": _resultat(
+                TypeDocument.JUSTIFICATIF_DOMICILE, justificatif_domicile=justificatif
+            ),
+            "rib.png": _resultat(TypeDocument.RIB, rib=rib),
+        }
+    )
+
+
+class TestKYCPipeline:
+    """Tests pour KYCPipeline."""
+
+    def test_iter_folder_produit_resultats_puis_dossier(self, dossier_client, stub_chain):
+        """Test que chaque résultat est produit avant le dossier final."""
+        # Given
+        pipeline = KYCPipeline(chain=stub_chain)
+
+        # When
+        items = list(pipeline.iter_folder(dossier_client))
+
+        # Then
+        assert len(items) == 4
+        assert all(isinstance(item, ResultatExtractionKYC) for item in items[:3])
+        assert isinstance(items[-1], DossierKYC)
+        assert items[-1].statut_kyc == "APPROVED"
+
+    def test_aiter_folder_produit_resultats_puis_dossier(self, dossier_client, stub_chain):
+        """Test de la version asynchrone du parcours de dossier."""
+        # Given
+        pipeline = KYCPipeline(chain=stub_chain)
+
+        async def consume() -> list:
+            return [item async for item in pipeline.aiter_folder(dossier_client)]
+
+        # When
+        items = asyncio.run(consume())
+
+        # Then
+        assert len(items) == 4
+        assert isinstance(items[-1], DossierKYC)
+
+    def test_process_folder_incremental(self, dossier_client, stub_chain):
+        """Test qu'un second passage ne retraite que le document remplacé."""
+        # Given
+        pipeline = KYCPipeline(chain=stub_chain)
+        pipeline.process_folder(dossier_client)
+        stub_chain.calls.clear()
+
+        # When
+        (dossier_client / "rib.png").write_bytes(b"nouveau rib")
+        dossier = pipeline.process_folder(dossier_client)
+
+        # Then
+        assert stub_chain.calls == ["rib.png"]
+        assert dossier.rib.iban == "FR7610278060740002014820115"
+
+    def test_process_folder_prompts_changes_reextrait(self, dossier_client, stub_chain):
+        """Test qu'un changement de prompts ou de modèles invalide les résultats du manifest."""
+        # Given
+        pipeline = KYCPipeline(chain=stub_chain)
+        pipeline.process_folder(dossier_client)
+        stub_chain.calls.clear()
+
+        # When
+        stub_chain.reuse_key = "prompts-v2"
+        pipeline.process_folder(dossier_client)
+
+        # Then
+        assert sorted(stub_chain.calls) == ["cni.png", "edf.pdf", "rib.png"]
+
+    def test_process_folder_incomplet(self, dossier_client, stub_chain):
+        """Test qu'un dossier sans RIB est refusé."""
+        # Given
+        (dossier_client / "rib.png").unlink()
+        pipeline = KYCPipeline(chain=stub_chain)
+
+        # When / Then
+        with pytest.raises(ValueError, match="incomplet"):
+            pipeline.process_folder(dossier_client)
+
+    def test_process_folder_incomplet_sans_extraction(self, dossier_client, stub_chain):
+        """Test qu'un dossier incomplet est refusé dès la classification, sans extraction."""
+        # Given
+        (dossier_client / "rib.png").unlink()
+        pipeline = KYCPipeline(chain=stub_chain)
+
+        # When
+        with pytest.raises(ValueError, match="RIB"):
+            pipeline.process_folder(dossier_client)
+
+        # Then
+        assert sorted(stub_chain.classified) == ["cni.png", "edf.pdf"]
+        assert stub_chain.calls == []
+
+    def test_process_folder_echec_extraction_rejouable(self, dossier_client, stub_chain):
+        """Test qu'un document requis en échec d'extraction rend le dossier rejouable."""
+        # Given
+        stub_chain.results["rib.png"] = stub_chain.results["rib.png"].model_copy(
+            update={"extraction_reussie": False, "rib": None, "erreurs_validation": ["503"]}
+        )
+        pipeline = KYCPipeline(chain=stub_chain)
+
+        # When
+        with pytest.raises(TransientDossierError, match="RIB") as excinfo:
+            pipeline.process_folder(dossier_client)
+
+        # Then
+        assert not isinstance(excinfo.value, ValueError)
+        assert "rib.png" in stub_chain.calls
+
+    def test_process_folder_extrait_un_document_par_type(self, dossier_client, stub_chain, rib):
+        """Test que seul le RIB le plus confiant est extrait quand deux RIB sont fournis."""
+        # Given
+        (dossier_client / "rib_flou.png").write_bytes(b"contenu rib flou")
+        stub_chain.results["rib_flou.png"] = _resultat(TypeDocument.RIB, confiance=0.4, rib=rib)
+        pipeline = KYCPipeline(chain=stub_chain)
+
+        # When
+        dossier = pipeline.process_folder(dossier_client, incremental=False)
+
+        # Then
+        assert len(stub_chain.classified) == 4
+        assert sorted(stub_chain.calls) == ["cni.png", "edf.pdf", "rib.png"]
+        assert dossier.statut_kyc == "APPROVED"
+
+    def test_process_folder_repli_sur_le_document_suivant(self, dossier_client, stub_chain, rib):
+        """Test que le RIB suivant est extrait quand l'extraction du meilleur échoue."""
+        # Given
+        (dossier_client / "rib_flou.png").write_bytes(b"contenu rib flou")
+        stub_chain.results["rib_flou.png"] = _resultat(TypeDocument.RIB, confiance=0.4, rib=rib)
+        stub_chain.results["rib.png"] = stub_chain.results["rib.png"].model_copy(
+            update={"extraction_reussie": False, "rib": None}
+        )
+        pipeline = KYCPipeline(chain=stub_chain)
+
+        # When
+        dossier = pipeline.process_folder(dossier_client)
+
+        # Then
+        assert stub_chain.calls[-2:] == ["rib.png", "rib_flou.png"]
+        assert dossier.statut_kyc == "APPROVED"
+
+    def test_process_folder_incomplet_garde_les_classifications(self, dossier_client, stub_chain):
+        """Test qu'un dossier incomplet ne fait pas reclasser ses documents au passage suivant."""
+        # Given
+        (dossier_client / "rib.png").unlink()
+        pipeline = KYCPipeline(chain=stub_chain)
+        with pytest.raises(ValueError, match="RIB"):
+            pipeline.process_folder(dossier_client)
+        stub_chain.classified.clear()
+
+        # When
+        (dossier_client / "rib.png").write_bytes(b"contenu rib.png")
+        dossier = pipeline.process_folder(dossier_client)
+
+        # Then
+        assert stub_chain.classified == ["rib.png"]
+        assert sorted(stub_chain.calls) == ["cni.png", "edf.pdf", "rib.png"]
+        assert dossier.statut_kyc == "APPROVED"
+
+    def test_process_folder_doublon_ecarte_non_reclasse(self, dossier_client, stub_chain, rib):
+        """Test qu'un doublon écarté garde sa classification dans le manifest."""
+        # Given
+        (dossier_client / "rib_flou.png").write_bytes(b"contenu rib flou")
+        stub_chain.results["rib_flou.png"] = _resultat(TypeDocument.RIB, confiance=0.4, rib=rib)
+        pipeline = KYCPipeline(chain=stub_chain)
+        pipeline.process_folder(dossier_client)
+        stub_chain.classified.clear()
+        stub_chain.calls.clear()
+
+        # When
+        dossier = pipeline.process_folder(dossier_client)
+
+        # Then
+        assert stub_chain.classified == []
+        assert stub_chain.calls == []
+        assert dossier.statut_kyc == "APPROVED"
+
+    def test_process_pdf_dossier_decoupe_par_document(self, tmp_path, monkeypatch):
+        """Test qu'un PDF multi-documents est segmenté puis extrait document par document."""
+        # Given : une CNI recto/verso, un justificatif puis un RIB (un marqueur par page)
+        page_types = [
+            TypeDocument.CARTE_IDENTITE,
+            TypeDocument.CARTE_IDENTITE,
+            TypeDocument.JUSTIFICATIF_DOMICILE,
+            TypeDocument.RIB,
+        ]
+        pdf_path = tmp_path / "client_42.pdf"
+        pdf_path.write_bytes(b"".join(fake_document_bytes(t) for t in page_types))
+        extracted_pages = {}
+
+        def fake_extract_pages(source, pages, output):
+            chunks = Path(source).read_bytes().split(FAKE_DOCUMENT_MARKER)[1:]
+            Path(output).write_bytes(
+                b"".join(FAKE_DOCUMENT_MARKER + chunks[page - 1] for page in pages)
+            )
+            extracted_pages[Path(output).stem] = pages
+            return Path(output)
+
+        monkeypatch.setattr(pipeline_module, "extract_pages", fake_extract_pages)
+        pipeline = KYCPipeline(chain=KYCDocumentChain(model=FakeGenerativeModel()))
+        pipeline.store = None
+
+        # When
+        dossier = pipeline.process_pdf_dossier(pdf_path)
+
+        # Then
+        assert extracted_pages == {
+            "carte_identite": [1, 2],
+            "justificatif_domicile": [3],
+            "rib": [4],
+        }
+        assert dossier.dossier_complet
+        assert dossier.document_identite.nom == "MARTIN"
+
+
+class TestStartup:
+    """Tests du démarrage à froid."""
+
+    def test_import_pipeline_sans_sdk_vertex(self):
+        """Test qu'importer le pipeline et construire une chain ne charge pas Vertex AI."""
+        # Given
+        code = (
+            "import sys\n"
+            "from chains.llm_chain import KYCDocumentChain\n"
+            "import pipeline\n"
+            "KYCDocumentChain()\n"
+            "assert 'vertexai' not in sys.modules\n"
+        )
+
+        # When
+        src_dir = Path(__file__).parent.parent / "src"
+        completed = subprocess.run(
+            [sys.executable, "-c", code],
+            capture_output=True,
+            text=True,
+            env={**os.environ, "PYTHONPATH": str(src_dir)},
+        )
+
+        # Then
+        assert completed.returncode == 0, completed.stderr
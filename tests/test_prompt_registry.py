@@ -0,0 +1,55 @@
+"""Tests pour le registre des prompts versionnés."""
+
+import pytest
+
+from chains.fake_model import FakeGenerativeModel, fake_document_bytes
+from chains.llm_chain import KYCDocumentChain
+from chains.prompt_registry import PROMPT_VERSIONS, PromptRegistry, estimate_tokens
+from chains.routing import Stage
+from chains.schemas import TypeDocument
+
+
+class TestPromptRegistry:
+    """Tests pour PromptRegistry."""
+
+    def test_selection_par_etape(self):
+        """Test que la version configurée est servie, et la v1 pour les autres étapes."""
+        # Given
+        registry = PromptRegistry({"extraction.rib": "v2"})
+
+        # When / Then
+        assert registry.get("extraction.rib").label == "extraction.rib@v2"
+        assert registry.get("classification").version == "v1"
+        assert registry.fingerprint() != PromptRegistry().fingerprint()
+
+    def test_version_inconnue_rejetee(self):
+        """Test qu'une version absente du registre est refusée au démarrage."""
+        # When / Then
+        with pytest.raises(ValueError, match="v9"):
+            PromptRegistry({"extraction.rib": "v9"})
+
+    def test_versions_allegees_moins_de_tokens(self):
+        """Test que chaque version allégée coûte moins de tokens que la v1."""
+        # When / Then
+        for versions in PROMPT_VERSIONS.values():
+            for version, text in versions.items():
+                assert estimate_tokens(text) <= estimate_tokens(versions["v1"]), version
+
+    def test_version_enregistree_avec_le_resultat(self, tmp_path, monkeypatch):
+        """Test que la version utilisée est suivie par le résultat et par la route."""
+        # Given
+        monkeypatch.setenv("VAR_KYC_PROMPTS", "extraction.rib=v2")
+        doc_path = tmp_path / "rib.png"
+        doc_path.write_bytes(fake_document_bytes(TypeDocument.RIB))
+        chain = KYCDocumentChain(model=FakeGenerativeModel())
+
+        # When
+        result = chain.process_document(doc_path)
+
+        # Then
+        assert result.prompts == {
+            "classification": "classification@v1",
+            "extraction": "extraction.rib@v2",
+        }
+        routes = {stats.stage: stats.prompt for stats in chain.router.stats()}
+        assert routes[Stage.EXTRACTION] == "extraction.rib@v2"
@@ -0,0 +1,129 @@
+"""Tests pour le rapport d'exploitation."""
+
+import sqlite3
+from contextlib import closing
+from datetime import date, datetime, timezone
+
+import pytest
+
+from chains.schemas import DossierKYC, ResultatExtractionKYC
+from storage import ResultStore
+from storage.export import ResultExporter, export_store
+from storage.report import (
+    DOSSIERS_SQL,
+    EXTRACTIONS_SQL,
+    build_report,
+    load_export,
+    load_store,
+    render_html,
+    render_markdown,
+)
+
+pytest.importorskip("pyarrow")
+
+
+@pytest.fixture
+def store(tmp_path, resultat_cni: ResultatExtractionKYC, dossier: DossierKYC):
+    """Store de 4 extractions (une en échec, une escaladée) et 3 dossiers (2 rejetés)."""
+    escalade = resultat_cni.model_copy(
+        update={"escalades": ["extraction"], "cout_usd": 0.004, "durees": {"extraction": 3.0}}
+    )
+    echec = resultat_cni.model_copy(
+        update={"extraction_reussie": False, "classification": None, "carte_identite": None}
+    )
+    rejete = dossier.model_copy(
+        update={"statut_kyc": "REJECTED", "raisons_rejet": ["IBAN invalide", "Noms discordants"]}
+    )
+    with ResultStore(tmp_path / "results.db") as store:
+        store.append_extractions(
+            [resultat_cni.model_copy(update={"cout_usd": 0.002}), escalade, echec, escalade]
+        )
+        store.append_dossiers(
+            [dossier, rejete, rejete.model_copy(update={"raisons_rejet": ["IBAN invalide"]})]
+        )
+        yield store
+
+
+class TestRapport:
+    """Tests pour load_store, load_export et build_report."""
+
+    def test_store_et_export_concordent(self, tmp_path, store: ResultStore):
+        """Test que le rapport est le même depuis le store et depuis son export Parquet."""
+        # Given
+        export_store(store, tmp_path / "export")
+
+        # When
+        from_store = build_report(load_store(store.db_path))
+        from_export = build_report(load_export(tmp_path / "export"))
+
+        # Then
+        for section, frame in from_store.items():
+            assert frame.to_dict() == from_export[section].to_dict(), section
+
+    def test_agregats(self, store: ResultStore):
+        """Test des taux, du coût moyen par type et des raisons de rejet."""
+        # When
+        report = build_report(load_store(store.db_path))
+
+        # Then
+        synthese = report["Synthèse"].loc["total"]
+        assert synthese["documents"] == 4
+        assert synthese["dossiers_rejetes"] == 2
+        assert synthese["taux_echec_pct"] == 25
+        assert synthese["taux_escalade_extraction_pct"] == 50
+        par_type = report["Par type de document"]
+        assert par_type.loc["carte_identite", "documents"] == 3
+        assert par_type.loc["carte_identite", "cout_moyen_usd"] == pytest.approx(0.010 / 3)
+        assert par_type.loc["inconnu", "taux_echec_pct"] == 100
+        assert report["Latences par type de document (s)"].loc[
+            "carte_identite", "extraction_p50"
+        ] == pytest.approx(3.0)
+        raisons = report["Raisons de rejet"]
+        assert raisons.loc["IBAN invalide", "dossiers"] == 2
+        assert raisons.loc["Noms discordants", "part_pct"] == 50
+
+    def test_store_lu_par_l_index(self, store: ResultStore):
+        """Test que `depuis` sur le store passe par l'index de `enregistre_le`."""
+        # When
+        with closing(sqlite3.connect(store.db_path)) as conn:
+            plans = {
+                sql: str(conn.execute(f"EXPLAIN QUERY PLAN {sql}", ("2026-10-01",)).fetchall())
+                for sql in (EXTRACTIONS_SQL, DOSSIERS_SQL)
+            }
+
+        # Then
+        assert "idx_extractions_enregistre" in plans[EXTRACTIONS_SQL]
+        assert "idx_dossiers_enregistre" in plans[DOSSIERS_SQL]
+        assert "json" not in EXTRACTIONS_SQL
+
+    def test_depuis_elague_les_partitions(self, tmp_path, resultat_cni: ResultatExtractionKYC):
+        """Test que `depuis` écarte les jours antérieurs de l'export."""
+        # Given
+        with ResultExporter(tmp_path) as exporter:
+            for day in (1, 2, 3):
+                enregistre_le = datetime(2026, 10, day, tzinfo=timezone.utc)
+                exporter.write_extraction(resultat_cni, enregistre_le=enregistre_le)
+
+        # When
+        data = load_export(tmp_path, depuis=date(2026, 10, 2))
+
+        # Then
+        assert sorted(data.extractions["date"].unique()) == ["2026-10-02", "2026-10-03"]
+        assert data.dossiers.empty
+
+    def test_rendus(self, store: ResultStore):
+        """Test des rendus Markdown et HTML, y compris des sections vides."""
+        # Given
+        report = build_report(load_store(store.db_path, depuis=date(2999, 1, 1)))
+        report["Raisons de rejet"] = build_report(load_store(store.db_path))["Raisons de rejet"]
+
+        # When
+        markdown = render_markdown(report, "Rapport <test>")
+        page = render_html(report, "Rapport <test>")
+
+        # Then
+        assert markdown.startswith("# Rapport <test>\n")
+        assert "## Synthèse\n\n_Aucune donnée._" in markdown
+        assert "| IBAN invalide | 2 | 100 |" in markdown
+        assert "<title>Rapport &lt;test&gt;</title>" in page
+        assert "IBAN invalide" in page
@@ -0,0 +1,157 @@
+"""Tests pour le store de résultats."""
+
+import re
+import sqlite3
+from contextlib import closing
+from datetime import date
+
+from chains.schemas import DossierKYC, ResultatExtractionKYC, TypeDocument
+from storage import ResultStore
+from storage.result_store import ADDED_COLUMNS, SCHEMA_SQL
+
+
+class TestResultStore:
+    """Tests pour ResultStore."""
+
+    def test_find_extraction_par_empreinte(self, tmp_path, resultat_cni: ResultatExtractionKYC):
+        """Test qu'une extraction est retrouvée par l'empreinte de son fichier."""
+        # Given
+        store = ResultStore(tmp_path / "results.db")
+        store.append_extraction(resultat_cni, dossier_client="client_1")
+
+        # When
+        found = store.find_extraction("a" * 64)
+
+        # Then
+        assert found == resultat_cni
+        assert store.find_extraction("b" * 64) is None
+        store.close()
+
+    def test_find_extraction_par_cle_de_reutilisation(
+        self, tmp_path, resultat_cni: ResultatExtractionKYC
+    ):
+        """Test qu'une extraction faite avec d'autres prompts ou modèles n'est pas réutilisée."""
+        # Given
+        with ResultStore(tmp_path / "results.db") as store:
+            store.append_extraction(resultat_cni, cle_reutilisation="prompts-v1")
+
+            # When
+            same = store.find_extraction("a" * 64, "prompts-v1")
+            other = store.find_extraction("a" * 64, "prompts-v2")
+            without = store.find_extraction("a" * 64)
+
+        # Then
+        assert same == resultat_cni
+        assert other is None
+        assert without is None
+
+    def test_find_extraction_reextrait_une_fois_les_avertissements(
+        self, tmp_path, resultat_cni: ResultatExtractionKYC
+    ):
+        """Test qu'une extraction aux champs hors format est réextraite une fois, puis réutilisée."""
+        # Given
+        hors_format = resultat_cni.model_copy(
+            update={"avertissements": ["numero_document: 9 caractères attendus"]}
+        )
+        with ResultStore(tmp_path / "results.db") as store:
+            store.append_extraction(hors_format, cle_reutilisation="prompts-v1")
+
+            # When
+            first = store.find_extraction("a" * 64, "prompts-v1")
+            store.append_extraction(hors_format, cle_reutilisation="prompts-v1")
+            second = store.find_extraction("a" * 64, "prompts-v1")
+            other_key = store.find_extraction("a" * 64, "prompts-v2")
+
+        # Then
+        assert first is None
+        assert second == hors_format
+        assert other_key is None
+
+    def test_migration_d_un_store_existant(self, tmp_path, resultat_cni: ResultatExtractionKYC):
+        """Test qu'un store créé sans les colonnes récentes les reçoit, remplies depuis le JSON."""
+        # Given
+        db_path = tmp_path / "results.db"
+        escalade = resultat_cni.model_copy(update={"escalades": ["extraction"], "cout_usd": 0.004})
+        old_schema = SCHEMA_SQL
+        for column in ADDED_COLUMNS["extractions"]:
+            old_schema = re.sub(rf"\n    {column} [^\n]*", "", old_schema)
+        with closing(sqlite3.connect(db_path)) as conn, conn:
+            conn.executescript(old_schema)
+            conn.execute(
+                "INSERT INTO extractions (enregistre_le, extraction_reussie, payload) "
+                "VALUES ('2026-10-19T08:30:00+00:00', 1, ?)",
+                (escalade.model_dump_json(),),
+            )
+
+        # When
+        with ResultStore(db_path) as store:
+            store.append_extraction(resultat_cni, cle_reutilisation="prompts-v1")
+            found = store.find_extraction("a" * 64, "prompts-v1")
+        with closing(sqlite3.connect(db_path)) as conn:
+            rows = conn.execute(
+                "SELECT cout_usd, escalade_classification, escalade_extraction "
+                "FROM extractions ORDER BY id"
+            ).fetchall()
+
+        # Then
+        assert found == resultat_cni
+        assert rows == [(0.004, 0, 1), (resultat_cni.cout_usd, 0, 0)]
+
+    def test_find_extraction_ignore_echecs(self, tmp_path, resultat_cni: ResultatExtractionKYC):
+        """Test qu'une extraction en échec n'est pas réutilisée."""
+        # Given
+        echec = resultat_cni.model_copy(
+            update={"extraction_reussie": False, "carte_identite": None}
+        )
+        with ResultStore(tmp_path / "results.db") as store:
+            store.append_extraction(echec)
+
+            # When
+            found = store.find_extraction("a" * 64)
+
+        # Then
+        assert found is None
+
+    def test_append_extractions_en_masse(self, tmp_path, resultat_cni: ResultatExtractionKYC):
+        """Test de l'écriture en masse et des filtres indexés."""
+        # Given
+        with ResultStore(tmp_path / "results.db") as store:
+            # When
+            inserted = store.append_extractions([resultat_cni] * 500, dossier_client="client_1")
+
+            # Then
+            assert inserted == 500
+            assert len(list(store.iter_extractions(dossier_client="client_1"))) == 500
+            assert not list(store.iter_extractions(type_document=TypeDocument.RIB))
+            assert len(list(store.iter_extractions(expire_avant=date(2031, 1, 1)))) == 500
+            assert not list(store.iter_extractions(expire_avant=date(2029, 1, 1)))
+
+    def test_iter_dossiers_par_statut(self, tmp_path, dossier: DossierKYC):
+        """Test du filtrage des dossiers par statut KYC."""
+        # Given
+        with ResultStore(tmp_path / "results.db") as store:
+            store.append_dossier(dossier, dossier_client="client_1")
+
+            # When
+            approuves = list(store.iter_dossiers(statut_kyc="APPROVED"))
+            rejetes = list(store.iter_dossiers(statut_kyc="REJECTED"))
+
+        # Then
+        assert [d.statut_kyc for d in approuves] == ["APPROVED"]
+        assert rejetes == []
+
+    def test_audit_des_champs_hors_format(self, tmp_path, resultat_cni: ResultatExtractionKYC):
+        """Test que l'audit du store liste les seules extractions à réextraire."""
+        # Given
+        cni = resultat_cni.carte_identite.model_copy(update={"numero_document": "12AB"})
+        hors_format = resultat_cni.model_copy(
+            update={"carte_identite": cni, "empreinte_fichier": "b" * 64}
+        )
+        with ResultStore(tmp_path / "results.db") as store:
+            store.append_extractions([resultat_cni, hors_format], dossier_client="client_1")
+
+            # When
+            audit = list(store.iter_field_warnings(dossier_client="client_1"))
+
+        # Then
+        assert [(empreinte, len(warnings)) for empreinte, _, warnings in audit] == [("b" * 64, 1)]
@@ -0,0 +1,318 @@
+"""Tests pour le routage des modèles par étape et type de document."""
+
+import json
+
+import pytest
+
+from chains.configuration import Configuration
+from chains.fake_model import FakeGenerativeModel, FakeResponse, fake_document_bytes
+from chains.llm_chain import KYCDocumentChain
+from chains.routing import ModelRouter, Stage
+from chains.schemas import TypeDocument
+
+PRICING = {
+    "modele-rapide": {"input": 0.10, "output": 0.40},
+    "modele-fort": {"input": 1.25, "output": 10.00},
+}
+NO_CAPS = {"daily_global_usd": None, "daily_client_usd": None, "dossier_usd": None}
+
+
+@pytest.fixture
+def config(make_config) -> Configuration:
+    return make_config(
+        routing={
+            "classification": {"default": "modele-rapide"},
+            "extraction": {"justificatif_domicile": "modele-fort"},
+        },
+        escalation={"models": {}},
+        budget=NO_CAPS,
+        model_pricing=PRICING,
+    )
+
+
+class TestModelRouter:
+    """Tests pour ModelRouter."""
+
+    def test_route_par_etape_et_type(self, config, monkeypatch):
+        """Test de la résolution : type, puis défaut de l'étape, puis modèle global."""
+        # Given
+        monkeypatch.setenv("VAR_LLM_MODELE", "modele-global")
+        router = ModelRouter(config)
+
+        # When / Then
+        assert router.route(Stage.CLASSIFICATION) == "modele-rapide"
+        assert router.route(Stage.EXTRACTION, TypeDocument.JUSTIFICATIF_DOMICILE) == "modele-fort"
+        assert router.route(Stage.EXTRACTION, TypeDocument.RIB) == "modele-global"
+
+    def test_type_inconnu_rejete(self, make_config):
+        """Test qu'une faute de frappe dans la table de routage est détectée."""
+        # Given
+        config = make_config(routing={"extraction": {"justificatif": "modele-fort"}})
+
+        # When / Then
+        with pytest.raises(ValueError, match="justificatif"):
+            ModelRouter(config)
+
+    def test_chain_suit_latence_et_cout_par_route(self, config, tmp_path):
+        """Test que la chain enregistre chaque appel sur sa route, au tarif du modèle."""
+        # Given
+        doc_path = tmp_path / "edf.png"
+        doc_path.write_bytes(fake_document_bytes(TypeDocument.JUSTIFICATIF_DOMICILE))
+        model = FakeGenerativeModel(input_tokens=1_000_000, output_tokens=100_000)
+        chain = KYCDocumentChain(config, model=model)
+
+        # When
+        result = chain.process_document(doc_path)
+
+        # Then
+        assert result.extraction_reussie is True
+        assert result.modeles == {"classification": "modele-rapide", "extraction": "modele-fort"}
+        stats = {(s.stage, s.modele): s for s in chain.router.stats()}
+        assert stats[(Stage.CLASSIFICATION, "modele-rapide")].cout_usd == pytest.approx(0.14)
+        extraction = stats[(Stage.EXTRACTION, "modele-fort")]
+        assert extraction.type_document == TypeDocument.JUSTIFICATIF_DOMICILE
+        assert extraction.appels == 1
+        assert extraction.cout_usd == pytest.approx(2.25)
+
+
+class InvalidOnceModel(FakeGenerativeModel):
+    """Modèle factice dont la première extraction retourne un JSON invalide."""
+
+    def __init__(self):
+        super().__init__()
+        self.extractions = 0
+
+    def generate_content(self, contents: list, generation_config=None) -> FakeResponse:
+        response = super().generate_content(contents, generation_config)
+        if "type_detecte" not in contents[0]:
+            self.extractions += 1
+            if self.extractions == 1:
+                response.text = '{"iban": '
+        return response
+
+
+class InvalidExtractionModel(FakeGenerativeModel):
+    """Modèle factice dont toutes les extractions retournent un JSON invalide."""
+
+    def generate_content(self, contents: list, generation_config=None) -> FakeResponse:
+        response = super().generate_content(contents, generation_config)
+        if "type_detecte" not in contents[0]:
+            response.text = '{"iban": '
+        return response
+
+
+@pytest.fixture
+def escalation_config(make_config) -> Configuration:
+    return make_config(
+        routing={
+            "classification": {"default": "modele-rapide"},
+            "extraction": {"default": "modele-rapide"},
+        },
+        escalation={"models": {"classification": "modele-fort", "extraction": "modele-fort"}},
+        budget=NO_CAPS,
+        model_pricing=PRICING,
+    )
+
+
+class TestEscalade:
+    """Tests pour la politique d'escalade de la chain."""
+
+    def test_chemin_rapide_sans_escalade(self, escalation_config, tmp_path):
+        """Test qu'un document facile ne paie jamais le modèle fort."""
+        # Given
+        doc_path = tmp_path / "rib.png"
+        doc_path.write_bytes(fake_document_bytes(TypeDocument.RIB))
+        chain = KYCDocumentChain(escalation_config, model=FakeGenerativeModel(confidence=0.95))
+
+        # When
+        result = chain.process_document(doc_path)
+
+        # Then
+        assert result.escalades == []
+        assert set(result.modeles.values()) == {"modele-rapide"}
+        assert all(stats.taux == 0.0 for stats in chain.router.escalation_stats())
+
+    def test_confiance_basse_escalade_la_classification(self, escalation_config, tmp_path):
+        """Test qu'une classification peu confiante est refaite avec le modèle fort."""
+        # Given
+        doc_path = tmp_path / "rib.png"
+        doc_path.write_bytes(fake_document_bytes(TypeDocument.RIB))
+        model = FakeGenerativeModel(confidence=0.5, input_tokens=100, output_tokens=10)
+        chain = KYCDocumentChain(escalation_config, model=model)
+
+        # When
+        result = chain.process_document(doc_path)
+
+        # Then
+        assert result.escalades == ["classification"]
+        assert result.modeles == {"classification": "modele-fort", "extraction": "modele-rapide"}
+        assert result.tokens["input_tokens"] == 300
+        taux = {stats.stage: stats.taux for stats in chain.router.escalation_stats()}
+        assert taux == {Stage.CLASSIFICATION: 1.0, Stage.EXTRACTION: 0.0}
+
+    def test_reponse_invalide_escalade_l_extraction(self, escalation_config, tmp_path):
+        """Test qu'une extraction invalide est refaite avec le modèle fort au lieu d'échouer."""
+        # Given
+        doc_path = tmp_path / "rib.png"
+        doc_path.write_bytes(fake_document_bytes(TypeDocument.RIB))
+        chain = KYCDocumentChain(escalation_config, model=InvalidOnceModel())
+
+        # When
+        result = chain.process_document(doc_path)
+
+        # Then
+        assert result.extraction_reussie is True
+        assert result.escalades == ["extraction"]
+        assert result.rib.iban_valide is True
+
+    def test_echec_compte_toutes_les_tentatives(self, escalation_config, tmp_path):
+        """Test qu'un document en échec porte le coût de ses tentatives rejetées et escaladées."""
+        # Given
+        doc_path = tmp_path / "rib.png"
+        doc_path.write_bytes(fake_document_bytes(TypeDocument.RIB))
+        model = InvalidExtractionModel(input_tokens=1_000_000, output_tokens=100_000)
+        chain = KYCDocumentChain(escalation_config, model=model)
+
+        # When
+        result = chain.process_document(doc_path)
+
+        # Then
+        assert result.extraction_reussie is False
+        # Classification et extraction rapides (0,14 chacune), extraction forte (2,25)
+        assert result.cout_usd == pytest.approx(2.53)
+        assert result.tokens["input_tokens"] == 3_000_000
+
+    def test_escalade_en_pleine_resolution(self, escalation_config, tmp_path, monkeypatch):
+        """Test que le modèle fort reçoit le document sans réduction d'image."""
+        # Given
+        doc_path = tmp_path / "rib.png"
+        doc_path.write_bytes(fake_document_bytes(TypeDocument.RIB))
+        chain = KYCDocumentChain(escalation_config, model=FakeGenerativeModel(confidence=0.5))
+        load = chain.ingestor.load
+        downsample_flags = []
+
+        def spy(path, downsample=True):
+            downsample_flags.append(downsample)
+            return load(path, downsample)
+
+        monkeypatch.setattr(chain.ingestor, "load", spy)
+
+        # When
+        result = chain.process_document(doc_path)
+
+        # Then
+        assert result.escalades == ["classification"]
+        assert downsample_flags == [True, False, True]
+
+
+class MissingFieldModel(FakeGenerativeModel):
+    """Modèle factice dont l'extraction complète omet la date d'expiration."""
+
+    def __init__(self):
+        super().__init__()
+        self.prompts: list[str] = []
+
+    def generate_content(self, contents: list, generation_config=None) -> FakeResponse:
+        response = super().generate_content(contents, generation_config)
+        self.prompts.append(contents[0])
+        payload = json.loads(response.text)
+        if "REPRISE PARTIELLE" not in contents[0]:
+            payload.pop("date_expiration", None)
+        response.text = json.dumps(payload)
+        return response
+
+
+class InvalidThenMissingFieldModel(MissingFieldModel):
+    """Modèle factice dont la première extraction est invalide, les suivantes incomplètes."""
+
+    def __init__(self):
+        super().__init__()
+        self.extractions = 0
+
+    def generate_content(self, contents: list, generation_config=None) -> FakeResponse:
+        response = super().generate_content(contents, generation_config)
+        if "type_detecte" not in contents[0]:
+            self.extractions += 1
+            if self.extractions == 1:
+                response.text = '{"numero_document": '
+        return response
+
+
+class TestReprisePartielle:
+    """Tests pour la reprise des seuls champs rejetés par le schéma."""
+
+    def test_champ_manquant_repris_sans_escalade(self, escalation_config, tmp_path):
+        """Test qu'un champ manquant est redemandé seul, les autres champs étant conservés."""
+        # Given
+        doc_path = tmp_path / "cni.png"
+        doc_path.write_bytes(fake_document_bytes(TypeDocument.CARTE_IDENTITE))
+        model = MissingFieldModel()
+        chain = KYCDocumentChain(escalation_config, model=model)
+
+        # When
+        result = chain.process_document(doc_path)
+
+        # Then
+        assert result.extraction_reussie is True
+        assert result.reprises == 1
+        assert result.escalades == []
+        assert result.carte_identite.date_expiration is not None
+        assert result.prompts["extraction"] == ("extraction.carte_identite@v1+reprise_partielle@v1")
+        reprise = model.prompts[-1]
+        assert "- date_expiration:" in reprise
+        assert "- numero_document:" not in reprise
+
+    def test_tentative_escaladee_reprise(self, escalation_config, tmp_path, monkeypatch):
+        """Test qu'un champ manquant dans la réponse du modèle fort est repris, pas perdu."""
+        # Given
+        doc_path = tmp_path / "cni.png"
+        doc_path.write_bytes(fake_document_bytes(TypeDocument.CARTE_IDENTITE))
+        model = InvalidThenMissingFieldModel()
+        chain = KYCDocumentChain(escalation_config, model=model)
+        load = chain.ingestor.load
+        downsample_flags = []
+
+        def spy(path, downsample=True):
+            downsample_flags.append(downsample)
+            return load(path, downsample)
+
+        monkeypatch.setattr(chain.ingestor, "load", spy)
+
+        # When
+        result = chain.process_document(doc_path)
+
+        # Then
+        assert result.extraction_reussie is True
+        assert result.escalades == ["extraction"]
+        assert result.modeles["extraction"] == "modele-fort"
+        assert result.reprises == 1
+        assert result.carte_identite.date_expiration is not None
+        assert "REPRISE PARTIELLE" in model.prompts[-1]
+        # La reprise de la tentative escaladée garde la pleine résolution
+        assert downsample_flags == [True, True, False, False]
+
+    def test_reprise_desactivee_escalade(self, make_config, tmp_path):
+        """Test qu'avec max_rounds à 0 l'extraction entière est refaite par escalade."""
+        # Given
+        config = make_config(
+            routing={
+                "classification": {"default": "modele-rapide"},
+                "extraction": {"default": "modele-rapide"},
+            },
+            escalation={"models": {"extraction": "modele-fort"}},
+            partial_extraction={"max_rounds": 0},
+            budget=NO_CAPS,
+            model_pricing=PRICING,
+        )
+        doc_path = tmp_path / "cni.png"
+        doc_path.write_bytes(fake_document_bytes(TypeDocument.CARTE_IDENTITE))
+        model = MissingFieldModel()
+        chain = KYCDocumentChain(config, model=model)
+
+        # When
+        result = chain.process_document(doc_path)
+
+        # Then
+        assert result.extraction_reussie is False
+        assert result.reprises == 0
+        assert not any("REPRISE PARTIELLE" in prompt for prompt in model.prompts)
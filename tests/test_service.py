@@ -0,0 +1,270 @@
+"""Tests pour le service HTTP KYC (backend factice)."""
+
+import asyncio
+import base64
+import json
+
+import pytest
+
+from chains.configuration import Configuration
+from chains.fake_model import FakeGenerativeModel, fake_document_bytes
+from chains.llm_chain import KYCDocumentChain
+from chains.schemas import TypeDocument
+from pipeline import KYCPipeline
+from service import KYCService
+from storage import ResultStore
+
+
+def _service(
+    latency_s: float = 0.0,
+    queue_size: int = 8,
+    workers: int = 2,
+    store: ResultStore | None = None,
+) -> KYCService:
+    config = Configuration()
+    chain = KYCDocumentChain(config, model=FakeGenerativeModel(latency_s=latency_s))
+    return KYCService(
+        chain=chain,
+        pipeline=KYCPipeline(config, store=store, chain=chain),
+        queue_size=queue_size,
+        workers=workers,
+        deadline_s=5,
+        max_body_bytes=1024 * 1024,
+    )
+
+
+async def _request(
+    port: int, method: str, target: str, body: bytes = b"", headers: dict | None = None
+) -> tuple[int, bytes]:
+    headers = {"Host": "test", "Content-Length": str(len(body)), **(headers or {})}
+    head = "".join(f"{name}: {value}\r\n" for name, value in headers.items())
+    reader, writer = await asyncio.open_connection("127.0.0.1", port)
+    writer.write(f"{method} {target} HTTP/1.1\r\n{head}\r\n".encode() + body)
+    await writer.drain()
+    response = await reader.read()
+    writer.close()
+    head, _, payload = response.partition(b"\r\n\r\n")
+    return int(head.split(b" ")[1]), payload
+
+
+async def _with_server(service: KYCService, scenario):
+    server = await service.start("127.0.0.1", 0)
+    port = server.sockets[0].getsockname()[1]
+    async with server:
+        return await scenario(port)
+
+
+class TestKYCService:
+    """Tests pour KYCService."""
+
+    def test_health_et_ready(self):
+        """Test des endpoints de santé."""
+        # Given
+        service = _service()
+
+        async def scenario(port: int):
+            return await _request(port, "GET", "/health"), await _request(port, "GET", "/ready")
+
+        # When
+        (health_status, _), (ready_status, ready_body) = asyncio.run(
+            _with_server(service, scenario)
+        )
+
+        # Then
+        assert health_status == 200
+        assert ready_status == 200
+        assert json.loads(ready_body) == {"ready": True}
+
+    def test_post_document(self):
+        """Test du traitement d'un document envoyé au service."""
+        # Given
+        service = _service()
+        body = fake_document_bytes(TypeDocument.RIB)
+
+        # When
+        status, payload = asyncio.run(
+            _with_server(
+                service, lambda port: _request(port, "POST", "/documents?filename=rib.png", body)
+            )
+        )
+
+        # Then
+        result = json.loads(payload)
+        assert status == 200
+        assert result["extraction_reussie"] is True
+        assert result["rib"]["iban_valide"] is True
+
+    def test_post_document_stocke_puis_reutilise(self, tmp_path):
+        """Test qu'un document envoyé passe par le pipeline : stocké, puis réutilisé."""
+        # Given
+        store = ResultStore(tmp_path / "results.db")
+        service = _service(store=store)
+        body = fake_document_bytes(TypeDocument.RIB)
+
+        async def scenario(port: int):
+            target = "/documents?filename=rib.png"
+            headers = {"X-Client-Id": "dupont"}
+            first = await _request(port, "POST", target, body, headers)
+            calls = service.chain.router.stats()
+            return first, sum(s.appels for s in calls), await _request(port, "POST", target, body)
+
+        # When
+        (first_status, _), calls, (second_status, _) = asyncio.run(_with_server(service, scenario))
+
+        # Then
+        assert first_status == second_status == 200
+        assert sum(s.appels for s in service.chain.router.stats()) == calls
+        assert [r.rib.iban_valide for r in store.iter_extractions(dossier_client="dupont")] == [
+            True
+        ]
+        store.close()
+
+    @pytest.mark.parametrize("filename", ["", ".", "..", "dossier/.."])
+    def test_nom_de_fichier_invalide_retourne_400(self, filename):
+        """Test qu'un nom qui ne désigne pas un fichier est refusé, document ou dossier."""
+        # Given
+        service = _service()
+        content = fake_document_bytes(TypeDocument.RIB)
+        dossier = {
+            "documents": [
+                {"filename": filename, "content_base64": base64.b64encode(content).decode()}
+            ]
+        }
+
+        async def scenario(port: int):
+            return (
+                await _request(port, "POST", f"/documents?filename={filename}", content),
+                await _request(port, "POST", "/dossiers", json.dumps(dossier).encode()),
+            )
+
+        # When
+        (document_status, payload), (dossier_status, _) = asyncio.run(
+            _with_server(service, scenario)
+        )
+
+        # Then
+        assert document_status == dossier_status == 400
+        assert "Nom de fichier invalide" in json.loads(payload)["erreur"]
+
+    def test_dossier_noms_en_double_retourne_400(self):
+        """Test que deux documents de même nom dans un dossier sont refusés, pas écrasés."""
+        # Given
+        service = _service()
+        documents = [
+            {
+                "filename": f"{folder}/rib.png",
+                "content_base64": base64.b64encode(fake_document_bytes(TypeDocument.RIB)).decode(),
+            }
+            for folder in ("a", "b")
+        ]
+        body = json.dumps({"documents": documents}).encode()
+
+        # When
+        status, payload = asyncio.run(
+            _with_server(service, lambda port: _request(port, "POST", "/dossiers", body))
+        )
+
+        # Then
+        assert status == 400
+        assert json.loads(payload) == {"erreur": "Noms de fichiers en double: rib.png"}
+
+    def test_post_dossier(self):
+        """Test de la soumission d'un dossier complet."""
+        # Given
+        service = _service()
+        documents = [
+            {
+                "filename": f"{type_document.value}.png",
+                "content_base64": base64.b64encode(fake_document_bytes(type_document)).decode(),
+            }
+            for type_document in (
+                TypeDocument.CARTE_IDENTITE,
+                TypeDocument.JUSTIFICATIF_DOMICILE,
+                TypeDocument.RIB,
+            )
+        ]
+        body = json.dumps({"documents": documents}).encode()
+
+        # When
+        status, payload = asyncio.run(
+            _with_server(service, lambda port: _request(port, "POST", "/dossiers", body))
+        )
+
+        # Then
+        assert status == 200
+        assert json.loads(payload)["statut_kyc"] == "APPROVED"
+
+    def test_saturation_retourne_429(self):
+        """Test de la contre-pression quand la file est pleine."""
+        # Given
+        service = _service(latency_s=0.2, queue_size=1, workers=1)
+        body = fake_document_bytes(TypeDocument.RIB)
+
+        async def scenario(port: int):
+            requests = [
+                _request(port, "POST", "/documents?filename=rib.png", body) for _ in range(4)
+            ]
+            statuses = [status for status, _ in await asyncio.gather(*requests)]
+            _, metrics = await _request(port, "GET", "/metrics")
+            return statuses, metrics.decode()
+
+        # When
+        statuses, metrics = asyncio.run(_with_server(service, scenario))
+
+        # Then
+        assert 429 in statuses
+        assert 200 in statuses
+        assert "kyc_rejected_total" in metrics
+
+    @pytest.mark.parametrize(
+        "headers",
+        [
+            {"X-Request-Timeout": "bientôt"},
+            {"X-Request-Timeout": "-1"},
+            {"X-Request-Timeout": "nan"},
+            {"Content-Length": "beaucoup"},
+            {"Content-Length": "-5"},
+        ],
+    )
+    def test_en_tete_invalide_retourne_400(self, headers):
+        """Test qu'un en-tête numérique invalide donne un 400, pas une connexion coupée."""
+        # Given
+        service = _service()
+        body = fake_document_bytes(TypeDocument.RIB)
+
+        async def scenario(port: int):
+            response = await _request(port, "POST", "/documents?filename=rib.png", body, headers)
+            return response, await _request(port, "GET", "/health")
+
+        # When
+        (status, payload), (health_status, _) = asyncio.run(_with_server(service, scenario))
+
+        # Then
+        assert status == 400
+        assert "invalide" in json.loads(payload)["erreur"]
+        assert health_status == 200
+
+    def test_deadline_depassee_retourne_504(self):
+        """Test qu'un travail plus long que la deadline du client donne un 504."""
+        # Given
+        service = _service(latency_s=0.3, workers=1)
+        body = fake_document_bytes(TypeDocument.RIB)
+
+        async def scenario(port: int):
+            response = await _request(
+                port,
+                "POST",
+                "/documents?filename=rib.png",
+                body,
+                {"X-Request-Timeout": "0.05"},
+            )
+            _, metrics = await _request(port, "GET", "/metrics")
+            return response, metrics.decode()
+
+        # When
+        (status, payload), metrics = asyncio.run(_with_server(service, scenario))
+
+        # Then
+        assert status == 504
+        assert json.loads(payload) == {"erreur": "Deadline dépassée"}
+        assert "kyc_deadline_exceeded_total 1" in metrics
@@ -0,0 +1,68 @@
+"""Tests pour les spans de tracing."""
+
+import json
+
+import pytest
+
+from chains.fake_model import FakeGenerativeModel, fake_document_bytes
+from chains.llm_chain import KYCDocumentChain
+from chains.schemas import TypeDocument
+from utils.tracing import get_tracer, span
+
+
+@pytest.fixture
+def tracer():
+    tracer = get_tracer()
+    yield tracer
+    tracer.reset()
+
+
+class TestTracing:
+    """Tests pour le tracer du processus."""
+
+    def test_desactive_par_defaut(self, tracer):
+        """Test qu'aucun span n'est mesuré tant que le tracing est désactivé."""
+        # When
+        with span("etape") as current:
+            pass
+
+        # Then
+        assert current is None
+        assert tracer.spans() == []
+
+    def test_spans_de_la_chain(self, tracer, tmp_path):
+        """Test que chaque étape de `process_document` produit un span."""
+        # Given
+        tracer.start_recording()
+        doc_path = tmp_path / "rib.png"
+        doc_path.write_bytes(fake_document_bytes(TypeDocument.RIB))
+        chain = KYCDocumentChain(model=FakeGenerativeModel())
+
+        # When
+        chain.process_document(doc_path)
+
+        # Then
+        names = [s.name for s in tracer.spans()]
+        for name in ("lecture_fichier", "encodage", "appel_modele", "parse_json", "validation"):
+            assert names.count(name) == 2
+        assert names[-1] == "document"
+        assert {"classification", "extraction"} <= set(names)
+
+    def test_export_chrome_trace_et_callbacks(self, tracer, tmp_path):
+        """Test de l'export Chrome Trace Event et des callbacks."""
+        # Given
+        received = []
+        tracer.add_listener(received.append)
+        tracer.start_recording()
+
+        # When
+        with pytest.raises(KeyError), span("etape", type_document="rib"):
+            raise KeyError("boom")
+        count = tracer.export_chrome_trace(tmp_path / "trace.json")
+
+        # Then
+        [event] = json.loads((tmp_path / "trace.json").read_text())["traceEvents"]
+        assert count == 1
+        assert event["ph"] == "X"
+        assert event["args"] == {"type_document": "rib", "erreur": "KeyError"}
+        assert received[0].name == "etape"